@@ -0,0 +1,129 @@
+/**
+ * Benchmark results and their comparison with a stored baseline
+ */
+
+import * as fs from 'fs';
+import * as path from 'path';
+
+export const DEFAULT_RESULTS_FILE = path.join('node_modules', '.cache', 'bench', 'results.json');
+export const DEFAULT_BASELINE_FILE = 'bench-baseline.json';
+export const DEFAULT_REGRESSION_THRESHOLD = 0.2;
+
+/**
+ * Speed of a single benchmark
+ */
+export interface BenchmarkSummary {
+    hz: number;         // operations per second
+    p95: number;        // 95th percentile of the duration of an operation, in milliseconds
+    samples: number;
+}
+
+export interface BenchmarkResults {
+    createdAt: string;
+    benchmarks: Record<string, BenchmarkSummary>;   // by file, suite and benchmark name
+}
+
+export interface BenchmarkComparison {
+    name: string;
+    baseline?: BenchmarkSummary;
+    current?: BenchmarkSummary;
+    hzChange: number;       // relative change of operations per second, negative when slower
+    p95Change: number;      // relative change of the 95th percentile, positive when slower
+    regressed: boolean;
+}
+
+/**
+ * Get a percentile of sorted values, using the nearest-rank method
+ * @param sorted - Values in ascending order
+ * @param percentile - Percentile between 0 and 100
+ * @returns The percentile value, or 0 if there are no values
+ */
+export function getPercentile(sorted: number[], percentile: number): number {
+    if (sorted.length === 0) return 0;
+    const rank = Math.ceil(percentile / 100 * sorted.length);
+    return sorted[Math.min(sorted.length, Math.max(1, rank)) - 1];
+}
+
+/**
+ * Summarize the durations of the operations of a benchmark
+ * @param samples - Duration of each operation, in milliseconds
+ * @returns The benchmark summary
+ */
+export function summarizeSamples(samples: number[]): BenchmarkSummary {
+    const sorted = [...samples].sort((a, b) => a - b);
+    const mean = sorted.reduce((sum, sample) => sum + sample, 0) / (sorted.length || 1);
+    return {
+        hz: mean > 0 ? 1000 / mean : 0,
+        p95: getPercentile(sorted, 95),
+        samples: sorted.length
+    };
+}
+
+/**
+ * Compare benchmark results with a baseline
+ *
+ * A benchmark regressed when its operations per second dropped, or its 95th percentile grew, by
+ * more than the threshold. Benchmarks missing from either side are reported but never regress.
+ *
+ * @param current - The new results
+ * @param baseline - The baseline results
+ * @param threshold - Allowed relative slowdown, e.g. 0.2 for 20%
+ * @returns One comparison per benchmark, in the order of the baseline and then of new benchmarks
+ */
+export function compareWithBaseline(current: BenchmarkResults, baseline: BenchmarkResults, threshold: number): BenchmarkComparison[] {
+    const names = [...new Set([...Object.keys(baseline.benchmarks), ...Object.keys(current.benchmarks)])];
+    return names.map(name => {
+        const before = baseline.benchmarks[name];
+        const after = current.benchmarks[name];
+        if (!before || !after) {
+            return {name, baseline: before, current: after, hzChange: 0, p95Change: 0, regressed: false};
+        }
+        const hzChange = before.hz > 0 ? after.hz / before.hz - 1 : 0;
+        const p95Change = before.p95 > 0 ? after.p95 / before.p95 - 1 : 0;
+        return {
+            name,
+            baseline: before,
+            current: after,
+            hzChange,
+            p95Change,
+            regressed: hzChange < -threshold || p95Change > threshold
+        };
+    });
+}
+
+const formatPercent = (change: number): string => `${change >= 0 ? '+' : ''}${(change * 100).toFixed(1)}%`;
+
+/**
+ * Format comparisons as lines of text, one per benchmark
+ * @param comparisons - The comparisons
+ * @returns The report
+ */
+export function formatComparisons(comparisons: BenchmarkComparison[]): string {
+    return comparisons.map(({name, baseline, current, hzChange, p95Change, regressed}) => {
+        if (!current) return `  missing  ${name}`;
+        const speed = `${current.hz.toFixed(1)} ops/s, p95 ${current.p95.toFixed(3)} ms`;
+        if (!baseline) return `  new      ${name}: ${speed}`;
+        return `${regressed ? 'REGRESSED' : '  ok     '} ${name}: ${speed} ` +
+            `(ops/s ${formatPercent(hzChange)}, p95 ${formatPercent(p95Change)})`;
+    }).join('\n');
+}
+
+/**
+ * Read benchmark results from a JSON file
+ * @param file - The file
+ * @returns The results, or null if the file doesn't exist
+ */
+export function readBenchmarkResults(file: string): BenchmarkResults | null {
+    if (!fs.existsSync(file)) return null;
+    return JSON.parse(fs.readFileSync(file, 'utf-8')) as BenchmarkResults;
+}
+
+/**
+ * Write benchmark results to a JSON file, creating its directory if needed
+ * @param file - The file
+ * @param results - The results
+ */
+export function writeBenchmarkResults(file: string, results: BenchmarkResults): void {
+    fs.mkdirSync(path.dirname(path.resolve(file)), {recursive: true});
+    fs.writeFileSync(file, JSON.stringify(results, null, 2) + '\n');
+}
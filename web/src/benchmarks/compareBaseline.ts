@@ -0,0 +1,65 @@
+/**
+ * Compare the results of the last `npm run bench` with the stored baseline
+ *
+ * Exits with status 1 if a benchmark regressed by more than the threshold. Without a baseline file,
+ * or with --update, the results become the new baseline.
+ */
+
+import {
+    compareWithBaseline,
+    DEFAULT_BASELINE_FILE,
+    DEFAULT_REGRESSION_THRESHOLD,
+    DEFAULT_RESULTS_FILE,
+    formatComparisons,
+    readBenchmarkResults,
+    writeBenchmarkResults
+} from './baseline.ts';
+
+const usage = 'Usage: compareBaseline.ts [--results <file>] [--baseline <file>] [--threshold <fraction>] [--update]';
+const args = process.argv.slice(2);
+let resultsFile = DEFAULT_RESULTS_FILE;
+let baselineFile = DEFAULT_BASELINE_FILE;
+let threshold = DEFAULT_REGRESSION_THRESHOLD;
+let update = false;
+
+for (let i = 0; i < args.length; i++) {
+    if (args[i] === '--results' && i + 1 < args.length) {
+        resultsFile = args[++i];
+    } else if (args[i] === '--baseline' && i + 1 < args.length) {
+        baselineFile = args[++i];
+    } else if (args[i] === '--threshold' && i + 1 < args.length) {
+        threshold = Number(args[++i]);
+        if (!(threshold >= 0)) {
+            console.error(usage);
+            process.exit(1);
+        }
+    } else if (args[i] === '--update') {
+        update = true;
+    } else {
+        console.error(usage);
+        process.exit(1);
+    }
+}
+
+const current = readBenchmarkResults(resultsFile);
+if (!current) {
+    console.error(`No benchmark results in ${resultsFile}, run \`npm run bench\` first`);
+    process.exit(1);
+}
+
+const baseline = update ? null : readBenchmarkResults(baselineFile);
+if (!baseline) {
+    writeBenchmarkResults(baselineFile, current);
+    console.log(`Baseline written to ${baselineFile}`);
+    process.exit(0);
+}
+
+const comparisons = compareWithBaseline(current, baseline, threshold);
+console.log(formatComparisons(comparisons));
+
+const regressions = comparisons.filter(comparison => comparison.regressed).length;
+if (regressions > 0) {
+    console.error(`${regressions} benchmark(s) regressed by more than ${(threshold * 100).toFixed(0)}%`);
+    process.exit(1);
+}
+console.log(`No benchmark regressed by more than ${(threshold * 100).toFixed(0)}%`);
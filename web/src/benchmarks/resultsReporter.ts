@@ -0,0 +1,37 @@
+/**
+ * Vitest benchmark reporter that stores the operations per second and 95th percentile of every
+ * benchmark, for comparison with the baseline by compareBaseline.ts
+ *
+ * Needs `benchmark.includeSamples`, since vitest drops the samples of the benchmarks otherwise.
+ */
+
+import type {Reporter} from 'vitest/node';
+import type {RunnerTask, RunnerTestFile} from 'vitest';
+import {BenchmarkResults, DEFAULT_RESULTS_FILE, summarizeSamples, writeBenchmarkResults} from './baseline';
+
+export default class BenchmarkResultsReporter implements Reporter {
+    onFinished(files: RunnerTestFile[] = []): void {
+        const results: BenchmarkResults = {createdAt: new Date().toISOString(), benchmarks: {}};
+
+        const visit = (task: RunnerTask, prefix: string): void => {
+            const name = `${prefix} > ${task.name}`;
+            if (task.type === 'suite') {
+                task.tasks.forEach(child => visit(child, name));
+                return;
+            }
+            const samples: number[] | undefined = (task.result as { benchmark?: { samples?: number[] } } | undefined)
+                ?.benchmark?.samples;
+            if (samples && samples.length > 0) {
+                results.benchmarks[name] = summarizeSamples(samples);
+            }
+        };
+        for (const file of files) {
+            file.tasks.forEach(task => visit(task, file.name));
+        }
+
+        // Skipped benchmarks, e.g. the ones needing the Firestore emulator, have no samples
+        if (Object.keys(results.benchmarks).length > 0) {
+            writeBenchmarkResults(DEFAULT_RESULTS_FILE, results);
+        }
+    }
+}
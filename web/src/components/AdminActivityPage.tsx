@@ -1,9 +1,20 @@
-import React, {useContext, useEffect, useState} from 'react';
+import React, {useCallback, useContext, useEffect, useRef, useState} from 'react';
 import {useNavigate} from 'react-router-dom';
+import {QueryDocumentSnapshot} from 'firebase/firestore';
 import {GameStateContext} from '../reducers';
 import {formatDate} from '../utils/dateUtils';
 import {UserActivity} from '../types';
-import {fetchRecentlyActiveUsers} from '../firebase/firestore';
+import {backfillPlayerActivity, fetchUserActivityPage} from '../firebase/firestore';
+import {
+    ACTIVITY_METRICS,
+    ActivityAggregates,
+    addActivityPage,
+    createActivityAggregates,
+    getActivityPercentile
+} from '../utils/activityStats';
+
+// Percentiles shown below the totals
+const PERCENTILES = [50, 90];
 
 /**
  * Admin Activity Page component
@@ -13,8 +24,20 @@ export function AdminActivityPage(): React.ReactElement {
     const context = useContext(GameStateContext);
     const navigate = useNavigate();
     const [users, setUsers] = useState<UserActivity[]>([]);
+    const [aggregates, setAggregates] = useState<ActivityAggregates>(createActivityAggregates);
     const [isLoading, setIsLoading] = useState(true);
+    const [isLoadingMore, setIsLoadingMore] = useState(false);
+    const [isBackfilling, setIsBackfilling] = useState(false);
+    // Number of players whose activity the last rebuild created
+    const [rebuiltCount, setRebuiltCount] = useState<number | null>(null);
     const [error, setError] = useState<string | null>(null);
+    // Cursor of the last loaded page; null when all pages are loaded
+    const cursor = useRef<QueryDocumentSnapshot | null>(null);
+    const hasMore = useRef(true);
+    const loadingPage = useRef(false);
+    // Incremented on reload; pages requested for an older generation are dropped when they arrive
+    const generation = useRef(0);
+    const sentinel = useRef<HTMLDivElement | null>(null);
 
     if (!context) {
         throw new Error('AdminActivityPage must be used within a GameStateContext Provider');
@@ -23,25 +46,86 @@ export function AdminActivityPage(): React.ReactElement {
     const {state} = context;
     const {auth} = state;
 
-    // Fetch recently active users when component mounts
+    // Fetch the page after the cursor and add it to the running aggregates
+    const fetchPage = useCallback(() => {
+        const pageGeneration = generation.current;
+        const isCurrent = () => pageGeneration === generation.current;
+        loadingPage.current = true;
+        setIsLoadingMore(true);
+
+        fetchUserActivityPage(undefined, cursor.current)
+            .then((page) => {
+                if (!isCurrent()) return;
+                cursor.current = page.cursor;
+                hasMore.current = page.cursor !== null;
+                setUsers(prevUsers => [...prevUsers, ...page.users]);
+                setAggregates(prevAggregates => addActivityPage(prevAggregates, page.users));
+            })
+            .catch((err) => {
+                if (!isCurrent()) return;
+                console.error('Error fetching active users:', err);
+                setError('Failed to load user activity data. Please try again later.');
+            })
+            .finally(() => {
+                if (!isCurrent()) return;
+                loadingPage.current = false;
+                setIsLoading(false);
+                setIsLoadingMore(false);
+            });
+    }, []);
+
+    // Fetch the next page, unless one is loading or all are loaded
+    const loadNextPage = useCallback(() => {
+        if (loadingPage.current || !hasMore.current) return;
+        fetchPage();
+    }, [fetchPage]);
+
+    // Start over from the first page, dropping a page that is still loading
+    const reload = useCallback(() => {
+        generation.current++;
+        cursor.current = null;
+        hasMore.current = true;
+        setUsers([]);
+        setAggregates(createActivityAggregates());
+        setIsLoading(true);
+        setError(null);
+        fetchPage();
+    }, [fetchPage]);
+
+    // Fetch the first page of recently active users when component mounts
     useEffect(() => {
         if (auth.isAuthenticated && auth.isAdmin) {
-            setIsLoading(true);
-            setError(null);
-
-            fetchRecentlyActiveUsers(50)
-                .then((activeUsers) => {
-                    console.log(activeUsers)
-                    setUsers(activeUsers);
-                    setIsLoading(false);
-                })
-                .catch((err) => {
-                    console.error('Error fetching active users:', err);
-                    setError('Failed to load user activity data. Please try again later.');
-                    setIsLoading(false);
-                });
+            reload();
         }
-    }, [auth.isAuthenticated, auth.isAdmin]);
+    }, [auth.isAuthenticated, auth.isAdmin, reload]);
+
+    // Load the next page when the end of the table scrolls into view; observing again after each page
+    // loads the following one if the end is still visible
+    useEffect(() => {
+        const element = sentinel.current;
+        if (!element || typeof IntersectionObserver === 'undefined') return;
+
+        const observer = new IntersectionObserver((entries) => {
+            if (entries.some(entry => entry.isIntersecting)) {
+                loadNextPage();
+            }
+        }, {rootMargin: '400px'});
+        observer.observe(element);
+        return () => observer.disconnect();
+    }, [loadNextPage, isLoading, users.length]);
+
+    const handleBackfill = () => {
+        setIsBackfilling(true);
+        backfillPlayerActivity()
+            .then((count) => {
+                setRebuiltCount(count);
+                reload();
+            })
+            .catch((err: Error) => {
+                alert(`Failed to rebuild the activity feed: ${err.message}`);
+            })
+            .finally(() => setIsBackfilling(false));
+    };
 
     const handleBackToHome = () => {
         navigate('/');
@@ -109,6 +193,17 @@ export function AdminActivityPage(): React.ReactElement {
                     ← Back to Home
                 </button>
                 <h1 className="text-2xl font-bold">Recent User Activity</h1>
+                <button
+                    onClick={handleBackfill}
+                    disabled={isBackfilling}
+                    className="ml-auto px-3 py-1 rounded hover:bg-[#3c3c3c] transition-colors"
+                    title="Create feed entries for players who haven't played since the feed was introduced"
+                >
+                    {isBackfilling ? 'Rebuilding...' : 'Rebuild feed'}
+                </button>
+                {rebuiltCount !== null && (
+                    <span className="ml-3 text-sm text-gray-400">Rebuilt the activity of {rebuiltCount} players</span>
+                )}
             </div>
 
             <div className="bg-[#333333] p-4 rounded-lg shadow-md">
@@ -163,28 +258,43 @@ export function AdminActivityPage(): React.ReactElement {
                             <tr className="bg-[#2a2a2a]">
                                 <td className="p-2 font-medium">Total</td>
                                 <td className="p-2"></td>
-                                <td className="p-2">
-                                    {users.reduce((sum, u) => sum + (u.totalLevelCompletions || 0), 0)}
-                                </td>
-                                <td className="p-2">
-                                    {users.reduce((sum, u) => sum + (u.totalLevelsSolved || 0), 0)}
-                                </td>
-                                <td className="p-2">
-                                    {users.reduce((sum, u) => sum + (u.totalTimeSpent || 0), 0)}s
-                                </td>
-                                <td className="p-2">
-                                    {users.reduce((sum, u) => sum + (u.totalHintsUsed || 0), 0)}
-                                </td>
-                                <td className="p-2">
-                                    {users.reduce((sum, u) => sum + (u.totalMistakesMade || 0), 0)}
-                                </td>
+                                {ACTIVITY_METRICS.map(metric => (
+                                    <td key={metric} className="p-2">
+                                        {aggregates.totals[metric]}{metric === 'totalTimeSpent' ? 's' : ''}
+                                    </td>
+                                ))}
                                 <td className="p-2"></td>
                                 <td className="p-2"></td>
                             </tr>
+                            {PERCENTILES.map(percentile => (
+                                <tr key={percentile} className="bg-[#2a2a2a]">
+                                    <td className="p-2 font-medium">{percentile === 50 ? 'Median' : `P${percentile}`}</td>
+                                    <td className="p-2"></td>
+                                    {ACTIVITY_METRICS.map(metric => (
+                                        <td key={metric} className="p-2">
+                                            {getActivityPercentile(aggregates, metric, percentile)}{metric === 'totalTimeSpent' ? 's' : ''}
+                                        </td>
+                                    ))}
+                                    <td className="p-2"></td>
+                                    <td className="p-2"></td>
+                                </tr>
+                            ))}
                             </tfoot>
                         </table>
                     </div>
                 )}
+
+                {/* Reaching this element loads the next page */}
+                <div ref={sentinel} className="p-2 text-center text-sm text-gray-400">
+                    {isLoadingMore ? 'Loading more users...' : hasMore.current && users.length > 0 ? (
+                        <button
+                            onClick={loadNextPage}
+                            className="px-3 py-1 rounded hover:bg-[#3c3c3c] transition-colors"
+                        >
+                            Load more
+                        </button>
+                    ) : null}
+                </div>
             </div>
         </div>
     );
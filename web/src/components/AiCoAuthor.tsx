@@ -1,23 +1,64 @@
-import React, {useEffect, useState} from 'react';
+import React, {useEffect, useMemo, useRef, useState} from 'react';
 import {useLevelContext} from '../context/LevelContext';
-import {parseLevelText} from '../levels_compiler/parser';
+import {ParseResult} from '../levels_compiler/parser';
 import {
-    generateHintAndExplanation,
+    generateHintsForAllEvents,
     generateRandomPythonCode,
     generateStartAndFinalMessages,
     getSelectedGeminiModel,
-    RegenerationMode
+    RegenerationMode,
+    streamHintAndExplanation
 } from '../utils/aiCoAuthor';
 
+/**
+ * Extract the events of the replace and replace-span blocks from the level parsed by the editor
+ */
+function extractEvents(parseResult: ParseResult | null): string[] {
+    // If there's an error in parsing, return an empty array
+    if (!parseResult || parseResult.error || !parseResult.level) {
+        return [];
+    }
+
+    // Collect all events from replace and replace-span blocks
+    const events = new Set<string>();
+
+    for (const block of parseResult.level.blocks) {
+        if ((block.type === 'replace' || block.type === 'replace-span') && block.event) {
+            // The event property can be a string or an array of strings
+            if (typeof block.event === 'string') {
+                events.add(block.event);
+            } else if (Array.isArray(block.event)) {
+                // Add each event in the array
+                for (const event of block.event) {
+                    events.add(event);
+                }
+            }
+        }
+    }
+
+    // Convert the Set to an array and return
+    return Array.from(events);
+}
+
 /**
  * AiCoAuthor component
  * Renders the AI Co-Author interface with API key input and generation buttons
  */
 export function AiCoAuthor(): React.ReactElement {
-    const {code, setCode} = useLevelContext();
+    const {code, setCode, parseResult} = useLevelContext();
     const [apiKey, setApiKey] = useState<string>('');
     const [selectedModel, setSelectedModel] = useState<string>(getSelectedGeminiModel());
     const [codeStyleIssue, setCodeStyleIssue] = useState<string>('');
+    // Answer unchanged requests from the response cache instead of calling the API again
+    const [reuseCached, setReuseCached] = useState<boolean>(true);
+    // Progress of generating for all events, or null when not running
+    const [allEventsProgress, setAllEventsProgress] = useState<{ finished: number, total: number } | null>(null);
+    // Event whose hint and explanation are being streamed into the editor
+    const [streamingEvent, setStreamingEvent] = useState<string | null>(null);
+    // Cancels the running stream
+    const abortRef = useRef<AbortController | null>(null);
+    // Last code written by the running stream, to notice edits by the author
+    const streamedCodeRef = useRef<string | null>(null);
 
     // Available models
     const models = [
@@ -46,6 +87,16 @@ export function AiCoAuthor(): React.ReactElement {
         localStorage.setItem('selectedGeminiModel', selectedModel);
     }, [selectedModel]);
 
+    // Stop streaming when the author edits the code, so the edit is not overwritten
+    useEffect(() => {
+        if (abortRef.current && streamedCodeRef.current !== null && code !== streamedCodeRef.current) {
+            abortRef.current.abort();
+        }
+    }, [code]);
+
+    // Stop streaming when the component unmounts
+    useEffect(() => () => abortRef.current?.abort(), []);
+
     // Handle API key input change
     const handleApiKeyChange = (e: React.ChangeEvent<HTMLInputElement>) => {
         setApiKey(e.target.value);
@@ -72,7 +123,7 @@ export function AiCoAuthor(): React.ReactElement {
                 alert('Please enter a code style issue');
                 return;
             }
-            const randomCode = await generateRandomPythonCode(codeStyleIssue, apiKey, selectedModel);
+            const randomCode = await generateRandomPythonCode(codeStyleIssue, apiKey, selectedModel, {refresh: !reuseCached});
             setCode(randomCode);
         } catch (error) {
             console.error('Error generating random Python code:', error);
@@ -87,7 +138,7 @@ export function AiCoAuthor(): React.ReactElement {
                 alert('Please enter a Gemini API key');
                 return;
             }
-            const updatedCode = await generateStartAndFinalMessages(code, apiKey, selectedModel);
+            const updatedCode = await generateStartAndFinalMessages(code, apiKey, selectedModel, {refresh: !reuseCached});
             setCode(updatedCode);
         } catch (error) {
             console.error('Error generating start and final messages:', error);
@@ -96,52 +147,62 @@ export function AiCoAuthor(): React.ReactElement {
     };
 
     // Handle generating hint and explanation/options for a specific event
+    // The response is streamed into the editor; selecting another event cancels the previous stream
     const handleGenerateHintAndExplanation = async (eventId: string, mode: RegenerationMode = 'both') => {
-        try {
-            if (!apiKey) {
-                alert('Please enter a Gemini API key');
-                return;
-            }
-            const updatedCode = await generateHintAndExplanation(code, eventId, apiKey, selectedModel, mode);
+        if (!apiKey) {
+            alert('Please enter a Gemini API key');
+            return;
+        }
+        abortRef.current?.abort();
+        const controller = new AbortController();
+        abortRef.current = controller;
+        streamedCodeRef.current = null;
+        setStreamingEvent(eventId);
+
+        const showCode = (updatedCode: string) => {
+            if (controller.signal.aborted) return;
+            streamedCodeRef.current = updatedCode;
             setCode(updatedCode);
+        };
+        try {
+            showCode(await streamHintAndExplanation(code, eventId, apiKey, selectedModel, mode, showCode, {
+                refresh: !reuseCached,
+                signal: controller.signal
+            }));
         } catch (error) {
+            if (controller.signal.aborted) return;
             console.error('Error generating hint/explanation/options:', error);
             alert('Failed to generate hint/explanation/options. Please check the console for details.');
+        } finally {
+            if (abortRef.current === controller) {
+                abortRef.current = null;
+                streamedCodeRef.current = null;
+                setStreamingEvent(null);
+            }
         }
     };
 
-    // Parse the code to extract events using the parser
-    const extractEvents = (codeText: string): string[] => {
-        // Parse the code using parseLevelText
-        const parseResult = parseLevelText(codeText);
-
-        // If there's an error in parsing, return an empty array
-        if (parseResult.error || !parseResult.level) {
-            return [];
-        }
-
-        // Collect all events from replace and replace-span blocks
-        const events = new Set<string>();
-
-        for (const block of parseResult.level.blocks) {
-            if ((block.type === 'replace' || block.type === 'replace-span') && block.event) {
-                // The event property can be a string or an array of strings
-                if (typeof block.event === 'string') {
-                    events.add(block.event);
-                } else if (Array.isArray(block.event)) {
-                    // Add each event in the array
-                    for (const event of block.event) {
-                        events.add(event);
-                    }
-                }
+    // Handle generating hints, explanations and options for all events at once
+    const handleGenerateForAllEvents = async () => {
+        try {
+            if (!apiKey) {
+                alert('Please enter a Gemini API key');
+                return;
             }
+            const updatedCode = await generateHintsForAllEvents(
+                code, apiKey, selectedModel, 'both', {refresh: !reuseCached},
+                (finished, total) => setAllEventsProgress({finished, total})
+            );
+            setCode(updatedCode);
+        } catch (error) {
+            console.error('Error generating hints for all events:', error);
+            alert('Failed to generate hints for all events. Please check the console for details.');
+        } finally {
+            setAllEventsProgress(null);
         }
-
-        // Convert the Set to an array and return
-        return Array.from(events);
     };
 
-    const events = extractEvents(code);
+    const events = useMemo(() => extractEvents(parseResult), [parseResult]);
 
     return (
         <div className={`ai-tab p-2`}>
@@ -188,6 +249,14 @@ export function AiCoAuthor(): React.ReactElement {
                     Your API key is stored only in your browser's local storage. It is not stored on our server and is
                     not even transferred to us.
                 </p>
+                <label className="flex items-center gap-2 text-sm mt-2">
+                    <input
+                        type="checkbox"
+                        checked={reuseCached}
+                        onChange={e => setReuseCached(e.target.checked)}
+                    />
+                    Reuse earlier responses for unchanged code
+                </label>
             </div>
 
             {/* Code Style Issues Section */}
@@ -233,11 +302,32 @@ export function AiCoAuthor(): React.ReactElement {
             {/* Generate Hints and Explanations */}
             <div className="mb-6">
                 <h3 className="text-md font-medium mb-3">Generate hints and explanations for events:</h3>
+                {events.length > 1 && (
+                    <button
+                        className="inline-block px-4 py-2 mb-3 bg-[#3c3c3c] hover:bg-[#4c4c4c] rounded text-left disabled:opacity-50"
+                        onClick={handleGenerateForAllEvents}
+                        disabled={allEventsProgress !== null}
+                        title="Regenerate hints, explanations and context menu options of all events"
+                    >
+                        {allEventsProgress
+                            ? `Generating... ${allEventsProgress.finished}/${allEventsProgress.total}`
+                            : 'Generate for all events'}
+                    </button>
+                )}
                 {events.length > 0 ? (
                     events.map((event, index) => (
                         <div key={index} className="mb-2">
                             <div className="text-sm text-gray-300 mb-1">Event: '{event}'</div>
                             <div className="flex gap-2 flex-wrap">
+                                {streamingEvent === event && (
+                                    <button
+                                        className="inline-block px-3 py-1 bg-[#5c3c3c] hover:bg-[#6c4c4c] rounded text-left"
+                                        onClick={() => abortRef.current?.abort()}
+                                        title="Stop generating and keep what has been received"
+                                    >
+                                        Stop
+                                    </button>
+                                )}
                                 <button
                                     className="inline-block px-3 py-1 bg-[#3c3c3c] hover:bg-[#4c4c4c] rounded text-left"
                                     onClick={() => handleGenerateHintAndExplanation(event, 'both')}
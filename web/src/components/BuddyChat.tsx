@@ -1,9 +1,10 @@
 import React, {useContext} from 'react';
-import {GameStateContext} from '../reducers';
+import {findNextLevelId, GameStateContext} from '../reducers';
 import {getHint, nextLevel, postChatMessage} from '../reducers/actionCreators';
 import BuddyChatMessage from './BuddyChatMessage';
 import MyChatMessage from './MyChatMessage';
 import {ChatMessage} from '../types';
+import {loadLevelData} from '../utils/levelLoader';
 
 // Constants
 const HINT_DELAY_MS = 300; // Delay before showing hint in milliseconds
@@ -30,8 +31,19 @@ export function BuddyChat(): React.ReactElement {
     const handleReply = (text: string): void =>
         dispatch(postChatMessage({type: "me", text} as ChatMessage));
 
-    const handleNextLevel = (): void =>
+    const handleNextLevel = async (): Promise<void> => {
+        // The next level is normally prefetched already; make sure it's loaded before switching
+        const nextLevelId = findNextLevelId(state.topics, state.currentLevelId);
+        if (nextLevelId) {
+            try {
+                await loadLevelData(state.topics, nextLevelId);
+            } catch (error) {
+                console.error('Error loading next level:', error);
+                return;
+            }
+        }
         dispatch(nextLevel());
+    };
 
     // Render different button based on a message type and typing animation status
     const renderButton = (): React.ReactNode => {
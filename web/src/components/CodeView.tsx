@@ -1,11 +1,17 @@
-import React, {useEffect, useState} from 'react';
-import {Highlight, themes, Token} from 'prism-react-renderer';
+import React, {memo, useEffect, useLayoutEffect, useMemo, useRef, useState} from 'react';
+import {themes, Token} from 'prism-react-renderer';
+import {getLineSignature, getTokenStyler, sliceLineTokens, tokenizeCode, TokenStyler} from '../utils/codeTokens';
 import './CodeView.css'; // Ensure CSS defines .code-line, .line-number, and .code-content
 
 // Animation speed constants
-const ANIMATION_INTERVAL_MS = 5; // Milliseconds between animation steps
+const ANIMATION_CHARS_PER_MS = 0.4; // Characters revealed per millisecond (2 every 5 ms)
 const FLASH_DURATION_MS = 50; // Duration of the flashing effect in milliseconds
 
+// Windowing constants
+const LINE_OVERSCAN = 20; // Lines rendered above and below the visible ones
+const DEFAULT_VIEWPORT_LINES = 100; // Lines rendered while the viewport size is unknown
+const DEFAULT_LINE_HEIGHT_PX = 21; // Line height until the first line is measured
+
 interface CodeViewProps {
     code: string;
     animate?: boolean;
@@ -15,9 +21,57 @@ interface CodeViewProps {
     onClick: (lineIndex: number, colIndex: number, token: string, clientX: number, clientY: number) => void;
 }
 
+interface CodeLineProps {
+    lineIndex: number;
+    tokens: Token[];
+    signature: string;              // identifies the rendered tokens of the line
+    flashingCol: number | null;     // column of the flashing token in this line
+    tokenStyler: TokenStyler;
+}
+
+/**
+ * A single line of code
+ *
+ * Tokens carry their column in data-col and the line its index in data-line-index, so clicks are
+ * resolved by the single handler of CodeView.
+ */
+const CodeLine = memo(function CodeLine({lineIndex, tokens, flashingCol, tokenStyler}: CodeLineProps) {
+    let colIndex = 0;
+    return (
+        <div data-line-index={lineIndex} className="code-line">
+            <span className="line-number">{lineIndex + 1}</span>
+            <span className="code-content">
+                {tokens.map(token => {
+                    const col = colIndex;
+                    colIndex += token.content.length;
+                    const {className, style} = tokenStyler(token);
+                    return (
+                        <span
+                            key={col}
+                            style={style}
+                            data-col={col}
+                            className={`${className} ${flashingCol === col ? 'flash-ok' : ''}`}>
+                            {token.content}
+                        </span>
+                    );
+                })}
+            </span>
+        </div>
+    );
+}, (prev, next) =>
+    // Sliced tokens are new arrays on every animation frame, so lines are compared by signature
+    prev.lineIndex === next.lineIndex &&
+    prev.signature === next.signature &&
+    prev.tokenStyler === next.tokenStyler &&
+    prev.flashingCol === next.flashingCol
+);
+
 /**
  * CodeView component
  * Renders code with syntax highlighting and animation
+ *
+ * Only the lines in and near the visible part of the view are mounted. The code is tokenized once
+ * per change through the line cache; the animation only reveals more of the tokenized lines.
  */
 export function CodeView({
                              code,
@@ -27,127 +81,145 @@ export function CodeView({
                              onClick
                          }: CodeViewProps): React.ReactElement {
     const [cursor, setCursor] = useState<number>(0);
-    const [flashingKey, setFlashingKey] = useState<string | null>(null);
-    const [isProcessingClick, setIsProcessingClick] = useState<boolean>(false);
+    const [flashing, setFlashing] = useState<{ lineIndex: number, colIndex: number } | null>(null);
+    const isProcessingClick = useRef<boolean>(false);
+
+    const scrollRef = useRef<HTMLPreElement | null>(null);
+    const [scrollTop, setScrollTop] = useState<number>(0);
+    const [viewportHeight, setViewportHeight] = useState<number>(0);
+    const [lineHeight, setLineHeight] = useState<number>(DEFAULT_LINE_HEIGHT_PX);
 
     useEffect(() => {
         if (!animate) {
             return;
         }
 
-        if (animate) {
-            setCursor(0);
-            console.log("Starting animation for code:", code);
-            const intervalRef = window.setInterval(() => {
-                setCursor(c => {
-                    if (c + 2 >= code.length) {
-                        if (intervalRef !== null) {
-                            clearInterval(intervalRef);
-                        }
-                        return Infinity;
-                    }
-                    return c + 2;
-                });
-            }, ANIMATION_INTERVAL_MS); // Slightly slower animation for better performance
-
-            return () => {
-                if (intervalRef !== null) {
-                    clearInterval(intervalRef);
-                }
-            };
-        }
+        setCursor(0);
+        let frame = 0;
+        let startTime: number | null = null;
+        const step = (time: number) => {
+            if (startTime === null) startTime = time;
+            const revealed = Math.floor((time - startTime) * ANIMATION_CHARS_PER_MS);
+            if (revealed >= code.length) {
+                setCursor(Infinity);
+                return;
+            }
+            setCursor(revealed);
+            frame = requestAnimationFrame(step);
+        };
+        frame = requestAnimationFrame(step);
+
+        return () => cancelAnimationFrame(frame);
+    }, []);
+
+    // Track the size of the view to know how many lines are visible
+    useEffect(() => {
+        const element = scrollRef.current;
+        if (!element) return;
+
+        setViewportHeight(element.clientHeight);
+        if (typeof ResizeObserver === 'undefined') return;
+        const observer = new ResizeObserver(() => setViewportHeight(element.clientHeight));
+        observer.observe(element);
+        return () => observer.disconnect();
     }, []);
 
-    const visibleCode = animate ? code.substring(0, Math.min(code.length, cursor)) : code;
+    // All lines have the same height, so measuring one is enough
+    useLayoutEffect(() => {
+        const line = scrollRef.current?.querySelector('.code-line');
+        const height = line?.getBoundingClientRect().height;
+        if (height && Math.abs(height - lineHeight) > 0.5) {
+            setLineHeight(height);
+        }
+    });
+
+    const lines = useMemo(() => tokenizeCode(code), [code]);
+
+    // Start offset of each line in the code, to find the lines revealed by the animation
+    const lineStarts = useMemo(() => {
+        const starts: number[] = [];
+        let offset = 0;
+        for (const line of code.split('\n')) {
+            starts.push(offset);
+            offset += line.length + 1;
+        }
+        return starts;
+    }, [code]);
+
+    // The animation shows the code up to the cursor; the last line may be cut
+    let lineCount = lines.length;
+    let lastLineLength = Infinity;
+    if (animate && cursor < code.length) {
+        let last = 0;
+        while (last + 1 < lineStarts.length && lineStarts[last + 1] <= cursor) last++;
+        lineCount = last + 1;
+        lastLineLength = cursor - lineStarts[last];
+    }
+
+    // Single click handler for all tokens; the clicked token is found from the data attributes
+    const handleClick = (e: React.MouseEvent<HTMLPreElement>): void => {
+        if (disable || isFinished || isProcessingClick.current) return;
+
+        const tokenElement = (e.target as HTMLElement).closest<HTMLElement>('[data-col]');
+        const lineElement = tokenElement?.closest<HTMLElement>('[data-line-index]');
+        if (!tokenElement || !lineElement) return;
 
-    const handleClick = (lineIndex: number, colIndex: number, token: Token, e: React.MouseEvent): void => {
-        if (disable || isFinished || isProcessingClick) return;
+        const lineIndex = Number(lineElement.dataset.lineIndex);
+        const colIndex = Number(tokenElement.dataset.col);
+        const token = tokenElement.textContent ?? '';
+        const {clientX, clientY} = e;
 
-        setIsProcessingClick(true);
-        const key = `${lineIndex} ${colIndex}`;
-        setFlashingKey(key);
+        isProcessingClick.current = true;
+        setFlashing({lineIndex, colIndex});
 
         setTimeout(() => {
-            setFlashingKey(null);
-            onClick(lineIndex, colIndex, token.content, e.clientX, e.clientY);
-            setIsProcessingClick(false);
+            setFlashing(null);
+            onClick(lineIndex, colIndex, token, clientX, clientY);
+            isProcessingClick.current = false;
         }, FLASH_DURATION_MS);
     };
 
-    function renderToken(
-        lineIndex: number,
-        colIndex: number,
-        token: Token,
-        getTokenProps: (options: { token: Token; key: string }) => any
-    ): React.ReactNode {
-        const {key, children: _, ...tokenProps} =
-            getTokenProps({token, key: `${lineIndex} ${colIndex}`});
-
-        let flashingClass = '';
-        if (flashingKey === key) {
-            flashingClass = 'flash-ok';
-        }
-
-        return (
-            <span
-                key={key}
-                {...tokenProps}
-                className={`${tokenProps.className} ${flashingClass}`}
-                onClick={(e) => handleClick(lineIndex, colIndex, token, e)}>
-        {token.content}
-      </span>
-        );
-    }
-
-    function renderLine(
-        lineIndex: number,
-        lineTokens: Token[],
-        getLineProps: (options: { line: Token[]; key: number | string }) => any,
-        getTokenProps: (options: { token: Token; key: string }) => any
-    ): React.ReactNode {
-        const {key: _, ...lineProps} = getLineProps({line: lineTokens, key: lineIndex});
-        const cols: number[] = [];
-        let colIndex = 0;
-
-        for (let token of lineTokens) {
-            cols.push(colIndex);
-            colIndex += token.content.length;
-        }
+    const handleScroll = (e: React.UIEvent<HTMLPreElement>): void => {
+        setScrollTop(e.currentTarget.scrollTop);
+    };
 
-        return (
-            <div
+    // Determine which theme to use
+    const theme = isFinished ? themes.oneDark : themes.vsDark;
+    const tokenStyler = getTokenStyler(theme);
+
+    const viewportLines = viewportHeight > 0 ? Math.ceil(viewportHeight / lineHeight) : DEFAULT_VIEWPORT_LINES;
+    const firstLine = Math.max(0, Math.floor(scrollTop / lineHeight) - LINE_OVERSCAN);
+    const endLine = Math.min(lineCount, firstLine + viewportLines + 2 * LINE_OVERSCAN);
+
+    const codeLines: React.ReactNode[] = [];
+    for (let lineIndex = firstLine; lineIndex < endLine; lineIndex++) {
+        const line = lines[lineIndex];
+        const isCut = lineIndex === lineCount - 1 && lastLineLength < Infinity;
+        const lineTokens = isCut ? sliceLineTokens(line, lastLineLength) : line.tokens;
+        codeLines.push(
+            <CodeLine
                 key={lineIndex}
-                {...lineProps}
-                data-line-index={lineIndex}
-                className="code-line">
-                <span className="line-number">{lineIndex + 1}</span>
-                <span className="code-content">
-          {lineTokens.map((token, tokenIndex) =>
-              renderToken(lineIndex, cols[tokenIndex], token, getTokenProps)
-          )}
-        </span>
-            </div>
+                lineIndex={lineIndex}
+                tokens={lineTokens}
+                signature={isCut ? getLineSignature(lineTokens) : line.signature}
+                flashingCol={flashing?.lineIndex === lineIndex ? flashing.colIndex : null}
+                tokenStyler={tokenStyler}
+            />
         );
     }
 
-    // Determine which theme to use
-    const theme = isFinished ? themes.oneDark : themes.vsDark;
-
     return (
-        <Highlight code={visibleCode} theme={theme} language="python">
-            {({className, style, tokens, getLineProps, getTokenProps}) => (
-                <pre className={`${className} ${disable ? 'disabled-code' : ''} ${isFinished ? 'finished-code' : ''}`}
-                     style={style}>
-          {tokens.map((lineTokens, lineIndex) =>
-              renderLine(
-                  lineIndex,
-                  lineTokens.filter(t => t.content.length > 0),
-                  getLineProps,
-                  getTokenProps
-              )
-          )}
+        <pre ref={scrollRef}
+             className={`prism-code language-python ${disable ? 'disabled-code' : ''} ${isFinished ? 'finished-code' : ''}`}
+             style={theme.plain as React.CSSProperties}
+             onClick={handleClick}
+             onScroll={handleScroll}>
+            <div style={{
+                paddingTop: firstLine * lineHeight,
+                paddingBottom: (lineCount - endLine) * lineHeight
+            }}>
+                {codeLines}
+            </div>
         </pre>
-            )}
-        </Highlight>
     );
 }
@@ -4,10 +4,10 @@ import {TopBar} from './TopBar';
 import CodeMirror from '@uiw/react-codemirror';
 import {python} from '@codemirror/lang-python';
 import {TabsContainer} from './TabsContainer';
-import {parseLevelText, ParseResult} from '../levels_compiler/parser';
 import {getCurrentUser} from '../firebase/auth';
 import {deleteLevelFromUserLevels, getCustomLevelById, saveCustomLevel} from '../firebase/firestore';
 import {LevelProvider} from '../context/LevelContext';
+import {useParsedLevel} from '../utils/levelParserClient';
 
 /**
  * Editor page for creating and editing custom levels
@@ -24,6 +24,10 @@ export function EditorPage(): React.ReactElement {
     const [initialCode, setInitialCode] = useState<string>(code); // Store initial code to detect changes
     const [isLoading, setIsLoading] = useState<boolean>(!!levelIdParam);
 
+    // The code is parsed in a worker after typing pauses; until then the result may be outdated
+    const parsed = useParsedLevel(code);
+    const isParsing = parsed?.content !== code;
+
     // Load level if levelId is provided
     useEffect(() => {
         const loadLevel = async () => {
@@ -80,7 +84,7 @@ export function EditorPage(): React.ReactElement {
                 return;
             }
 
-            if (errors.length > 0) {
+            if (isParsing || errors.length > 0) {
                 // Should not happen as button is disabled, but check anyway
                 alert('Please fix the errors before saving');
                 return;
@@ -153,9 +157,12 @@ export function EditorPage(): React.ReactElement {
     const handleCodeChange = (value: string) => {
         setCode(value);
         setHasChanges(true);
+    };
 
-        // Parse the code using parseLevelText
-        const result: ParseResult = parseLevelText(value);
+    // Update the errors and the filename from the latest parse
+    useEffect(() => {
+        if (!parsed) return;
+        const result = parsed.result;
 
         if (result.error) {
             // If there's an error, update the errors state
@@ -169,7 +176,7 @@ export function EditorPage(): React.ReactElement {
                 setFilename(result.level.filename);
             }
         }
-    };
+    }, [parsed]);
 
     return (
         <div className="flex flex-col h-screen bg-[#2d2d2d] text-[#d4d4d4]">
@@ -185,12 +192,12 @@ export function EditorPage(): React.ReactElement {
                         <div>
                             <button
                                 className={`px-4 py-2 mr-2 rounded ${
-                                    errors.length === 0
+                                    errors.length === 0 && !isParsing
                                         ? "bg-[#4c8b36] hover:bg-[#5da142]"
                                         : "bg-[#4c8b36] opacity-50 cursor-not-allowed"
                                 }`}
                                 onClick={handleSave}
-                                disabled={errors.length > 0}
+                                disabled={isParsing || errors.length > 0}
                             >
                                 Save
                             </button>
@@ -244,7 +251,7 @@ export function EditorPage(): React.ReactElement {
 
                         {/* Tabs Container (Right) */}
                         <div className="w-1/3 bg-[#1e1e1e] p-4 rounded overflow-auto">
-                            <LevelProvider code={code} setCode={setCode}>
+                            <LevelProvider code={code} setCode={setCode} parseResult={parsed?.result ?? null}>
                                 <TabsContainer/>
                             </LevelProvider>
                         </div>
@@ -1,4 +1,4 @@
-import React, {useContext, useEffect, useState} from 'react';
+import React, {useContext, useEffect, useMemo, useState} from 'react';
 import {useNavigate, useParams} from 'react-router-dom';
 import {GameStateContext} from '../reducers';
 import {formatDate} from '../utils/dateUtils';
@@ -10,7 +10,13 @@ import {
     updateGroupNameThunk
 } from '../reducers/actionCreators';
 import {GroupMember} from '../types';
-import {createJoinCode, fetchGroupMembers, fetchJoinCodesForGroup, refreshMemberStats} from '../firebase/firestore';
+import {createJoinCode, fetchJoinCodesForGroup, refreshMemberStats, subscribeToGroupMembers} from '../firebase/firestore';
+import {
+    applyMemberChanges,
+    GroupMemberChange,
+    MEMBER_UPDATE_INTERVAL_MS,
+    ThrottledBatcher
+} from '../utils/groupMembers';
 
 // Helper function to execute thunks directly
 type ThunkResult<T> = (dispatch: React.Dispatch<GameAction>, getState?: any) => Promise<T>;
@@ -59,27 +65,35 @@ export function GroupPage(): React.ReactElement {
         deleted: false
     };
 
-    // State for members and join codes
-    const [members, setMembers] = useState<GroupMember[]>([]);
+    // State for members (keyed by UID) and join codes
+    const [memberMap, setMemberMap] = useState<Map<string, GroupMember>>(() => new Map());
+    const members = useMemo(() => Array.from(memberMap.values()), [memberMap]);
     const [joinCodes, setJoinCodes] = useState<{ code: string, active: boolean }[]>([]);
     const [refreshingMember, setRefreshingMember] = useState<string | null>(null);
     const [refreshSuccess, setRefreshSuccess] = useState<string | null>(null);
 
-    // Fetch members when the group is loaded
+    // Listen to member changes when the group is loaded; changes are applied at a bounded rate
+    useEffect(() => {
+        if (!group.id || group.id === 'Loading...') return;
+
+        const batcher = new ThrottledBatcher<GroupMemberChange>(
+            (changes) => setMemberMap(current => applyMemberChanges(current, changes)),
+            MEMBER_UPDATE_INTERVAL_MS
+        );
+        setMemberMap(new Map());
+        const unsubscribe = subscribeToGroupMembers(group.id, (changes) => batcher.push(changes));
+
+        return () => {
+            unsubscribe();
+            batcher.cancel();
+        };
+    }, [group.id]);
+
+    // Fetch join codes when the group is loaded
     useEffect(() => {
         if (group.id && group.id !== 'Loading...') {
             const groupId = group.id; // Store in a constant to satisfy TypeScript
 
-            // Fetch the members from Firestore
-            fetchGroupMembers(groupId)
-                .then((fetchedMembers) => {
-                    // Update the state with the fetched members
-                    setMembers(fetchedMembers);
-                })
-                .catch((error) => {
-                    console.error('Error fetching group members:', error);
-                });
-
             // Fetch the join codes for the group
             fetchJoinCodesForGroup(groupId)
                 .then((fetchedJoinCodes) => {
@@ -221,18 +235,9 @@ export function GroupPage(): React.ReactElement {
         // Call the function to refresh the member's stats
         refreshMemberStats(groupId, memberId)
             .then(() => {
-                // Handle success
+                // Handle success; the members listener picks up the updated stats
                 console.log(`Member ${memberId} stats refreshed successfully`);
                 setRefreshSuccess(memberId);
-
-                // Refresh the members list
-                return fetchGroupMembers(groupId);
-            })
-            .then((updatedMembers) => {
-                // Update the members state with the refreshed data
-                if (updatedMembers) {
-                    setMembers(updatedMembers);
-                }
             })
             .catch((error) => {
                 // Handle error
@@ -1,26 +1,40 @@
-import React from 'react';
-import {isCurrentLevel, isLevelClickable, isLevelSolved} from '../utils/levelUtils';
-import {GameState, LevelData} from '../types';
+import React, {memo} from 'react';
+import {LevelStatus} from '../utils/levelUtils';
+import {LevelSummary} from '../types';
 import {renderToPyLevel} from '../utils/pylang';
 import {getCurrentUser} from '../firebase/auth';
 import {saveCustomLevel} from '../firebase/firestore';
 import {useNavigate} from 'react-router-dom';
+import {loadLevelData} from '../utils/levelLoader';
+import {useGameStore} from '../reducers/gameStore';
 
 interface LevelItemProps {
-    state: GameState;
-    level: LevelData;
+    level: LevelSummary;
     topicName: string;
+    status: LevelStatus;
+    isCurrent: boolean;
+    isAdmin: boolean;
     onLevelSelect: (topicName: string, levelId: string) => void;
 }
 
 /**
  * Component for rendering a single level item in the sidebar
+ *
+ * Gets its status as props, so it only re-renders when its own status changes.
  */
-export function LevelItem({state, level, topicName, onLevelSelect}: LevelItemProps): React.ReactElement {
+export const LevelItem = memo(function LevelItem({
+                                                     level,
+                                                     topicName,
+                                                     status,
+                                                     isCurrent,
+                                                     isAdmin,
+                                                     onLevelSelect
+                                                 }: LevelItemProps): React.ReactElement {
     const navigate = useNavigate();
+    const store = useGameStore();
 
     const handleClick = (): void => {
-        if (isLevelClickable(state, topicName, level.filename)) {
+        if (status.clickable) {
             onLevelSelect(topicName, level.filename);
         }
     };
@@ -34,7 +48,8 @@ export function LevelItem({state, level, topicName, onLevelSelect}: LevelItemPro
                 return;
             }
             // Convert current level data to PyLevels format text
-            const content = renderToPyLevel(level);
+            const levelData = await loadLevelData(store.getState().topics, {topic: topicName, levelId: level.filename});
+            const content = levelData && renderToPyLevel(levelData);
             if (!content) {
                 alert('Failed to prepare level content');
                 return;
@@ -49,17 +64,13 @@ export function LevelItem({state, level, topicName, onLevelSelect}: LevelItemPro
         }
     };
 
-    const levelClickable = isLevelClickable(state, topicName, level.filename);
-    const levelCurrent = isCurrentLevel(state, topicName, level.filename);
-    const levelSolved = isLevelSolved(state, topicName, level.filename);
-
     return (
         <div
             key={level.filename}
             className={`group flex items-center pl-4 p-1 ${
-                levelClickable
+                status.clickable
                     ? `cursor-pointer ${
-                        levelCurrent
+                        isCurrent
                             ? 'bg-[#37373d]'
                             : ''
                     }`
@@ -68,10 +79,10 @@ export function LevelItem({state, level, topicName, onLevelSelect}: LevelItemPro
             onClick={handleClick}
         >
       <span className="mr-2">
-        {levelSolved ? '✔️' : ' '}
+        {status.solved ? '✔️' : ' '}
       </span>
             <span className="flex-1">{level.filename}</span>
-            {state.auth.isAdmin && (
+            {isAdmin && (
                 <div
                     className="px-2 cursor-pointer text-gray-400 hover:text-white invisible group-hover:visible"
                     onClick={handleCloneToCommunity}
@@ -82,4 +93,4 @@ export function LevelItem({state, level, topicName, onLevelSelect}: LevelItemPro
             )}
         </div>
     );
-}
\ No newline at end of file
+});
\ No newline at end of file
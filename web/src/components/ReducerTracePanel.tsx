@@ -0,0 +1,87 @@
+import React, {useEffect, useState} from 'react';
+import {reducerTracer, ReducerTraceSummary} from '../utils/reducerTracing';
+
+// The panel reads the tracer on an interval instead of re-rendering on every dispatch
+const REFRESH_INTERVAL_MS = 1000;
+
+interface ReducerTracePanelProps {
+    onClose: () => void;
+}
+
+/**
+ * Debug panel showing the traced reducer actions
+ * Tracing is switched on and off here; the traced actions can be downloaded as JSON
+ */
+export function ReducerTracePanel({onClose}: ReducerTracePanelProps): React.ReactElement {
+    const [enabled, setEnabled] = useState(reducerTracer.enabled);
+    const [summary, setSummary] = useState<ReducerTraceSummary[]>(() => reducerTracer.getSummary());
+
+    useEffect(() => {
+        const interval = window.setInterval(() => setSummary(reducerTracer.getSummary()), REFRESH_INTERVAL_MS);
+        return () => clearInterval(interval);
+    }, []);
+
+    const toggleTracing = (): void => {
+        reducerTracer.setEnabled(!enabled);
+        setEnabled(!enabled);
+    };
+
+    const clearTrace = (): void => {
+        reducerTracer.clear();
+        setSummary([]);
+    };
+
+    const exportTrace = (): void => {
+        const blob = new Blob([reducerTracer.exportJson()], {type: 'application/json'});
+        const url = URL.createObjectURL(blob);
+        const link = document.createElement('a');
+        link.href = url;
+        link.download = `reducer-trace-${new Date().toISOString()}.json`;
+        link.click();
+        URL.revokeObjectURL(url);
+    };
+
+    const buttonClass = 'px-2 py-1 rounded bg-[#3c3c3c] hover:bg-[#4c4c4c]';
+
+    return (
+        <div className="fixed bottom-4 right-4 z-50 w-[36rem] max-h-[50vh] overflow-auto p-3 rounded shadow-lg bg-[#252526] border border-[#3c3c3c] text-sm">
+            <div className="flex items-center justify-between mb-2">
+                <span className="font-medium text-[#9cdcfe]">Reducer trace</span>
+                <div className="flex gap-2">
+                    <button onClick={toggleTracing} className={buttonClass}>
+                        {enabled ? 'Stop tracing' : 'Start tracing'}
+                    </button>
+                    <button onClick={clearTrace} className={buttonClass}>Clear</button>
+                    <button onClick={exportTrace} className={buttonClass}>Export JSON</button>
+                    <button onClick={onClose} className={buttonClass} title="Close">×</button>
+                </div>
+            </div>
+            {summary.length === 0 ? (
+                <p className="text-[#858585]">{enabled ? 'No actions traced yet.' : 'Tracing is off.'}</p>
+            ) : (
+                <table className="w-full">
+                    <thead>
+                    <tr className="border-b border-[#3c3c3c]">
+                        <th className="text-left p-1">Action</th>
+                        <th className="text-right p-1">Count</th>
+                        <th className="text-right p-1">Avg ms</th>
+                        <th className="text-right p-1">Max ms</th>
+                        <th className="text-right p-1">Avg size Δ</th>
+                    </tr>
+                    </thead>
+                    <tbody>
+                    {summary.map(row => (
+                        <tr key={row.type} className="border-b border-[#3c3c3c]">
+                            <td className="p-1">{row.type}</td>
+                            <td className="text-right p-1">{row.count}</td>
+                            <td className="text-right p-1">{row.traced ? (row.totalMs / row.traced).toFixed(2) : '-'}</td>
+                            <td className="text-right p-1">{row.maxMs.toFixed(2)}</td>
+                            <td className="text-right p-1">{row.traced ? Math.round(row.totalStateSizeDelta / row.traced) : '-'}</td>
+                        </tr>
+                    ))}
+                    </tbody>
+                </table>
+            )}
+        </div>
+    );
+}
@@ -1,28 +1,37 @@
-import React, {useContext, useEffect, useState} from 'react';
+import React, {useCallback, useEffect, useState, useSyncExternalStore} from 'react';
 import {useNavigate} from 'react-router-dom';
-import {GameStateContext} from '../reducers';
+import {useGameSelector, useGameStore} from '../reducers/gameStore';
 import {loadLevel, setCustomLevels, setUserLevels} from '../reducers/actionCreators';
 import {TopicItem} from './TopicItem';
 import {onAuthStateChanged} from '../firebase/auth';
-import {getCustomLevelById, getUserLevels} from '../firebase/firestore';
-import {CustomLevel} from '../types';
-import {isDebugModeEnabled} from '../utils/debugUtils';
+import {loadUserLevelsOfflineFirst} from '../firebase/firestore';
+import {isDebugModeEnabled, subscribeToDebugMode} from '../utils/debugUtils';
+import {loadLevelData} from '../utils/levelLoader';
+import {selectLevelStatuses} from '../utils/levelUtils';
 
 /**
  * Sidebar navigation component showing topics and levels
+ *
+ * Selects only the parts of the game state it shows, so it doesn't re-render on every action.
  */
 export function SidebarNavigationContainer(): React.ReactElement {
-    const context = useContext(GameStateContext);
+    const store = useGameStore();
+    const {dispatch} = store;
     const navigate = useNavigate();
 
-    if (!context) {
-        throw new Error('SidebarNavigationContainer must be used within a GameStateContext Provider');
-    }
+    const topics = useGameSelector(state => state.topics);
+    const playerLevels = useGameSelector(state => state.playerStats.levels);
+    const currentLevelId = useGameSelector(state => state.currentLevelId);
+    const isAdmin = useGameSelector(state => state.auth.isAdmin);
+    const isAuthenticated = useGameSelector(state => state.auth.isAuthenticated);
+    const userLevels = useGameSelector(state => state.userLevels);
+    const customLevels = useGameSelector(state => state.customLevels);
+    const debugMode = useSyncExternalStore(subscribeToDebugMode, isDebugModeEnabled);
+    const levelStatuses = selectLevelStatuses(topics, playerLevels, debugMode);
 
-    const {state, dispatch} = context;
     const [expandedTopics, setExpandedTopics] = useState<Record<string, boolean>>({
-        [state.currentLevelId.topic]: true,
-        'My Levels': state.currentLevelId.topic === 'community'
+        [currentLevelId.topic]: true,
+        'My Levels': currentLevelId.topic === 'community'
     });
 
     // Fetch user levels when auth state changes (user logs in/out)
@@ -30,25 +39,11 @@ export function SidebarNavigationContainer(): React.ReactElement {
         const fetchUserLevels = async (user: any) => {
             if (user) {
                 try {
-                    const levels = await getUserLevels(user.uid);
-                    if (levels) {
+                    // Shows the levels cached on this device first, then the ones from Firestore
+                    await loadUserLevelsOfflineFirst(user.uid, (levels, customLevels) => {
                         dispatch(setUserLevels(levels));
-
-                        // Fetch custom level details for each level_id
-                        const levelDetails: Record<string, CustomLevel> = {};
-                        await Promise.all(levels.map(async (level) => {
-                            try {
-                                const customLevel = await getCustomLevelById(level.level_id);
-                                if (customLevel) {
-                                    levelDetails[level.level_id] = customLevel;
-                                }
-                            } catch (error) {
-                                console.error(`Error fetching custom level ${level.level_id}:`, error);
-                            }
-                        }));
-
-                        dispatch(setCustomLevels(levelDetails));
-                    }
+                        dispatch(setCustomLevels(customLevels));
+                    });
                 } catch (error) {
                     console.error('Error fetching user levels:', error);
                 }
@@ -69,23 +64,31 @@ export function SidebarNavigationContainer(): React.ReactElement {
     // Collapse all topics except the one containing the current level
     useEffect(() => {
         setExpandedTopics({
-            [state.currentLevelId.topic]: true,
-            'My Levels': state.currentLevelId.topic === 'community'
+            [currentLevelId.topic]: true,
+            'My Levels': currentLevelId.topic === 'community'
         });
-    }, [state.currentLevelId.topic]);
+    }, [currentLevelId.topic]);
 
-    const toggleTopic = (topicName: string): void => {
+    // Callbacks keep their identity, so level items don't re-render because of them
+    const toggleTopic = useCallback((topicName: string): void => {
         setExpandedTopics(prev => ({
             ...prev,
             [topicName]: !prev[topicName]
         }));
-    };
-
-    const handleLevelSelect = (topic: string, levelId: string): void => {
-        dispatch(loadLevel({topic, levelId}));
-        // Reset URL path to root after loading standard level
-        navigate('/');
-    };
+    }, []);
+
+    const handleLevelSelect = useCallback(async (topic: string, levelId: string): Promise<void> => {
+        try {
+            // Fetch the level chunk unless it's already loaded
+            const levelData = await loadLevelData(store.getState().topics, {topic, levelId});
+            if (!levelData) return;
+            dispatch(loadLevel({topic, levelId}, levelData));
+            // Reset URL path to root after loading standard level
+            navigate('/');
+        } catch (error) {
+            console.error(`Error loading level ${topic}/${levelId}:`, error);
+        }
+    }, [store, dispatch, navigate]);
 
     const handleCreateNewLevel = (): void => {
         navigate('/editor');
@@ -100,13 +103,13 @@ export function SidebarNavigationContainer(): React.ReactElement {
                 <h1 className="text-m font-light">EXPLORER</h1>
             </div>
             <div className="text-sm">
-                {state.topics.filter(topic => {
+                {topics.filter(topic => {
                     // Filter out Testing topic
                     if (topic.name === "Testing") return false;
 
                     // Filter out topics with inDevelopment: true unless in debug mode or user is admin
                     if (topic.inDevelopment) {
-                        return isDebugModeEnabled() || state.auth.isAdmin;
+                        return debugMode || isAdmin;
                     }
 
                     // Show all other topics
@@ -114,8 +117,10 @@ export function SidebarNavigationContainer(): React.ReactElement {
                 }).map((topic) => (
                     <TopicItem
                         key={topic.name}
-                        state={state}
                         topic={topic}
+                        levelStatuses={levelStatuses}
+                        currentLevelId={currentLevelId}
+                        isAdmin={isAdmin}
                         isExpanded={expandedTopics[topic.name] || false}
                         onToggle={toggleTopic}
                         onLevelSelect={handleLevelSelect}
@@ -123,7 +128,7 @@ export function SidebarNavigationContainer(): React.ReactElement {
                 ))}
 
                 {/* My Levels topic - only show when user is authenticated */}
-                {state.auth.isAuthenticated && (
+                {isAuthenticated && (
                     <div className="">
                         <div
                             className="flex items-center p-1 cursor-pointer"
@@ -136,14 +141,14 @@ export function SidebarNavigationContainer(): React.ReactElement {
                         {expandedTopics['My Levels'] && (
                             <div>
                                 {/* Render user levels */}
-                                {state.userLevels.map((level) => {
-                                    const customLevel = state.customLevels[level.level_id];
+                                {userLevels.map((level) => {
+                                    const customLevel = customLevels[level.level_id];
                                     return (
                                         <div
                                             key={level.level_id}
                                             className={`flex items-center pl-4 p-1 hover:bg-[#37373d] ${
-                                                state.currentLevelId.topic === 'community' &&
-                                                state.currentLevelId.levelId === level.level_id
+                                                currentLevelId.topic === 'community' &&
+                                                currentLevelId.levelId === level.level_id
                                                     ? 'bg-[#37373d]'
                                                     : ''
                                             }`}
@@ -176,7 +181,7 @@ export function SidebarNavigationContainer(): React.ReactElement {
                     </div>
                 )}
 
-                {state.topics.length === 0 && (
+                {topics.length === 0 && (
                     <div className="p-2 text-[#888888]">Loading...</div>
                 )}
             </div>
@@ -1,36 +1,66 @@
-import React, {useEffect, useReducer} from 'react';
-import {gameReducer, GameStateContext, initialState} from '../reducers';
+import React, {useCallback, useEffect, useLayoutEffect, useReducer, useRef, useState} from 'react';
+import {findNextLevelId, gameReducer, GameStateContext, initialState} from '../reducers';
+import {GameStore, GameStoreContext} from '../reducers/gameStore';
 import {onAuthStateChanged, signInAnonymously} from '../firebase/auth';
-import {loadPlayerStats, savePlayerStats} from '../firebase/firestore';
+import {
+    cachePlayerStats,
+    flushPlayerStats,
+    flushPlayerStatsOnPageHide,
+    loadPlayerStatsOfflineFirst,
+    schedulePlayerStatsSave
+} from '../firebase/firestore';
 import {loginFailure, loginRequest, loginSuccess, setPlayerStats} from '../reducers/actionCreators';
+import {prefetchLevel} from '../utils/levelLoader';
+import {withReducerTracing} from '../utils/reducerTracing';
+import {User} from '../types';
 
 interface StateProviderProps {
     children: React.ReactNode;
 }
 
+// Records action durations and state sizes while reducer tracing is enabled in debug mode
+const tracedGameReducer = withReducerTracing(gameReducer);
+
 /**
  * Provider component for game state
  */
 export function StateProvider({children}: StateProviderProps): React.ReactElement {
-    const [state, dispatch] = useReducer(gameReducer, initialState);
+    const [state, dispatch] = useReducer(tracedGameReducer, initialState);
+    // Same state for components that select parts of it, see useGameSelector
+    const [store] = useState(() => new GameStore(state, dispatch));
+    useLayoutEffect(() => store.setState(state), [store, state]);
+    // User whose statistics have been reconciled with Firestore; statistics are only saved after that
+    const statsLoadedFor = useRef<string | null>(null);
+    // User whose statistics are in the state, from Firestore or from the copy on this device
+    const statsShownFor = useRef<string | null>(null);
+    const currentUser = useRef<User | null>(null);
+
+    // Show the statistics cached on this device, then reconcile them with Firestore
+    const loadStats = useCallback(async (user: User) => {
+        try {
+            await loadPlayerStatsOfflineFirst(user, (playerStats, synced) => {
+                if (currentUser.current?.uid !== user.uid) return;
+                statsShownFor.current = user.uid;
+                if (synced) {
+                    statsLoadedFor.current = user.uid;
+                }
+                dispatch(setPlayerStats(playerStats));
+            });
+        } catch (error) {
+            console.error('Error loading player data:', error);
+        }
+    }, []);
 
     // Set up auth state change listener and anonymous authentication
     useEffect(() => {
         let isFirstAuthChange = true;
         
         const unsubscribe = onAuthStateChanged(async (user) => {
+            currentUser.current = user;
             if (user) {
                 // User is signed in (could be anonymous or regular)
                 dispatch(loginSuccess(user, user.isAnonymous));
-
-                try {
-                    // Load player statistics from Firestore
-                    const playerStats = await loadPlayerStats(user);
-                    // Update state with loaded player statistics
-                    dispatch(setPlayerStats(playerStats));
-                } catch (error) {
-                    console.error('Error loading player data:', error);
-                }
+                await loadStats(user);
             } else if (isFirstAuthChange) {
                 // No user is signed in and this is the first auth state change
                 // Sign in anonymously
@@ -56,20 +86,50 @@ export function StateProvider({children}: StateProviderProps): React.ReactElemen
 
         // Clean up the listener when the component unmounts
         return () => unsubscribe();
-    }, []);
+    }, [loadStats]);
 
-    // Save player statistics to Firestore whenever they change
+    // Save player statistics whenever they change: on this device at once, and to Firestore in the background
     useEffect(() => {
         const {user} = state.auth;
-        if (user) {
-            savePlayerStats(user, state.playerStats)
-                .catch(error => console.error('Error saving player statistics:', error));
+        if (user && statsShownFor.current === user.uid) {
+            cachePlayerStats(user, state.playerStats);
+        }
+        if (user && statsLoadedFor.current === user.uid) {
+            schedulePlayerStatsSave(user, state.playerStats);
         }
     }, [state.playerStats, state.auth.user]);
 
+    // When the connection is back, write queued statistics, or reconcile them if that failed before
+    useEffect(() => {
+        const onOnline = () => {
+            const user = currentUser.current;
+            if (!user) return;
+            if (statsLoadedFor.current === user.uid) {
+                flushPlayerStats().catch(error => console.error('Error saving player statistics:', error));
+            } else {
+                loadStats(user);
+            }
+        };
+        window.addEventListener('online', onOnline);
+        return () => window.removeEventListener('online', onOnline);
+    }, [loadStats]);
+
+    // Write pending statistics before the page is hidden or closed
+    useEffect(() => flushPlayerStatsOnPageHide(), []);
+
+    // Prefetch the next level in the background, so it's ready when the current one is solved
+    useEffect(() => {
+        const nextLevelId = findNextLevelId(state.topics, state.currentLevelId);
+        if (nextLevelId) {
+            prefetchLevel(state.topics, nextLevelId);
+        }
+    }, [state.topics, state.currentLevelId]);
+
     return (
-        <GameStateContext.Provider value={{state, dispatch}}>
-            {children}
-        </GameStateContext.Provider>
+        <GameStoreContext.Provider value={store}>
+            <GameStateContext.Provider value={{state, dispatch}}>
+                {children}
+            </GameStateContext.Provider>
+        </GameStoreContext.Provider>
     );
 }
@@ -13,6 +13,7 @@ import {
 import {isUserAdmin, savePlayerStats} from '../firebase/firestore';
 import {createDefaultPlayerStats} from '../reducers/statsReducer';
 import {parseDebugModeFromUrl} from '../utils/debugUtils';
+import {ReducerTracePanel} from './ReducerTracePanel';
 
 /**
  * Top navigation bar component
@@ -23,6 +24,7 @@ export function TopBar(): React.ReactElement {
     const navigate = useNavigate();
     const location = useLocation();
     const [debugMode, setDebugMode] = useState(false);
+    const [showTracePanel, setShowTracePanel] = useState(false);
 
     if (!context) {
         throw new Error('TopBar must be used within a GameStateContext Provider');
@@ -144,6 +146,18 @@ export function TopBar(): React.ReactElement {
             </button>);
     }
 
+    function renderTraceButton() {
+        if (!debugMode) return null;
+        return (
+            <button
+                onClick={() => setShowTracePanel(show => !show)}
+                className="px-3 py-1 flex items-center gap-2 rounded hover:bg-[#3c3c3c] transition-colors"
+                title="Show Reducer Trace">
+                <span>Trace</span>
+            </button>
+        );
+    }
+
     function renderStatsButton() {
         return (
             <button
@@ -197,6 +211,7 @@ export function TopBar(): React.ReactElement {
                 {renderStatsButton()}
                 {renderGroupsButton()}
                 {renderResetProgressButton()}
+                {renderTraceButton()}
                 {renderWatchActivityButton()}
                 {renderAdminModeLabel()}
             </>
@@ -215,6 +230,7 @@ export function TopBar(): React.ReactElement {
                 {(isMainPage || isCommunityLevelsPage) && renderNavigationButtons()}
                 {auth.isAuthenticated && !auth.isAnonymous ? renderLogoutButton() : renderLoginButton()}
             </div>
+            {debugMode && showTracePanel && <ReducerTracePanel onClose={() => setShowTracePanel(false)}/>}
         </div>
     );
 }
@@ -1,19 +1,33 @@
-import React from 'react';
+import React, {memo} from 'react';
 import {LevelItem} from './LevelItem';
-import {GameState, Topic} from '../types';
+import {LevelId, TopicSummary} from '../types';
+import {getLevelKey, LevelStatus} from '../utils/levelUtils';
 
 interface TopicItemProps {
-    state: GameState;
-    topic: Topic;
+    topic: TopicSummary;
+    levelStatuses: ReadonlyMap<string, LevelStatus>;
+    currentLevelId: LevelId;
+    isAdmin: boolean;
     isExpanded: boolean;
     onToggle: (topicName: string) => void;
     onLevelSelect: (topicName: string, levelId: string) => void;
 }
 
+// Status of levels missing from the status map
+const UNKNOWN_LEVEL_STATUS: LevelStatus = {solved: false, clickable: false};
+
 /**
  * Component for rendering a single topic item with its levels in the sidebar
  */
-export function TopicItem({state, topic, isExpanded, onToggle, onLevelSelect}: TopicItemProps): React.ReactElement {
+export const TopicItem = memo(function TopicItem({
+                                                     topic,
+                                                     levelStatuses,
+                                                     currentLevelId,
+                                                     isAdmin,
+                                                     isExpanded,
+                                                     onToggle,
+                                                     onLevelSelect
+                                                 }: TopicItemProps): React.ReactElement {
     return (
         <div className="">
             <div
@@ -31,9 +45,11 @@ export function TopicItem({state, topic, isExpanded, onToggle, onLevelSelect}: T
                     {topic.levels.map((level) => (
                         <LevelItem
                             key={level.filename}
-                            state={state}
                             level={level}
                             topicName={topic.name}
+                            status={levelStatuses.get(getLevelKey(topic.name, level.filename)) ?? UNKNOWN_LEVEL_STATUS}
+                            isCurrent={currentLevelId.topic === topic.name && currentLevelId.levelId === level.filename}
+                            isAdmin={isAdmin}
                             onLevelSelect={onLevelSelect}
                         />
                     ))}
@@ -41,4 +57,4 @@ export function TopicItem({state, topic, isExpanded, onToggle, onLevelSelect}: T
             )}
         </div>
     );
-}
\ No newline at end of file
+});
\ No newline at end of file
@@ -1,8 +1,10 @@
 import React, {createContext, ReactNode, useContext} from 'react';
+import {ParseResult} from '../levels_compiler/parser';
 
 interface LevelContextType {
     code: string;
     setCode: (code: string) => void;
+    parseResult: ParseResult | null;    // latest result of parsing the code in the background
 }
 
 // Create the context with a default value
@@ -21,12 +23,13 @@ interface LevelProviderProps {
     children: ReactNode;
     code: string;
     setCode: (code: string) => void;
+    parseResult: ParseResult | null;
 }
 
 // Provider component
-export function LevelProvider({children, code, setCode}: LevelProviderProps): React.ReactElement {
+export function LevelProvider({children, code, setCode, parseResult}: LevelProviderProps): React.ReactElement {
     return (
-        <LevelContext.Provider value={{code, setCode}}>
+        <LevelContext.Provider value={{code, setCode, parseResult}}>
             {children}
         </LevelContext.Provider>
     );
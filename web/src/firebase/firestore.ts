@@ -3,21 +3,34 @@ import {
     arrayUnion,
     collection,
     deleteDoc,
+    deleteField,
     doc,
+    documentId,
     DocumentReference,
+    FirestoreError,
+    getCountFromServer,
     getDoc,
     getDocs,
     limit,
+    onSnapshot,
     orderBy,
     query,
+    QueryConstraint,
+    QueryDocumentSnapshot,
     serverTimestamp,
     setDoc,
+    startAfter,
+    Unsubscribe,
     updateDoc,
-    where
+    where,
+    writeBatch
 } from 'firebase/firestore';
 import {db} from './index';
 import {CustomLevel, Group, GroupMember, JoinCode, PlayerStatsState, User, UserActivity, UserLevel} from '../types';
 import {createDefaultPlayerStats} from '../reducers/statsReducer';
+import {flushOnPageHide, PlayerStatsWrite, PlayerStatsWriteBehind} from './statsWriteBehind';
+import {hasUnsyncedStats, mergePlayerStats, OfflineCache} from './offlineCache';
+import {GroupMemberChange} from '../utils/groupMembers';
 
 /**
  * Get the player document reference
@@ -28,101 +41,273 @@ export const getPlayerDocRef = (userId: string): DocumentReference => {
     return doc(db, 'playerStats', userId);
 };
 
+// Maximum number of values in a Firestore 'in' filter
+export const IN_QUERY_LIMIT = 30;
+
+// Maximum number of chunk queries of a bulk fetch that run at the same time
+export const BULK_FETCH_CONCURRENCY = 4;
+
 /**
- * Save player statistics to Firestore
- * @param user - Firebase user
+ * Run an async function over items with a bounded number of concurrent calls
+ * @param items - Items to process
+ * @param concurrency - Maximum number of concurrent calls
+ * @param fn - Async function to call for each item
+ * @returns Promise that resolves with the results in the order of the items
+ */
+const mapWithConcurrency = async <T, R>(items: T[], concurrency: number, fn: (item: T) => Promise<R>): Promise<R[]> => {
+    const results: R[] = new Array(items.length);
+    let next = 0;
+    const worker = async () => {
+        while (next < items.length) {
+            const index = next++;
+            results[index] = await fn(items[index]);
+        }
+    };
+    await Promise.all(Array.from({length: Math.min(concurrency, items.length)}, worker));
+    return results;
+};
+
+/**
+ * Fetch documents of a collection by their IDs
+ *
+ * The IDs are split into chunks that fit into an 'in' filter, and the chunk queries run concurrently
+ * with a bounded pool.
+ *
+ * @param collectionPath - Path of the collection
+ * @param ids - Document IDs; duplicates are fetched once
+ * @param constraints - Additional filters for the queries
+ * @param concurrency - Maximum number of concurrent chunk queries
+ * @returns Promise that resolves with the found documents, in the order of the IDs
+ */
+export const fetchDocsByIds = async (
+    collectionPath: string,
+    ids: string[],
+    constraints: QueryConstraint[] = [],
+    concurrency: number = BULK_FETCH_CONCURRENCY
+): Promise<QueryDocumentSnapshot[]> => {
+    const uniqueIds = [...new Set(ids)];
+    const chunks: string[][] = [];
+    for (let i = 0; i < uniqueIds.length; i += IN_QUERY_LIMIT) {
+        chunks.push(uniqueIds.slice(i, i + IN_QUERY_LIMIT));
+    }
+
+    const snapshots = await mapWithConcurrency(chunks, concurrency, chunk => getDocs(query(
+        collection(db, collectionPath),
+        where(documentId(), 'in', chunk),
+        ...constraints
+    )));
+
+    const docsById = new Map<string, QueryDocumentSnapshot>();
+    for (const snapshot of snapshots) {
+        for (const doc of snapshot.docs) {
+            docsById.set(doc.id, doc);
+        }
+    }
+    return uniqueIds.flatMap(id => docsById.get(id) ?? []);
+};
+
+// Groups each player is a member of, as last read or written by this client
+const memberOfGroupsCache = new Map<string, string[]>();
+
+/**
+ * Get the groups a player is a member of, reading the player document only if they aren't cached
+ * @param userId - User ID
+ * @returns Promise that resolves with the group IDs
+ */
+export const getMemberOfGroups = async (userId: string): Promise<string[]> => {
+    const cached = memberOfGroupsCache.get(userId);
+    if (cached) return cached;
+
+    const playerDoc = await getDoc(getPlayerDocRef(userId));
+    const memberOfGroups = playerDoc.exists() ? (playerDoc.data().memberOfGroups as string[] | undefined) ?? [] : [];
+    memberOfGroupsCache.set(userId, memberOfGroups);
+    return memberOfGroups;
+};
+
+/**
+ * Forget the cached group membership, so it's read again on next use
+ * @param userId - User ID, or undefined to forget all players
+ */
+export const invalidateMemberOfGroupsCache = (userId?: string): void => {
+    if (userId === undefined) {
+        memberOfGroupsCache.clear();
+    } else {
+        memberOfGroupsCache.delete(userId);
+    }
+};
+
+/**
+ * Get the member document fields that mirror a player's statistics
  * @param playerStats - Player statistics state
- * @returns Promise that resolves when the operation is complete
+ * @returns Fields for the member document
  */
+const getMemberStatsFields = (playerStats: PlayerStatsState) => ({
+    levelsCompleted: playerStats.summary.totalLevelsSolved || 0,
+    totalLevelsPlayed: playerStats.summary.totalLevelCompletions || 0,
+    totalMisclicks: playerStats.summary.totalMistakesMade || 0,
+    totalTimeSpent: playerStats.summary.totalTimeSpent || 0,
+    totalHintsUsed: playerStats.summary.totalHintsUsed || 0,
+    totalWrongClicks: playerStats.summary.totalMistakesMade || 0,
+    lastPlayedAt: new Date().toISOString(),
+    updatedAt: serverTimestamp()
+});
+
+/**
+ * Get the reference of a player's activity document
+ *
+ * Activity documents mirror the summary of the player statistics without the per-level map,
+ * so the admin activity feed can page through players cheaply.
+ *
+ * @param userId - User ID
+ * @returns Firestore document reference
+ */
+export const getPlayerActivityDocRef = (userId: string): DocumentReference => {
+    return doc(db, 'playerActivity', userId);
+};
+
+// Creation time of the player documents loaded by this client, copied to the activity mirror
+const playerCreatedAt = new Map<string, unknown>();
+
 /**
  * Update all group member stats for a player
+ *
+ * All member documents are updated in a single batch. If one of them doesn't exist, the batch fails
+ * as a whole; the documents are then updated one by one, so the others still get the new stats.
+ *
  * @param userId - User ID
  * @param playerStats - Player statistics state
  * @returns Promise that resolves when the operation is complete
  */
 export const updateAllGroupMemberStats = async (userId: string, playerStats: PlayerStatsState): Promise<void> => {
     try {
-        // Get the player document to access the memberOfGroups array
-        const playerDocRef = getPlayerDocRef(userId);
-        const playerDoc = await getDoc(playerDocRef);
-
-        if (!playerDoc.exists() || !playerDoc.data().memberOfGroups) {
-            // If the player document doesn't exist or doesn't have memberOfGroups, there's nothing to update
-            return;
-        }
-
-        const memberOfGroups = playerDoc.data().memberOfGroups as string[];
+        const memberOfGroups = await getMemberOfGroups(userId);
 
         if (memberOfGroups.length === 0) {
             // If the player is not a member of any groups, there's nothing to update
             return;
         }
 
-        // For each group, update the member document with the new stats
-        const updatePromises = memberOfGroups.map(async (groupId) => {
-            const memberDocRef = doc(db, 'groups', groupId, 'members', userId);
-            const memberDoc = await getDoc(memberDocRef);
+        const memberStats = getMemberStatsFields(playerStats);
+        const memberDocRefs = memberOfGroups.map(groupId => doc(db, 'groups', groupId, 'members', userId));
 
-            if (!memberDoc.exists()) {
-                // If the member document doesn't exist, skip it
-                console.warn(`Member document not found for user ${userId} in group ${groupId}`);
-                return;
-            }
+        const batch = writeBatch(db);
+        memberDocRefs.forEach(memberDocRef => batch.update(memberDocRef, memberStats));
 
-            // Update the member document with stats from player stats
-            return updateDoc(memberDocRef, {
-                levelsCompleted: playerStats.summary.totalLevelsSolved || 0,
-                totalLevelsPlayed: playerStats.summary.totalLevelCompletions || 0,
-                totalMisclicks: playerStats.summary.totalMistakesMade || 0,
-                totalTimeSpent: playerStats.summary.totalTimeSpent || 0,
-                totalHintsUsed: playerStats.summary.totalHintsUsed || 0,
-                totalWrongClicks: playerStats.summary.totalMistakesMade || 0,
-                lastPlayedAt: new Date().toISOString(),
-                updatedAt: serverTimestamp()
-            });
-        });
+        try {
+            await batch.commit();
+        } catch (error) {
+            if ((error as FirestoreError).code !== 'not-found') throw error;
 
-        // Wait for all updates to complete
-        await Promise.all(updatePromises);
+            // Find out which member documents are missing by updating them separately
+            const results = await Promise.allSettled(memberDocRefs.map(memberDocRef => updateDoc(memberDocRef, memberStats)));
+            results.forEach((result, i) => {
+                if (result.status === 'rejected') {
+                    console.warn(`Member document not found for user ${userId} in group ${memberOfGroups[i]}`);
+                }
+            });
+        }
     } catch (error) {
         console.error('Error updating group member stats:', error);
         throw error;
     }
 };
 
-export const savePlayerStats = async (user: User, playerStats: PlayerStatsState): Promise<void> => {
+/**
+ * Write changed player statistics to Firestore
+ *
+ * Uses a merging set, so the document doesn't have to be read first and only the changed
+ * levels.<key> fields are sent. Removed levels are deleted from the levels map.
+ *
+ * @param write - The changes to write
+ * @returns Promise that resolves when the operation is complete
+ */
+export const writePlayerStatsPatch = async ({user, patch, stats, isNew}: PlayerStatsWrite): Promise<void> => {
+    const levels = Object.fromEntries(
+        Object.entries(patch.levels).map(([key, levelStats]) => [key, levelStats ?? deleteField()])
+    );
+    const createdAt = isNew ? serverTimestamp() : playerCreatedAt.get(user.uid);
+
+    const batch = writeBatch(db);
+    batch.set(getPlayerDocRef(user.uid), {
+        playerId: user.uid,
+        displayName: user.displayName,
+        email: user.email,
+        ...(patch.summary ? {summary: patch.summary} : {}),
+        // A merged empty map would replace the stored levels, so leave it out
+        ...(Object.keys(levels).length > 0 || isNew ? {levels} : {}),
+        ...(isNew ? {createdAt} : {}),
+        updatedAt: serverTimestamp()
+    }, {merge: true});
+    // Keep the activity mirror in sync; it always gets the whole summary, which is small
+    batch.set(getPlayerActivityDocRef(user.uid), {
+        displayName: user.displayName,
+        email: user.email,
+        summary: stats.summary,
+        ...(createdAt ? {createdAt} : {}),
+        updatedAt: serverTimestamp()
+    }, {merge: true});
+    await batch.commit();
+    await offlineCache.markPlayerStatsSynced(user.uid, stats);
+
+    // Group members only show summary statistics
+    if (patch.summary) {
+        await updateAllGroupMemberStats(user.uid, stats);
+    }
+};
+
+// Local copy of player statistics, user levels and custom levels, for offline play and instant start
+export const offlineCache = new OfflineCache();
+
+// Write-behind queue for all player statistics writes of this client
+export const playerStatsWriteBehind = new PlayerStatsWriteBehind(writePlayerStatsPatch);
+
+/**
+ * Queue player statistics to be saved to Firestore
+ *
+ * Changes made in quick succession are coalesced into a single write of the changed fields.
+ *
+ * @param user - Firebase user
+ * @param playerStats - Player statistics state
+ */
+export const schedulePlayerStatsSave = (user: User, playerStats: PlayerStatsState): void => {
     if (!user) return;
+    playerStatsWriteBehind.schedule(user, playerStats);
+};
 
-    const playerDocRef = getPlayerDocRef(user.uid);
+/**
+ * Save queued player statistics when the page is hidden or closed
+ * @returns Function that removes the page listeners
+ */
+export const flushPlayerStatsOnPageHide = (): (() => void) => flushOnPageHide(playerStatsWriteBehind);
 
-    try {
-        // Check if the document exists
-        const docSnap = await getDoc(playerDocRef);
+/**
+ * Write queued player statistics, e.g. when the connection is back
+ * @returns Promise that resolves when the queued statistics are written
+ */
+export const flushPlayerStats = (): Promise<void> => playerStatsWriteBehind.flush();
 
-        if (docSnap.exists()) {
-            // Update existing document
-            await updateDoc(playerDocRef, {
-                displayName: user.displayName,
-                email: user.email,
-                summary: playerStats.summary,
-                levels: playerStats.levels,
-                updatedAt: serverTimestamp()
-            });
-        } else {
-            // Create new document
-            await setDoc(playerDocRef, {
-                playerId: user.uid,
-                displayName: user.displayName,
-                email: user.email,
-                summary: playerStats.summary,
-                levels: playerStats.levels,
-                createdAt: serverTimestamp(),
-                updatedAt: serverTimestamp()
-            });
-        }
+/**
+ * Store player statistics on this device, so they survive reloads while offline
+ * @param user - Firebase user
+ * @param playerStats - Player statistics state
+ */
+export const cachePlayerStats = (user: User, playerStats: PlayerStatsState): void => {
+    if (!user) return;
+    offlineCache.savePlayerStats(user.uid, playerStats);
+};
+
+/**
+ * Save player statistics to Firestore immediately, together with any queued changes
+ * @param user - Firebase user
+ * @param playerStats - Player statistics state
+ * @returns Promise that resolves when the operation is complete
+ */
+export const savePlayerStats = async (user: User, playerStats: PlayerStatsState): Promise<void> => {
+    if (!user) return;
 
-        // Update all group member stats for this player
-        await updateAllGroupMemberStats(user.uid, playerStats);
+    try {
+        playerStatsWriteBehind.schedule(user, playerStats);
+        await playerStatsWriteBehind.flush();
     } catch (error) {
         console.error('Error saving player statistics:', error);
         throw error;
@@ -130,6 +315,44 @@ export const savePlayerStats = async (user: User, playerStats: PlayerStatsState)
 };
 
 
+/**
+ * Read player statistics from Firestore
+ * @param user - Firebase user
+ * @returns Promise that resolves with the player statistics state, or rejects if they can't be read
+ */
+const fetchPlayerStats = async (user: User): Promise<PlayerStatsState> => {
+    const docSnap = await getDoc(getPlayerDocRef(user.uid));
+
+    if (docSnap.exists()) {
+        const data = docSnap.data();
+        memberOfGroupsCache.set(user.uid, data.memberOfGroups || []);
+        if (data.createdAt) {
+            playerCreatedAt.set(user.uid, data.createdAt);
+        }
+
+        // Check if the document has the expected structure
+        if (data.summary && data.levels) {
+            const playerStats = {
+                summary: data.summary,
+                levels: data.levels
+            };
+            // Later saves only write what differs from the loaded statistics
+            playerStatsWriteBehind.setPersisted(user.uid, playerStats, true);
+            return playerStats;
+        } else {
+            // If the document doesn't have the expected structure, return default stats
+            console.warn('Player document does not have the expected structure, using default stats');
+            playerStatsWriteBehind.setPersisted(user.uid, null, true);
+            return createDefaultPlayerStats();
+        }
+    }
+
+    // If the document doesn't exist, return default stats
+    memberOfGroupsCache.set(user.uid, []);
+    playerStatsWriteBehind.setPersisted(user.uid, null, false);
+    return createDefaultPlayerStats();
+};
+
 /**
  * Load player statistics from Firestore
  * @param user - Firebase user
@@ -138,33 +361,53 @@ export const savePlayerStats = async (user: User, playerStats: PlayerStatsState)
 export const loadPlayerStats = async (user: User): Promise<PlayerStatsState> => {
     if (!user) return createDefaultPlayerStats();
 
-    const playerDocRef = getPlayerDocRef(user.uid);
-
     try {
-        const docSnap = await getDoc(playerDocRef);
-
-        if (docSnap.exists()) {
-            const data = docSnap.data();
+        return await fetchPlayerStats(user);
+    } catch (error) {
+        console.error('Error loading player statistics:', error);
+        return createDefaultPlayerStats();
+    }
+};
 
-            // Check if the document has the expected structure
-            if (data.summary && data.levels) {
-                return {
-                    summary: data.summary,
-                    levels: data.levels
-                };
-            } else {
-                // If the document doesn't have the expected structure, return default stats
-                console.warn('Player document does not have the expected structure, using default stats');
-                return createDefaultPlayerStats();
-            }
-        }
+/**
+ * Load player statistics, starting with the copy on this device
+ *
+ * The cached statistics are shown at once. Then the statistics are read from Firestore and
+ * reconciled with changes made on this device that were not written yet, e.g. while offline.
+ * When Firestore can't be reached, the cached statistics stay in use; call this again when the
+ * connection is back.
+ *
+ * @param user - Firebase user
+ * @param onStats - Called with the statistics to show; synced is true once they are reconciled
+ * with Firestore, so that changes can be saved again
+ * @returns Promise that resolves with true if the statistics were reconciled with Firestore
+ */
+export const loadPlayerStatsOfflineFirst = async (
+    user: User,
+    onStats: (playerStats: PlayerStatsState, synced: boolean) => void
+): Promise<boolean> => {
+    const cached = await offlineCache.getPlayerStats(user.uid);
+    if (cached) {
+        onStats(cached.stats, false);
+    }
 
-        // If the document doesn't exist, return default stats
-        return createDefaultPlayerStats();
+    let remote: PlayerStatsState;
+    try {
+        remote = await fetchPlayerStats(user);
     } catch (error) {
         console.error('Error loading player statistics:', error);
-        return createDefaultPlayerStats();
+        if (!cached) {
+            onStats(createDefaultPlayerStats(), false);
+        }
+        return false;
     }
+
+    // Statistics may have changed on this device while they were loading
+    const local = await offlineCache.getPlayerStats(user.uid);
+    const playerStats = local && hasUnsyncedStats(local) ? mergePlayerStats(remote, local.stats, local.synced) : remote;
+    await offlineCache.markPlayerStatsSynced(user.uid, remote, playerStats);
+    onStats(playerStats, true);
+    return true;
 };
 
 /**
@@ -287,17 +530,17 @@ export const fetchOwnedGroups = async (userId: string): Promise<Group[]> => {
             });
         }
 
-        // Then, for each group, count the members
-        for (const group of groups) {
+        // Then count the members of all groups concurrently, without downloading the member documents
+        await Promise.all(groups.map(async (group) => {
             try {
                 const membersCollection = collection(db, 'groups', group.id, 'members');
-                const membersSnapshot = await getDocs(membersCollection);
-                group.memberCount = membersSnapshot.size;
+                const countSnapshot = await getCountFromServer(membersCollection);
+                group.memberCount = countSnapshot.data().count;
             } catch (e) {
                 console.error(`Error counting members for group ${group.id}:`, e);
                 // Keep the default 0 if there's an error
             }
-        }
+        }));
 
         return groups;
     } catch (error) {
@@ -328,17 +571,10 @@ export const fetchJoinedGroups = async (userId: string): Promise<Group[]> => {
         }
 
         // Fetch the groups the user is a member of
-        const groupsCollection = collection(db, 'groups');
-        const q = query(
-            groupsCollection,
-            where('__name__', 'in', memberOfGroups),
-            where('deleted', '==', false)
-        );
-
-        const querySnapshot = await getDocs(q);
+        const groupDocs = await fetchDocsByIds('groups', memberOfGroups, [where('deleted', '==', false)]);
         const groups: Group[] = [];
 
-        querySnapshot.forEach((doc) => {
+        groupDocs.forEach((doc) => {
             const data = doc.data() as Group;
             groups.push({
                 ...data,
@@ -419,6 +655,38 @@ export const fetchGroupMembers = async (groupId: string): Promise<GroupMember[]>
     }
 };
 
+/**
+ * Subscribe to the members of a group
+ *
+ * The first call of the listener gets all members as added; later calls only get the members that
+ * were added, modified, or removed since the previous call.
+ *
+ * @param groupId - Group ID
+ * @param onChanges - Listener for member changes
+ * @param onError - Listener for errors; the subscription ends after an error
+ * @returns Function that ends the subscription
+ */
+export const subscribeToGroupMembers = (
+    groupId: string,
+    onChanges: (changes: GroupMemberChange[]) => void,
+    onError?: (error: Error) => void
+): Unsubscribe => {
+    const membersCollection = collection(db, 'groups', groupId, 'members');
+
+    return onSnapshot(membersCollection, (snapshot) => {
+        onChanges(snapshot.docChanges().map((change) => ({
+            type: change.type,
+            member: {
+                ...change.doc.data() as GroupMember,
+                uid: change.doc.id
+            }
+        })));
+    }, (error) => {
+        console.error('Error listening to group members:', error);
+        onError?.(error);
+    });
+};
+
 /**
  * Update a group's name
  * @param groupId - Group ID
@@ -706,6 +974,9 @@ export const joinGroup = async (
             });
         }
 
+        const memberOfGroups: string[] = (playerDoc.exists() && playerDoc.data().memberOfGroups) || [];
+        memberOfGroupsCache.set(user.uid, memberOfGroups.includes(groupId) ? memberOfGroups : [...memberOfGroups, groupId]);
+
         return group;
     } catch (error) {
         console.error('Error joining group:', error);
@@ -745,20 +1016,14 @@ export const recalculatePlayerGroupMembership = async (userId: string): Promise<
         const validGroups: Group[] = [];
         const validTeacherIds: string[] = [];
 
-        // Process groups in batches to avoid potential limitations
-        const batchSize = 10;
-        for (let i = 0; i < memberOfGroups.length; i += batchSize) {
-            const batch = memberOfGroups.slice(i, i + batchSize);
-            const groupPromises = batch.map((groupId: string) => fetchGroupById(groupId));
-            const groups = await Promise.all(groupPromises);
-
-            for (const group of groups) {
-                if (group && !group.deleted) {
-                    validGroups.push(group);
-                    // Add the owner to teacherIds if not already included
-                    if (!validTeacherIds.includes(group.ownerUid)) {
-                        validTeacherIds.push(group.ownerUid);
-                    }
+        const groupDocs = await fetchDocsByIds('groups', memberOfGroups);
+        for (const groupDoc of groupDocs) {
+            const group = {...groupDoc.data() as Group, id: groupDoc.id};
+            if (!group.deleted) {
+                validGroups.push(group);
+                // Add the owner to teacherIds if not already included
+                if (!validTeacherIds.includes(group.ownerUid)) {
+                    validTeacherIds.push(group.ownerUid);
                 }
             }
         }
@@ -808,6 +1073,7 @@ export const leaveGroup = async (groupId: string, userId: string): Promise<void>
             teacherIds: teacherIds,
             updatedAt: serverTimestamp()
         });
+        memberOfGroupsCache.set(userId, updatedMemberOfGroups);
     } catch (error) {
         console.error('Error leaving group:', error);
         throw error;
@@ -928,11 +1194,18 @@ export const getCustomLevelById = async (levelId: string): Promise<CustomLevel |
         const levelDoc = await getDoc(levelDocRef);
 
         if (levelDoc.exists()) {
-            return levelDoc.data() as CustomLevel;
+            const level = levelDoc.data() as CustomLevel;
+            offlineCache.put(`customLevel/${levelId}`, level);
+            return level;
         }
 
+        offlineCache.delete(`customLevel/${levelId}`);
         return null;
     } catch (error) {
+        // Offline, a level seen before is still playable
+        const cached = await offlineCache.get<CustomLevel>(`customLevel/${levelId}`);
+        if (cached) return cached;
+
         console.error('Error getting custom level by ID:', error);
         throw error;
     }
@@ -964,6 +1237,61 @@ export const getUserLevels = async (userId: string): Promise<UserLevel[] | null>
     }
 };
 
+/**
+ * Get the details of a user's levels from the copy on this device
+ * @param levels - The user's levels
+ * @returns Cached custom levels by level ID
+ */
+const getCachedCustomLevels = async (levels: UserLevel[]): Promise<Record<string, CustomLevel>> => {
+    const customLevels: Record<string, CustomLevel> = {};
+    await Promise.all(levels.map(async (level) => {
+        const customLevel = await offlineCache.get<CustomLevel>(`customLevel/${level.level_id}`);
+        if (customLevel) {
+            customLevels[level.level_id] = customLevel;
+        }
+    }));
+    return customLevels;
+};
+
+/**
+ * Load a user's levels with their details, starting with the copy on this device
+ *
+ * The cached levels are shown at once, then they are read from Firestore. Details of levels that
+ * can't be read are taken from the cache, so levels seen before stay playable offline.
+ *
+ * @param userId - User ID
+ * @param onLevels - Called with the cached levels, if any, and again with the levels from Firestore
+ * @returns Promise that resolves when the levels are read from Firestore, or rejects if they can't be
+ */
+export const loadUserLevelsOfflineFirst = async (
+    userId: string,
+    onLevels: (levels: UserLevel[], customLevels: Record<string, CustomLevel>) => void
+): Promise<void> => {
+    const cachedLevels = await offlineCache.get<UserLevel[]>(`userLevels/${userId}`);
+    if (cachedLevels) {
+        onLevels(cachedLevels, await getCachedCustomLevels(cachedLevels));
+    }
+
+    const levels = await getUserLevels(userId);
+    if (!levels) return;
+    offlineCache.put(`userLevels/${userId}`, levels);
+
+    // Fetch custom level details for each level_id
+    const customLevels: Record<string, CustomLevel> = {};
+    await Promise.all(levels.map(async (level) => {
+        try {
+            const customLevel = await getCustomLevelById(level.level_id);
+            if (customLevel) {
+                customLevels[level.level_id] = customLevel;
+            }
+        } catch (error) {
+            console.error(`Error fetching custom level ${level.level_id}:`, error);
+        }
+    }));
+
+    onLevels(levels, customLevels);
+};
+
 /**
  * Delete a level from a user's levels
  * This removes the level from userLevels collection but does not delete it from communityLevels
@@ -1015,32 +1343,121 @@ export const isUserAdmin = async (userId: string): Promise<boolean> => {
     }
 };
 
-export const fetchRecentlyActiveUsers = async (limitCount: number = 50): Promise<UserActivity[]> => {
+// Number of players per page of the admin activity feed
+export const ACTIVITY_PAGE_SIZE = 50;
+
+/**
+ * A page of the admin activity feed
+ */
+export interface UserActivityPage {
+    users: UserActivity[];
+    cursor: QueryDocumentSnapshot | null;   // pass to fetch the next page; null after the last page
+}
+
+/**
+ * Convert a player activity document to user activity
+ * @param doc - Player activity document
+ * @returns User activity
+ */
+const toUserActivity = (doc: QueryDocumentSnapshot): UserActivity => {
+    const data = doc.data();
+    return {
+        uid: doc.id,
+        displayName: data.displayName || 'Unknown',
+        email: data.email || 'No email',
+        totalLevelCompletions: data.summary?.totalLevelCompletions || 0,
+        totalLevelsSolved: data.summary?.totalLevelsSolved || 0,
+        totalTimeSpent: data.summary?.totalTimeSpent || 0,
+        totalHintsUsed: data.summary?.totalHintsUsed || 0,
+        totalMistakesMade: data.summary?.totalMistakesMade || 0,
+        lastPlayedAt: data.updatedAt?.toDate().toISOString() || null,
+        createdAt: data.createdAt?.toDate().toISOString() || null
+    };
+};
+
+/**
+ * Fetch a page of players, most recently active first
+ *
+ * Reads the activity mirror documents, so the per-level statistics aren't transferred.
+ *
+ * @param pageSize - Number of players per page
+ * @param cursor - Cursor of the previous page, or null for the first page
+ * @returns Promise that resolves with the page
+ */
+export const fetchUserActivityPage = async (
+    pageSize: number = ACTIVITY_PAGE_SIZE,
+    cursor: QueryDocumentSnapshot | null = null
+): Promise<UserActivityPage> => {
     try {
-        const playerStatsRef = collection(db, 'playerStats');
-        const q = query(
-            playerStatsRef,
-            orderBy('updatedAt', 'desc'),
-            limit(limitCount)
-        );
+        const constraints: QueryConstraint[] = [orderBy('updatedAt', 'desc')];
+        if (cursor) {
+            constraints.push(startAfter(cursor));
+        }
+        constraints.push(limit(pageSize));
 
-        const querySnapshot = await getDocs(q);
+        const querySnapshot = await getDocs(query(collection(db, 'playerActivity'), ...constraints));
+        const docs = querySnapshot.docs;
 
-        return querySnapshot.docs.map(doc => {
-            const data = doc.data();
-            return {
-                uid: doc.id,
-                displayName: data.displayName || 'Unknown',
-                email: data.email || 'No email',
-                totalLevelCompletions: data.summary?.totalLevelCompletions || 0,
-                totalLevelsSolved: data.summary?.totalLevelsSolved || 0,
-                totalTimeSpent: data.summary?.totalTimeSpent || 0,
-                totalHintsUsed: data.summary?.totalHintsUsed || 0,
-                totalMistakesMade: data.summary?.totalMistakesMade || 0,
-                lastPlayedAt: data.updatedAt?.toDate().toISOString() || null,
-                createdAt: data.createdAt?.toDate().toISOString() || null
-            };
-        });
+        return {
+            users: docs.map(toUserActivity),
+            cursor: docs.length === pageSize ? docs[docs.length - 1] : null
+        };
+    } catch (error) {
+        console.error('Error fetching user activity page:', error);
+        throw error;
+    }
+};
+
+/**
+ * Create the activity documents of all players from their player statistics
+ *
+ * Players get an activity document with every save; this fills in the players who haven't
+ * played since activity documents were introduced. Reads every player document once.
+ *
+ * @param pageSize - Number of players read and written per batch
+ * @returns Promise that resolves with the number of activity documents written
+ */
+export const backfillPlayerActivity = async (pageSize: number = 200): Promise<number> => {
+    try {
+        let cursor: QueryDocumentSnapshot | null = null;
+        let written = 0;
+
+        do {
+            const constraints: QueryConstraint[] = [orderBy(documentId())];
+            if (cursor) {
+                constraints.push(startAfter(cursor));
+            }
+            constraints.push(limit(pageSize));
+            const querySnapshot = await getDocs(query(collection(db, 'playerStats'), ...constraints));
+
+            const batch = writeBatch(db);
+            for (const playerDoc of querySnapshot.docs) {
+                const data = playerDoc.data();
+                batch.set(getPlayerActivityDocRef(playerDoc.id), {
+                    displayName: data.displayName ?? null,
+                    email: data.email ?? null,
+                    summary: data.summary || createDefaultPlayerStats().summary,
+                    createdAt: data.createdAt ?? null,
+                    updatedAt: data.updatedAt ?? null
+                });
+            }
+            await batch.commit();
+
+            written += querySnapshot.size;
+            cursor = querySnapshot.size === pageSize ? querySnapshot.docs[querySnapshot.size - 1] : null;
+        } while (cursor);
+
+        return written;
+    } catch (error) {
+        console.error('Error backfilling player activity:', error);
+        throw error;
+    }
+};
+
+export const fetchRecentlyActiveUsers = async (limitCount: number = ACTIVITY_PAGE_SIZE): Promise<UserActivity[]> => {
+    try {
+        const {users} = await fetchUserActivityPage(limitCount);
+        return users;
     } catch (error) {
         console.error('Error fetching recently active users:', error);
         return [];
@@ -0,0 +1,215 @@
+// Offline-first local copy of player data in IndexedDB
+import {PlayerLevelStats, PlayerStatsState} from '../types';
+import {createDefaultLevelStats} from '../reducers/statsReducer';
+
+export const OFFLINE_DB_NAME = 'cleanCodeGame';
+export const OFFLINE_DB_VERSION = 1;
+const SNAPSHOT_STORE = 'snapshots';
+
+/**
+ * Cached statistics of a player
+ */
+export interface CachedPlayerStats {
+    stats: PlayerStatsState;            // latest statistics on this device
+    synced: PlayerStatsState | null;    // statistics last read from or written to Firestore, null if unknown
+}
+
+const SUM_FIELDS = ['timesCompleted', 'totalTimeSpent', 'totalHintsUsed', 'totalMistakesMade'] as const;
+const MIN_FIELDS = ['minTimeSpent', 'minHintsUsed', 'minMistakesMade'] as const;
+
+const levelStatsEqual = (a: PlayerLevelStats, b: PlayerLevelStats): boolean =>
+    SUM_FIELDS.every(field => a[field] === b[field]) && MIN_FIELDS.every(field => a[field] === b[field]);
+
+/**
+ * Check if statistics have changes that are not in Firestore yet
+ * @param cached - Cached statistics
+ * @returns True if the statistics differ from the last synced ones
+ */
+export const hasUnsyncedStats = (cached: CachedPlayerStats): boolean => {
+    const {stats, synced} = cached;
+    if (!synced) return true;
+    const keys = Object.keys(stats.levels);
+    return keys.length !== Object.keys(synced.levels).length ||
+        keys.some(key => !synced.levels[key] || !levelStatsEqual(stats.levels[key], synced.levels[key]));
+};
+
+/**
+ * Merge statistics played on this device into the statistics in Firestore
+ *
+ * Follows statsReducer: counters only grow, so the local increments since the last sync are added
+ * to the remote counters, and minimums take the smaller value. Without a known sync state, the
+ * larger counter wins, so nothing is counted twice. The summary grows by the same amounts as the
+ * levels, and a level counts as newly solved if it was not completed remotely.
+ *
+ * @param remote - Statistics in Firestore
+ * @param local - Statistics on this device
+ * @param base - Statistics at the last sync of this device, or null if unknown
+ * @returns The merged statistics
+ */
+export const mergePlayerStats = (
+    remote: PlayerStatsState,
+    local: PlayerStatsState,
+    base: PlayerStatsState | null
+): PlayerStatsState => {
+    const levels: Record<string, PlayerLevelStats> = {...remote.levels};
+    const summary = {...remote.summary};
+
+    for (const [key, localLevel] of Object.entries(local.levels)) {
+        if (remote.levels[key] && levelStatsEqual(remote.levels[key], localLevel)) continue;
+        const remoteLevel = remote.levels[key] ?? createDefaultLevelStats();
+        const baseLevel = base ? base.levels[key] ?? createDefaultLevelStats() : null;
+
+        const merged = {...remoteLevel};
+        for (const field of SUM_FIELDS) {
+            merged[field] = baseLevel
+                ? remoteLevel[field] + Math.max(0, localLevel[field] - baseLevel[field])
+                : Math.max(remoteLevel[field], localLevel[field]);
+        }
+        for (const field of MIN_FIELDS) {
+            merged[field] = Math.min(remoteLevel[field], localLevel[field]);
+        }
+        levels[key] = merged;
+
+        summary.totalLevelCompletions += merged.timesCompleted - remoteLevel.timesCompleted;
+        summary.totalTimeSpent += merged.totalTimeSpent - remoteLevel.totalTimeSpent;
+        summary.totalHintsUsed += merged.totalHintsUsed - remoteLevel.totalHintsUsed;
+        summary.totalMistakesMade += merged.totalMistakesMade - remoteLevel.totalMistakesMade;
+        if (remoteLevel.timesCompleted === 0 && merged.timesCompleted > 0) {
+            summary.totalLevelsSolved += 1;
+        }
+    }
+
+    return {summary, levels};
+};
+
+/**
+ * Key-value store in IndexedDB
+ *
+ * The cache never fails: without IndexedDB, or when a request fails, reads return undefined and
+ * writes are dropped, so the app keeps working online.
+ */
+export class OfflineCache {
+    private readonly factory: IDBFactory | undefined;
+    private readonly dbName: string;
+    private db: Promise<IDBDatabase | null> | null = null;
+
+    /**
+     * @param factory - IndexedDB implementation, the browser's by default
+     * @param dbName - Name of the database
+     */
+    constructor(factory: IDBFactory | undefined = globalThis.indexedDB, dbName: string = OFFLINE_DB_NAME) {
+        this.factory = factory;
+        this.dbName = dbName;
+    }
+
+    private open(): Promise<IDBDatabase | null> {
+        if (!this.db) {
+            this.db = new Promise(resolve => {
+                if (!this.factory) {
+                    resolve(null);
+                    return;
+                }
+                const request = this.factory.open(this.dbName, OFFLINE_DB_VERSION);
+                request.onupgradeneeded = () => request.result.createObjectStore(SNAPSHOT_STORE);
+                request.onsuccess = () => resolve(request.result);
+                request.onerror = () => {
+                    console.warn('Offline cache is not available:', request.error);
+                    resolve(null);
+                };
+            });
+        }
+        return this.db;
+    }
+
+    /**
+     * Run one transaction on the snapshot store
+     * @returns Result of the transaction, or undefined if the cache is not available
+     */
+    private async transaction<T>(
+        mode: IDBTransactionMode,
+        run: (store: IDBObjectStore, done: (result: T) => void) => void
+    ): Promise<T | undefined> {
+        const db = await this.open();
+        if (!db) return undefined;
+
+        return new Promise(resolve => {
+            let result: T | undefined;
+            try {
+                const transaction = db.transaction(SNAPSHOT_STORE, mode);
+                transaction.oncomplete = () => resolve(result);
+                transaction.onerror = () => {
+                    console.warn('Offline cache request failed:', transaction.error);
+                    resolve(undefined);
+                };
+                transaction.onabort = () => resolve(undefined);
+                run(transaction.objectStore(SNAPSHOT_STORE), value => result = value);
+            } catch (error) {
+                console.warn('Offline cache request failed:', error);
+                resolve(undefined);
+            }
+        });
+    }
+
+    /**
+     * Read a value
+     * @param key - The key
+     * @returns The value, or undefined if there is none
+     */
+    get<T>(key: string): Promise<T | undefined> {
+        return this.transaction<T>('readonly', (store, done) => {
+            const request = store.get(key);
+            request.onsuccess = () => done(request.result as T);
+        });
+    }
+
+    /**
+     * Store a value
+     * @param key - The key
+     * @param value - The value; must be structured-cloneable
+     */
+    async put(key: string, value: unknown): Promise<void> {
+        await this.transaction('readwrite', store => store.put(value, key));
+    }
+
+    /**
+     * Update a value in a single transaction, so concurrent updates are not lost
+     * @param key - The key
+     * @param update - Computes the new value from the current one
+     */
+    async update<T>(key: string, update: (value: T | undefined) => T): Promise<void> {
+        await this.transaction('readwrite', store => {
+            const request = store.get(key);
+            request.onsuccess = () => store.put(update(request.result as T | undefined), key);
+        });
+    }
+
+    async delete(key: string): Promise<void> {
+        await this.transaction('readwrite', store => store.delete(key));
+    }
+
+    getPlayerStats(userId: string): Promise<CachedPlayerStats | undefined> {
+        return this.get<CachedPlayerStats>(`playerStats/${userId}`);
+    }
+
+    /**
+     * Store the latest statistics of a player on this device
+     * @param userId - User ID
+     * @param stats - Current statistics
+     */
+    savePlayerStats(userId: string, stats: PlayerStatsState): Promise<void> {
+        return this.update<CachedPlayerStats>(`playerStats/${userId}`, cached => ({stats, synced: cached?.synced ?? null}));
+    }
+
+    /**
+     * Record statistics that Firestore has, after reading or writing them
+     * @param userId - User ID
+     * @param synced - Statistics in Firestore
+     * @param stats - Latest statistics on this device, if they changed too
+     */
+    markPlayerStatsSynced(userId: string, synced: PlayerStatsState, stats?: PlayerStatsState): Promise<void> {
+        return this.update<CachedPlayerStats>(`playerStats/${userId}`, cached => ({
+            stats: stats ?? cached?.stats ?? synced,
+            synced
+        }));
+    }
+}
@@ -0,0 +1,195 @@
+// Write-behind queue for player statistics: coalesces changes and writes only what differs
+import {PlayerLevelStats, PlayerStatsState, PlayerSummaryStats, User} from '../types';
+
+// How long changes are collected before they are written
+export const STATS_WRITE_DELAY_MS = 2000;
+
+/**
+ * Changes of the player statistics since the last successful write
+ */
+export interface PlayerStatsPatch {
+    summary?: PlayerSummaryStats;                       // set if any summary field changed
+    levels: Record<string, PlayerLevelStats | null>;    // changed levels, null for removed levels
+}
+
+/**
+ * A single write of the queue
+ */
+export interface PlayerStatsWrite {
+    user: User;
+    patch: PlayerStatsPatch;
+    stats: PlayerStatsState;    // the complete statistics the patch brings the stored document to
+    isNew: boolean;             // whether the document is known not to exist yet
+}
+
+export type PlayerStatsWriter = (write: PlayerStatsWrite) => Promise<void>;
+
+interface PersistedStats {
+    stats: PlayerStatsState | null;     // null if the stored statistics are unknown
+    exists: boolean;
+}
+
+const shallowEqual = (a: object, b: object): boolean => {
+    const aKeys = Object.keys(a);
+    if (aKeys.length !== Object.keys(b).length) return false;
+    return aKeys.every(key => Object.is(a[key as keyof typeof a], b[key as keyof typeof b]));
+};
+
+/**
+ * Compute the changes between stored and current player statistics
+ * @param persisted - Stored statistics, or null if unknown
+ * @param stats - Current statistics
+ * @returns The changes, or null if there's nothing to write
+ */
+export const diffPlayerStats = (persisted: PlayerStatsState | null, stats: PlayerStatsState): PlayerStatsPatch | null => {
+    if (!persisted) {
+        return {summary: stats.summary, levels: {...stats.levels}};
+    }
+
+    const patch: PlayerStatsPatch = {levels: {}};
+    let changed = false;
+
+    if (!shallowEqual(persisted.summary, stats.summary)) {
+        patch.summary = stats.summary;
+        changed = true;
+    }
+    for (const [key, levelStats] of Object.entries(stats.levels)) {
+        const previous = persisted.levels[key];
+        if (!previous || !shallowEqual(previous, levelStats)) {
+            patch.levels[key] = levelStats;
+            changed = true;
+        }
+    }
+    for (const key of Object.keys(persisted.levels)) {
+        if (!(key in stats.levels)) {
+            patch.levels[key] = null;
+            changed = true;
+        }
+    }
+
+    return changed ? patch : null;
+};
+
+/**
+ * Debounced, diff-based persistence of player statistics
+ *
+ * Scheduled statistics are collected for a short time and then written as one patch against the
+ * last successfully written statistics of the user. Writes never overlap; a failed write leaves its
+ * changes queued for the next attempt.
+ */
+export class PlayerStatsWriteBehind {
+    private persisted = new Map<string, PersistedStats>();
+    private pending: { user: User; stats: PlayerStatsState } | null = null;
+    private timer: ReturnType<typeof setTimeout> | null = null;
+    private inFlight: Promise<void> = Promise.resolve();
+    private flushCount = 0;
+    private readonly writer: PlayerStatsWriter;
+    private readonly delayMs: number;
+
+    /**
+     * @param writer - Writes one patch to the storage
+     * @param delayMs - How long changes are collected before they are written
+     */
+    constructor(writer: PlayerStatsWriter, delayMs: number = STATS_WRITE_DELAY_MS) {
+        this.writer = writer;
+        this.delayMs = delayMs;
+    }
+
+    /**
+     * Record the statistics that are currently stored for a user, e.g. after loading them
+     * @param userId - User ID
+     * @param stats - Stored statistics, or null if they are unknown
+     * @param exists - Whether the user's document exists
+     */
+    setPersisted(userId: string, stats: PlayerStatsState | null, exists: boolean): void {
+        this.persisted.set(userId, {stats, exists});
+    }
+
+    /**
+     * Queue statistics to be written after the write delay
+     *
+     * Statistics scheduled within the delay replace each other, so only the latest are written.
+     *
+     * @param user - Firebase user
+     * @param stats - Current player statistics
+     */
+    schedule(user: User, stats: PlayerStatsState): void {
+        if (this.pending && this.pending.user.uid !== user.uid) {
+            // Don't let another user's statistics replace unwritten changes
+            this.flush().catch(error => console.error('Error saving player statistics:', error));
+        }
+        this.pending = {user, stats};
+        if (this.timer === null) {
+            this.timer = setTimeout(() => {
+                this.timer = null;
+                this.flush().catch(error => console.error('Error saving player statistics:', error));
+            }, this.delayMs);
+        }
+    }
+
+    /**
+     * Write the queued statistics now
+     * @returns Promise that resolves when the queued statistics are written
+     */
+    flush(): Promise<void> {
+        if (this.timer !== null) {
+            clearTimeout(this.timer);
+            this.timer = null;
+        }
+        const pending = this.pending;
+        if (!pending) return this.inFlight;
+        this.pending = null;
+        const flushNumber = ++this.flushCount;
+
+        const write = this.inFlight.then(() => this.write(pending.user, pending.stats, flushNumber));
+        this.inFlight = write.catch(() => undefined);
+        return write;
+    }
+
+    /**
+     * Whether there are statistics waiting to be written
+     */
+    hasPending(): boolean {
+        return this.pending !== null;
+    }
+
+    private async write(user: User, stats: PlayerStatsState, flushNumber: number): Promise<void> {
+        const persisted = this.persisted.get(user.uid);
+        const patch = diffPlayerStats(persisted?.stats ?? null, stats);
+        if (!patch) return;
+
+        try {
+            await this.writer({user, patch, stats, isNew: persisted?.exists === false});
+            this.persisted.set(user.uid, {stats, exists: true});
+        } catch (error) {
+            // Retry with the next write, unless newer statistics are already queued or being written
+            if (!this.pending && flushNumber === this.flushCount) {
+                this.pending = {user, stats};
+            }
+            throw error;
+        }
+    }
+}
+
+/**
+ * Flush a write-behind queue when the page is hidden or unloaded
+ * @param queue - The queue to flush
+ * @returns Function that removes the listeners
+ */
+export const flushOnPageHide = (queue: PlayerStatsWriteBehind): (() => void) => {
+    const flush = () => {
+        if (queue.hasPending()) {
+            queue.flush().catch(error => console.error('Error saving player statistics:', error));
+        }
+    };
+    const onVisibilityChange = () => {
+        if (document.visibilityState === 'hidden') flush();
+    };
+
+    document.addEventListener('visibilitychange', onVisibilityChange);
+    window.addEventListener('pagehide', flush);
+    return () => {
+        document.removeEventListener('visibilitychange', onVisibilityChange);
+        window.removeEventListener('pagehide', flush);
+    };
+};
@@ -0,0 +1,351 @@
+import * as fs from 'fs';
+import * as path from 'path';
+import {
+    GeminiClient,
+    GeminiResponseCache,
+    GenerationOptions,
+    generateHintsForAllEvents,
+    generateLevelFixes,
+    generateRandomPythonCode,
+    generateStartAndFinalMessages,
+    RequestPool
+} from '../utils/aiCoAuthor.ts';
+import {parseLevelText} from "./parser.ts";
+
+export const DEFAULT_MODEL = 'gemini-2.5-flash';
+export const DEFAULT_CHECKPOINT_DIR = path.join('node_modules', '.cache', 'levels-generator');
+
+const CHECKPOINT_VERSION = 1;
+
+export interface GenerateLevelsOptions {
+    apiKey: string;
+    model?: string;                     // Gemini model, DEFAULT_MODEL by default
+    apiUrl?: string;                    // base URL of the API, e.g. of a local stand-in server
+    jobs?: number;                      // levels generated at the same time
+    concurrency?: number;               // requests sent at the same time
+    requestsPerMinute?: number;         // maximum rate of requests, unlimited by default
+    attempts?: number;                  // generations of a level before it is given up as invalid
+    checkpointFile?: string | null;     // path of the checkpoint, null to start from scratch every time
+    topicName?: string;                 // name for a new topic.json, the directory name by default
+    verbose?: boolean;                  // log the prompts, requests and responses of the co-author
+}
+
+export interface LevelFailure {
+    issue: string;
+    error: string;
+}
+
+export interface GenerateLevelsResult {
+    written: string[];                  // paths of the level files written by this run
+    skipped: number;                    // issues whose level was written by an earlier run
+    failed: LevelFailure[];             // issues without a valid level, in the order of the issues
+}
+
+interface LevelRecord {
+    file?: string;                      // name of the written level file
+    error?: string;                     // why the last generation failed
+    invalid?: boolean;                  // the failed level was generated but is not valid
+}
+
+interface CheckpointData {
+    version: number;
+    firstNumber: number;                // number of the level file of the first issue
+    responses: Record<string, unknown>;
+    levels: Record<string, LevelRecord>;
+}
+
+/**
+ * Progress of a batch on disk: the responses of the model and the outcome of every issue
+ *
+ * The checkpoint is written after every response, so an interrupted run continues where it
+ * stopped without sending the same requests again.
+ */
+class Checkpoint implements GeminiResponseCache {
+    readonly data: CheckpointData;
+    private readonly file: string | null;
+
+    constructor(file: string | null, firstNumber: number) {
+        this.file = file;
+        this.data = {version: CHECKPOINT_VERSION, firstNumber, responses: {}, levels: {}};
+        if (file && fs.existsSync(file)) {
+            try {
+                const data = JSON.parse(fs.readFileSync(file, 'utf-8')) as CheckpointData;
+                if (data.version === CHECKPOINT_VERSION) {
+                    this.data = data;
+                }
+            } catch (err) {
+                console.warn(`Ignoring unreadable checkpoint ${file}:`, err);
+            }
+        }
+    }
+
+    async get<T>(key: string): Promise<T | undefined> {
+        return this.data.responses[key] as T | undefined;
+    }
+
+    async put(key: string, value: unknown): Promise<void> {
+        this.data.responses[key] = value;
+        this.save();
+    }
+
+    setLevel(issue: string, record: LevelRecord): void {
+        this.data.levels[issue] = record;
+        this.save();
+    }
+
+    /**
+     * Write the checkpoint to a temporary file first, so an interruption never leaves half of it
+     */
+    private save(): void {
+        if (!this.file) return;
+        fs.mkdirSync(path.dirname(this.file), {recursive: true});
+        const temporaryFile = `${this.file}.tmp`;
+        fs.writeFileSync(temporaryFile, JSON.stringify(this.data), 'utf-8');
+        fs.renameSync(temporaryFile, this.file);
+    }
+}
+
+/**
+ * Read code style issues from a text file: one issue per line, '#' starts a comment line
+ */
+export function readIssues(file: string): string[] {
+    return fs.readFileSync(file, 'utf-8')
+        .split(/\r?\n/)
+        .map(line => line.trim())
+        .filter(line => line && !line.startsWith('#'));
+}
+
+/**
+ * Check that a generated level is complete
+ * @returns - The problem, or null if the level is valid and complete
+ */
+export function checkGeneratedLevel(code: string): string | null {
+    const {level, error} = parseLevelText(code);
+    if (error || !level) {
+        return error ?? 'Level could not be parsed';
+    }
+    const isMissing = (text: string | undefined) => !text || text.trim() === 'TODO';
+    if (isMissing(level.startMessage) || isMissing(level.finalMessage)) {
+        return 'Level has no start or final message';
+    }
+    const fixes = level.blocks.filter(block => block.type === 'replace' || block.type === 'replace-span');
+    if (fixes.length === 0) {
+        return 'Level has no fixes';
+    }
+    const incomplete = fixes.find(block => !block.hint || !block.explanation);
+    if (incomplete) {
+        return `Fix of '${incomplete.clickable}' has no hint or explanation`;
+    }
+    return null;
+}
+
+/**
+ * Generate a complete level for a code style issue: code, fixes, messages, hints and options
+ */
+async function generateLevelText(
+    issue: string,
+    apiKey: string,
+    model: string,
+    options: GenerationOptions
+): Promise<string> {
+    let code = await generateRandomPythonCode(issue, apiKey, model, options);
+    code = await generateLevelFixes(code, issue, apiKey, model, options);
+    code = await generateStartAndFinalMessages(code, apiKey, model, options);
+    return generateHintsForAllEvents(code, apiKey, model, 'both', options);
+}
+
+/**
+ * Number of the next level file in a topic directory, after the numbered files it already has
+ */
+function nextLevelNumber(topicDir: string): number {
+    const numbers = fs.existsSync(topicDir)
+        ? fs.readdirSync(topicDir)
+            .filter(file => file.endsWith('.py'))
+            .map(file => parseInt(file, 10))
+            .filter(number => Number.isInteger(number))
+        : [];
+    return Math.max(0, ...numbers) + 1;
+}
+
+/**
+ * Name of a level file: the number of the level and the file name chosen by the model
+ */
+function levelFileName(number: number, code: string): string {
+    const filename = parseLevelText(code).level?.filename ?? '';
+    const name = path.basename(filename, '.py').toLowerCase().replace(/[^a-z0-9_]+/g, '-').replace(/^-+|-+$/g, '');
+    return `${String(number).padStart(2, '0')}-${name || 'level'}.py`;
+}
+
+/**
+ * Generate one level file per code style issue into a topic directory
+ *
+ * Up to `jobs` levels are generated at the same time, sharing one client whose requests are
+ * limited by `concurrency` and `requestsPerMinute`. Every level is checked with parseLevelText
+ * before it is written; levels that are not valid are generated again with new responses, up to
+ * `attempts` times.
+ *
+ * Responses and written files are recorded in the checkpoint. A run with the same checkpoint skips
+ * the issues whose level was written, and reuses the responses of interrupted levels. Levels that
+ * were not valid are generated with new responses.
+ *
+ * @param issues - Code style issues, one level each
+ * @param topicDir - Topic directory for the level files; created with a topic.json if missing
+ * @param options - API key, model and limits
+ * @returns - Written files, skipped issues and failures
+ */
+export async function generateLevels(
+    issues: string[],
+    topicDir: string,
+    options: GenerateLevelsOptions
+): Promise<GenerateLevelsResult> {
+    const {apiKey, model = DEFAULT_MODEL, jobs = 2, attempts = 2} = options;
+    const checkpointFile = options.checkpointFile === undefined
+        ? path.join(DEFAULT_CHECKPOINT_DIR, `${path.basename(path.resolve(topicDir))}.json`)
+        : options.checkpointFile;
+    const checkpoint = new Checkpoint(checkpointFile, nextLevelNumber(topicDir));
+    const client = new GeminiClient({
+        apiUrl: options.apiUrl,
+        concurrency: options.concurrency,
+        requestsPerMinute: options.requestsPerMinute,
+        quiet: !options.verbose,
+        cache: checkpoint
+    });
+
+    fs.mkdirSync(topicDir, {recursive: true});
+    const topicFile = path.join(topicDir, 'topic.json');
+    if (!fs.existsSync(topicFile)) {
+        const name = options.topicName ?? path.basename(path.resolve(topicDir));
+        // Generated levels are reviewed before players see them
+        fs.writeFileSync(topicFile, JSON.stringify({name, inDevelopment: true}, null, 2) + '\n', 'utf-8');
+    }
+
+    const result: GenerateLevelsResult = {written: [], skipped: 0, failed: []};
+    const failures: (LevelFailure | null)[] = issues.map(() => null);
+    const pool = new RequestPool(jobs);
+
+    await Promise.all(issues.map((issue, index) => pool.run(async () => {
+        const record = checkpoint.data.levels[issue];
+        if (record?.file && fs.existsSync(path.join(topicDir, record.file))) {
+            result.skipped++;
+            return;
+        }
+
+        let error = 'Level was not generated';
+        for (let attempt = 0; attempt < Math.max(1, attempts); attempt++) {
+            // Responses that led to an invalid level are not reused
+            const refresh = attempt > 0 || record?.invalid === true;
+            let code: string;
+            try {
+                code = await generateLevelText(issue, apiKey, model, {client, refresh});
+            } catch (err) {
+                // Requests are already retried by the client, so give up until the next run
+                error = err instanceof Error ? err.message : String(err);
+                checkpoint.setLevel(issue, {error});
+                break;
+            }
+
+            const problem = checkGeneratedLevel(code);
+            if (problem) {
+                error = problem;
+                checkpoint.setLevel(issue, {error, invalid: true});
+                continue;
+            }
+
+            const file = levelFileName(checkpoint.data.firstNumber + index, code);
+            const filePath = path.join(topicDir, file);
+            if (fs.existsSync(filePath)) {
+                error = `${filePath} already exists`;
+                checkpoint.setLevel(issue, {error});
+                break;
+            }
+            fs.writeFileSync(filePath, code.endsWith('\n') ? code : code + '\n', 'utf-8');
+            checkpoint.setLevel(issue, {file});
+            result.written.push(filePath);
+            console.info(`  ✅ ${filePath}`);
+            return;
+        }
+        failures[index] = {issue, error};
+        console.info(`  ❌ ${issue}: ${error}`);
+    })));
+
+    result.failed = failures.filter((failure): failure is LevelFailure => failure !== null);
+    result.written.sort();
+    return result;
+}
+
+// If this file is run directly
+const isMainModule = import.meta.url.endsWith(process.argv[1].replace(/\\/g, '/'));
+if (isMainModule) {
+    const usage = 'Usage: GEMINI_API_KEY=<key> generateLevels.ts <issuesFile> <topicDir> [--model M] [--jobs N]'
+        + ' [--concurrency N] [--rpm N] [--attempts N] [--api-url URL] [--checkpoint FILE] [--no-checkpoint]'
+        + ' [--topic-name NAME] [--verbose]';
+    const args = process.argv.slice(2);
+    const positional: string[] = [];
+    const options: GenerateLevelsOptions = {apiKey: process.env.GEMINI_API_KEY ?? ''};
+
+    const readNumber = (value: string | undefined): number => {
+        const number = Number(value);
+        if (!Number.isInteger(number) || number < 1) {
+            console.error(usage);
+            process.exit(1);
+        }
+        return number;
+    };
+
+    for (let i = 0; i < args.length; i++) {
+        switch (args[i]) {
+            case '--model':
+                options.model = args[++i];
+                break;
+            case '--jobs':
+                options.jobs = readNumber(args[++i]);
+                break;
+            case '--concurrency':
+                options.concurrency = readNumber(args[++i]);
+                break;
+            case '--rpm':
+                options.requestsPerMinute = readNumber(args[++i]);
+                break;
+            case '--attempts':
+                options.attempts = readNumber(args[++i]);
+                break;
+            case '--api-url':
+                options.apiUrl = args[++i];
+                break;
+            case '--checkpoint':
+                options.checkpointFile = args[++i];
+                break;
+            case '--no-checkpoint':
+                options.checkpointFile = null;
+                break;
+            case '--topic-name':
+                options.topicName = args[++i];
+                break;
+            case '--verbose':
+                options.verbose = true;
+                break;
+            default:
+                positional.push(args[i]);
+        }
+    }
+
+    const [issuesFile, topicDir] = positional;
+
+    if (!issuesFile || !topicDir || !options.apiKey) {
+        console.error(usage);
+        process.exit(1);
+    }
+
+    try {
+        const issues = readIssues(issuesFile);
+        console.info(`Generating ${issues.length} level(s) into ${topicDir}`);
+        const {written, skipped, failed} = await generateLevels(issues, topicDir, options);
+        console.info(`Wrote ${written.length} level(s), skipped ${skipped} written before, ${failed.length} failed`);
+        if (failed.length > 0) {
+            process.exit(1);
+        }
+    } catch (err) {
+        console.error('Error during level generation:', err);
+        process.exit(1);
+    }
+}
@@ -1,14 +1,116 @@
 import * as fs from 'fs';
 import * as path from 'path';
-import type {Topic} from '../types.js'
-import {parseLevelFile} from "./parser.ts";
+import {createHash} from 'crypto';
+import {Worker} from 'worker_threads';
+import type {LevelData, LevelsManifest, Topic} from '../types.js'
+import {PARSER_VERSION, parseLevelSource, ParseResult} from "./parser.ts";
+import type {ParseTask, ParseTaskResult} from "./parseWorker.ts";
+import {compileInitialLevelState} from "../utils/initialLevelState.ts";
 
 export interface OutputStructure {
     topics: Topic[];
 }
 
-export function generate(source: string, output: string): void {
-    const outputStructure: OutputStructure = {topics: []};
+export const DEFAULT_CACHE_FILE = path.join('node_modules', '.cache', 'levels-compiler', 'cache.json');
+
+export interface GenerateOptions {
+    cacheFile?: string | null;   // path of the compile cache, null disables caching
+    chunksDir?: string | null;   // directory for the levels manifest and per-level chunks, null to skip them
+}
+
+export const MANIFEST_FILE = 'manifest.json';
+
+export interface LevelError {
+    filePath: string;
+    error: string;
+}
+
+export interface GenerateResult {
+    written: boolean;            // false if the output files were already up to date
+    parsed: number;              // number of level files parsed
+    cached: number;              // number of level files taken from the cache
+    errors: LevelError[];        // level files that failed to parse, in topic/level order
+}
+
+interface CacheEntry {
+    size: number;
+    mtimeMs: number;
+    hash: string;
+    level: LevelData;
+}
+
+interface CompileCache {
+    parserVersion: number;
+    entries: Record<string, CacheEntry>;
+}
+
+interface LevelSlot {
+    filePath: string;
+    entry?: CacheEntry;          // cached entry, if the file doesn't have to be parsed
+    task?: number;               // index of the parse task otherwise
+    size: number;
+    mtimeMs: number;
+    hash: string;
+}
+
+/**
+ * Everything known about a compilation before the level files are parsed
+ */
+interface CompilePlan {
+    cacheFile: string | null;
+    cache: CompileCache;
+    cacheChanged: boolean;
+    cached: number;
+    topics: { dir: string; topic: Topic; slots: LevelSlot[] }[];
+    tasks: ParseTask[];
+}
+
+function hashContent(content: string): string {
+    return createHash('sha256').update(content).digest('hex');
+}
+
+/**
+ * Load the compile cache, ignoring missing, corrupted or outdated cache files
+ */
+function loadCache(cacheFile: string): CompileCache {
+    const empty: CompileCache = {parserVersion: PARSER_VERSION, entries: {}};
+    try {
+        const cache = JSON.parse(fs.readFileSync(cacheFile, 'utf-8')) as CompileCache;
+        if (cache.parserVersion !== PARSER_VERSION || typeof cache.entries !== 'object' || !cache.entries) {
+            return empty;
+        }
+        return cache;
+    } catch {
+        return empty;
+    }
+}
+
+/**
+ * Write content to a file unless it already has exactly this content
+ * @returns - True if the file was written
+ */
+function writeIfChanged(file: string, content: string): boolean {
+    if (fs.existsSync(file) && fs.readFileSync(file, 'utf-8') === content) {
+        return false;
+    }
+    fs.mkdirSync(path.dirname(file), {recursive: true});
+    fs.writeFileSync(file, content, 'utf-8');
+    return true;
+}
+
+/**
+ * Collect topics and level files, and find out which level files have to be parsed
+ */
+function planCompile(source: string, options: GenerateOptions): CompilePlan {
+    const cacheFile = options.cacheFile === undefined ? DEFAULT_CACHE_FILE : options.cacheFile;
+    const plan: CompilePlan = {
+        cacheFile,
+        cache: cacheFile ? loadCache(cacheFile) : {parserVersion: PARSER_VERSION, entries: {}},
+        cacheChanged: false,
+        cached: 0,
+        topics: [],
+        tasks: []
+    };
 
     // Get all directories in the source directory
     const sourceDirs = fs.readdirSync(source)
@@ -34,6 +136,7 @@ export function generate(source: string, output: string): void {
             // Copy inDevelopment field from topic.json, default to false if missing
             inDevelopment: topicData.inDevelopment || false
         };
+        const slots: LevelSlot[] = [];
 
         // Get all Python files in the topic directory
         const levelFiles = fs.readdirSync(topicPath)
@@ -41,49 +144,298 @@ export function generate(source: string, output: string): void {
             .sort();
 
         for (const levelFile of levelFiles) {
-            const levelFilePath = path.join(topicPath, levelFile);
-            console.log(`  * level ${levelFilePath}`);
+            const filePath = path.join(topicPath, levelFile);
+            const {size, mtimeMs} = fs.statSync(filePath);
+            const entry = plan.cache.entries[filePath];
+
+            if (entry && entry.size === size && entry.mtimeMs === mtimeMs) {
+                slots.push({filePath, entry, size, mtimeMs, hash: entry.hash});
+                plan.cached++;
+                continue;
+            }
 
             // Read the file content
-            const content = fs.readFileSync(levelFilePath, 'utf-8');
+            const content = fs.readFileSync(filePath, 'utf-8');
+            const hash = hashContent(content);
+            plan.cacheChanged = true;
 
-            // Parse the level with both the file path and content
-            const level = parseLevelFile(levelFilePath, content);
-            if (level) {
-                topic.levels.push(level);
+            if (entry && entry.hash === hash) {
+                // Touched but not modified
+                slots.push({filePath, entry: {...entry, size, mtimeMs}, size, mtimeMs, hash});
+                plan.cached++;
+            } else {
+                console.log(`  * level ${filePath}`);
+                slots.push({filePath, task: plan.tasks.length, size, mtimeMs, hash});
+                plan.tasks.push({index: plan.tasks.length, filePath, content});
             }
         }
 
+        plan.topics.push({dir: topicDir, topic, slots});
+    }
+
+    return plan;
+}
+
+/**
+ * Write the levels manifest and one JSON chunk per level, and remove chunks of deleted levels
+ *
+ * Chunks are stored as <chunksDir>/<topic dir>/<level file name>.json. The manifest lists topics
+ * and level file names with the chunk of each level, and inlines the level players start with:
+ * the first level of the first topic that is not in development.
+ *
+ * @returns - True if any file was written or removed
+ */
+function writeChunks(chunksDir: string, topics: { dir: string; topic: Topic; chunks: string[] }[]): boolean {
+    const manifest: LevelsManifest = {topics: [], startLevel: null};
+    const chunkFiles = new Set<string>();
+    let written = false;
+
+    for (const {dir, topic, chunks} of topics) {
+        manifest.topics.push({
+            name: topic.name,
+            inDevelopment: topic.inDevelopment,
+            levels: topic.levels.map((level, i) => ({filename: level.filename, chunk: chunks[i]}))
+        });
+        if (!manifest.startLevel && !topic.inDevelopment && topic.levels.length > 0) {
+            manifest.startLevel = {topic: topic.name, level: topic.levels[0]};
+        }
+
+        topic.levels.forEach((level, i) => {
+            const chunkFile = path.join(chunksDir, dir, `${path.basename(chunks[i])}.json`);
+            chunkFiles.add(chunkFile);
+            written = writeIfChanged(chunkFile, JSON.stringify(level)) || written;
+        });
+    }
+
+    // Remove chunks of levels that no longer exist
+    if (fs.existsSync(chunksDir)) {
+        for (const dir of fs.readdirSync(chunksDir)) {
+            const dirPath = path.join(chunksDir, dir);
+            if (!fs.statSync(dirPath).isDirectory()) continue;
+            for (const file of fs.readdirSync(dirPath).filter(f => f.endsWith('.json'))) {
+                if (!chunkFiles.has(path.join(dirPath, file))) {
+                    fs.rmSync(path.join(dirPath, file));
+                    written = true;
+                }
+            }
+            if (fs.readdirSync(dirPath).length === 0) {
+                fs.rmdirSync(dirPath);
+            }
+        }
+    }
+
+    return writeIfChanged(path.join(chunksDir, MANIFEST_FILE), JSON.stringify(manifest, null, 2)) || written;
+}
+
+/**
+ * Assemble parsed and cached levels in topic/level order, update the cache and write the output
+ */
+function finishCompile(
+    plan: CompilePlan,
+    results: ParseResult[],
+    source: string,
+    output: string,
+    chunksDir: string | null
+): GenerateResult {
+    const entries: Record<string, CacheEntry> = {};
+    const errors: LevelError[] = [];
+    const outputStructure: OutputStructure = {topics: []};
+    const chunkedTopics: { dir: string; topic: Topic; chunks: string[] }[] = [];
+
+    for (const {dir, topic, slots} of plan.topics) {
+        const chunks: string[] = [];
+        for (const slot of slots) {
+            let entry = slot.entry;
+            if (slot.task !== undefined) {
+                const result = results[slot.task];
+                // Levels with errors are not cached, so the error is reported on every run
+                if (result.level) {
+                    entry = {size: slot.size, mtimeMs: slot.mtimeMs, hash: slot.hash, level: result.level};
+                } else {
+                    errors.push({filePath: slot.filePath, error: result.error ?? 'Unknown error'});
+                }
+            }
+            if (entry) {
+                entries[slot.filePath] = entry;
+                // The initial state is not cached, so it always matches the current level renderer
+                topic.levels.push({...entry.level, initialState: compileInitialLevelState(entry.level)});
+                chunks.push(`${dir}/${path.basename(slot.filePath, '.py')}`);
+            }
+        }
         outputStructure.topics.push(topic);
+        chunkedTopics.push({dir, topic, chunks});
+    }
+
+    // Drop entries of deleted files
+    const cacheChanged = plan.cacheChanged || Object.keys(plan.cache.entries).some(file => !(file in entries));
+    if (plan.cacheFile && cacheChanged) {
+        try {
+            writeIfChanged(plan.cacheFile, JSON.stringify({parserVersion: PARSER_VERSION, entries}));
+        } catch (err) {
+            console.warn(`Could not write compile cache ${plan.cacheFile}:`, err);
+        }
     }
 
-    // Ensure the output directory exists
-    const outputDir = path.dirname(output);
-    if (!fs.existsSync(outputDir)) {
-        fs.mkdirSync(outputDir, {recursive: true});
+    if (errors.length > 0) {
+        console.error(`❌ ${errors.length} level file(s) could not be parsed:\n`
+            + errors.map(e => `  * ${e.filePath}: ${e.error}`).join('\n'));
     }
 
     // Write the output file
-    fs.writeFileSync(output, JSON.stringify(outputStructure, null, 2), 'utf-8');
+    let written = writeIfChanged(output, JSON.stringify(outputStructure, null, 2));
+    if (chunksDir) {
+        written = writeChunks(chunksDir, chunkedTopics) || written;
+    }
+    const parsed = plan.tasks.length;
+
+    console.log(written
+        ? `✅ Built ${output} from ${source} (${parsed} parsed, ${plan.cached} cached)`
+        : `✅ ${output} is up to date (${parsed} parsed, ${plan.cached} cached)`);
 
-    console.log(`✅ Built ${output} from ${source}`);
+    return {written, parsed, cached: plan.cached, errors};
+}
+
+/**
+ * Parse level files on a pool of worker threads
+ * @param tasks - Level files to parse
+ * @param jobs - Maximum number of worker threads
+ * @returns - Parse results in the order of the tasks
+ */
+function parseInWorkers(tasks: ParseTask[], jobs: number): Promise<ParseResult[]> {
+    const results: ParseResult[] = new Array(tasks.length);
+    const workerCount = Math.min(jobs, tasks.length);
+    if (workerCount === 0) {
+        return Promise.resolve(results);
+    }
+
+    return new Promise((resolve, reject) => {
+        const workers: Worker[] = [];
+        let nextTask = 0;
+        let completed = 0;
+        let settled = false;
+
+        const settle = (err?: Error) => {
+            if (settled) return;
+            settled = true;
+            workers.forEach(worker => worker.terminate());
+            if (err) {
+                reject(err);
+            } else {
+                resolve(results);
+            }
+        };
+
+        for (let i = 0; i < workerCount; i++) {
+            const worker = new Worker(new URL('./parseWorker.ts', import.meta.url));
+            const sendNextTask = () => {
+                if (nextTask < tasks.length) {
+                    worker.postMessage(tasks[nextTask++]);
+                }
+            };
+
+            worker.on('message', ({index, result}: ParseTaskResult) => {
+                results[index] = result;
+                if (++completed === tasks.length) {
+                    settle();
+                } else {
+                    sendNextTask();
+                }
+            });
+            worker.on('error', settle);
+            worker.on('exit', code => settle(new Error(`Level parser worker stopped with exit code ${code}`)));
+
+            workers.push(worker);
+            sendNextTask();
+        }
+    });
+}
+
+/**
+ * Compile all level files into a single JSON file
+ *
+ * Parsed levels are cached on disk, keyed by the content hash of the level file and the parser
+ * version, so only changed files are parsed again. File size and modification time are checked
+ * first, so unchanged files are not even read. Output files are left untouched if their content
+ * would not change.
+ *
+ * Every level is emitted with its initial state (code, regions and first hint), so the web app
+ * doesn't have to render it when the level is loaded.
+ *
+ * With options.chunksDir, the levels are also split into a small manifest and one JSON chunk per
+ * level, so the web app can load levels on demand.
+ *
+ * @param source - Directory with one subdirectory per topic
+ * @param output - Path of the JSON file to generate
+ * @param options - Compile cache settings
+ * @returns - Whether the output was written, how many levels were parsed or taken from the cache,
+ * and the parse errors
+ */
+export function generate(source: string, output: string, options: GenerateOptions = {}): GenerateResult {
+    const plan = planCompile(source, options);
+    const results = plan.tasks.map(task => parseLevelSource(task.filePath, task.content));
+    return finishCompile(plan, results, source, output, options.chunksDir ?? null);
+}
+
+/**
+ * Same as generate, but parses level files on up to `jobs` worker threads
+ *
+ * Results are assembled in the same topic/level order, so the output is identical to generate.
+ *
+ * @param source - Directory with one subdirectory per topic
+ * @param output - Path of the JSON file to generate
+ * @param jobs - Maximum number of worker threads
+ * @param options - Compile cache settings
+ * @returns - Same as generate
+ */
+export async function generateParallel(
+    source: string,
+    output: string,
+    jobs: number,
+    options: GenerateOptions = {}
+): Promise<GenerateResult> {
+    const plan = planCompile(source, options);
+    const results = await parseInWorkers(plan.tasks, jobs);
+    return finishCompile(plan, results, source, output, options.chunksDir ?? null);
 }
 
 // If this file is run directly
 // In ES modules, we can use import.meta.url to check if this is the main module
 const isMainModule = import.meta.url.endsWith(process.argv[1].replace(/\\/g, '/'));
 if (isMainModule) {
+    const usage = 'Usage: main.ts <inputDir> <outputFile> [--chunks <dir>] [--no-cache] [--jobs N]';
     const args = process.argv.slice(2);
+    const positional: string[] = [];
+    let noCache = false;
+    let chunksDir: string | null = null;
+    let jobs = 1;
+
+    for (let i = 0; i < args.length; i++) {
+        if (args[i] === '--no-cache') {
+            noCache = true;
+        } else if (args[i] === '--chunks' && i + 1 < args.length) {
+            chunksDir = args[++i];
+        } else if (args[i] === '--jobs') {
+            jobs = Number(args[++i]);
+            if (!Number.isInteger(jobs) || jobs < 1) {
+                console.error(usage);
+                process.exit(1);
+            }
+        } else {
+            positional.push(args[i]);
+        }
+    }
+
+    const [inputDir, outputFile] = positional;
 
-    if (args.length < 2) {
-        console.error('Usage: main.ts <inputDir> <outputFile>');
+    if (!inputDir || !outputFile) {
+        console.error(usage);
         process.exit(1);
     }
 
-    const [inputDir, outputFile] = args;
+    const options: GenerateOptions = noCache ? {cacheFile: null, chunksDir} : {chunksDir};
 
     try {
-        await generate(inputDir, outputFile);
+        await (jobs > 1 ? generateParallel(inputDir, outputFile, jobs, options) : generate(inputDir, outputFile, options));
         console.log(`Levels compiled from ${inputDir} to ${outputFile}`);
     } catch (err) {
         console.error('Error during level compilation:', err);
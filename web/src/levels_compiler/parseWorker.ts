@@ -0,0 +1,19 @@
+import {parentPort} from 'worker_threads';
+import {parseLevelSource, ParseResult} from "./parser.ts";
+
+export interface ParseTask {
+    index: number;
+    filePath: string;
+    content: string;
+}
+
+export interface ParseTaskResult {
+    index: number;
+    result: ParseResult;
+}
+
+// Worker thread entry point for parallel compilation: parses one level file per message
+parentPort?.on('message', (task: ParseTask) => {
+    const message: ParseTaskResult = {index: task.index, result: parseLevelSource(task.filePath, task.content)};
+    parentPort!.postMessage(message);
+});
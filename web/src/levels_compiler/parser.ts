@@ -1,10 +1,27 @@
 import type {LevelBlock, LevelData} from '../types.js'
 
+/**
+ * Version of the parser output format. Bump it whenever a change to the parser changes the
+ * produced LevelData, so that compile caches created by older versions are discarded.
+ */
+export const PARSER_VERSION = 1;
+
 export interface ParseContext {
     filename?: string;
     lines: string[];
     idx: number;
     level: LevelData;
+    ids?: Record<string, number>;       // counters of the generated event IDs, by base ID
+    generatedIds?: GeneratedId[];       // if set, the generated event IDs are recorded here
+    lineOffset?: number;                // number of level lines before lines[0]
+}
+
+/**
+ * An event ID generated for a block of a section, assigned again when the sections are joined
+ */
+export interface GeneratedId {
+    block: number;
+    base: string;
 }
 
 export interface ParseResult {
@@ -21,6 +38,11 @@ export function cleanArg(s: string): string {
 }
 
 function parseArgsList(argString: string): string[] {
+    // Without quotes, arguments are just separated by spaces
+    if (!argString.includes('"')) {
+        return argString.split(' ').filter(arg => arg.length > 0);
+    }
+
     const args: string[] = [];
     let currentArg = '';
     let inQuotes = false;
@@ -78,13 +100,13 @@ export function parseDirective(context: ParseContext): [string, string[]] {
 }
 
 export function collectBlockUntil(context: ParseContext, endDirective: string): string {
-    let block = '';
+    const block: string[] = [];
     while (context.idx < context.lines.length && !context.lines[context.idx].trim().startsWith(`##${endDirective}`)) {
         const line = context.lines[context.idx].replace(/\r?\n$/, '');
         if (line.startsWith('##')) {
             throw errorWithContext(`Missing ##${endDirective} directive? Or what?!`, context);
         }
-        block += line + '\n';
+        block.push(line + '\n');
         context.idx++;
     }
 
@@ -92,7 +114,7 @@ export function collectBlockUntil(context: ParseContext, endDirective: string):
         throw errorWithContext(`Missing ##${endDirective} directive`, context);
     }
     context.idx++;
-    return block;
+    return block.join('');
 }
 
 // Directive handlers
@@ -121,7 +143,7 @@ export function readReplaceSpan(args: string[], context: ParseContext): LevelBlo
     }
 
     const clickable = cleanArg(args[1]);
-    const event = args[0] !== '-' ? args[0] : generateId(clickable);
+    const event = args[0] !== '-' ? args[0] : generateId(clickable, context);
     const block: LevelBlock = {
         type: 'replace-span',
         clickable,
@@ -139,7 +161,7 @@ export function readReplace(args: string[], context: ParseContext): LevelBlock {
     }
 
     const clickable = args.length > 1 ? args[1] : undefined;
-    const event = (args.length > 0 && args[0] !== '-') ? args[0] : generateId(clickable);
+    const event = (args.length > 0 && args[0] !== '-') ? args[0] : generateId(clickable, context);
 
     context.idx++;
     const text = collectBlockUntil(context, 'with');
@@ -293,7 +315,7 @@ export function readOption(args: string[], context: ParseContext): void {
 
 function errorWithContext(message: string, context: ParseContext): Error {
     let fileInfo = context.filename ? ` in file ${context.filename}` : '';
-    return new Error(`${message}. Line ${context.idx + 1}${fileInfo}`);
+    return new Error(`${message}. Line ${(context.lineOffset ?? 0) + context.idx + 1}${fileInfo}`);
 }
 
 export function readFilename(args: string[], context: ParseContext): string {
@@ -387,7 +409,7 @@ function readOneBlock(context: ParseContext): void {
 
 // Main parsing function
 export function parseLevelFile(filePath: string, content: string): LevelData | undefined {
-    const result = parseLevelText(content);
+    const result = parseLevelSource(filePath, content);
 
     // If there was an error parsing the level, log it and return undefined
     if (result.error) {
@@ -395,12 +417,19 @@ export function parseLevelFile(filePath: string, content: string): LevelData | u
         return undefined;
     }
 
+    return result.level;
+}
+
+// Same as parseLevelFile, but returns the error instead of logging it
+export function parseLevelSource(filePath: string, content: string): ParseResult {
+    const result = parseLevelText(content);
+
     // Set the filename in the context if it wasn't set by parseLevelText
     if (result.level && !result.level.filename) {
         result.level.filename = filePath;
     }
 
-    return result.level;
+    return result;
 }
 
 // Function to validate required level instructions
@@ -515,64 +544,224 @@ function validateOptions(level: LevelData): string | null {
     return null;
 }
 
+// Validate a completely read level
+function validateLevel(level: LevelData): ParseResult {
+    // Validate required level instructions
+    const requiredInstructionsError = validateRequiredInstructions(level);
+    if (requiredInstructionsError) {
+        return {error: requiredInstructionsError};
+    }
+
+    // Validate event references
+    const eventReferencesError = validateEventReferences(level);
+    if (eventReferencesError) {
+        return {error: eventReferencesError};
+    }
+    // Validate options for blocks
+    const optionsError = validateOptions(level);
+    if (optionsError) {
+        return {error: optionsError};
+    }
+    return {level};
+}
+
 export function parseLevelText(content: string): ParseResult {
     const lines = content.trimEnd().split(/\r?\n/);
-    resetIdGenerator();
 
     const outputLevel: LevelData = {
         filename: "",
         blocks: []
     };
 
+    // Generated IDs are counted per parse, so parses never affect each other
     const context: ParseContext = {
         lines,
         idx: 0,
-        level: outputLevel
+        level: outputLevel,
+        ids: {}
     };
 
     try {
         while (context.idx < lines.length) {
             readOneBlock(context);
         }
+    } catch (e) {
+        return {error: e instanceof Error ? e.message : String(e)};
+    }
+    return validateLevel(context.level);
+}
 
-        // Validate required level instructions
-        const requiredInstructionsError = validateRequiredInstructions(context.level);
-        if (requiredInstructionsError) {
-            return {error: requiredInstructionsError};
-        }
+// Incremental parsing
 
-        // Validate event references
-        const eventReferencesError = validateEventReferences(context.level);
-        if (eventReferencesError) {
-            return {error: eventReferencesError};
+/**
+ * A section of a level: a block with the directives following it, up to the next block
+ */
+interface ParsedSection {
+    level: LevelData;               // the blocks of the section and the level fields it sets
+    generatedIds: GeneratedId[];
+}
+
+const LEVEL_FIELDS = ['filename', 'startMessage', 'startReply', 'finalMessage', 'endReply'] as const;
+
+function isDirectiveLine(line: string): boolean {
+    return line.startsWith('##') || line.startsWith('"""') && line.length > 3;
+}
+
+// Index after the line starting with ##endDirective, like collectBlockUntil
+function skipBlockUntil(lines: string[], idx: number, endDirective: string): number {
+    while (idx < lines.length && !lines[idx].trim().startsWith(`##${endDirective}`)) {
+        idx++;
+    }
+    return Math.min(idx + 1, lines.length);
+}
+
+/**
+ * Find the first line of each section, following the lines the directive handlers read
+ *
+ * A wrong split only makes a section fail to parse, and a failed section falls back to a full parse.
+ */
+function findSectionStarts(lines: string[]): number[] {
+    const starts = [0];
+    const startSection = (idx: number) => {
+        if (idx > 0) starts.push(idx);
+    };
+
+    let idx = 0;
+    while (idx < lines.length) {
+        if (!isDirectiveLine(lines[idx])) {
+            // Text block
+            startSection(idx);
+            do {
+                idx++;
+            } while (idx < lines.length && !isDirectiveLine(lines[idx]));
+            continue;
         }
-        // Validate options for blocks
-        const optionsError = validateOptions(context.level);
-        if (optionsError) {
-            return {error: optionsError};
+
+        const line = lines[idx].trim();
+        const cmd = line.substring(line.startsWith('##') ? 2 : 3).split(/\s+/)[0];
+        switch (cmd) {
+            case 'replace':
+            case 'replace-on':
+                startSection(idx);
+                idx = skipBlockUntil(lines, skipBlockUntil(lines, idx + 1, 'with'), 'end');
+                break;
+            case 'add-on':
+            case 'remove-on':
+                startSection(idx);
+                idx = skipBlockUntil(lines, idx + 1, 'end');
+                break;
+            case 'replace-span':
+                startSection(idx);
+                idx++;
+                break;
+            case 'start':
+            case 'final':
+                // Message up to the line ending with """, like readMessage
+                idx++;
+                while (idx < lines.length && !lines[idx].trim().endsWith('"""')) {
+                    idx++;
+                }
+                idx = Math.min(idx + 1, lines.length);
+                break;
+            case 'end_of_level':
+                return starts;
+            default:
+                idx++;
         }
-    } catch (e) {
-        return {error: e instanceof Error ? e.message : String(e)};
     }
-    return {level: context.level};
+    return starts;
 }
 
-let idCounter: Record<string, number> = {}
+function parseSection(lines: string[], start: number, end: number): ParsedSection {
+    const context: ParseContext = {
+        lines: lines.slice(start, end),
+        idx: 0,
+        level: {filename: "", blocks: []},
+        ids: {},
+        generatedIds: [],
+        lineOffset: start
+    };
+    while (context.idx < context.lines.length) {
+        readOneBlock(context);
+    }
+    return {level: context.level, generatedIds: context.generatedIds!};
+}
+
+/**
+ * Level parser for parsing a level again and again while it is edited
+ *
+ * The level is split into sections, each starting with a block. Sections whose text didn't change
+ * since the previous parse are not parsed again. Generated event IDs are assigned when the sections
+ * are joined, so the result is the same as the one of parseLevelText. Each instance keeps its own
+ * state, so several parsers can be used at the same time.
+ */
+export class IncrementalLevelParser {
+    private sections = new Map<string, ParsedSection>();
+    // Number of sections of the last parse, and how many of them were reused
+    lastParse = {sections: 0, reused: 0};
+
+    parse(content: string): ParseResult {
+        const lines = content.trimEnd().split(/\r?\n/);
+        const starts = findSectionStarts(lines);
+        const sections = new Map<string, ParsedSection>();
+        const level: LevelData = {filename: "", blocks: []};
+        const ids: Record<string, number> = {};
+        this.lastParse = {sections: starts.length, reused: 0};
+
+        try {
+            for (let i = 0; i < starts.length; i++) {
+                const end = i + 1 < starts.length ? starts[i + 1] : lines.length;
+                const key = lines.slice(starts[i], end).join('\n');
+                let section = sections.get(key) ?? this.sections.get(key);
+                if (section) {
+                    this.lastParse.reused++;
+                } else {
+                    section = parseSection(lines, starts[i], end);
+                }
+                sections.set(key, section);
+                appendSection(level, section, ids);
+            }
+        } catch {
+            // Report errors exactly like a full parse does
+            this.sections = sections;
+            return parseLevelText(content);
+        }
 
-function resetIdGenerator(): void {
-    idCounter = {}
+        this.sections = sections;
+        return validateLevel(level);
+    }
+}
+
+// Add copies of the blocks of a section to a level, generating their event IDs in level order
+function appendSection(level: LevelData, section: ParsedSection, ids: Record<string, number>): void {
+    section.level.blocks.forEach((block, index) => {
+        const generated = section.generatedIds.find(id => id.block === index);
+        level.blocks.push(generated ? {...block, event: nextId(ids, generated.base)} : {...block});
+    });
+    for (const field of LEVEL_FIELDS) {
+        const value = section.level[field];
+        if (value !== undefined && value !== '') {
+            level[field] = value;
+        }
+    }
 }
 
-function generateId(clickable: string | undefined): string {
-    let id = makeIdFrom(clickable || "id");
-    if (!idCounter[id]) {
-        idCounter[id] = 0;
+function nextId(ids: Record<string, number>, base: string): string {
+    let id = base;
+    if (!ids[id]) {
+        ids[id] = 0;
     } else {
-        id = id + "-" + idCounter[id];
+        id = id + "-" + ids[id];
     }
-    idCounter[id]++
+    ids[id]++
     return id;
+}
 
+function generateId(clickable: string | undefined, context: ParseContext): string {
+    const base = makeIdFrom(clickable || "id");
+    context.generatedIds?.push({block: context.level.blocks.length, base});
+    if (!context.ids) context.ids = {};
+    return nextId(context.ids, base);
 }
 
 /** remove all nonId Characters. If end with an empty string, then return 'id'*/
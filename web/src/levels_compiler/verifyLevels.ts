@@ -0,0 +1,175 @@
+import * as fs from 'fs';
+import * as path from 'path';
+import {Worker} from 'worker_threads';
+import type {VerifyOptions} from "../utils/levelVerifier.ts";
+import {LevelReport, verifyLevelSource, VerifyTask, VerifyTaskResult} from "./verifyWorker.ts";
+
+/**
+ * Collect the level files of all topics, in the order of the levels compiler
+ */
+export function findLevelFiles(source: string): string[] {
+    const files: string[] = [];
+    const topicDirs = fs.readdirSync(source)
+        .filter(dir => fs.existsSync(path.join(source, dir, 'topic.json')))
+        .sort();
+    for (const topicDir of topicDirs) {
+        const topicPath = path.join(source, topicDir);
+        files.push(...fs.readdirSync(topicPath)
+            .filter(file => file.endsWith('.py'))
+            .sort()
+            .map(file => path.join(topicPath, file)));
+    }
+    return files;
+}
+
+/**
+ * Verify level files on a pool of worker threads
+ * @param tasks - Level files to verify
+ * @param jobs - Maximum number of worker threads
+ * @returns - Reports in the order of the tasks
+ */
+function verifyInWorkers(tasks: VerifyTask[], jobs: number): Promise<LevelReport[]> {
+    const reports: LevelReport[] = new Array(tasks.length);
+    const workerCount = Math.min(jobs, tasks.length);
+    if (workerCount === 0) {
+        return Promise.resolve(reports);
+    }
+
+    return new Promise((resolve, reject) => {
+        const workers: Worker[] = [];
+        let nextTask = 0;
+        let completed = 0;
+        let settled = false;
+
+        const settle = (err?: Error) => {
+            if (settled) return;
+            settled = true;
+            workers.forEach(worker => worker.terminate());
+            if (err) {
+                reject(err);
+            } else {
+                resolve(reports);
+            }
+        };
+
+        for (let i = 0; i < workerCount; i++) {
+            const worker = new Worker(new URL('./verifyWorker.ts', import.meta.url));
+            const sendNextTask = () => {
+                if (nextTask < tasks.length) {
+                    worker.postMessage(tasks[nextTask++]);
+                }
+            };
+
+            worker.on('message', ({index, report}: VerifyTaskResult) => {
+                reports[index] = report;
+                if (++completed === tasks.length) {
+                    settle();
+                } else {
+                    sendNextTask();
+                }
+            });
+            worker.on('error', settle);
+            worker.on('exit', code => settle(new Error(`Level verifier worker stopped with exit code ${code}`)));
+
+            workers.push(worker);
+            sendNextTask();
+        }
+    });
+}
+
+/**
+ * Verify that every order of clicks in every level of a levels directory can be completed
+ *
+ * Level files are read like the levels compiler reads them, and verified with verifyLevel on up
+ * to `jobs` worker threads.
+ *
+ * @param source - Directory with one subdirectory per topic
+ * @param jobs - Maximum number of worker threads, 1 to verify in this thread
+ * @param options - Limits of the exploration
+ * @returns - One report per level file, in topic/level order
+ */
+export async function verifyLevels(source: string, jobs: number = 1, options: VerifyOptions = {}): Promise<LevelReport[]> {
+    const tasks: VerifyTask[] = findLevelFiles(source).map((filePath, index) =>
+        ({index, filePath, content: fs.readFileSync(filePath, 'utf-8'), options}));
+    if (jobs > 1) {
+        return verifyInWorkers(tasks, jobs);
+    }
+    return tasks.map(task => verifyLevelSource(task.filePath, task.content, task.options));
+}
+
+/**
+ * Describe the problems of a level, or return null if it has none
+ */
+export function formatReport(report: LevelReport): string | null {
+    if (report.error) {
+        return `❌ ${report.filePath}: ${report.error}`;
+    }
+    const result = report.result!;
+    const lines: string[] = [];
+    for (const deadEnd of result.deadEnds) {
+        const clicks = deadEnd.events.length > 0 ? `after clicking ${deadEnd.events.join(', ')}` : 'from the start';
+        const missing = deadEnd.missing.length > 0 ? `, no region for ${deadEnd.missing.join(', ')}` : '';
+        lines.push(`  * dead end ${clicks}${missing}`);
+    }
+    if (!result.complete) {
+        lines.push(`  * stopped after ${result.states} states`);
+    }
+    if (lines.length === 0) {
+        return null;
+    }
+    return `${result.solvable ? '⚠️' : '❌'} ${report.filePath}:\n${lines.join('\n')}`;
+}
+
+// If this file is run directly
+const isMainModule = import.meta.url.endsWith(process.argv[1].replace(/\\/g, '/'));
+if (isMainModule) {
+    const usage = 'Usage: verifyLevels.ts <levelsDir> [--jobs N] [--max-states N] [--no-split]';
+    const args = process.argv.slice(2);
+    const positional: string[] = [];
+    const options: VerifyOptions = {};
+    let jobs = 1;
+
+    const readNumber = (value: string | undefined): number => {
+        const number = Number(value);
+        if (!Number.isInteger(number) || number < 1) {
+            console.error(usage);
+            process.exit(1);
+        }
+        return number;
+    };
+
+    for (let i = 0; i < args.length; i++) {
+        if (args[i] === '--jobs') {
+            jobs = readNumber(args[++i]);
+        } else if (args[i] === '--max-states') {
+            options.maxStates = readNumber(args[++i]);
+        } else if (args[i] === '--no-split') {
+            options.splitGroups = false;
+        } else {
+            positional.push(args[i]);
+        }
+    }
+
+    const [levelsDir] = positional;
+
+    if (!levelsDir) {
+        console.error(usage);
+        process.exit(1);
+    }
+
+    try {
+        const reports = await verifyLevels(levelsDir, jobs, options);
+        const problems = reports.map(formatReport).filter(problem => problem !== null);
+        problems.forEach(problem => console.log(problem));
+        const failed = reports.filter(report => report.error || !report.result!.solvable).length;
+        const states = reports.reduce((sum, report) => sum + (report.result?.states ?? 0), 0);
+        console.log(`${failed === 0 ? '✅' : '❌'} Verified ${reports.length} level(s) in ${levelsDir}`
+            + ` (${states} states), ${failed} with dead ends or errors`);
+        if (failed > 0) {
+            process.exit(1);
+        }
+    } catch (err) {
+        console.error('Error during level verification:', err);
+        process.exit(1);
+    }
+}
@@ -0,0 +1,38 @@
+import {parentPort} from 'worker_threads';
+import {parseLevelSource} from "./parser.ts";
+import {verifyLevel, VerifyOptions, VerifyResult} from "../utils/levelVerifier.ts";
+
+export interface VerifyTask {
+    index: number;
+    filePath: string;
+    content: string;
+    options: VerifyOptions;
+}
+
+export interface LevelReport {
+    filePath: string;
+    error?: string;             // parse error
+    result?: VerifyResult;
+}
+
+export interface VerifyTaskResult {
+    index: number;
+    report: LevelReport;
+}
+
+/**
+ * Parse a level file and verify that every order of clicks can be completed
+ */
+export function verifyLevelSource(filePath: string, content: string, options: VerifyOptions): LevelReport {
+    const {level, error} = parseLevelSource(filePath, content);
+    if (error || !level) {
+        return {filePath, error: error ?? 'Unknown error'};
+    }
+    return {filePath, result: verifyLevel(level, options)};
+}
+
+// Worker thread entry point for parallel verification: verifies one level file per message
+parentPort?.on('message', (task: VerifyTask) => {
+    const message: VerifyTaskResult = {index: task.index, report: verifyLevelSource(task.filePath, task.content, task.options)};
+    parentPort!.postMessage(message);
+});
@@ -72,6 +72,7 @@ export interface LoadLevelAction {
     type: typeof LOAD_LEVEL;
     payload: {
         levelId: LevelId;
+        levelData?: LevelData;   // loaded level data; if missing, the level must already be loaded
     };
 }
 
@@ -453,9 +454,9 @@ export type GameAction =
     | SelectContextMenuItemAction;
 
 // Action creators
-export const loadLevel = (levelId: LevelId): LoadLevelAction => ({
+export const loadLevel = (levelId: LevelId, levelData?: LevelData): LoadLevelAction => ({
     type: LOAD_LEVEL,
-    payload: {levelId}
+    payload: levelData ? {levelId, levelData} : {levelId}
 });
 
 export const loadCommunityLevel = (levelId: string, levelData: LevelData): LoadCommunityLevelAction => ({
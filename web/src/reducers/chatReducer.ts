@@ -1,42 +1,7 @@
 import {ChatMessage, ChatMessageType, GameState, LevelData} from '../types';
 import {GameAction} from './actionCreators';
 import {APPLY_FIX, GET_HINT, LOAD_COMMUNITY_LEVEL, LOAD_LEVEL, POST_CHAT_MESSAGE, WRONG_CLICK,} from './actionTypes';
-
-/**
- * Helper function to check if an event is triggered
- * @param event - Event ID or array of event IDs
- * @param triggeredEvents - List of triggered event IDs
- * @returns True if the event is triggered
- */
-function isEventTriggered(event: string | string[] | undefined, triggeredEvents: string[]): boolean {
-    if (!event) return false;
-
-    if (Array.isArray(event)) {
-        // If event is an array, check if any of the events in the array are in the triggeredEvents list
-        return event.some(e => triggeredEvents.includes(e));
-    } else {
-        // If event is a string, check if it's in the triggeredEvents list
-        return triggeredEvents.includes(event);
-    }
-}
-
-/**
- * Helper function to check if an event matches a specific event ID
- * @param event - Event ID or array of event IDs
- * @param eventId - Specific event ID to check
- * @returns True if the event matches the event ID
- */
-function eventMatches(event: string | string[] | undefined, eventId: string): boolean {
-    if (!event) return false;
-
-    if (Array.isArray(event)) {
-        // If event is an array, check if any of the events in the array match the event ID
-        return event.includes(eventId);
-    } else {
-        // If event is a string, check if it matches the event ID
-        return event === eventId;
-    }
-}
+import {getLevelIndex, getTriggeredEvents} from '../utils/levelIndex';
 
 export const DEFAULT_MESSAGE = 'Great job! You\'ve fixed all the issues in this level.';
 export const DEFAULT_INSTRUCTION = 'Find and fix all the issues in this code.';
@@ -85,9 +50,8 @@ export function chatReducer(
             if (!currentLevel || !topics) return state;
 
             // Find the block that was triggered
-            const triggeredBlock = currentLevel.level.blocks.find(
-                block => eventMatches(block.event, eventId) && block.explanation
-            );
+            const triggeredBlock = getLevelIndex(currentLevel.level.blocks)
+                .findEventBlock(eventId, block => block.explanation);
 
             // Create a buddy explanation message
             const buddyExplainMessage: ChatMessage = {
@@ -96,12 +60,7 @@ export function chatReducer(
             };
 
             // Check if all issues are fixed
-            const allIssuesFixed = currentLevel.level.blocks
-                .filter(block => block.event && block.type !== 'neutral')
-                .every(block =>
-                    isEventTriggered(block.event, currentLevel.triggeredEvents) ||
-                    eventMatches(block.event, eventId)
-                );
+            const allIssuesFixed = getTriggeredEvents(currentLevel).add(eventId).allIssuesFixed;
 
             // If all issues are fixed, add a summary message
             let buddySummarizeMessage: ChatMessage | null = null;
@@ -130,9 +89,9 @@ export function chatReducer(
             if (!currentLevel) return state;
 
             // Find the block with the pending hint
-            const blockWithHint = currentLevel.level.blocks.find(
-                block => currentLevel.pendingHintId && eventMatches(block.event, currentLevel.pendingHintId) && block.hint
-            );
+            const blockWithHint = currentLevel.pendingHintId
+                ? getLevelIndex(currentLevel.level.blocks).findEventBlock(currentLevel.pendingHintId, block => block.hint)
+                : undefined;
 
             // Create a buddy help message
             const buddyHelpMessage: ChatMessage = {
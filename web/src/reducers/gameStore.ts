@@ -0,0 +1,77 @@
+import React, {createContext, useContext, useSyncExternalStore} from 'react';
+import {GameState} from '../types';
+import {GameAction} from './actionCreators';
+
+/**
+ * Subscribable holder of the latest game state
+ *
+ * Every component that reads GameStateContext re-renders on every action. Components that only
+ * need a small part of the state select it with useGameSelector instead, and re-render only when
+ * the selected value changes.
+ */
+export class GameStore {
+    readonly dispatch: React.Dispatch<GameAction>;
+    private state: GameState;
+    private readonly listeners = new Set<() => void>();
+
+    /**
+     * @param state - Initial game state
+     * @param dispatch - Dispatch function of the game reducer
+     */
+    constructor(state: GameState, dispatch: React.Dispatch<GameAction>) {
+        this.state = state;
+        this.dispatch = dispatch;
+    }
+
+    getState = (): GameState => this.state;
+
+    /**
+     * Register a listener that is called after the state changed
+     * @returns Function that removes the listener
+     */
+    subscribe = (listener: () => void): (() => void) => {
+        this.listeners.add(listener);
+        return () => {
+            this.listeners.delete(listener);
+        };
+    };
+
+    /**
+     * Replace the state and notify the listeners
+     * @param state - The new game state
+     */
+    setState(state: GameState): void {
+        if (state === this.state) return;
+        this.state = state;
+        this.listeners.forEach(listener => listener());
+    }
+}
+
+// Context for the game store; provided next to GameStateContext by StateProvider
+export const GameStoreContext = createContext<GameStore | null>(null);
+
+/**
+ * Get the game store of the surrounding provider
+ * @returns The game store
+ */
+export function useGameStore(): GameStore {
+    const store = useContext(GameStoreContext);
+    if (!store) {
+        throw new Error('useGameStore must be used within a GameStoreContext Provider');
+    }
+    return store;
+}
+
+/**
+ * Select a value from the game state and re-render only when it changes
+ *
+ * Values are compared with Object.is, so the selector must return the same value for the same
+ * state: a primitive, a part of the state or a memoized result, but not a new object.
+ *
+ * @param selector - Computes the value from the game state
+ * @returns The selected value
+ */
+export function useGameSelector<T>(selector: (state: GameState) => T): T {
+    const store = useGameStore();
+    return useSyncExternalStore(store.subscribe, () => selector(store.getState()));
+}
@@ -1,8 +1,9 @@
 import React, {createContext} from 'react';
-import levelsData from '../data/levels.json';
-import {GameState, LevelId, Topic} from '../types.ts';
+import {GameState, LevelId, TopicSummary} from '../types.ts';
 import {applyFix, GameAction, loadLevel, postChatMessage, updateLevelStats, wrongClick} from './actionCreators.ts';
 import {getCurrentLevelKey} from '../utils/levelUtils';
+import {getRegionIndex} from '../utils/regionIndex';
+import {levelsManifest} from '../utils/levelLoader';
 import {
     APPLY_FIX,
     CLOSE_OPTIONS_MENU,
@@ -53,14 +54,14 @@ import {chatReducer, getInstructionChatMessage} from './chatReducer.ts';
 import {createDefaultPlayerStats, statsReducer} from './statsReducer.ts';
 
 
-let firstTopic = levelsData.topics[1]; // skip testing
+// The first level of the first topic that is not in development, inlined in the manifest
+const startLevel = levelsManifest.startLevel!;
 // Initial state
-let firstLevel = firstTopic.levels[0];
 export const initialState: GameState = {
-    topics: levelsData.topics as Topic[],
-    currentLevelId: {topic: firstTopic.name, levelId: firstLevel.filename},
-    currentLevel: createInitialLevelState(firstLevel),
-    chatMessages: [getInstructionChatMessage(firstLevel)],
+    topics: levelsManifest.topics,
+    currentLevelId: {topic: startLevel.topic, levelId: startLevel.level.filename},
+    currentLevel: createInitialLevelState(startLevel.level),
+    chatMessages: [getInstructionChatMessage(startLevel.level)],
     isTypingAnimationComplete: true,
     auth: {
         user: null,
@@ -91,11 +92,11 @@ export const initialState: GameState = {
 
 /**
  * Find the next level ID in sequence
- * @param topics - All topics
+ * @param topics - All topics from the levels manifest
  * @param currentLevelId - Current level ID
  * @returns Next level ID or null if no next level
  */
-export const findNextLevelId = (topics: Topic[], currentLevelId: LevelId): LevelId | null => {
+export const findNextLevelId = (topics: TopicSummary[], currentLevelId: LevelId): LevelId | null => {
     const currentTopic = topics.find(t => t.name === currentLevelId.topic);
 
     if (!currentTopic) return null;
@@ -133,8 +134,6 @@ export const findNextLevelId = (topics: Topic[], currentLevelId: LevelId): Level
  * @returns New state
  */
 export function gameReducer(state: GameState = initialState, action: GameAction): GameState {
-    console.log(action);
-
     switch (action.type) {
         case CODE_CLICK: {
             if (!state.currentLevel) return state;
@@ -143,16 +142,13 @@ export function gameReducer(state: GameState = initialState, action: GameAction)
             const {lineIndex, colIndex, token} = action.payload;
 
             // Find the region that contains the clicked position
-            const region = state.currentLevel.regions?.find(r => r.contains(lineIndex, colIndex, token.length));
+            const regionIndex = getRegionIndex(state.currentLevel);
+            const region = regionIndex.find(lineIndex, colIndex, token.length);
 
             if (region) {
                 // Check if clicked block has context options
                 const eventId = region.eventId;
-                const blockWithOptions = state.currentLevel.level.blocks.find(b => {
-                    if (!b.event) return false;
-                    if (!b.options) return false;
-                    return Array.isArray(b.event) ? b.event.includes(eventId) : b.event === eventId;
-                });
+                const blockWithOptions = regionIndex.findOptionsBlock(eventId);
                 if (blockWithOptions && blockWithOptions.options && blockWithOptions.options.length > 0) {
                     const {clientX, clientY} = (action as any).payload;
                     const anchor = (typeof clientX === 'number' && typeof clientY === 'number') ? {
@@ -378,7 +374,7 @@ export function gameReducer(state: GameState = initialState, action: GameAction)
                 return state;
             }
 
-            // Load the next level
+            // Load the next level; it has to be loaded (usually prefetched) before NEXT_LEVEL
             return gameReducer(
                 state,
                 loadLevel(nextLevelId)
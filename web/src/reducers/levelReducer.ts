@@ -1,7 +1,11 @@
-import {LevelData, LevelState, Topic} from '../types';
+import {LevelData, LevelState, TopicSummary} from '../types';
 import {GameAction} from './actionCreators';
 import {APPLY_FIX, GET_HINT, LOAD_COMMUNITY_LEVEL, LOAD_LEVEL, WRONG_CLICK} from './actionTypes';
-import {applyEvents} from '../utils/pylang';
+import {renderLevel} from '../utils/levelRenderer';
+import {RegionIndex} from '../utils/regionIndex';
+import {getLoadedLevel} from '../utils/levelLoader';
+import {getInitialLevelState} from '../utils/initialLevelState';
+import {getLevelIndex, getTriggeredEvents, TriggeredEvents} from '../utils/levelIndex';
 
 
 /**
@@ -29,22 +33,7 @@ export const checkAllIssuesFixed = (
     triggeredEvents: string[],
     eventId: string
 ): boolean => {
-    return blocks
-        .filter(block => block.event && block.type !== 'neutral')
-        .every(block => {
-            // Check if the block's event is triggered
-            if (Array.isArray(block.event)) {
-                // If block.event is an array, check if any of the events in the array are in the triggeredEvents list
-                // or if eventId matches any of the events in the array
-                return block.event.some(e => triggeredEvents.includes(e) || eventId === e);
-            } else if (block.event) {
-                // If block.event is a string, check if it's in the triggeredEvents list
-                // or if eventId matches the event
-                return triggeredEvents.includes(block.event) || eventId === block.event;
-            } else {
-                return false;
-            }
-        });
+    return new TriggeredEvents(getLevelIndex(blocks), triggeredEvents).add(eventId).allIssuesFixed;
 };
 
 /**
@@ -57,7 +46,7 @@ export const checkAllIssuesFixed = (
 export function levelReducer(
     state: LevelState | null,
     action: GameAction,
-    topics: Topic[] = []
+    topics: TopicSummary[] = []
 ): LevelState | null {
     if (!state && action.type !== LOAD_LEVEL && action.type !== LOAD_COMMUNITY_LEVEL) return null;
 
@@ -65,11 +54,8 @@ export function levelReducer(
         case LOAD_LEVEL: {
             const {levelId} = action.payload;
 
-            // Find the level data
-            const topic = topics.find(t => t.name === levelId.topic);
-            if (!topic) return state;
-
-            const levelData = topic.levels.find((l: any) => l.filename === levelId.levelId);
+            // Use the level data from the action, or find an already loaded level
+            const levelData = action.payload.levelData ?? getLoadedLevel(topics, levelId);
             if (!levelData) return state;
 
             // Create an initial level state
@@ -88,32 +74,22 @@ export function levelReducer(
 
             const {eventId} = action.payload;
 
-            // Calculate new triggered events
-            const triggeredEvents = calculateNewTriggeredEvents(
-                state.triggeredEvents,
-                eventId
-            );
-
-            // Calculate next hint ID
-            const nextHintId = calculateNextHintId(state.level, triggeredEvents);
-
-            // Update code and regions with applyEvents
-            const {code, regions} = applyEvents(state.level.blocks, triggeredEvents);
+            // Add the event; the set also tracks the next hint and the remaining issues
+            const triggered = getTriggeredEvents(state).add(eventId);
+            const triggeredEvents = triggered.events;
 
-            // Check if all issues are fixed
-            const allIssuesFixed = checkAllIssuesFixed(
-                state.level.blocks,
-                triggeredEvents,
-                eventId
-            );
+            // Update code and regions, re-rendering only the blocks affected by the new event
+            const {code, regions} = renderLevel(state.level.blocks, triggeredEvents);
 
             return {
                 ...state,
                 code,
                 regions,
+                regionIndex: new RegionIndex(regions, state.level.blocks),
                 triggeredEvents,
-                isFinished: allIssuesFixed,
-                pendingHintId: nextHintId,
+                triggered,
+                isFinished: triggered.allIssuesFixed,
+                pendingHintId: triggered.nextHintId,
             };
         }
 
@@ -149,51 +125,26 @@ export function levelReducer(
  * @returns Next hint ID or null
  */
 export const calculateNextHintId = (levelData: LevelData, triggeredEvents: string[]): string | null => {
-    // Find the first block with a hint that hasn't been triggered yet
-    const blockWithHint = levelData.blocks.find(
-        block => block.hint && block.event && !isEventTriggered(block.event, triggeredEvents)
-    );
-
-    // If the block has an event array, return the first event in the array
-    // Otherwise, return the event as is
-    if (blockWithHint?.event) {
-        return Array.isArray(blockWithHint.event) ? blockWithHint.event[0] : blockWithHint.event;
-    }
-
-    return null;
+    return new TriggeredEvents(getLevelIndex(levelData.blocks), triggeredEvents).nextHintId;
 };
 
-/**
- * Helper function to check if an event is triggered
- * @param event - Event ID or array of event IDs
- * @param triggeredEvents - List of triggered event IDs
- * @returns True if the event is triggered
- */
-function isEventTriggered(event: string | string[] | undefined, triggeredEvents: string[]): boolean {
-    if (!event) return false;
-
-    if (Array.isArray(event)) {
-        // If event is an array, check if any of the events in the array are in the triggeredEvents list
-        return event.some(e => triggeredEvents.includes(e));
-    } else {
-        // If event is a string, check if it's in the triggeredEvents list
-        return triggeredEvents.includes(event);
-    }
-}
-
 /**
  * Creates initial level state with zero progress
+ * Built-in levels are hydrated from the state precomputed by the levels compiler
  * @param levelData - Data for the level
  * @returns Initial level state
  */
 export const createInitialLevelState = (levelData: LevelData): LevelState => {
-    const {code, regions} = applyEvents(levelData.blocks, []);
+    const {code, regions, pendingHintId} = getInitialLevelState(levelData);
+    const triggered = new TriggeredEvents(getLevelIndex(levelData.blocks), []);
     return {
         level: levelData,
-        triggeredEvents: [],
-        pendingHintId: calculateNextHintId(levelData, []),
+        triggeredEvents: triggered.events,
+        triggered,
+        pendingHintId,
         code,
         regions,
+        regionIndex: new RegionIndex(regions, levelData.blocks),
         isFinished: false,
         startTime: Date.now(),           // Initialize with current timestamp
         sessionHintsUsed: 0,             // Initialize with zero hints used
@@ -0,0 +1,76 @@
+import {afterEach, beforeEach, describe, expect, test, vi} from 'vitest';
+import {act, fireEvent, render, screen} from '@testing-library/react';
+import {BrowserRouter} from 'react-router-dom';
+import {AdminActivityPage} from '../components/AdminActivityPage';
+import {GameStateContext} from '../reducers';
+import {backfillPlayerActivity, fetchUserActivityPage, UserActivityPage} from '../firebase/firestore';
+import {UserActivity} from '../types';
+import {createStateBuilder, mockDispatch} from './stateBuilder';
+
+vi.mock('../firebase/firestore', () => ({
+    fetchUserActivityPage: vi.fn(),
+    backfillPlayerActivity: vi.fn()
+}));
+
+function activity(uid: string): UserActivity {
+    return {
+        uid,
+        displayName: uid,
+        email: `${uid}@example.com`,
+        totalLevelCompletions: 1,
+        totalLevelsSolved: 1,
+        totalTimeSpent: 60,
+        totalHintsUsed: 0,
+        totalMistakesMade: 0,
+        lastPlayedAt: null,
+        createdAt: null
+    };
+}
+
+function page(uids: string[], cursor: string | null): UserActivityPage {
+    return {users: uids.map(activity), cursor: cursor as unknown as UserActivityPage['cursor']};
+}
+
+const renderPage = () => render(
+    <BrowserRouter>
+        <GameStateContext.Provider value={{state: createStateBuilder().asAdmin().build(), dispatch: mockDispatch}}>
+            <AdminActivityPage/>
+        </GameStateContext.Provider>
+    </BrowserRouter>
+);
+
+describe('AdminActivityPage', () => {
+    beforeEach(() => {
+        vi.resetAllMocks();
+        // Pages are only loaded by the Load more button
+        vi.stubGlobal('IntersectionObserver', undefined);
+    });
+
+    afterEach(() => {
+        vi.unstubAllGlobals();
+    });
+
+    test('drops a page that is still loading when the feed is rebuilt', async () => {
+        let resolveStalePage: (page: UserActivityPage) => void = () => {};
+        vi.mocked(fetchUserActivityPage)
+            .mockResolvedValueOnce(page(['first'], 'cursor-1'))
+            .mockReturnValueOnce(new Promise(resolve => resolveStalePage = resolve))
+            .mockResolvedValueOnce(page(['rebuilt'], null));
+        vi.mocked(backfillPlayerActivity).mockResolvedValue(2);
+
+        renderPage();
+        fireEvent.click(await screen.findByText('Load more'));
+        fireEvent.click(screen.getByText('Rebuild feed'));
+
+        expect(await screen.findByText('rebuilt')).toBeDefined();
+        expect(fetchUserActivityPage).toHaveBeenLastCalledWith(undefined, null);
+        expect(screen.getByText('Rebuilt the activity of 2 players')).toBeDefined();
+
+        await act(async () => resolveStalePage(page(['stale'], 'cursor-2')));
+
+        expect(screen.queryByText('stale')).toBeNull();
+        expect(screen.queryByText('first')).toBeNull();
+        expect(screen.getByText('Last 1 Active Users')).toBeDefined();
+        expect(screen.queryByText('Load more')).toBeNull();
+    });
+});
@@ -0,0 +1,97 @@
+import {afterEach, beforeEach, describe, expect, test, vi} from 'vitest';
+import {act, fireEvent, render} from '@testing-library/react';
+import {CodeView} from '../components/CodeView';
+
+const bigCode = Array.from({length: 2000}, (_, i) => `value_${i} = compute(${i}, "text")`).join('\n');
+
+describe('CodeView', () => {
+    beforeEach(() => {
+        vi.useFakeTimers();
+    });
+
+    afterEach(() => {
+        vi.useRealTimers();
+    });
+
+    test('mounts only a window of lines of a large level', () => {
+        const {container} = render(<CodeView code={bigCode} onClick={() => {}}/>);
+
+        const lines = container.querySelectorAll('.code-line');
+        expect(lines.length).toBeGreaterThan(0);
+        expect(lines.length).toBeLessThan(200);
+        expect(lines[0].getAttribute('data-line-index')).toBe('0');
+    });
+
+    test('renders the lines around the scroll position', () => {
+        const {container} = render(<CodeView code={bigCode} onClick={() => {}}/>);
+        const pre = container.querySelector('pre')!;
+
+        Object.defineProperty(pre, 'scrollTop', {value: 21 * 1000, configurable: true});
+        fireEvent.scroll(pre);
+
+        const indices = Array.from(container.querySelectorAll('.code-line'))
+            .map(line => Number(line.getAttribute('data-line-index')));
+        expect(indices).toContain(1000);
+        expect(indices).not.toContain(0);
+    });
+
+    test('reports the clicked token with its line and column', () => {
+        const onClick = vi.fn();
+        const {container} = render(<CodeView code={'x = 1\nname = compute(x)'} onClick={onClick}/>);
+
+        const token = Array.from(container.querySelectorAll('[data-line-index="1"] [data-col]'))
+            .find(span => span.textContent!.includes('compute'))! as HTMLElement;
+        fireEvent.click(token, {clientX: 10, clientY: 20});
+        expect(token.className).toContain('flash-ok');
+        act(() => {
+            vi.advanceTimersByTime(50);
+        });
+
+        // Plain text between Prism tokens is a single token, so the column is where it starts
+        expect(onClick).toHaveBeenCalledWith(1, Number(token.dataset.col), token.textContent, 10, 20);
+        expect('name = compute(x)'.startsWith(token.textContent!, Number(token.dataset.col))).toBe(true);
+    });
+
+    test('ignores clicks outside tokens and while disabled', () => {
+        const onClick = vi.fn();
+        const {container, rerender} = render(<CodeView code={'x = 1'} onClick={onClick}/>);
+
+        fireEvent.click(container.querySelector('.line-number')!);
+        rerender(<CodeView code={'x = 1'} disable={true} onClick={onClick}/>);
+        fireEvent.click(container.querySelector('[data-col]')!);
+        act(() => {
+            vi.advanceTimersByTime(100);
+        });
+
+        expect(onClick).not.toHaveBeenCalled();
+    });
+
+    test('reveals the highlighted code on animation frames', () => {
+        const frames: FrameRequestCallback[] = [];
+        vi.stubGlobal('requestAnimationFrame', (callback: FrameRequestCallback) => frames.push(callback));
+        vi.stubGlobal('cancelAnimationFrame', () => {});
+        const runFrame = (time: number) => act(() => frames.shift()!(time));
+        const text = (container: HTMLElement) => Array.from(container.querySelectorAll('.code-content'))
+            .map(line => line.textContent).join('\n');
+
+        try {
+            const {container} = render(<CodeView code={'def compute(x):\ny = 2'} animate={true} onClick={() => {}}/>);
+            runFrame(1000);
+            expect(text(container)).toBe('');
+
+            runFrame(1000 + 25);
+            expect(text(container)).toBe('def comput');
+            // The cut token keeps the type it has in the whole code
+            expect(container.querySelector('[data-col="4"]')!.className).toContain('function');
+
+            runFrame(1000 + 50);
+            expect(text(container)).toBe('def compute(x):\ny = ');
+
+            runFrame(1000 + 100);
+            expect(text(container)).toBe('def compute(x):\ny = 2');
+            expect(frames).toHaveLength(0);
+        } finally {
+            vi.unstubAllGlobals();
+        }
+    });
+});
@@ -2,7 +2,7 @@ import {describe, expect, test, vi, beforeEach} from 'vitest';
 import React from 'react';
 import {render, screen} from '@testing-library/react';
 import {SidebarNavigationContainer} from '../components/SidebarNavigationContainer.tsx';
-import {GameStateContext} from '../reducers/index.ts';
+import {GameStore, GameStoreContext} from '../reducers/gameStore.ts';
 import {createStateBuilder, mockDispatch} from './stateBuilder';
 
 // Mock react-router-dom
@@ -12,7 +12,8 @@ vi.mock('react-router-dom', () => ({
 
 // Mock debugUtils
 vi.mock('../utils/debugUtils', () => ({
-    isDebugModeEnabled: vi.fn()
+    isDebugModeEnabled: vi.fn(),
+    subscribeToDebugMode: () => () => {}
 }));
 
 // Import the mocked function
@@ -58,9 +59,9 @@ describe('SidebarNavigationContainer with inDevelopment topics', () => {
         const mockState = createMockState(false); // Not admin
         
         render(
-            <GameStateContext.Provider value={{state: mockState, dispatch: mockDispatch}}>
+            <GameStoreContext.Provider value={new GameStore(mockState, mockDispatch)}>
                 <SidebarNavigationContainer/>
-            </GameStateContext.Provider>
+            </GameStoreContext.Provider>
         );
 
         // Regular topic should be visible
@@ -74,9 +75,9 @@ describe('SidebarNavigationContainer with inDevelopment topics', () => {
         const mockState = createMockState(false); // Not admin
         
         render(
-            <GameStateContext.Provider value={{state: mockState, dispatch: mockDispatch}}>
+            <GameStoreContext.Provider value={new GameStore(mockState, mockDispatch)}>
                 <SidebarNavigationContainer/>
-            </GameStateContext.Provider>
+            </GameStoreContext.Provider>
         );
 
         // Development topic should be hidden
@@ -90,9 +91,9 @@ describe('SidebarNavigationContainer with inDevelopment topics', () => {
         const mockState = createMockState(false); // Not admin
         
         render(
-            <GameStateContext.Provider value={{state: mockState, dispatch: mockDispatch}}>
+            <GameStoreContext.Provider value={new GameStore(mockState, mockDispatch)}>
                 <SidebarNavigationContainer/>
-            </GameStateContext.Provider>
+            </GameStoreContext.Provider>
         );
 
         // Development topic should be visible
@@ -106,9 +107,9 @@ describe('SidebarNavigationContainer with inDevelopment topics', () => {
         const mockState = createMockState(true); // Admin user
         
         render(
-            <GameStateContext.Provider value={{state: mockState, dispatch: mockDispatch}}>
+            <GameStoreContext.Provider value={new GameStore(mockState, mockDispatch)}>
                 <SidebarNavigationContainer/>
-            </GameStateContext.Provider>
+            </GameStoreContext.Provider>
         );
 
         // Development topic should be visible for admin
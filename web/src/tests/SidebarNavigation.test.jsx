@@ -1,8 +1,8 @@
 import {describe, expect, test, vi} from 'vitest';
-import React from 'react';
-import {render, screen} from '@testing-library/react';
+import React, {Profiler} from 'react';
+import {act, render, screen} from '@testing-library/react';
 import {SidebarNavigationContainer} from '../components/SidebarNavigationContainer.tsx';
-import {GameStateContext} from '../reducers/index.ts';
+import {GameStore, GameStoreContext} from '../reducers/gameStore.ts';
 import {isLevelClickable} from '../utils/levelUtils';
 // Import state builder
 import {createStateBuilder, mockDispatch} from './stateBuilder';
@@ -37,9 +37,9 @@ const mockState = createStateBuilder()
 describe('SidebarNavigationContainer', () => {
     test('renders topics and levels', () => {
         render(
-            <GameStateContext.Provider value={{state: mockState, dispatch: mockDispatch}}>
+            <GameStoreContext.Provider value={new GameStore(mockState, mockDispatch)}>
                 <SidebarNavigationContainer/>
-            </GameStateContext.Provider>
+            </GameStoreContext.Provider>
         );
 
         // Check if topics are rendered
@@ -73,9 +73,9 @@ describe('SidebarNavigationContainer', () => {
 
         // Now render the component to verify the UI reflects these rules
         render(
-            <GameStateContext.Provider value={{state: mockState, dispatch: mockDispatch}}>
+            <GameStoreContext.Provider value={new GameStore(mockState, mockDispatch)}>
                 <SidebarNavigationContainer/>
-            </GameStateContext.Provider>
+            </GameStoreContext.Provider>
         );
 
         // Find level elements by their text content for topic1 (expanded by default)
@@ -88,4 +88,27 @@ describe('SidebarNavigationContainer', () => {
         expect(level2.className).toContain('cursor-pointer');
         expect(level3.className).toContain('cursor-not-allowed');
     });
+
+    test('re-renders only when the shown state changes', () => {
+        const store = new GameStore(mockState, mockDispatch);
+        const renders = [];
+        render(
+            <GameStoreContext.Provider value={store}>
+                <Profiler id="sidebar" onRender={() => renders.push(1)}>
+                    <SidebarNavigationContainer/>
+                </Profiler>
+            </GameStoreContext.Provider>
+        );
+        renders.length = 0;
+
+        // Clicks in the game don't change anything the sidebar shows
+        act(() => store.setState({...store.getState(), chatMessages: [], isTypingAnimationComplete: false}));
+        expect(renders).toHaveLength(0);
+
+        // Solving a level unlocks the next one
+        const levels = {...mockState.playerStats.levels, topic1__level2: mockState.playerStats.levels.topic1__level1};
+        act(() => store.setState({...store.getState(), playerStats: {...mockState.playerStats, levels}}));
+        expect(renders.length).toBeGreaterThan(0);
+        expect(screen.getByText('level3.py').closest('div').className).toContain('cursor-pointer');
+    });
 });
\ No newline at end of file
@@ -1,5 +1,5 @@
 import {beforeEach, describe, expect, test, vi} from 'vitest';
-import {render, screen} from '@testing-library/react';
+import {fireEvent, render, screen} from '@testing-library/react';
 import {TopBar} from '../components/TopBar';
 import {GameStateContext} from '../reducers';
 import {BrowserRouter} from 'react-router-dom';
@@ -12,7 +12,9 @@ import {createStateBuilder, mockDispatch} from './stateBuilder';
 vi.mock('../utils/debugUtils', () => ({
     isDebugModeEnabled: vi.fn(),
     parseDebugModeFromUrl: vi.fn(),
-    setDebugMode: vi.fn()
+    setDebugMode: vi.fn(),
+    isReducerTracingEnabled: vi.fn(),
+    setReducerTracing: vi.fn()
 }));
 
 // Use the state builder to create mock state
@@ -92,6 +94,18 @@ describe('TopBar with debug mode', () => {
         expect(buttonElement?.className).not.toContain('hidden');
     });
 
+    test('Trace button opens the reducer trace panel in debug mode only', () => {
+        renderTopBar();
+        expect(screen.queryByText('Trace')).toBeNull();
+
+        (parseDebugModeFromUrl as any).mockReturnValue(true);
+        renderTopBar();
+        fireEvent.click(screen.getByText('Trace'));
+
+        expect(screen.getByText('Reducer trace')).toBeDefined();
+        expect(screen.getByText('Export JSON')).toBeDefined();
+    });
+
     test('Clean Code Game title is clickable', () => {
         renderTopBar();
 
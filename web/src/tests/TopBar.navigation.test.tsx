@@ -11,7 +11,9 @@ import {createStateBuilder, mockDispatch} from './stateBuilder';
 vi.mock('../utils/debugUtils', () => ({
     isDebugModeEnabled: vi.fn(),
     parseDebugModeFromUrl: vi.fn(),
-    setDebugMode: vi.fn()
+    setDebugMode: vi.fn(),
+    isReducerTracingEnabled: vi.fn(),
+    setReducerTracing: vi.fn()
 }));
 
 // Use the state builder to create mock state
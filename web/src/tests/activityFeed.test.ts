@@ -0,0 +1,109 @@
+import {beforeEach, describe, expect, test, vi} from 'vitest';
+import {
+    ACTIVITY_METRICS,
+    addActivityPage,
+    createActivityAggregates,
+    getActivityPercentile
+} from '../utils/activityStats';
+import {fetchUserActivityPage} from '../firebase/firestore';
+import {UserActivity} from '../types';
+import {collection, getDocs, limit, startAfter} from 'firebase/firestore';
+
+vi.mock('firebase/firestore', () => ({
+    collection: vi.fn((...path: unknown[]) => path.slice(1).join('/')),
+    query: vi.fn((collection: string, ...constraints: unknown[]) => ({collection, constraints})),
+    orderBy: vi.fn((field: string, direction: string) => ({orderBy: field, direction})),
+    startAfter: vi.fn((cursor: unknown) => ({startAfter: cursor})),
+    limit: vi.fn((count: number) => ({limit: count})),
+    getDocs: vi.fn(),
+    serverTimestamp: vi.fn(() => 'mocked-timestamp')
+}));
+
+vi.mock('../firebase/index', () => ({
+    db: {}
+}));
+
+function activity(uid: string, value: number): UserActivity {
+    return {
+        uid,
+        displayName: uid,
+        email: `${uid}@example.com`,
+        totalLevelCompletions: value,
+        totalLevelsSolved: value % 7,
+        totalTimeSpent: value * 60,
+        totalHintsUsed: value % 3,
+        totalMistakesMade: 100 - value,
+        lastPlayedAt: null,
+        createdAt: null
+    };
+}
+
+describe('activity aggregates', () => {
+    test('running aggregates over pages match aggregates over all users', () => {
+        const users = Array.from({length: 237}, (_, i) => activity(`u${i}`, (i * 37) % 101));
+        let aggregates = createActivityAggregates();
+        for (let i = 0; i < users.length; i += 50) {
+            aggregates = addActivityPage(aggregates, users.slice(i, i + 50));
+        }
+
+        expect(aggregates.count).toBe(users.length);
+        for (const metric of ACTIVITY_METRICS) {
+            const values = users.map(u => u[metric]).sort((a, b) => a - b);
+            expect(aggregates.totals[metric]).toBe(values.reduce((sum, v) => sum + v, 0));
+            expect(aggregates.sorted[metric]).toEqual(values);
+            expect(getActivityPercentile(aggregates, metric, 50)).toBe(values[Math.ceil(values.length / 2) - 1]);
+            expect(getActivityPercentile(aggregates, metric, 100)).toBe(values[values.length - 1]);
+            expect(getActivityPercentile(aggregates, metric, 0)).toBe(values[0]);
+        }
+    });
+
+    test('adding a page leaves the previous aggregates untouched', () => {
+        const first = addActivityPage(createActivityAggregates(), [activity('a', 5)]);
+        const second = addActivityPage(first, [activity('b', 1)]);
+
+        expect(first.count).toBe(1);
+        expect(first.sorted.totalLevelCompletions).toEqual([5]);
+        expect(second.sorted.totalLevelCompletions).toEqual([1, 5]);
+        expect(getActivityPercentile(createActivityAggregates(), 'totalTimeSpent', 90)).toBe(0);
+    });
+});
+
+describe('fetchUserActivityPage', () => {
+    const activityDoc = (uid: string) => ({
+        id: uid,
+        data: () => ({
+            displayName: uid,
+            summary: {totalLevelCompletions: 3},
+            updatedAt: {toDate: () => new Date('2024-01-02T00:00:00.000Z')}
+        })
+    });
+
+    beforeEach(() => {
+        vi.clearAllMocks();
+    });
+
+    test('reads summary mirror documents and returns a cursor for the next page', async () => {
+        const docs = ['a', 'b', 'c'].map(activityDoc);
+        (getDocs as any).mockResolvedValue({docs});
+
+        const page = await fetchUserActivityPage(3);
+
+        expect(collection).toHaveBeenCalledWith(expect.anything(), 'playerActivity');
+        expect(limit).toHaveBeenCalledWith(3);
+        expect(startAfter).not.toHaveBeenCalled();
+        expect(page.users.map(u => u.uid)).toEqual(['a', 'b', 'c']);
+        expect(page.users[0]).toMatchObject({totalLevelCompletions: 3, lastPlayedAt: '2024-01-02T00:00:00.000Z'});
+        expect(page.cursor).toBe(docs[2]);
+    });
+
+    test('continues after the cursor and ends with a short page', async () => {
+        const cursor = activityDoc('c');
+        (getDocs as any).mockResolvedValue({docs: [activityDoc('d')]});
+
+        const page = await fetchUserActivityPage(3, cursor as any);
+
+        expect(startAfter).toHaveBeenCalledWith(cursor);
+        expect(page.users.map(u => u.uid)).toEqual(['d']);
+        expect(page.cursor).toBeNull();
+    });
+});
@@ -0,0 +1,228 @@
+// @vitest-environment node
+import {afterAll, beforeAll, beforeEach, describe, expect, test, vi} from 'vitest';
+import {createServer, IncomingMessage, Server, ServerResponse} from 'node:http';
+import {AddressInfo} from 'node:net';
+import {
+    GeminiApiError,
+    GeminiClient,
+    GeminiRequest,
+    GeminiResponseCache,
+    generateHintsForAllEvents,
+    RequestPool
+} from '../utils/aiCoAuthor';
+import {parseLevelText} from '../levels_compiler/parser';
+
+const LEVEL = `##file greeting.py
+"""start
+TODO
+"""
+def f(n):
+    return n * 60
+
+##replace-span rename "f" "to_seconds"
+##replace-span seconds "60" "SECONDS_PER_MINUTE"
+##replace-span name "n" "minutes"
+"""final
+TODO
+"""
+`;
+
+type Handler = (body: any, res: ServerResponse) => void;
+
+/**
+ * Local stand-in for the Gemini endpoint
+ */
+const mockServer = {
+    server: null as Server | null,
+    url: '',
+    requests: [] as { url: string, apiKey: string, body: any }[],
+    running: 0,
+    maxRunning: 0,
+    delayMs: 0,
+    handlers: [] as Handler[],      // responses for the next requests; hints by default
+};
+
+function reply(res: ServerResponse, value: object): void {
+    res.writeHead(200, {'Content-Type': 'application/json'});
+    res.end(JSON.stringify({candidates: [{content: {parts: [{text: JSON.stringify(value)}]}}]}));
+}
+
+function replyHint(body: any, res: ServerResponse): void {
+    // Answer with the changed line, so every event gets its own hint
+    const prompt: string = body.contents[0].parts[0].text;
+    const [before, after] = prompt.split('```python\n').slice(1).map(code => code.split('```')[0].split('\n'));
+    const changed = after.find((line, i) => line !== before[i])!.trim();
+    reply(res, {analysis: '', change: '', hint: `Hint for ${changed}`, explanation: 'Better', options: [{label: 'Fix it', correct: true}]});
+}
+
+function handle(req: IncomingMessage, res: ServerResponse): void {
+    let data = '';
+    req.on('data', chunk => data += chunk);
+    req.on('end', () => {
+        const body = JSON.parse(data);
+        mockServer.requests.push({url: req.url!, apiKey: String(req.headers['x-goog-api-key']), body});
+        mockServer.running++;
+        mockServer.maxRunning = Math.max(mockServer.maxRunning, mockServer.running);
+        setTimeout(() => {
+            mockServer.running--;
+            (mockServer.handlers.shift() ?? replyHint)(body, res);
+        }, mockServer.delayMs);
+    });
+}
+
+function createMemoryCache(): GeminiResponseCache & { entries: Map<string, unknown> } {
+    const entries = new Map<string, unknown>();
+    return {
+        entries,
+        get: async <T>(key: string) => entries.get(key) as T | undefined,
+        put: async (key: string, value: unknown) => {
+            entries.set(key, value);
+        }
+    };
+}
+
+const request: GeminiRequest = {
+    apiKey: 'test-key',
+    model: 'test-model',
+    systemPrompt: 'system',
+    prompt: 'prompt',
+    schema: {type: 'object'}
+};
+
+describe('Gemini client', () => {
+    beforeAll(async () => {
+        mockServer.server = createServer(handle);
+        await new Promise<void>(resolve => mockServer.server!.listen(0, '127.0.0.1', resolve));
+        mockServer.url = `http://127.0.0.1:${(mockServer.server.address() as AddressInfo).port}/v1beta`;
+    });
+
+    afterAll(async () => {
+        await new Promise(resolve => mockServer.server!.close(resolve));
+    });
+
+    beforeEach(() => {
+        mockServer.requests = [];
+        mockServer.handlers = [];
+        mockServer.maxRunning = 0;
+        mockServer.delayMs = 0;
+        vi.spyOn(console, 'log').mockImplementation(() => {});
+        vi.spyOn(console, 'warn').mockImplementation(() => {});
+        vi.spyOn(console, 'error').mockImplementation(() => {});
+    });
+
+    test('generates hints for all events and reuses cached responses', async () => {
+        const cache = createMemoryCache();
+        const client = new GeminiClient({apiUrl: mockServer.url, cache});
+        const progress: number[] = [];
+
+        const code = await generateHintsForAllEvents(LEVEL, 'test-key', 'test-model', 'both', {client},
+            finished => progress.push(finished));
+
+        // Events that no other block refers to are rendered without their names
+        const blocks = parseLevelText(code).level!.blocks;
+        const span = (clickable: string) => blocks.find(block => block.clickable === clickable)!;
+        expect(span('f').hint).toBe('Hint for def to_seconds(minutes):');
+        expect(span('60').hint).toBe('Hint for return minutes * SECONDS_PER_MINUTE');
+        expect(span('n').options).toEqual([{id: 'good', label: 'Fix it', correct: true}]);
+        expect(mockServer.requests).toHaveLength(3);
+        expect(mockServer.requests[0].url).toBe('/v1beta/models/test-model:generateContent');
+        expect(mockServer.requests[0].apiKey).toBe('test-key');
+        expect(progress).toEqual([0, 1, 2, 3]);
+        expect(cache.entries.size).toBe(3);
+
+        // Nothing changed, so nothing is sent again
+        expect(await generateHintsForAllEvents(LEVEL, 'test-key', 'test-model', 'both', {client})).toBe(code);
+        expect(mockServer.requests).toHaveLength(3);
+
+        // Unless new responses are requested
+        await generateHintsForAllEvents(LEVEL, 'test-key', 'test-model', 'both', {client, refresh: true});
+        expect(mockServer.requests).toHaveLength(6);
+    });
+
+    test('limits the number of concurrent requests', async () => {
+        mockServer.delayMs = 20;
+        mockServer.handlers = Array.from({length: 6}, (): Handler => (_, res) => reply(res, {}));
+        const client = new GeminiClient({apiUrl: mockServer.url, concurrency: 2});
+
+        await Promise.all(Array.from({length: 6}, (_, i) => client.generate({...request, prompt: `prompt ${i}`})));
+
+        expect(mockServer.requests).toHaveLength(6);
+        expect(mockServer.maxRunning).toBe(2);
+    });
+
+    test('sends equal concurrent requests once', async () => {
+        mockServer.delayMs = 20;
+        mockServer.handlers = [(_, res) => reply(res, {answer: 1})];
+        const client = new GeminiClient({apiUrl: mockServer.url});
+
+        const responses = await Promise.all([client.generate(request), client.generate({...request, apiKey: 'other'})]);
+
+        expect(responses).toEqual([{answer: 1}, {answer: 1}]);
+        expect(mockServer.requests).toHaveLength(1);
+    });
+
+    test('sends a refresh even when an equal request is in flight', async () => {
+        mockServer.delayMs = 20;
+        mockServer.handlers = [(_, res) => reply(res, {answer: 1}), (_, res) => reply(res, {answer: 2})];
+        const client = new GeminiClient({apiUrl: mockServer.url});
+
+        const responses = await Promise.all([client.generate(request), client.generate(request, true)]);
+
+        expect(responses).toEqual([{answer: 1}, {answer: 2}]);
+        expect(mockServer.requests).toHaveLength(2);
+    });
+
+    test('retries rate limited and failed requests', async () => {
+        const fail = (status: number): Handler => (_, res) => {
+            res.writeHead(status, {'Retry-After': '0'});
+            res.end('try later');
+        };
+        mockServer.handlers = [fail(429), fail(503), (_, res) => reply(res, {answer: 2})];
+        const client = new GeminiClient({apiUrl: mockServer.url, retryDelayMs: 1});
+
+        expect(await client.generate(request)).toEqual({answer: 2});
+        expect(mockServer.requests).toHaveLength(3);
+    });
+
+    test('does not retry client errors and gives up after the maximum number of retries', async () => {
+        const fail = (status: number): Handler => (_, res) => {
+            res.writeHead(status);
+            res.end('error');
+        };
+        const client = new GeminiClient({apiUrl: mockServer.url, maxRetries: 1, retryDelayMs: 1});
+
+        mockServer.handlers = [fail(400)];
+        await expect(client.generate(request)).rejects.toMatchObject({status: 400});
+        expect(mockServer.requests).toHaveLength(1);
+
+        mockServer.handlers = [fail(500), fail(500), fail(500)];
+        await expect(client.generate(request)).rejects.toBeInstanceOf(GeminiApiError);
+        expect(mockServer.requests).toHaveLength(3);
+    });
+});
+
+describe('RequestPool', () => {
+    test('runs queued tasks in order as slots become free', async () => {
+        const pool = new RequestPool(1);
+        const order: number[] = [];
+        const task = (i: number) => pool.run(async () => {
+            order.push(i);
+            await new Promise(resolve => setTimeout(resolve, 1));
+            return i;
+        });
+
+        expect(await Promise.all([task(1), task(2), task(3)])).toEqual([1, 2, 3]);
+        expect(order).toEqual([1, 2, 3]);
+        await expect(pool.run(() => Promise.reject(new Error('failed')))).rejects.toThrow('failed');
+        expect(await task(4)).toBe(4);
+    });
+
+    test('spaces the starts of tasks by the minimum interval', async () => {
+        const pool = new RequestPool(4, 20);
+        const start = Date.now();
+        const startTimes = await Promise.all([1, 2, 3].map(() => pool.run(async () => Date.now() - start)));
+
+        expect(startTimes[1]).toBeGreaterThanOrEqual(19);
+        expect(startTimes[2]).toBeGreaterThanOrEqual(39);
+    });
+});
@@ -0,0 +1,208 @@
+// @vitest-environment node
+import {afterAll, beforeAll, beforeEach, describe, expect, test, vi} from 'vitest';
+import {createServer, IncomingMessage, Server, ServerResponse} from 'node:http';
+import {AddressInfo} from 'node:net';
+import {GeminiClient, GeminiRequest, streamHintAndExplanation} from '../utils/aiCoAuthor';
+import {parseLevelText} from '../levels_compiler/parser';
+
+const LEVEL = `##file greeting.py
+"""start
+TODO
+"""
+def f(n):
+    return n * 60
+
+##replace-span rename "f" "to_seconds"
+"""final
+TODO
+"""
+`;
+
+const RESPONSE = {
+    analysis: 'f says nothing',
+    change: 'Rename f',
+    hint: 'What does the function compute?',
+    explanation: 'A name should tell what a function does',
+    options: [{label: 'Rename to to_seconds', correct: true}, {label: 'Add a comment', correct: false}]
+};
+
+type Handler = (url: string, res: ServerResponse) => void;
+
+/**
+ * Local stand-in for the Gemini endpoint that answers with server-sent events
+ */
+const sseServer = {
+    server: null as Server | null,
+    url: '',
+    requests: [] as string[],
+    handlers: [] as Handler[],
+    closed: [] as boolean[],        // whether each response was closed before it was finished
+};
+
+/**
+ * Send a response text as server-sent events of a few characters each
+ */
+function replyStream(text: string, pieceLength: number = 12, delayMs: number = 5): Handler {
+    return (_, res) => {
+        res.writeHead(200, {'Content-Type': 'text/event-stream'});
+        const index = sseServer.closed.push(false) - 1;
+        res.on('close', () => sseServer.closed[index] = !res.writableFinished);
+        let position = 0;
+        const next = () => {
+            if (res.destroyed) return;
+            if (position >= text.length) {
+                res.end();
+                return;
+            }
+            const piece = text.substring(position, position + pieceLength);
+            position += pieceLength;
+            // Alternate line endings, as servers may use either
+            const eol = position % 2 ? '\r\n' : '\n';
+            res.write(`data: ${JSON.stringify({candidates: [{content: {parts: [{text: piece}]}}]})}${eol}${eol}`);
+            setTimeout(next, delayMs);
+        };
+        next();
+    };
+}
+
+function findRename(code: string) {
+    return parseLevelText(code).level!.blocks.find(block => block.clickable === 'f')!;
+}
+
+function reply(value: object): Handler {
+    return (_, res) => {
+        res.writeHead(200, {'Content-Type': 'application/json'});
+        res.end(JSON.stringify({candidates: [{content: {parts: [{text: JSON.stringify(value)}]}}]}));
+    };
+}
+
+function handle(req: IncomingMessage, res: ServerResponse): void {
+    req.resume();
+    req.on('end', () => {
+        sseServer.requests.push(req.url!);
+        const handler = sseServer.handlers.shift();
+        if (handler) {
+            handler(req.url!, res);
+        } else {
+            res.writeHead(500);
+            res.end('no response');
+        }
+    });
+}
+
+const request: GeminiRequest = {
+    apiKey: 'test-key',
+    model: 'test-model',
+    systemPrompt: 'system',
+    prompt: 'prompt',
+    schema: {type: 'object'}
+};
+
+describe('Streaming Gemini responses', () => {
+    beforeAll(async () => {
+        sseServer.server = createServer(handle);
+        await new Promise<void>(resolve => sseServer.server!.listen(0, '127.0.0.1', resolve));
+        sseServer.url = `http://127.0.0.1:${(sseServer.server.address() as AddressInfo).port}/v1beta`;
+    });
+
+    afterAll(async () => {
+        await new Promise(resolve => sseServer.server!.close(resolve));
+    });
+
+    beforeEach(() => {
+        sseServer.requests = [];
+        sseServer.handlers = [];
+        sseServer.closed = [];
+        vi.spyOn(console, 'log').mockImplementation(() => {});
+        vi.spyOn(console, 'warn').mockImplementation(() => {});
+        vi.spyOn(console, 'error').mockImplementation(() => {});
+    });
+
+    test('fills in the hint while the response arrives', async () => {
+        sseServer.handlers = [replyStream(JSON.stringify(RESPONSE))];
+        const client = new GeminiClient({apiUrl: sseServer.url});
+        const hints: string[] = [];
+
+        const code = await streamHintAndExplanation(LEVEL, 'rename', 'test-key', 'test-model', 'both',
+            partial => hints.push(findRename(partial).hint ?? ''), {client});
+
+        expect(sseServer.requests).toEqual(['/v1beta/models/test-model:streamGenerateContent?alt=sse']);
+        const block = findRename(code);
+        expect(block.hint).toBe(RESPONSE.hint);
+        expect(block.explanation).toBe(RESPONSE.explanation);
+        expect(block.options).toEqual([
+            {id: 'good', label: 'Rename to to_seconds', correct: true},
+            {id: 'bad-1', label: 'Add a comment', correct: false}
+        ]);
+
+        // The hint grows piece by piece
+        const growing = hints.filter(hint => hint && hint !== RESPONSE.hint);
+        expect(growing.length).toBeGreaterThan(1);
+        expect(growing.every(hint => RESPONSE.hint.startsWith(hint))).toBe(true);
+    });
+
+    test('cancels the request when the signal is aborted', async () => {
+        sseServer.handlers = [replyStream(JSON.stringify(RESPONSE), 4, 20)];
+        const client = new GeminiClient({apiUrl: sseServer.url});
+        const controller = new AbortController();
+        const partials: unknown[] = [];
+
+        const streaming = client.stream(request, partial => {
+            partials.push(partial);
+            controller.abort();
+        }, {signal: controller.signal});
+
+        await expect(streaming).rejects.toMatchObject({name: 'AbortError'});
+        expect(partials).toHaveLength(1);
+        await vi.waitFor(() => expect(sseServer.closed).toEqual([true]));
+        // No regular request is sent after cancelling
+        expect(sseServer.requests).toHaveLength(1);
+    });
+
+    test('sends a regular request if streaming fails', async () => {
+        sseServer.handlers = [
+            (_, res) => {
+                res.writeHead(404);
+                res.end('not found');
+            },
+            reply({answer: 1})
+        ];
+        const client = new GeminiClient({apiUrl: sseServer.url});
+        const partials: unknown[] = [];
+
+        expect(await client.stream(request, partial => partials.push(partial))).toEqual({answer: 1});
+        expect(sseServer.requests).toEqual([
+            '/v1beta/models/test-model:streamGenerateContent?alt=sse',
+            '/v1beta/models/test-model:generateContent'
+        ]);
+        expect(partials).toEqual([]);
+    });
+
+    test('sends a regular request if the streamed response is incomplete', async () => {
+        sseServer.handlers = [replyStream('{"answer": 1'), reply({answer: 1})];
+        const client = new GeminiClient({apiUrl: sseServer.url});
+
+        expect(await client.stream(request, () => {})).toEqual({answer: 1});
+        expect(sseServer.requests).toHaveLength(2);
+    });
+
+    test('passes a cached response at once', async () => {
+        const entries = new Map<string, unknown>();
+        const client = new GeminiClient({
+            apiUrl: sseServer.url,
+            cache: {
+                get: async <T>(key: string) => entries.get(key) as T | undefined,
+                put: async (key: string, value: unknown) => {
+                    entries.set(key, value);
+                }
+            }
+        });
+        sseServer.handlers = [replyStream(JSON.stringify({answer: 2}))];
+        expect(await client.stream(request, () => {})).toEqual({answer: 2});
+
+        const partials: unknown[] = [];
+        expect(await client.stream(request, partial => partials.push(partial))).toEqual({answer: 2});
+        expect(partials).toEqual([{answer: 2}]);
+        expect(sseServer.requests).toHaveLength(1);
+    });
+});
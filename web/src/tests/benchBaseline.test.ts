@@ -0,0 +1,109 @@
+import {describe, expect, test, vi} from 'vitest';
+import {
+    BenchmarkResults,
+    compareWithBaseline,
+    formatComparisons,
+    getPercentile,
+    summarizeSamples,
+    writeBenchmarkResults
+} from '../benchmarks/baseline';
+import BenchmarkResultsReporter from '../benchmarks/resultsReporter';
+import {parseLevelText} from '../levels_compiler/parser';
+import {createSyntheticLevelText} from './levelGenerator';
+
+vi.mock('../benchmarks/baseline', async (importOriginal) => ({
+    ...await importOriginal<typeof import('../benchmarks/baseline')>(),
+    writeBenchmarkResults: vi.fn()
+}));
+
+function results(benchmarks: BenchmarkResults['benchmarks']): BenchmarkResults {
+    return {createdAt: '2024-01-01T00:00:00.000Z', benchmarks};
+}
+
+describe('benchmark summaries', () => {
+    test('getPercentile uses the nearest rank', () => {
+        const sorted = Array.from({length: 100}, (_, i) => i + 1);
+
+        expect(getPercentile(sorted, 95)).toBe(95);
+        expect(getPercentile(sorted, 0)).toBe(1);
+        expect(getPercentile([7], 95)).toBe(7);
+        expect(getPercentile([], 95)).toBe(0);
+    });
+
+    test('summarizeSamples computes operations per second and the 95th percentile', () => {
+        const samples = [...Array.from({length: 19}, () => 1), 21];
+
+        expect(summarizeSamples(samples)).toEqual({hz: 500, p95: 1, samples: 20});
+    });
+});
+
+describe('compareWithBaseline', () => {
+    const baseline = results({
+        'a': {hz: 1000, p95: 2, samples: 100},
+        'b': {hz: 1000, p95: 2, samples: 100},
+        'c': {hz: 1000, p95: 2, samples: 100},
+        'gone': {hz: 10, p95: 1, samples: 10}
+    });
+
+    test('flags benchmarks that got slower than the threshold allows', () => {
+        const current = results({
+            'a': {hz: 850, p95: 2.2, samples: 100},     // within 20%
+            'b': {hz: 700, p95: 2, samples: 100},       // fewer operations per second
+            'c': {hz: 1000, p95: 3, samples: 100},      // slower 95th percentile
+            'new': {hz: 5, p95: 1, samples: 10}
+        });
+
+        const comparisons = compareWithBaseline(current, baseline, 0.2);
+
+        expect(comparisons.map(c => [c.name, c.regressed])).toEqual([
+            ['a', false], ['b', true], ['c', true], ['gone', false], ['new', false]
+        ]);
+        expect(comparisons[1].hzChange).toBeCloseTo(-0.3);
+        expect(comparisons[2].p95Change).toBeCloseTo(0.5);
+
+        const report = formatComparisons(comparisons).split('\n');
+        expect(report[1]).toMatch(/^REGRESSED b: 700\.0 ops\/s, p95 2\.000 ms \(ops\/s -30\.0%, p95 \+0\.0%\)$/);
+        expect(report[3]).toContain('missing  gone');
+        expect(report[4]).toContain('new      new');
+    });
+
+    test('accepts any slowdown below a larger threshold', () => {
+        const current = results({'b': {hz: 700, p95: 2, samples: 100}});
+
+        expect(compareWithBaseline(current, baseline, 0.5).some(c => c.regressed)).toBe(false);
+    });
+});
+
+describe('BenchmarkResultsReporter', () => {
+    test('stores a summary of every benchmark with samples', () => {
+        const bench = (name: string, samples?: number[]) => ({
+            type: 'test', name, result: samples ? {benchmark: {samples}} : undefined
+        });
+        const file = {
+            name: 'src/tests/x.bench.ts',
+            tasks: [{type: 'suite', name: 'parse', tasks: [bench('fast', [1, 1]), bench('skipped')]}]
+        };
+
+        new BenchmarkResultsReporter().onFinished([file as any]);
+
+        const [, written] = (writeBenchmarkResults as any).mock.calls[0];
+        expect(written.benchmarks).toEqual({
+            'src/tests/x.bench.ts > parse > fast': {hz: 1000, p95: 1, samples: 2}
+        });
+    });
+});
+
+describe('createSyntheticLevelText', () => {
+    test('creates levels that parse, with the requested spans and events per block', () => {
+        const source = createSyntheticLevelText({lines: 200, spans: 10, eventsPerBlock: 3, replaceBlocks: 4});
+        const {level, error} = parseLevelText(source);
+
+        expect(error).toBeUndefined();
+        const blocks = level!.blocks;
+        expect(blocks.filter(b => b.type === 'replace-span')).toHaveLength(10);
+        expect(blocks.filter(b => b.type === 'replace')).toHaveLength(4);
+        const replaceOn = blocks.filter(b => b.type === 'replace-on');
+        expect(replaceOn).toHaveLength(4);
+        expect(replaceOn.every(b => (b.event as string[]).length === 3)).toBe(true);
+    });
+});
@@ -0,0 +1,57 @@
+import {bench, describe} from 'vitest';
+import {normalizeTokens, Prism} from 'prism-react-renderer';
+import {LineTokenCache, sliceLineTokens} from '../utils/codeTokens';
+
+const LINES = 2000;
+const CHARS_PER_FRAME = 7; // characters revealed in a 60 fps frame by the CodeView animation
+
+function createLevelCode(lines: number): string {
+    const code: string[] = [];
+    for (let i = 0; i < lines; i++) {
+        if (i % 50 === 0) {
+            code.push(`def function_${i}(value, items):`, '    """', `    Docstring of function ${i}`, '    """');
+            i += 3;
+        } else {
+            code.push(`    result_${i} = compute(value + ${i}, "label ${i}") if items else None  # step ${i}`);
+        }
+    }
+    return code.join('\n');
+}
+
+const code = createLevelCode(LINES);
+
+// Render work of one animation frame near the end of the code, where it is the most expensive
+describe(`animation frame, ${LINES} lines`, () => {
+    const cursor = code.length - 100;
+
+    bench('highlight the revealed prefix', () => {
+        normalizeTokens(Prism.tokenize(code.substring(0, cursor), Prism.languages.python));
+    });
+
+    const cache = new LineTokenCache();
+    cache.tokenize(code);
+    bench('slice the cached lines', () => {
+        const lines = cache.tokenize(code);
+        const last = lines.length - 1;
+        sliceLineTokens(lines[last], CHARS_PER_FRAME);
+    });
+});
+
+// Highlighting after a fix changed a single line
+describe(`highlighting after a fix, ${LINES} lines`, () => {
+    let fix = 0;
+    const fixedCode = () => {
+        fix++;
+        return code.replace('result_1 =', `fixed_${fix} =`);
+    };
+
+    bench('whole code', () => {
+        normalizeTokens(Prism.tokenize(fixedCode(), Prism.languages.python));
+    });
+
+    const cache = new LineTokenCache();
+    cache.tokenize(code);
+    bench('line cache', () => {
+        cache.tokenize(fixedCode());
+    });
+});
@@ -0,0 +1,90 @@
+import {describe, expect, test} from 'vitest';
+import {themes} from 'prism-react-renderer';
+import {getTokenStyler, LineTokenCache, sliceLineTokens, tokenizeLine} from '../utils/codeTokens';
+
+const text = (tokens: { content: string }[]) => tokens.map(token => token.content).join('');
+
+describe('tokenizeLine', () => {
+    test('highlights a line like Prism', () => {
+        const line = tokenizeLine('def f(x): return x + 1  # add', '');
+
+        expect(text(line.tokens)).toBe('def f(x): return x + 1  # add');
+        expect(line.tokens.find(token => token.content === 'def')!.types).toContain('keyword');
+        expect(line.tokens.find(token => token.content === '# add')!.types).toContain('comment');
+        expect(line.endState).toBe('');
+    });
+
+    test('carries open triple-quoted strings to the next lines', () => {
+        const open = tokenizeLine('x = """first', '');
+        const middle = tokenizeLine('def not_code():', open.endState);
+        const close = tokenizeLine('last""" + y', middle.endState);
+
+        expect(open.endState).toBe('"""');
+        expect(open.tokens[open.tokens.length - 1]).toEqual({types: ['triple-quoted-string', 'string'], content: '"""first'});
+        expect(middle.tokens).toEqual([{types: ['triple-quoted-string', 'string'], content: 'def not_code():'}]);
+        expect(middle.endState).toBe('"""');
+        expect(close.tokens[0].content).toBe('last"""');
+        expect(text(close.tokens)).toBe('last""" + y');
+        expect(close.endState).toBe('');
+    });
+
+    test('ignores triple quotes in comments, closed strings and other string delimiters', () => {
+        expect(tokenizeLine('s = \'a"""b\'  # """', '').endState).toBe('');
+        expect(tokenizeLine('s = """one line"""', '').endState).toBe('');
+        expect(tokenizeLine("s = r'''raw", '').endState).toBe("'''");
+        expect(tokenizeLine('still """ open', "'''").endState).toBe("'''");
+    });
+});
+
+describe('LineTokenCache', () => {
+    test('reuses unchanged lines when the code changes', () => {
+        const cache = new LineTokenCache();
+        const before = cache.tokenize('a = 1\nb = 2\nc = 3');
+        const after = cache.tokenize('a = 1\nb = 20\nc = 3');
+
+        expect(after[0]).toBe(before[0]);
+        expect(after[1]).not.toBe(before[1]);
+        expect(after[2]).toBe(before[2]);
+        expect(cache.size).toBe(4);
+    });
+
+    test('keys lines by the state at their start', () => {
+        const cache = new LineTokenCache();
+        const lines = cache.tokenize('x = 1\n"""\nx = 1\n"""');
+
+        expect(lines[2].tokens).toEqual([{types: ['triple-quoted-string', 'string'], content: 'x = 1'}]);
+        expect(lines[0].tokens).not.toEqual(lines[2].tokens);
+    });
+
+    test('evicts the oldest lines when full', () => {
+        const cache = new LineTokenCache(2);
+        const first = cache.tokenizeLine('a', '');
+        cache.tokenizeLine('b', '');
+        cache.tokenizeLine('c', '');
+
+        expect(cache.size).toBe(2);
+        expect(cache.tokenizeLine('a', '')).not.toBe(first);
+    });
+});
+
+describe('sliceLineTokens', () => {
+    test('keeps the first characters of a line, cutting the last token', () => {
+        const line = tokenizeLine('value = compute(1)', '');
+
+        expect(text(sliceLineTokens(line, 11))).toBe('value = com');
+        expect(sliceLineTokens(line, 0)).toEqual([]);
+        expect(sliceLineTokens(line, 100)).toEqual(line.tokens);
+    });
+});
+
+describe('getTokenStyler', () => {
+    test('styles tokens from the theme and returns the same styler per theme', () => {
+        const styler = getTokenStyler(themes.vsDark);
+
+        expect(getTokenStyler(themes.vsDark)).toBe(styler);
+        expect(styler({types: ['plain'], content: ' '})).toEqual({className: 'token plain', style: undefined});
+        const comment = styler({types: ['comment'], content: '# x'});
+        expect(comment.className).toBe('token comment');
+        expect(comment.style).toMatchObject(themes.vsDark.styles.find(s => s.types.includes('comment'))!.style);
+    });
+});
@@ -0,0 +1,117 @@
+import {beforeEach, describe, expect, test, vi} from 'vitest';
+import {
+    fetchDocsByIds,
+    fetchJoinedGroups,
+    IN_QUERY_LIMIT,
+    recalculatePlayerGroupMembership
+} from '../firebase/firestore';
+import {getDoc, getDocs, where} from 'firebase/firestore';
+
+vi.mock('firebase/firestore', () => ({
+    collection: vi.fn((...path: unknown[]) => path.slice(1).join('/')),
+    doc: vi.fn((...path: unknown[]) => path.slice(1).join('/')),
+    documentId: vi.fn(() => '__name__'),
+    where: vi.fn((field: string, op: string, value: unknown) => ({field, op, value})),
+    query: vi.fn((collection: string, ...constraints: unknown[]) => ({collection, constraints})),
+    getDoc: vi.fn(),
+    getDocs: vi.fn(),
+    serverTimestamp: vi.fn(() => 'mocked-timestamp')
+}));
+
+vi.mock('../firebase/index', () => ({
+    db: {}
+}));
+
+interface FakeQuery {
+    collection: string;
+    constraints: { field: string; op: string; value: unknown }[];
+}
+
+// Stored groups; every third one is deleted
+const groupIds = Array.from({length: 75}, (_, i) => `g${i}`);
+const storedGroups = new Map(groupIds.map((id, i) => [id, {name: id, ownerUid: `t${i % 4}`, deleted: i % 3 === 2}]));
+
+/**
+ * Answer a query like Firestore would, from the stored groups
+ */
+async function runQuery({constraints}: FakeQuery) {
+    const ids = constraints.find(c => c.field === '__name__')!.value as string[];
+    if (ids.length > IN_QUERY_LIMIT) throw new Error('Too many values in an in filter');
+    const filters = constraints.filter(c => c.field !== '__name__');
+    const docs = [...ids].sort()
+        .filter(id => storedGroups.has(id))
+        .map(id => ({id, data: () => storedGroups.get(id)!}))
+        .filter(doc => filters.every(f => doc.data()[f.field as 'deleted'] === f.value));
+    return {docs};
+}
+
+describe('fetchDocsByIds', () => {
+    beforeEach(() => {
+        vi.clearAllMocks();
+        (getDocs as any).mockImplementation(runQuery);
+    });
+
+    test('splits the IDs into chunks that fit into an in filter', async () => {
+        const docs = await fetchDocsByIds('groups', groupIds);
+
+        expect(getDocs).toHaveBeenCalledTimes(Math.ceil(groupIds.length / IN_QUERY_LIMIT));
+        expect(docs.map(doc => doc.id)).toEqual(groupIds);
+    });
+
+    test('keeps the order of the IDs, skips missing documents and duplicates', async () => {
+        const docs = await fetchDocsByIds('groups', ['g5', 'missing', 'g1', 'g5', 'g40']);
+
+        expect(docs.map(doc => doc.id)).toEqual(['g5', 'g1', 'g40']);
+        expect(getDocs).toHaveBeenCalledTimes(1);
+    });
+
+    test('applies additional filters to every chunk', async () => {
+        const docs = await fetchDocsByIds('groups', groupIds, [where('deleted', '==', false)]);
+
+        expect(docs).toHaveLength(50);
+        expect(docs.every(doc => !doc.data().deleted)).toBe(true);
+    });
+
+    test('runs at most the given number of chunk queries at the same time', async () => {
+        let running = 0;
+        let maxRunning = 0;
+        (getDocs as any).mockImplementation(async (q: FakeQuery) => {
+            maxRunning = Math.max(maxRunning, ++running);
+            await new Promise(resolve => setTimeout(resolve, 1));
+            running--;
+            return runQuery(q);
+        });
+        const manyIds = Array.from({length: IN_QUERY_LIMIT * 10}, (_, i) => `g${i}`);
+
+        await fetchDocsByIds('groups', manyIds, [], 3);
+
+        expect(getDocs).toHaveBeenCalledTimes(10);
+        expect(maxRunning).toBe(3);
+    });
+});
+
+describe('group membership with many groups', () => {
+    beforeEach(() => {
+        vi.clearAllMocks();
+        (getDocs as any).mockImplementation(runQuery);
+        (getDoc as any).mockImplementation(async (ref: string) => ref.startsWith('playerStats/')
+            ? {exists: () => true, data: () => ({memberOfGroups: groupIds})}
+            : {exists: () => true, data: () => ({joinedAt: '2024-01-01T00:00:00.000Z'})});
+    });
+
+    test('fetchJoinedGroups returns all groups that are not deleted', async () => {
+        const groups = await fetchJoinedGroups('player1');
+
+        expect(groups.map(g => g.id)).toEqual(groupIds.filter((_, i) => i % 3 !== 2));
+        expect(groups[0].joinedAt).toBe('2024-01-01T00:00:00.000Z');
+    });
+
+    test('recalculatePlayerGroupMembership reads the groups with chunked queries', async () => {
+        const {memberOfGroups, teacherIds} = await recalculatePlayerGroupMembership('player1');
+
+        expect(memberOfGroups).toEqual(groupIds.filter((_, i) => i % 3 !== 2));
+        expect(teacherIds).toEqual(['t0', 't1', 't3', 't2']);
+        // Only the player document is read on its own
+        expect(getDoc).toHaveBeenCalledTimes(1);
+    });
+});
@@ -0,0 +1,95 @@
+/**
+ * Member counting of fetchOwnedGroups against the Firestore emulator
+ *
+ * Run with `npm run bench:emulator`, which starts the emulator and sets FIRESTORE_EMULATOR_HOST.
+ * Without the emulator the benchmarks are skipped.
+ */
+import {afterAll, beforeAll, bench, describe, vi} from 'vitest';
+import {collection, doc, getDocs, query, where, writeBatch} from 'firebase/firestore';
+import {db} from '../firebase/index';
+import {fetchOwnedGroups} from '../firebase/firestore';
+
+const emulatorHost = process.env.FIRESTORE_EMULATOR_HOST;
+const TEACHER_UID = 'bench-teacher';
+const GROUPS = 20;
+const MEMBERS_PER_GROUP = 40;
+
+vi.mock('../firebase/index', async () => {
+    const {initializeApp} = await import('firebase/app');
+    const {connectFirestoreEmulator, getFirestore} = await import('firebase/firestore');
+    const app = initializeApp({projectId: 'demo-cleanpygame', apiKey: 'demo'}, 'bench');
+    const db = getFirestore(app);
+    const [host, port] = (process.env.FIRESTORE_EMULATOR_HOST ?? 'localhost:8080').split(':');
+    // Act as the teacher, so the security rules allow reading the members
+    connectFirestoreEmulator(db, host, Number(port), {mockUserToken: {user_id: 'bench-teacher'}});
+    return {db};
+});
+
+// Documents read by one call of the members queries, counted from the snapshots
+let memberQueryReads = 0;
+
+/**
+ * The previous implementation: one members query per group, one group after another
+ */
+async function fetchOwnedGroupsWithMemberQueries(userId: string) {
+    const groupsSnapshot = await getDocs(query(
+        collection(db, 'groups'),
+        where('ownerUid', '==', userId),
+        where('deleted', '==', false)
+    ));
+    let reads = groupsSnapshot.size;
+    const groups = groupsSnapshot.docs.map(doc => ({id: doc.id, memberCount: 0}));
+    for (const group of groups) {
+        const membersSnapshot = await getDocs(collection(db, 'groups', group.id, 'members'));
+        group.memberCount = membersSnapshot.size;
+        reads += membersSnapshot.size;
+    }
+    memberQueryReads = reads;
+    return groups;
+}
+
+describe.skipIf(!emulatorHost)(`fetchOwnedGroups with ${GROUPS} groups of ${MEMBERS_PER_GROUP} members`, () => {
+    beforeAll(async () => {
+        const groupIds = Array.from({length: GROUPS}, (_, g) => `bench-group-${g}`);
+        const groupsBatch = writeBatch(db);
+        groupIds.forEach((groupId, g) => {
+            groupsBatch.set(doc(db, 'groups', groupId), {
+                id: groupId,
+                name: `Group ${g}`,
+                ownerUid: TEACHER_UID,
+                ownerName: 'Teacher',
+                deleted: false
+            });
+        });
+        // The rules check member writes against the stored group, which has to be committed first
+        await groupsBatch.commit();
+
+        for (const groupId of groupIds) {
+            const batch = writeBatch(db);
+            for (let m = 0; m < MEMBERS_PER_GROUP; m++) {
+                batch.set(doc(db, 'groups', groupId, 'members', `student-${m}`), {
+                    uid: `student-${m}`,
+                    displayName: `Student ${m}`,
+                    levelsCompleted: m
+                });
+            }
+            await batch.commit();
+        }
+    });
+
+    afterAll(() => {
+        console.log(`Document reads per call with members queries: ${memberQueryReads}`);
+        // The emulator doesn't report reads, so this follows the pricing: the groups query reads
+        // the groups, and a count query is billed one read per started batch of 1000 counted entries
+        const estimatedCountReads = GROUPS + GROUPS * Math.ceil(MEMBERS_PER_GROUP / 1000);
+        console.log(`Estimated billed reads per call with count queries: ${estimatedCountReads}`);
+    });
+
+    bench('sequential members queries', async () => {
+        await fetchOwnedGroupsWithMemberQueries(TEACHER_UID);
+    });
+
+    bench('concurrent count queries', async () => {
+        await fetchOwnedGroups(TEACHER_UID);
+    });
+});
@@ -0,0 +1,69 @@
+import {beforeEach, describe, expect, test, vi} from 'vitest';
+import {fetchOwnedGroups} from '../firebase/firestore';
+import {getCountFromServer, getDocs} from 'firebase/firestore';
+
+vi.mock('firebase/firestore', () => ({
+    collection: vi.fn((...path: unknown[]) => path.slice(1).join('/')),
+    query: vi.fn((collection: string) => collection),
+    where: vi.fn(),
+    getDocs: vi.fn(),
+    getCountFromServer: vi.fn(),
+    serverTimestamp: vi.fn(() => 'mocked-timestamp')
+}));
+
+vi.mock('../firebase/index', () => ({
+    db: {}
+}));
+
+const groupDocs = (ids: string[]) => ({
+    docs: ids.map(id => ({id, data: () => ({name: `Group ${id}`, ownerUid: 'teacher', deleted: false})}))
+});
+
+describe('fetchOwnedGroups', () => {
+    beforeEach(() => {
+        vi.clearAllMocks();
+    });
+
+    test('counts members with aggregation queries instead of reading member documents', async () => {
+        const memberCounts: Record<string, number> = {'groups/g1/members': 3, 'groups/g2/members': 40};
+        (getDocs as any).mockResolvedValue(groupDocs(['g1', 'g2']));
+        (getCountFromServer as any).mockImplementation(async (collection: string) => ({
+            data: () => ({count: memberCounts[collection]})
+        }));
+
+        const groups = await fetchOwnedGroups('teacher');
+
+        expect(groups.map(g => [g.id, g.memberCount])).toEqual([['g1', 3], ['g2', 40]]);
+        // Only the groups query downloads documents
+        expect(getDocs).toHaveBeenCalledTimes(1);
+    });
+
+    test('issues the count queries concurrently', async () => {
+        const ids = ['g1', 'g2', 'g3', 'g4'];
+        (getDocs as any).mockResolvedValue(groupDocs(ids));
+        let pending = 0;
+        let maxPending = 0;
+        (getCountFromServer as any).mockImplementation(async () => {
+            maxPending = Math.max(maxPending, ++pending);
+            await new Promise(resolve => setTimeout(resolve, 1));
+            pending--;
+            return {data: () => ({count: 1})};
+        });
+
+        await fetchOwnedGroups('teacher');
+
+        expect(maxPending).toBe(ids.length);
+    });
+
+    test('keeps a zero count for groups whose count fails', async () => {
+        vi.spyOn(console, 'error').mockImplementation(() => {});
+        (getDocs as any).mockResolvedValue(groupDocs(['g1', 'g2']));
+        (getCountFromServer as any)
+            .mockRejectedValueOnce(new Error('unavailable'))
+            .mockResolvedValueOnce({data: () => ({count: 5})});
+
+        const groups = await fetchOwnedGroups('teacher');
+
+        expect(groups.map(g => g.memberCount)).toEqual([0, 5]);
+    });
+});
@@ -0,0 +1,108 @@
+import {beforeEach, describe, expect, test, vi} from 'vitest';
+import {
+    getMemberOfGroups,
+    invalidateMemberOfGroupsCache,
+    leaveGroup,
+    updateAllGroupMemberStats
+} from '../firebase/firestore';
+import {createDefaultPlayerStats} from '../reducers/statsReducer';
+import {deleteDoc, getDoc, updateDoc, writeBatch} from 'firebase/firestore';
+
+vi.mock('firebase/firestore', () => ({
+    doc: vi.fn((...path: unknown[]) => path.slice(1).join('/')),
+    getDoc: vi.fn(),
+    updateDoc: vi.fn(),
+    deleteDoc: vi.fn(),
+    writeBatch: vi.fn(),
+    serverTimestamp: vi.fn(() => 'mocked-timestamp')
+}));
+
+vi.mock('../firebase/index', () => ({
+    db: {}
+}));
+
+const playerDoc = (memberOfGroups: string[]) => ({
+    exists: () => true,
+    data: () => ({memberOfGroups})
+});
+
+describe('updateAllGroupMemberStats', () => {
+    let batch: { update: ReturnType<typeof vi.fn>; commit: ReturnType<typeof vi.fn> };
+
+    beforeEach(() => {
+        vi.clearAllMocks();
+        invalidateMemberOfGroupsCache();
+        batch = {update: vi.fn(), commit: vi.fn().mockResolvedValue(undefined)};
+        (writeBatch as any).mockReturnValue(batch);
+    });
+
+    test('updates all member documents in one batch without reading them', async () => {
+        (getDoc as any).mockResolvedValue(playerDoc(['g1', 'g2', 'g3']));
+        const stats = createDefaultPlayerStats();
+        stats.summary.totalLevelsSolved = 4;
+
+        await updateAllGroupMemberStats('player1', stats);
+
+        expect(getDoc).toHaveBeenCalledTimes(1);
+        expect(getDoc).toHaveBeenCalledWith('playerStats/player1');
+        expect(batch.update.mock.calls.map(call => call[0])).toEqual([
+            'groups/g1/members/player1',
+            'groups/g2/members/player1',
+            'groups/g3/members/player1'
+        ]);
+        expect(batch.update.mock.calls[0][1]).toMatchObject({levelsCompleted: 4, updatedAt: 'mocked-timestamp'});
+        expect(batch.commit).toHaveBeenCalledTimes(1);
+        expect(updateDoc).not.toHaveBeenCalled();
+    });
+
+    test('reads the membership list only once', async () => {
+        (getDoc as any).mockResolvedValue(playerDoc(['g1']));
+
+        await updateAllGroupMemberStats('player1', createDefaultPlayerStats());
+        await updateAllGroupMemberStats('player1', createDefaultPlayerStats());
+
+        expect(getDoc).toHaveBeenCalledTimes(1);
+        expect(batch.commit).toHaveBeenCalledTimes(2);
+    });
+
+    test('skips players without groups', async () => {
+        (getDoc as any).mockResolvedValue({exists: () => false});
+
+        await updateAllGroupMemberStats('player1', createDefaultPlayerStats());
+
+        expect(writeBatch).not.toHaveBeenCalled();
+    });
+
+    test('updates the remaining members separately when a member document is missing', async () => {
+        const consoleWarn = vi.spyOn(console, 'warn').mockImplementation(() => {});
+        (getDoc as any).mockResolvedValue(playerDoc(['g1', 'g2']));
+        batch.commit.mockRejectedValue({code: 'not-found'});
+        (updateDoc as any).mockImplementation(async (ref: string) => {
+            if (ref === 'groups/g1/members/player1') throw {code: 'not-found'};
+        });
+
+        await updateAllGroupMemberStats('player1', createDefaultPlayerStats());
+
+        expect(updateDoc).toHaveBeenCalledTimes(2);
+        expect(consoleWarn).toHaveBeenCalledWith('Member document not found for user player1 in group g1');
+        consoleWarn.mockRestore();
+    });
+
+    test('uses the membership list written by leaveGroup', async () => {
+        (deleteDoc as any).mockResolvedValue(undefined);
+        (updateDoc as any).mockResolvedValue(undefined);
+
+        // Group lookups of the membership recalculation find every group
+        (getDoc as any).mockImplementation(async (ref: string) => ref.startsWith('groups/')
+            ? {exists: () => true, id: ref.split('/')[1], data: () => ({ownerUid: 'teacher', deleted: false})}
+            : playerDoc(['g1', 'g2']));
+        await leaveGroup('g1', 'player1');
+        (getDoc as any).mockClear();
+
+        expect(await getMemberOfGroups('player1')).toEqual(['g2']);
+        await updateAllGroupMemberStats('player1', createDefaultPlayerStats());
+
+        expect(getDoc).not.toHaveBeenCalled();
+        expect(batch.update.mock.calls.map(call => call[0])).toEqual(['groups/g2/members/player1']);
+    });
+});
@@ -0,0 +1,117 @@
+import {afterEach, beforeEach, describe, expect, test, vi} from 'vitest';
+import {applyMemberChanges, GroupMemberChange, ThrottledBatcher} from '../utils/groupMembers';
+import {subscribeToGroupMembers} from '../firebase/firestore';
+import {GroupMember} from '../types';
+import {onSnapshot} from 'firebase/firestore';
+
+vi.mock('firebase/firestore', () => ({
+    collection: vi.fn((...path: unknown[]) => path.slice(1).join('/')),
+    onSnapshot: vi.fn(),
+    serverTimestamp: vi.fn(() => 'mocked-timestamp')
+}));
+
+vi.mock('../firebase/index', () => ({
+    db: {}
+}));
+
+function member(uid: string, levelsCompleted = 0): GroupMember {
+    return {
+        uid,
+        displayName: uid,
+        levelsCompleted,
+        totalLevelsPlayed: 0,
+        totalMisclicks: 0,
+        totalTimeSpent: 0,
+        totalHintsUsed: 0,
+        totalWrongClicks: 0,
+        lastPlayedAt: '',
+        joinedAt: ''
+    };
+}
+
+describe('applyMemberChanges', () => {
+    test('adds, modifies and removes members by UID', () => {
+        const initial = applyMemberChanges(new Map(), [
+            {type: 'added', member: member('a')},
+            {type: 'added', member: member('b')},
+            {type: 'added', member: member('c')}
+        ]);
+
+        const updated = applyMemberChanges(initial, [
+            {type: 'modified', member: member('b', 5)},
+            {type: 'removed', member: member('a')}
+        ]);
+
+        expect([...updated.keys()]).toEqual(['b', 'c']);
+        expect(updated.get('b')!.levelsCompleted).toBe(5);
+        // The previous map is left untouched
+        expect(initial.size).toBe(3);
+        expect(applyMemberChanges(updated, [])).toBe(updated);
+    });
+});
+
+describe('ThrottledBatcher', () => {
+    beforeEach(() => {
+        vi.useFakeTimers();
+    });
+
+    afterEach(() => {
+        vi.useRealTimers();
+    });
+
+    test('delivers the first batch immediately and later ones at most once per interval', () => {
+        const deliver = vi.fn();
+        const batcher = new ThrottledBatcher<number>(deliver, 500);
+
+        batcher.push([1]);
+        expect(deliver).toHaveBeenCalledWith([1]);
+
+        batcher.push([2]);
+        batcher.push([3, 4]);
+        vi.advanceTimersByTime(499);
+        expect(deliver).toHaveBeenCalledTimes(1);
+
+        vi.advanceTimersByTime(1);
+        expect(deliver).toHaveBeenLastCalledWith([2, 3, 4]);
+
+        vi.advanceTimersByTime(1000);
+        batcher.push([5]);
+        expect(deliver).toHaveBeenCalledTimes(3);
+    });
+
+    test('drops pending items when cancelled', () => {
+        const deliver = vi.fn();
+        const batcher = new ThrottledBatcher<number>(deliver, 500);
+
+        batcher.push([1]);
+        batcher.push([2]);
+        batcher.cancel();
+        vi.advanceTimersByTime(1000);
+
+        expect(deliver).toHaveBeenCalledTimes(1);
+    });
+});
+
+describe('subscribeToGroupMembers', () => {
+    test('passes document changes on as member changes', () => {
+        const unsubscribe = vi.fn();
+        (onSnapshot as any).mockReturnValue(unsubscribe);
+        const received: GroupMemberChange[][] = [];
+
+        const stop = subscribeToGroupMembers('g1', changes => received.push(changes));
+        const [ref, onNext] = (onSnapshot as any).mock.calls[0];
+        onNext({
+            docChanges: () => [
+                {type: 'added', doc: {id: 'a', data: () => ({displayName: 'A'})}},
+                {type: 'removed', doc: {id: 'b', data: () => ({displayName: 'B'})}}
+            ]
+        });
+
+        expect(ref).toBe('groups/g1/members');
+        expect(received).toEqual([[
+            {type: 'added', member: {displayName: 'A', uid: 'a'}},
+            {type: 'removed', member: {displayName: 'B', uid: 'b'}}
+        ]]);
+        expect(stop).toBe(unsubscribe);
+    });
+});
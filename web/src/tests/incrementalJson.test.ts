@@ -0,0 +1,59 @@
+import {describe, expect, test} from 'vitest';
+import {IncrementalJsonParser} from '../utils/incrementalJson';
+
+const RESPONSE = {
+    analysis: 'The name "f" says nothing\n',
+    hint: 'Rename é \\ the function',
+    explanation: 'Names tell what a function does',
+    options: [{label: 'Rename', correct: true}, {label: 'Keep', correct: false}],
+    score: -12.5e-1,
+    extra: [null, [], {}, 0, [1, [2]]]
+};
+const TEXT = JSON.stringify(RESPONSE, null, 2);
+
+function parseInChunks(text: string, sizes: number[]): unknown {
+    const parser = new IncrementalJsonParser();
+    let position = 0;
+    for (const size of sizes) {
+        parser.push(text.substring(position, position + size));
+        position += size;
+    }
+    return parser.end(text.substring(position));
+}
+
+describe('IncrementalJsonParser', () => {
+    test('parses the same value as JSON.parse however the text is split', () => {
+        expect(parseInChunks(TEXT, [])).toEqual(RESPONSE);
+        expect(parseInChunks(TEXT, Array(TEXT.length).fill(1))).toEqual(RESPONSE);
+        for (let seed = 1; seed <= 50; seed++) {
+            const sizes = Array.from({length: 20}, (_, i) => (seed * 7 + i * 13) % 17);
+            expect(parseInChunks(TEXT, sizes)).toEqual(RESPONSE);
+        }
+        expect(parseInChunks('42', [1])).toBe(42);
+        expect(parseInChunks('"a\\u0041b"', [3, 2])).toBe('aAb');
+    });
+
+    test('shows the fields received so far', () => {
+        const parser = new IncrementalJsonParser();
+
+        parser.push('{"hint": "Rena');
+        expect(parser.value).toEqual({hint: 'Rena'});
+        parser.push('me", "options": [{"label": "Re');
+        expect(parser.value).toEqual({hint: 'Rename', options: [{label: 'Re'}]});
+        parser.push('name", "correct": tr');
+        expect(parser.value).toEqual({hint: 'Rename', options: [{label: 'Rename'}]});
+        parser.push('ue}]');
+        expect(parser.done).toBe(false);
+        parser.push('}');
+        expect(parser.done).toBe(true);
+        expect(parser.value).toEqual({hint: 'Rename', options: [{label: 'Rename', correct: true}]});
+    });
+
+    test('rejects invalid and incomplete text', () => {
+        expect(() => new IncrementalJsonParser().end('{"a" 1}')).toThrow(SyntaxError);
+        expect(() => new IncrementalJsonParser().end('[1,]')).toThrow(SyntaxError);
+        expect(() => new IncrementalJsonParser().end('{"a": tru}')).toThrow(SyntaxError);
+        expect(() => new IncrementalJsonParser().end('{} {}')).toThrow(SyntaxError);
+        expect(() => new IncrementalJsonParser().end('{"a": "b')).toThrow('Unexpected end of JSON input');
+    });
+});
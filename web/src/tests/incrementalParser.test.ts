@@ -0,0 +1,98 @@
+import {describe, expect, test} from 'vitest';
+import * as fs from 'node:fs';
+import * as path from 'node:path';
+import {fileURLToPath} from 'node:url';
+import {IncrementalLevelParser, parseLevelText} from '../levels_compiler/parser';
+import {createSyntheticLevelText} from './levelGenerator';
+
+const levelsDir = fileURLToPath(new URL('../../levels', import.meta.url));
+
+function readCorpus(): string[] {
+    const sources: string[] = [];
+    for (const topic of fs.readdirSync(levelsDir).sort()) {
+        const topicDir = path.join(levelsDir, topic);
+        if (!fs.statSync(topicDir).isDirectory()) continue;
+        for (const file of fs.readdirSync(topicDir).sort()) {
+            if (file.endsWith('.py')) {
+                sources.push(fs.readFileSync(path.join(topicDir, file), 'utf-8'));
+            }
+        }
+    }
+    return sources;
+}
+
+const level = `##file test.py
+"""start
+Welcome!
+"""
+##start-reply "Go"
+##replace fix
+def f(x): return x
+##with
+def double(x): return x
+##end
+##replace-span - a b
+y = 1
+a = 2
+##replace-span - a c
+z = a
+##add-on a
+w = 3
+##end
+"""final
+Done
+"""
+##final-reply "Finish"`;
+
+describe('IncrementalLevelParser', () => {
+    test('parses every level of the corpus like parseLevelText', () => {
+        const parser = new IncrementalLevelParser();
+        for (const source of readCorpus()) {
+            expect(parser.parse(source)).toEqual(parseLevelText(source));
+        }
+    });
+
+    test('reuses unchanged sections after an edit', () => {
+        const parser = new IncrementalLevelParser();
+        expect(parser.parse(level)).toEqual(parseLevelText(level));
+        expect(parser.lastParse.reused).toBe(0);
+
+        const edited = level.replace('w = 3', 'w = 4');
+        expect(parser.parse(edited)).toEqual(parseLevelText(edited));
+        expect(parser.lastParse.reused).toBe(parser.lastParse.sections - 1);
+    });
+
+    test('generates the same event IDs when a section with a generated ID is inserted', () => {
+        const parser = new IncrementalLevelParser();
+        parser.parse(level);
+
+        const edited = level.replace('##replace-span - a c', '##replace-span - a d\nq = a\n##replace-span - a c');
+        const result = parser.parse(edited);
+        expect(result).toEqual(parseLevelText(edited));
+        expect(result.level!.blocks[1].event).toBe('a');
+        expect(result.level!.blocks[3].event).toBe('a-1');
+    });
+
+    test('reports errors of an edited level like parseLevelText', () => {
+        const parser = new IncrementalLevelParser();
+        parser.parse(level);
+
+        const broken = level.replace('##end\n##replace-span', '##replace-span');
+        expect(parser.parse(broken)).toEqual(parseLevelText(broken));
+        expect(parser.parse(level)).toEqual(parseLevelText(level));
+    });
+
+    test('stays equal to parseLevelText over a series of edits of a large level', () => {
+        const parser = new IncrementalLevelParser();
+        let source = createSyntheticLevelText({lines: 300, spans: 20, eventsPerBlock: 2});
+        const lines = source.split('\n');
+        for (let i = 0; i < 50; i++) {
+            const index = (i * 7919) % lines.length;
+            if (!lines[index].startsWith('##') && !lines[index].startsWith('"""')) {
+                lines[index] = lines[index] + ' # edited';
+            }
+            source = lines.join('\n');
+            expect(parser.parse(source)).toEqual(parseLevelText(source));
+        }
+    });
+});
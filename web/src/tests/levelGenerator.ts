@@ -0,0 +1,83 @@
+/**
+ * Generator of synthetic level sources for benchmarks
+ * Produces levels of any size in the syntax of the levels in web/levels
+ */
+
+export interface SyntheticLevelOptions {
+    lines: number;              // lines of code outside of replace blocks
+    spans: number;              // number of ##replace-span blocks
+    eventsPerBlock: number;     // events of each ##replace-on block
+    replaceBlocks?: number;     // number of ##replace blocks, each followed by a ##replace-on block
+}
+
+/**
+ * Create the source of a synthetic level
+ *
+ * Span i renames name_i to renamed_i; the code also mentions names that are never renamed, as real
+ * levels do. Every replace block defines an event, and the replace-on blocks depend on the span and
+ * replace events in turn.
+ *
+ * @param options - Size of the level
+ * @returns The level source, accepted by parseLevelText
+ */
+export function createSyntheticLevelText(options: SyntheticLevelOptions): string {
+    const {lines, spans, eventsPerBlock} = options;
+    const replaceBlocks = Math.min(lines, options.replaceBlocks ?? Math.max(1, Math.floor(lines / 50)));
+    const names = Math.max(1, spans * 3);
+    const events = [
+        ...Array.from({length: spans}, (_, i) => `span_${i}`),
+        ...Array.from({length: replaceBlocks}, (_, i) => `fix_${i}`)
+    ];
+
+    const source: string[] = [
+        '##file synthetic.py',
+        '"""start',
+        `Synthetic level with ${lines} lines, ${spans} spans and ${replaceBlocks} replace blocks.`,
+        '"""',
+        'def main(items):'
+    ];
+
+    let nextEvent = 0;
+    const linesPerChunk = Math.max(1, Math.floor(lines / Math.max(1, replaceBlocks)));
+    for (let line = 0; line < lines; line++) {
+        const a = (line * 7) % names;
+        const b = (line * 13 + 5) % names;
+        source.push(`    name_${a} = compute(name_${b}, items[${line}])  # line ${line}`);
+
+        const block = Math.floor(line / linesPerChunk);
+        if ((line + 1) % linesPerChunk === 0 && block < replaceBlocks) {
+            source.push(
+                `##replace fix_${block}`,
+                `    total_${block} = name_${a} + name_${b} + 0`,
+                '##with',
+                `    total_${block} = name_${a} + name_${b}`,
+                '##end',
+                `##explain "Adding zero, fixed ${block}"`,
+                `##hint "Look at total_${block}"`
+            );
+
+            const blockEvents: string[] = [];
+            for (let e = 0; e < Math.min(eventsPerBlock, events.length); e++) {
+                blockEvents.push(events[nextEvent++ % events.length]);
+            }
+            source.push(
+                `##replace-on ${blockEvents.join(' ')}`,
+                `    log(total_${block}, "before")`,
+                '##with',
+                `    log(total_${block}, "after")`,
+                '##end'
+            );
+        }
+    }
+
+    for (let i = 0; i < spans; i++) {
+        source.push(
+            `##replace-span span_${i} name_${i} renamed_${i}`,
+            `##explain "Renamed name_${i}"`,
+            `##hint "Which name is name_${i}?"`
+        );
+    }
+
+    source.push('"""final', 'All fixed.', '"""');
+    return source.join('\n');
+}
@@ -0,0 +1,95 @@
+import {describe, expect, test} from 'vitest';
+import {getLevelIndex, getTriggeredEvents, LevelIndex, TriggeredEvents} from '../utils/levelIndex';
+import {calculateNextHintId, checkAllIssuesFixed, createInitialLevelState, levelReducer} from '../reducers/levelReducer';
+import {applyFix} from '../reducers/actionCreators';
+import {LevelBlock, LevelData} from '../types';
+
+const blocks: LevelBlock[] = [
+    {type: 'text', text: 'x = 1\n'},
+    {type: 'replace-span', clickable: 'x', replacement: 'count', event: 'rename', hint: 'Rename x', explanation: 'Names'},
+    {type: 'replace-on', event: 'rename', text: '', replacement: 'count += 1\n'},
+    {type: 'replace', text: 'a\n', replacement: 'b\n', event: ['split', 'merge'], hint: 'Split or merge'},
+    {type: 'neutral', text: 'c\n', replacement: 'd\n', event: 'optional', options: [{id: 'keep', label: 'Keep', correct: true}]},
+    {type: 'replace', text: 'e\n', replacement: 'f\n', event: 'last', hint: 'Last', explanation: 'Done'}
+];
+
+const level: LevelData = {filename: 'index.py', blocks};
+
+describe('LevelIndex', () => {
+    test('maps events to their blocks in level order', () => {
+        const index = new LevelIndex(blocks);
+
+        expect(index.getEventBlockIndices('rename')).toEqual([1, 2]);
+        expect(index.getEventBlockIndices('merge')).toEqual([3]);
+        expect(index.getEventBlockIndices('unknown')).toEqual([]);
+        expect(index.findEventBlock('rename', block => block.type === 'replace-on')).toBe(blocks[2]);
+        expect(index.findEventBlock('last', block => block.explanation)).toBe(blocks[5]);
+        expect(index.findOptionsBlock('optional')).toBe(blocks[4]);
+        expect(index.requiredCount).toBe(4);
+    });
+
+    test('is built once per blocks array', () => {
+        expect(getLevelIndex(blocks)).toBe(getLevelIndex(blocks));
+        expect(getLevelIndex([...blocks])).not.toBe(getLevelIndex(blocks));
+    });
+});
+
+describe('TriggeredEvents', () => {
+    test('tracks the next hint and the remaining issues', () => {
+        let triggered = new TriggeredEvents(getLevelIndex(blocks), []);
+        expect(triggered.nextHintId).toBe('rename');
+        expect(triggered.allIssuesFixed).toBe(false);
+
+        triggered = triggered.add('merge');
+        expect(triggered.nextHintId).toBe('rename');
+        expect(triggered.isBlockFixed(3)).toBe(true);
+
+        triggered = triggered.add('rename');
+        expect(triggered.nextHintId).toBe('last');
+        expect(triggered.allIssuesFixed).toBe(false);
+
+        // Neutral blocks don't have to be fixed
+        triggered = triggered.add('last');
+        expect(triggered.nextHintId).toBeNull();
+        expect(triggered.allIssuesFixed).toBe(true);
+        expect(triggered.events).toEqual(['merge', 'rename', 'last']);
+        expect(triggered.has('rename')).toBe(true);
+        expect(triggered.has('optional')).toBe(false);
+    });
+
+    test('adding a triggered event returns the same set', () => {
+        const triggered = new TriggeredEvents(getLevelIndex(blocks), []).add('rename');
+        expect(triggered.add('rename')).toBe(triggered);
+    });
+
+    test('is the same when built from a list or event by event', () => {
+        const events = ['split', 'unknown', 'last', 'rename'];
+        let incremental = new TriggeredEvents(getLevelIndex(blocks), []);
+        events.forEach(event => incremental = incremental.add(event));
+        const fromList = new TriggeredEvents(getLevelIndex(blocks), events);
+
+        expect(incremental.allIssuesFixed).toBe(fromList.allIssuesFixed);
+        expect(incremental.nextHintId).toBe(fromList.nextHintId);
+        expect(incremental.events).toEqual(fromList.events);
+    });
+});
+
+describe('reducer helpers', () => {
+    test('agree with the triggered events of the level state', () => {
+        let state = createInitialLevelState(level);
+        for (const eventId of ['last', 'split', 'rename']) {
+            const allFixed = checkAllIssuesFixed(blocks, state.triggeredEvents, eventId);
+            state = levelReducer(state, applyFix(eventId))!;
+
+            expect(state.isFinished).toBe(allFixed);
+            expect(state.pendingHintId).toBe(calculateNextHintId(level, state.triggeredEvents));
+            expect(getTriggeredEvents(state)).toBe(state.triggered);
+        }
+        expect(state.isFinished).toBe(true);
+    });
+
+    test('rebuild the triggered events of states created without them', () => {
+        const state = {...createInitialLevelState(level), triggeredEvents: ['rename'], triggered: undefined};
+        expect(getTriggeredEvents(state).nextHintId).toBe('split');
+    });
+});
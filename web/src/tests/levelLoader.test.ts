@@ -0,0 +1,39 @@
+import {describe, expect, test} from 'vitest';
+import {getLoadedLevel, levelsManifest, loadLevelData} from '../utils/levelLoader';
+import {LevelData, TopicSummary} from '../types';
+
+const {topics} = levelsManifest;
+
+describe('levelLoader', () => {
+    test('should have the start level available without loading', () => {
+        const {topic, level} = levelsManifest.startLevel!;
+
+        expect(getLoadedLevel(topics, {topic, levelId: level.filename})).toBe(level);
+    });
+
+    test('should load level chunks on demand', async () => {
+        const topic = topics[topics.length - 1];
+        const levelId = {topic: topic.name, levelId: topic.levels[topic.levels.length - 1].filename};
+
+        expect(getLoadedLevel(topics, levelId)).toBeUndefined();
+        const [first, second] = await Promise.all([loadLevelData(topics, levelId), loadLevelData(topics, levelId)]);
+
+        expect(first?.filename).toBe(levelId.levelId);
+        expect(first?.blocks.length).toBeGreaterThan(0);
+        expect(second).toBe(first);
+        expect(getLoadedLevel(topics, levelId)).toBe(first);
+    });
+
+    test('should return undefined for unknown levels', async () => {
+        expect(await loadLevelData(topics, {topic: 'Naming', levelId: 'missing.py'})).toBeUndefined();
+        expect(await loadLevelData(topics, {topic: 'missing', levelId: 'onboarding.py'})).toBeUndefined();
+    });
+
+    test('should use level data carried by the topics', async () => {
+        const level: LevelData = {filename: 'level1.py', blocks: []};
+        const customTopics: TopicSummary[] = [{name: 'topic1', levels: [level]}];
+
+        expect(getLoadedLevel(customTopics, {topic: 'topic1', levelId: 'level1.py'})).toBe(level);
+        expect(await loadLevelData(customTopics, {topic: 'topic1', levelId: 'level1.py'})).toBe(level);
+    });
+});
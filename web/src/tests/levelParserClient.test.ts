@@ -0,0 +1,112 @@
+import {afterEach, beforeEach, describe, expect, test, vi} from 'vitest';
+import {LevelParserClient, LevelParseRequest, LevelParseResponse, LevelParseWorker} from '../utils/levelParserClient';
+import {parseLevelText} from '../levels_compiler/parser';
+
+const level = (name: string) => `##file ${name}.py
+"""start
+Hello
+"""
+##start-reply "Go"
+x = 1
+"""final
+Done
+"""
+##final-reply "Finish"`;
+
+/**
+ * Worker that answers only when told to, parsing on the main thread
+ */
+class FakeWorker implements LevelParseWorker {
+    onmessage: ((event: MessageEvent<LevelParseResponse>) => void) | null = null;
+    requests: LevelParseRequest[] = [];
+    terminated = false;
+
+    postMessage(request: LevelParseRequest): void {
+        this.requests.push(request);
+    }
+
+    respond(): void {
+        const {id, content} = this.requests.shift()!;
+        this.onmessage?.({data: {id, content, result: parseLevelText(content)}} as MessageEvent<LevelParseResponse>);
+    }
+
+    terminate(): void {
+        this.terminated = true;
+    }
+}
+
+describe('LevelParserClient', () => {
+    let worker: FakeWorker;
+    let onResult: ReturnType<typeof vi.fn>;
+
+    beforeEach(() => {
+        vi.useFakeTimers();
+        worker = new FakeWorker();
+        onResult = vi.fn();
+    });
+
+    afterEach(() => {
+        vi.useRealTimers();
+    });
+
+    test('parses only the last text typed within the debounce delay', () => {
+        const client = new LevelParserClient(onResult, 100, () => worker);
+        client.parse(level('a'));
+        vi.advanceTimersByTime(50);
+        client.parse(level('b'));
+        vi.advanceTimersByTime(99);
+        expect(worker.requests).toHaveLength(0);
+
+        vi.advanceTimersByTime(1);
+        expect(worker.requests.map(request => request.content)).toEqual([level('b')]);
+
+        worker.respond();
+        expect(onResult).toHaveBeenCalledTimes(1);
+        expect(onResult.mock.calls[0][0].content).toBe(level('b'));
+        expect(onResult.mock.calls[0][0].result.level.filename).toBe('b.py');
+    });
+
+    test('drops results that are outdated and sends only the newest text', () => {
+        const client = new LevelParserClient(onResult, 10, () => worker);
+        client.parse(level('a'));
+        vi.advanceTimersByTime(10);
+        client.parse(level('b'));
+        vi.advanceTimersByTime(10);
+        client.parse(level('c'));
+        vi.advanceTimersByTime(10);
+
+        // The worker is still busy with the first text; the second is never sent
+        expect(worker.requests.map(request => request.content)).toEqual([level('a')]);
+
+        worker.respond();
+        expect(onResult).not.toHaveBeenCalled();
+        expect(worker.requests.map(request => request.content)).toEqual([level('c')]);
+
+        worker.respond();
+        expect(onResult).toHaveBeenCalledTimes(1);
+        expect(onResult.mock.calls[0][0].result.level.filename).toBe('c.py');
+    });
+
+    test('ignores responses after being disposed', () => {
+        const client = new LevelParserClient(onResult, 10, () => worker);
+        client.parse(level('a'));
+        vi.advanceTimersByTime(10);
+        client.dispose();
+        worker.respond();
+        client.parse(level('b'));
+        vi.advanceTimersByTime(10);
+
+        expect(worker.terminated).toBe(true);
+        expect(worker.requests).toHaveLength(0);
+        expect(onResult).not.toHaveBeenCalled();
+    });
+
+    test('parses on the main thread without workers', () => {
+        const client = new LevelParserClient(onResult, 10, () => null);
+        client.parse('##file broken.py');
+        vi.advanceTimersByTime(10);
+
+        expect(onResult).toHaveBeenCalledTimes(1);
+        expect(onResult.mock.calls[0][0].result).toEqual(parseLevelText('##file broken.py'));
+    });
+});
@@ -2,6 +2,7 @@ import {describe, expect, test, vi} from 'vitest';
 import {createInitialLevelState, levelReducer} from '../reducers/levelReducer';
 import {applyFix, getHint, wrongClick} from '../reducers/actionCreators';
 import {LevelData} from '../types';
+import {compileInitialLevelState} from '../utils/initialLevelState';
 
 // Mock Date.now for consistent testing
 const mockDateNow = 1627776000000; // Fixed timestamp for testing
@@ -48,6 +49,19 @@ describe('Level Reducer', () => {
         expect(initialState.pendingHintId).toBe('rename_function'); // First event with a hint
     });
 
+    test('createInitialLevelState hydrates the state precomputed by the levels compiler', () => {
+        const compiledLevel: LevelData = {...mockLevelData, initialState: compileInitialLevelState(mockLevelData)};
+
+        const runtimeState = createInitialLevelState(mockLevelData);
+        const hydratedState = createInitialLevelState(compiledLevel);
+
+        expect(JSON.parse(JSON.stringify(compiledLevel.initialState))).toEqual(compiledLevel.initialState);
+        expect(hydratedState.code).toBe(runtimeState.code);
+        expect(hydratedState.regions).toEqual(runtimeState.regions);
+        expect(hydratedState.pendingHintId).toBe(runtimeState.pendingHintId);
+        expect(hydratedState.regionIndex!.find(0, 4)).toEqual(runtimeState.regionIndex!.find(0, 4));
+    });
+
     test('GET_HINT increments sessionHintsUsed', () => {
         // Create initial state
         const initialState = createInitialLevelState(mockLevelData);
@@ -0,0 +1,125 @@
+import {describe, expect, test} from 'vitest';
+import * as fs from 'node:fs';
+import * as path from 'node:path';
+import {fileURLToPath} from 'node:url';
+import {applyEvents} from '../utils/pylang';
+import {LevelRenderer, renderLevel} from '../utils/levelRenderer';
+import {parseLevelText} from '../levels_compiler/parser';
+import {LevelBlock, LevelData} from '../types';
+
+const levelsDir = fileURLToPath(new URL('../../levels', import.meta.url));
+
+function loadLevels(): { name: string; level: LevelData }[] {
+    const levels: { name: string; level: LevelData }[] = [];
+    for (const topicDir of fs.readdirSync(levelsDir).sort()) {
+        const topicPath = path.join(levelsDir, topicDir);
+        if (!fs.existsSync(path.join(topicPath, 'topic.json'))) continue;
+        for (const file of fs.readdirSync(topicPath).filter(f => f.endsWith('.py')).sort()) {
+            const result = parseLevelText(fs.readFileSync(path.join(topicPath, file), 'utf-8'));
+            if (result.level) {
+                levels.push({name: `${topicDir}/${file}`, level: result.level});
+            }
+        }
+    }
+    return levels;
+}
+
+function getClickableEvents(blocks: LevelBlock[]): string[] {
+    const events: string[] = [];
+    for (const block of blocks) {
+        if ((block.type === 'replace' || block.type === 'replace-span') && typeof block.event === 'string'
+            && !events.includes(block.event)) {
+            events.push(block.event);
+        }
+    }
+    return events;
+}
+
+function shuffle<T>(items: T[], seed: number): T[] {
+    const result = [...items];
+    let state = seed;
+    for (let i = result.length - 1; i > 0; i--) {
+        state = (state * 1103515245 + 12345) % 2147483648;
+        const j = state % (i + 1);
+        [result[i], result[j]] = [result[j], result[i]];
+    }
+    return result;
+}
+
+function expectSameAsApplyEvents(blocks: LevelBlock[], order: string[]): void {
+    const renderer = new LevelRenderer(blocks);
+    for (let i = 0; i <= order.length; i++) {
+        const events = order.slice(0, i);
+        expect(renderer.render(events)).toEqual(applyEvents(blocks, events));
+    }
+}
+
+describe('LevelRenderer matches applyEvents on all levels', () => {
+    const levels = loadLevels();
+
+    test('levels are found', () => {
+        expect(levels.length).toBeGreaterThan(0);
+    });
+
+    for (const {name, level} of levels) {
+        test(name, () => {
+            const events = getClickableEvents(level.blocks);
+            expectSameAsApplyEvents(level.blocks, events);
+            expectSameAsApplyEvents(level.blocks, [...events].reverse());
+            for (const seed of [1, 7, 42]) {
+                expectSameAsApplyEvents(level.blocks, shuffle(events, seed));
+            }
+        });
+    }
+});
+
+describe('LevelRenderer', () => {
+    test('should start over when events are removed', () => {
+        const blocks: LevelBlock[] = [
+            {type: 'text', text: 'a b\n'},
+            {type: 'replace-span', clickable: 'a', replacement: 'b', event: 'ab'},
+            {type: 'replace-span', clickable: 'b', replacement: 'c', event: 'bc'},
+        ];
+        const renderer = new LevelRenderer(blocks);
+
+        expect(renderer.render(['ab', 'bc'])).toEqual(applyEvents(blocks, ['ab', 'bc']));
+        expect(renderer.render(['bc'])).toEqual(applyEvents(blocks, ['bc']));
+        expect(renderer.render([])).toEqual(applyEvents(blocks, []));
+    });
+
+    test('should handle replacements that contain their clickable', () => {
+        const blocks: LevelBlock[] = [
+            {type: 'text', text: 'x = a\ny = a.b\n'},
+            {type: 'replace-span', clickable: 'a', replacement: 'a.b', event: 'ab'},
+            {type: 'replace-span', clickable: 'b', replacement: 'a', event: 'ba'},
+            {type: 'replace-span', clickable: 'y', replacement: 'z', event: 'yz'},
+        ];
+
+        expectSameAsApplyEvents(blocks, ['ab', 'ba', 'yz']);
+        expectSameAsApplyEvents(blocks, ['yz', 'ba', 'ab']);
+    });
+
+    test('should handle blocks without trailing newlines', () => {
+        const blocks: LevelBlock[] = [
+            {type: 'text', text: 'def f(a):'},
+            {type: 'replace', text: ' return a\n', replacement: '', event: 'remove'},
+            {type: 'replace-on', text: 'f(a)', replacement: 'f(b)\n', event: 'remove'},
+            {type: 'replace-span', clickable: 'a', replacement: 'arg', event: 'rename'},
+            {type: 'replace-span', clickable: 'f', replacement: '', event: 'noop'},
+        ];
+
+        expectSameAsApplyEvents(blocks, ['remove', 'rename', 'noop']);
+        expectSameAsApplyEvents(blocks, ['noop', 'rename', 'remove']);
+    });
+
+    test('renderLevel should reuse the renderer for the same blocks', () => {
+        const blocks: LevelBlock[] = [
+            {type: 'text', text: 'print(value)\n'},
+            {type: 'replace-span', clickable: 'value', replacement: 'total', event: 'rename'},
+        ];
+
+        const initial = renderLevel(blocks, []);
+        expect(renderLevel(blocks, [])).toBe(initial);
+        expect(renderLevel(blocks, ['rename'])).toEqual(applyEvents(blocks, ['rename']));
+    });
+});
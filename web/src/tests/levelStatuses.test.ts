@@ -0,0 +1,53 @@
+import {describe, expect, test} from 'vitest';
+import {computeLevelStatuses, isLevelClickable, isLevelSolved, selectLevelStatuses} from '../utils/levelUtils';
+import {createStateBuilder} from './stateBuilder';
+import {GameState} from '../types';
+
+const state: GameState = createStateBuilder()
+    .withTopics()
+    .withCompletedLevel('topic1', 'level2.py')
+    .build();
+
+describe('computeLevelStatuses', () => {
+    test('follows the rules of isLevelClickable and isLevelSolved', () => {
+        const statuses = computeLevelStatuses(state.topics, state.playerStats.levels, false);
+
+        for (const topic of state.topics) {
+            for (const level of topic.levels) {
+                expect(statuses.get(`${topic.name}__${level.filename.replace('.py', '')}`)).toEqual({
+                    solved: isLevelSolved(state, topic.name, level.filename),
+                    clickable: isLevelClickable(state, topic.name, level.filename)
+                });
+            }
+        }
+        expect(statuses.get('topic1__level1')!.clickable).toBe(true);
+        expect(statuses.get('topic1__level3')!.clickable).toBe(true);
+        expect(statuses.get('topic2__level2')!.clickable).toBe(false);
+    });
+
+    test('makes all levels clickable in debug mode', () => {
+        const statuses = computeLevelStatuses(state.topics, state.playerStats.levels, true);
+
+        expect([...statuses.values()].every(status => status.clickable)).toBe(true);
+        expect(statuses.get('topic1__level2')!.solved).toBe(true);
+    });
+
+    test('uses the same object for equal statuses', () => {
+        const before = computeLevelStatuses(state.topics, {}, false);
+        const after = computeLevelStatuses(state.topics, state.playerStats.levels, false);
+
+        expect(after.get('topic1__level1')).toBe(before.get('topic1__level1'));
+        expect(after.get('topic2__level2')).toBe(before.get('topic2__level2'));
+        expect(after.get('topic1__level2')).not.toBe(before.get('topic1__level2'));
+    });
+});
+
+describe('selectLevelStatuses', () => {
+    test('computes the statuses once per version of its inputs', () => {
+        const statuses = selectLevelStatuses(state.topics, state.playerStats.levels, false);
+
+        expect(selectLevelStatuses(state.topics, state.playerStats.levels, false)).toBe(statuses);
+        expect(selectLevelStatuses(state.topics, state.playerStats.levels, true)).not.toBe(statuses);
+        expect(selectLevelStatuses(state.topics, {...state.playerStats.levels}, false)).not.toBe(statuses);
+    });
+});
@@ -0,0 +1,155 @@
+import {afterEach, beforeEach, describe, expect, test} from 'vitest';
+import {execFileSync} from 'node:child_process';
+import * as fs from 'node:fs';
+import * as os from 'node:os';
+import * as path from 'node:path';
+import {fileURLToPath} from 'node:url';
+import {parseLevelText} from '../levels_compiler/parser';
+import {verifyLevels} from '../levels_compiler/verifyLevels';
+import {groupIndependentEvents, verifyLevel} from '../utils/levelVerifier';
+import {LevelData} from '../types';
+
+const levelsDir = fileURLToPath(new URL('../../levels', import.meta.url));
+const verifierMain = fileURLToPath(new URL('../levels_compiler/verifyLevels.ts', import.meta.url));
+
+// Removing the debug output also removes the only occurrence of the clickable of 'quotes'
+const DEAD_END_LEVEL = `##file cleanup.py
+"""start
+TODO
+"""
+def report(values):
+##replace cleanup
+    print("debug", values)
+##with
+##end
+##explain "Remove debug output"
+    return sum(values)
+##replace-span quotes "debug" "info"
+##explain "Say what it is"
+"""final
+TODO
+"""
+`;
+
+function parse(text: string): LevelData {
+    const {level, error} = parseLevelText(text);
+    if (!level) throw new Error(error);
+    return level;
+}
+
+/**
+ * Level with one independent rename per variable
+ */
+function independentRenamesLevel(count: number): string {
+    const names = Array.from({length: count}, (_, i) => `v${i}`);
+    return [
+        '##file renames.py', '"""start', 'TODO', '"""',
+        ...names.map((name, i) => `${name} = ${i}`),
+        ...names.flatMap((name, i) => [`##replace-span e${i} "${name}" "value_${i}"`, `##explain "Better"`]),
+        '"""final', 'TODO', '"""', ''
+    ].join('\n');
+}
+
+describe('verifyLevel', () => {
+    test('finds the clicks that lead to a dead end', () => {
+        const result = verifyLevel(parse(DEAD_END_LEVEL));
+
+        expect(result.solvable).toBe(false);
+        expect(result.complete).toBe(true);
+        expect(result.deadEnds).toEqual([{events: ['cleanup'], missing: ['quotes']}]);
+    });
+
+    test('accepts levels that can be completed in any order', () => {
+        const fixed = DEAD_END_LEVEL.replace('##replace-span quotes "debug" "info"', '##replace-span quotes "values" "scores"');
+        const result = verifyLevel(parse(fixed));
+
+        expect(result).toMatchObject({solvable: true, deadEnds: [], complete: true});
+        // Both orders lead to the same set of events, which is explored once
+        expect(result.states).toBe(4);
+    });
+
+    test('reports fixes that can never be clicked', () => {
+        const level = parse(independentRenamesLevel(2).replace('"v1" "value_1"', '"v9" "value_9"'));
+        const result = verifyLevel(level);
+
+        expect(result.solvable).toBe(false);
+        expect(result.deadEnds).toEqual([{events: [], missing: ['e1']}]);
+    });
+
+    test('explores independent fixes separately', () => {
+        const level = parse(independentRenamesLevel(12));
+
+        expect(groupIndependentEvents(level.blocks)).toHaveLength(12);
+        expect(verifyLevel(level)).toMatchObject({solvable: true, groups: 12, states: 24});
+        expect(verifyLevel(level, {splitGroups: false})).toMatchObject({solvable: true, groups: 1, states: 4096});
+    });
+
+    test('groups fixes that only share a symbol', () => {
+        // Replacing the sum removes the only "+", the clickable of 'sign'
+        const level = parse(`##file total.py
+"""start
+TODO
+"""
+def total(a, b):
+##replace builtin
+    s = a + b
+##with
+    s = sum([a, b])
+##end
+##explain "Use sum"
+    return s
+##replace-span sign "+" "-"
+##explain "Subtract"
+"""final
+TODO
+"""
+`);
+
+        expect(groupIndependentEvents(level.blocks)).toEqual([['builtin', 'sign']]);
+        expect(verifyLevel(level).deadEnds).toEqual([{events: ['builtin'], missing: ['sign']}]);
+    });
+
+    test('stops at the maximum number of states', () => {
+        const result = verifyLevel(parse(independentRenamesLevel(12)), {splitGroups: false, maxStates: 100});
+
+        expect(result.complete).toBe(false);
+        expect(result.states).toBe(101);
+    });
+});
+
+describe('verifyLevels', () => {
+    let workDir: string;
+
+    beforeEach(() => {
+        workDir = fs.mkdtempSync(path.join(os.tmpdir(), 'levels-verifier-'));
+        fs.cpSync(path.join(levelsDir, '01-names'), path.join(workDir, '01-names'), {recursive: true});
+        fs.mkdirSync(path.join(workDir, '02-broken'));
+        fs.writeFileSync(path.join(workDir, '02-broken', 'topic.json'), JSON.stringify({name: 'Broken'}));
+        fs.writeFileSync(path.join(workDir, '02-broken', '01-cleanup.py'), DEAD_END_LEVEL);
+    });
+
+    afterEach(() => {
+        fs.rmSync(workDir, {recursive: true, force: true});
+    });
+
+    test('finds no dead ends in the levels', async () => {
+        const reports = await verifyLevels(levelsDir);
+
+        expect(reports.length).toBeGreaterThan(0);
+        expect(reports.filter(report => report.error || !report.result!.solvable)).toEqual([]);
+    });
+
+    test('flags dead ends from the command line with worker threads', () => {
+        let output = '';
+        let status = 0;
+        try {
+            execFileSync(process.execPath, ['--import', 'tsx', verifierMain, workDir, '--jobs', '2'], {encoding: 'utf-8'});
+        } catch (err) {
+            ({stdout: output, status} = err as { stdout: string, status: number });
+        }
+
+        expect(status).toBe(1);
+        expect(output).toContain(`${path.join(workDir, '02-broken', '01-cleanup.py')}:\n  * dead end after clicking cleanup, no region for quotes`);
+        expect(output).toContain('1 with dead ends or errors');
+    }, 30000);
+});
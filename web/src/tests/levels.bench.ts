@@ -0,0 +1,116 @@
+/**
+ * Speed of level parsing, rendering and clicking over the level corpus and a synthetic level
+ *
+ * The size of the synthetic level is set with BENCH_LEVEL_LINES, BENCH_LEVEL_SPANS and
+ * BENCH_LEVEL_EVENTS_PER_BLOCK. Run `npm run bench:check` to compare the results with the baseline.
+ */
+import {bench, describe} from 'vitest';
+import * as fs from 'node:fs';
+import * as path from 'node:path';
+import {fileURLToPath} from 'node:url';
+import {parseLevelText} from '../levels_compiler/parser';
+import {applyEvents, replaceSubstringWithWordBoundaries} from '../utils/pylang';
+import {gameReducer, initialState} from '../reducers';
+import {createInitialLevelState} from '../reducers/levelReducer';
+import {codeClick} from '../reducers/actionCreators';
+import {GameState, LevelData} from '../types';
+import {createSyntheticLevelText, SyntheticLevelOptions} from './levelGenerator';
+
+const levelsDir = fileURLToPath(new URL('../../levels', import.meta.url));
+
+const syntheticOptions: SyntheticLevelOptions = {
+    lines: Number(process.env.BENCH_LEVEL_LINES ?? 2000),
+    spans: Number(process.env.BENCH_LEVEL_SPANS ?? 100),
+    eventsPerBlock: Number(process.env.BENCH_LEVEL_EVENTS_PER_BLOCK ?? 3)
+};
+const syntheticName = `synthetic (${syntheticOptions.lines} lines, ${syntheticOptions.spans} spans, ` +
+    `${syntheticOptions.eventsPerBlock} events per block)`;
+
+/**
+ * Read the sources of all levels in web/levels
+ */
+function readCorpus(): string[] {
+    const sources: string[] = [];
+    for (const topic of fs.readdirSync(levelsDir).sort()) {
+        const topicDir = path.join(levelsDir, topic);
+        if (!fs.statSync(topicDir).isDirectory()) continue;
+        for (const file of fs.readdirSync(topicDir).sort()) {
+            if (file.endsWith('.py')) {
+                sources.push(fs.readFileSync(path.join(topicDir, file), 'utf-8'));
+            }
+        }
+    }
+    return sources;
+}
+
+function parseOrThrow(source: string): LevelData {
+    const result = parseLevelText(source);
+    if (!result.level) throw new Error(`Benchmark level does not parse: ${result.error}`);
+    return result.level;
+}
+
+/**
+ * All events a level defines, in block order
+ */
+function getLevelEvents(level: LevelData): string[] {
+    return level.blocks
+        .filter(block => (block.type === 'replace' || block.type === 'replace-span') && block.event)
+        .map(block => block.event as string);
+}
+
+const corpusSources = readCorpus();
+const corpusLevels = corpusSources.map(parseOrThrow);
+const syntheticSource = createSyntheticLevelText(syntheticOptions);
+const syntheticLevel = parseOrThrow(syntheticSource);
+
+describe('parseLevelText', () => {
+    bench(`corpus (${corpusSources.length} levels)`, () => {
+        for (const source of corpusSources) parseLevelText(source);
+    });
+
+    bench(syntheticName, () => {
+        parseLevelText(syntheticSource);
+    });
+});
+
+describe('applyEvents', () => {
+    bench('corpus, no events', () => {
+        for (const level of corpusLevels) applyEvents(level.blocks, []);
+    });
+
+    bench('corpus, all events', () => {
+        for (const level of corpusLevels) applyEvents(level.blocks, getLevelEvents(level));
+    });
+
+    const syntheticEvents = getLevelEvents(syntheticLevel);
+    bench(`${syntheticName}, half of the events`, () => {
+        applyEvents(syntheticLevel.blocks, syntheticEvents.filter((_, i) => i % 2 === 0));
+    });
+});
+
+describe('replaceSubstringWithWordBoundaries', () => {
+    const code = applyEvents(syntheticLevel.blocks, []).code;
+
+    bench(`${syntheticName}, frequent name`, () => {
+        replaceSubstringWithWordBoundaries(code, 'name_1', 'renamed_1');
+    });
+
+    bench(`${syntheticName}, missing name`, () => {
+        replaceSubstringWithWordBoundaries(code, 'not_in_code', 'renamed');
+    });
+});
+
+describe('gameReducer CODE_CLICK', () => {
+    const state: GameState = {...initialState, currentLevel: createInitialLevelState(syntheticLevel)};
+    const region = state.currentLevel.regions[Math.floor(state.currentLevel.regions.length / 2)];
+    const lines = state.currentLevel.code.split('\n');
+    const token = lines[region.startLine].substring(region.startCol, region.startCol + 1);
+
+    bench(`${syntheticName}, fix`, () => {
+        gameReducer(state, codeClick(region.startLine, region.startCol, token));
+    });
+
+    bench(`${syntheticName}, wrong click`, () => {
+        gameReducer(state, codeClick(0, 0, 'def'));
+    });
+});
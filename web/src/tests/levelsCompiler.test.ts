@@ -0,0 +1,160 @@
+import {afterEach, beforeEach, describe, expect, test, vi} from 'vitest';
+import {execFileSync} from 'node:child_process';
+import * as fs from 'node:fs';
+import * as os from 'node:os';
+import * as path from 'node:path';
+import {fileURLToPath} from 'node:url';
+import {generate} from '../levels_compiler/main';
+import {applyEvents} from '../utils/pylang';
+import {unpackRegions} from '../utils/regions';
+import {calculateNextHintId} from '../reducers/levelReducer';
+
+const levelsDir = fileURLToPath(new URL('../../levels', import.meta.url));
+const compilerMain = fileURLToPath(new URL('../levels_compiler/main.ts', import.meta.url));
+
+describe('generate', () => {
+    let workDir: string;
+    let source: string;
+    let output: string;
+    let cacheFile: string;
+
+    beforeEach(() => {
+        vi.spyOn(console, 'log').mockImplementation(() => {});
+        workDir = fs.mkdtempSync(path.join(os.tmpdir(), 'levels-compiler-'));
+        source = path.join(workDir, 'levels');
+        output = path.join(workDir, 'out', 'levels.json');
+        cacheFile = path.join(workDir, 'cache', 'cache.json');
+        for (const topic of ['00-test', '01-names']) {
+            fs.cpSync(path.join(levelsDir, topic), path.join(source, topic), {recursive: true});
+        }
+    });
+
+    afterEach(() => {
+        vi.restoreAllMocks();
+        fs.rmSync(workDir, {recursive: true, force: true});
+    });
+
+    function levelFiles(): string[] {
+        return fs.readdirSync(path.join(source, '01-names')).filter(f => f.endsWith('.py'));
+    }
+
+    test('should produce the same output with and without cache', () => {
+        const uncachedOutput = path.join(workDir, 'uncached.json');
+        generate(source, uncachedOutput, {cacheFile: null});
+        generate(source, output, {cacheFile});
+        generate(source, output, {cacheFile});
+
+        expect(fs.readFileSync(output, 'utf-8')).toBe(fs.readFileSync(uncachedOutput, 'utf-8'));
+    });
+
+    test('should only parse changed files and skip writing unchanged output', () => {
+        const total = levelFiles().length + 1;
+
+        expect(generate(source, output, {cacheFile})).toEqual({written: true, parsed: total, cached: 0, errors: []});
+        const writtenAt = fs.statSync(output).mtimeMs;
+
+        expect(generate(source, output, {cacheFile})).toEqual({written: false, parsed: 0, cached: total, errors: []});
+        expect(fs.statSync(output).mtimeMs).toBe(writtenAt);
+
+        // Trailing blank lines are ignored by the parser
+        const changedFile = path.join(source, '01-names', levelFiles()[0]);
+        fs.appendFileSync(changedFile, '\n\n');
+        expect(generate(source, output, {cacheFile})).toEqual({written: false, parsed: 1, cached: total - 1, errors: []});
+
+        fs.writeFileSync(changedFile, fs.readFileSync(changedFile, 'utf-8').replace('##file ', '##file renamed_'));
+        expect(generate(source, output, {cacheFile})).toMatchObject({written: true, parsed: 1});
+    });
+
+    test('should reuse entries of files that were touched without changes', () => {
+        generate(source, output, {cacheFile});
+        const touchedFile = path.join(source, '01-names', levelFiles()[0]);
+        const later = new Date(Date.now() + 10000);
+        fs.utimesSync(touchedFile, later, later);
+
+        expect(generate(source, output, {cacheFile})).toMatchObject({written: false, parsed: 0});
+    });
+
+    test('should discard a cache from another parser version', () => {
+        generate(source, output, {cacheFile});
+        const cache = JSON.parse(fs.readFileSync(cacheFile, 'utf-8'));
+        fs.writeFileSync(cacheFile, JSON.stringify({...cache, parserVersion: -1}));
+
+        expect(generate(source, output, {cacheFile})).toMatchObject({parsed: levelFiles().length + 1, cached: 0});
+    });
+
+    test('should ignore a corrupted cache', () => {
+        fs.mkdirSync(path.dirname(cacheFile), {recursive: true});
+        fs.writeFileSync(cacheFile, '{not json');
+
+        expect(generate(source, output, {cacheFile})).toMatchObject({written: true, cached: 0});
+    });
+
+    test('should report all parse errors together and keep the other levels', () => {
+        const consoleError = vi.spyOn(console, 'error').mockImplementation(() => {});
+        fs.writeFileSync(path.join(source, '00-test', '1-broken.py'), '##file broken.py\n##unknown\n');
+        fs.writeFileSync(path.join(source, '01-names', '99-broken.py'), '##bogus\n');
+
+        const result = generate(source, output, {cacheFile});
+
+        expect(result.errors.map(e => path.basename(e.filePath))).toEqual(['1-broken.py', '99-broken.py']);
+        expect(result.errors[1].error).toContain('##bogus');
+        expect(consoleError).toHaveBeenCalledTimes(1);
+        const compiled = JSON.parse(fs.readFileSync(output, 'utf-8'));
+        expect(compiled.topics[1].levels).toHaveLength(levelFiles().length - 1);
+
+        // Broken files are not cached and are reported again
+        expect(generate(source, output, {cacheFile}).errors).toHaveLength(2);
+    });
+
+    test('should produce the same output with --jobs as the serial compiler', () => {
+        fs.writeFileSync(path.join(source, '01-names', '99-broken.py'), '##bogus\n');
+        const serialOutput = path.join(workDir, 'serial.json');
+        const parallelOutput = path.join(workDir, 'parallel.json');
+        vi.spyOn(console, 'error').mockImplementation(() => {});
+        generate(source, serialOutput, {cacheFile: null});
+
+        // Worker threads load TypeScript sources, so run the compiler the way npm scripts do
+        execFileSync(process.execPath, ['--import', 'tsx', compilerMain, source, parallelOutput, '--jobs', '3', '--no-cache'],
+            {stdio: 'pipe'});
+
+        expect(fs.readFileSync(parallelOutput, 'utf-8')).toBe(fs.readFileSync(serialOutput, 'utf-8'));
+    });
+
+    test('should split levels into a manifest and per-level chunks', () => {
+        const chunksDir = path.join(workDir, 'chunks');
+        generate(source, output, {cacheFile, chunksDir});
+
+        const compiled = JSON.parse(fs.readFileSync(output, 'utf-8'));
+        const manifest = JSON.parse(fs.readFileSync(path.join(chunksDir, 'manifest.json'), 'utf-8'));
+        expect(manifest.topics.map((t: { name: string }) => t.name)).toEqual(['Testing', 'Naming']);
+        expect(manifest.startLevel).toEqual({topic: 'Naming', level: compiled.topics[1].levels[0]});
+        manifest.topics.forEach((topic: { levels: { filename: string; chunk: string }[] }, i: number) => {
+            topic.levels.forEach((level, j) => {
+                const chunk = JSON.parse(fs.readFileSync(path.join(chunksDir, `${level.chunk}.json`), 'utf-8'));
+                expect(chunk).toEqual(compiled.topics[i].levels[j]);
+                expect(level.filename).toBe(chunk.filename);
+            });
+        });
+
+        // Chunks of deleted levels are removed
+        fs.rmSync(path.join(source, '00-test'), {recursive: true});
+        expect(generate(source, output, {cacheFile, chunksDir}).written).toBe(true);
+        expect(fs.existsSync(path.join(chunksDir, '00-test'))).toBe(false);
+        expect(generate(source, output, {cacheFile, chunksDir}).written).toBe(false);
+    });
+
+    test('should emit the initial state of every level', () => {
+        generate(source, output, {cacheFile});
+        generate(source, output, {cacheFile});
+
+        const compiled = JSON.parse(fs.readFileSync(output, 'utf-8'));
+        for (const topic of compiled.topics) {
+            for (const level of topic.levels) {
+                const {code, regions} = applyEvents(level.blocks, []);
+                expect(level.initialState.code).toBe(code);
+                expect(unpackRegions(level.initialState.regions)).toEqual(regions);
+                expect(level.initialState.pendingHintId).toBe(calculateNextHintId(level, []));
+            }
+        }
+    });
+});
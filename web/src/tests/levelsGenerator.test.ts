@@ -0,0 +1,192 @@
+// @vitest-environment node
+import {afterAll, afterEach, beforeAll, beforeEach, describe, expect, test, vi} from 'vitest';
+import {execFile} from 'node:child_process';
+import {createServer, IncomingMessage, Server, ServerResponse} from 'node:http';
+import {AddressInfo} from 'node:net';
+import * as fs from 'node:fs';
+import * as os from 'node:os';
+import * as path from 'node:path';
+import {fileURLToPath} from 'node:url';
+import {promisify} from 'node:util';
+import {checkGeneratedLevel, generateLevels, readIssues} from '../levels_compiler/generateLevels';
+import {parseLevelText} from '../levels_compiler/parser';
+
+const generatorMain = fileURLToPath(new URL('../levels_compiler/generateLevels.ts', import.meta.url));
+
+const ISSUES = ['Cryptic variable names', 'Magic numbers', 'Deeply nested conditions'];
+
+/**
+ * Local stand-in for the Gemini endpoint, answering by the schema of each request
+ */
+const mockServer = {
+    server: null as Server | null,
+    url: '',
+    requests: [] as string[],       // the step of every request
+    running: 0,
+    maxRunning: 0,
+    fail: null as ((step: string) => number | null) | null,     // status to fail a request with
+};
+
+function respond(step: string, prompt: string): object {
+    const issue = ISSUES.find(issue => prompt.includes(issue)) ?? 'unknown';
+    const slug = issue.toLowerCase().replace(/ /g, '_');
+    switch (step) {
+        case 'code':
+            return {
+                candidates: [], analysis: '', details: '', filename: `${slug}.py`,
+                pythonCode: `def calc(a, b):\n    return a * 42 + b\n\nprint("${issue}")`
+            };
+        case 'fixes':
+            return {analysis: '', fixes: [{clickable: 'calc', replacement: 'total'}, {clickable: 'missing', replacement: 'x'}]};
+        case 'messages':
+            return {
+                analysis: '', problems: '', startMessage: `Look at ${issue}`, startReply: 'OK',
+                finalMessage: 'Much better', endReply: 'Next'
+            };
+        default:
+            return {analysis: '', change: '', hint: 'What does it compute?', explanation: 'Names matter',
+                options: [{label: 'Rename to total', correct: true}, {label: 'Rename to sum', correct: false}]};
+    }
+}
+
+function handle(req: IncomingMessage, res: ServerResponse): void {
+    let data = '';
+    req.on('data', chunk => data += chunk);
+    req.on('end', () => {
+        const body = JSON.parse(data);
+        const properties = Object.keys(body.generationConfig.responseSchema.properties);
+        const step = properties.includes('pythonCode') ? 'code'
+            : properties.includes('fixes') ? 'fixes'
+                : properties.includes('startMessage') ? 'messages' : 'hint';
+        const prompt: string = body.contents[0].parts[0].text;
+        mockServer.requests.push(step);
+        mockServer.running++;
+        mockServer.maxRunning = Math.max(mockServer.maxRunning, mockServer.running);
+        setTimeout(() => {
+            mockServer.running--;
+            const status = mockServer.fail?.(step) ?? null;
+            if (status) {
+                res.writeHead(status);
+                res.end('failed');
+                return;
+            }
+            res.writeHead(200, {'Content-Type': 'application/json'});
+            res.end(JSON.stringify({candidates: [{content: {parts: [{text: JSON.stringify(respond(step, prompt))}]}}]}));
+        }, 5);
+    });
+}
+
+describe('generateLevels', () => {
+    let workDir: string;
+    let topicDir: string;
+    let checkpointFile: string;
+
+    beforeAll(async () => {
+        mockServer.server = createServer(handle);
+        await new Promise<void>(resolve => mockServer.server!.listen(0, '127.0.0.1', resolve));
+        mockServer.url = `http://127.0.0.1:${(mockServer.server.address() as AddressInfo).port}/v1beta`;
+    });
+
+    afterAll(async () => {
+        await new Promise(resolve => mockServer.server!.close(resolve));
+    });
+
+    beforeEach(() => {
+        mockServer.requests = [];
+        mockServer.maxRunning = 0;
+        mockServer.fail = null;
+        vi.spyOn(console, 'log').mockImplementation(() => {});
+        vi.spyOn(console, 'info').mockImplementation(() => {});
+        vi.spyOn(console, 'warn').mockImplementation(() => {});
+        vi.spyOn(console, 'error').mockImplementation(() => {});
+        workDir = fs.mkdtempSync(path.join(os.tmpdir(), 'levels-generator-'));
+        topicDir = path.join(workDir, 'levels', '04-generated');
+        checkpointFile = path.join(workDir, 'checkpoint.json');
+    });
+
+    afterEach(() => {
+        vi.restoreAllMocks();
+        fs.rmSync(workDir, {recursive: true, force: true});
+    });
+
+    const options = () => ({apiKey: 'test-key', apiUrl: mockServer.url, checkpointFile});
+
+    test('writes a complete, valid level file per issue', async () => {
+        const result = await generateLevels(ISSUES, topicDir, {...options(), jobs: 3, concurrency: 2});
+
+        expect(result.failed).toEqual([]);
+        expect(result.written.map(file => path.basename(file))).toEqual([
+            '01-cryptic_variable_names.py', '02-magic_numbers.py', '03-deeply_nested_conditions.py'
+        ]);
+        expect(JSON.parse(fs.readFileSync(path.join(topicDir, 'topic.json'), 'utf-8')))
+            .toEqual({name: '04-generated', inDevelopment: true});
+        for (const file of result.written) {
+            const code = fs.readFileSync(file, 'utf-8');
+            expect(checkGeneratedLevel(code)).toBeNull();
+            const level = parseLevelText(code).level!;
+            // The fix of a text that is not in the code is dropped
+            expect(level.blocks.filter(block => block.type === 'replace-span')).toMatchObject([
+                {clickable: 'calc', replacement: 'total', hint: 'What does it compute?'}
+            ]);
+        }
+        // Code, fixes, messages and one hint per level
+        expect(mockServer.requests).toHaveLength(12);
+        expect(mockServer.maxRunning).toBeLessThanOrEqual(2);
+        // Prompts and responses are only logged with the verbose option
+        expect(console.log).not.toHaveBeenCalled();
+    });
+
+    test('continues from the checkpoint after an interruption', async () => {
+        // The second level stops before its messages
+        let messages = 0;
+        mockServer.fail = step => step === 'messages' && ++messages > 1 ? 400 : null;
+        const first = await generateLevels(ISSUES.slice(0, 2), topicDir, {...options(), jobs: 1});
+        expect(first.written).toHaveLength(1);
+        expect(first.failed).toMatchObject([{issue: ISSUES[1], error: 'API request failed with status 400'}]);
+
+        mockServer.fail = null;
+        mockServer.requests = [];
+        const second = await generateLevels(ISSUES, topicDir, {...options(), jobs: 1});
+
+        expect(second.skipped).toBe(1);
+        expect(second.failed).toEqual([]);
+        expect(second.written.map(file => path.basename(file))).toEqual(['02-magic_numbers.py', '03-deeply_nested_conditions.py']);
+        // Code and fixes of the interrupted level were kept
+        expect(mockServer.requests).toEqual(['messages', 'hint', 'code', 'fixes', 'messages', 'hint']);
+    });
+
+    test('generates invalid levels again with new responses', async () => {
+        // Without a hint the level is not complete
+        let failures = 1;
+        mockServer.fail = step => step === 'hint' && failures-- > 0 ? 400 : null;
+
+        const result = await generateLevels(ISSUES.slice(0, 1), topicDir, {...options(), attempts: 2});
+
+        expect(result.written).toHaveLength(1);
+        expect(mockServer.requests).toEqual(['code', 'fixes', 'messages', 'hint', 'code', 'fixes', 'messages', 'hint']);
+    });
+
+    test('numbers new levels after the existing ones', async () => {
+        fs.mkdirSync(topicDir, {recursive: true});
+        fs.writeFileSync(path.join(topicDir, '07-existing.py'), '');
+
+        const result = await generateLevels(ISSUES.slice(1, 2), topicDir, options());
+
+        expect(result.written.map(file => path.basename(file))).toEqual(['08-magic_numbers.py']);
+    });
+
+    test('runs from the command line', async () => {
+        const issuesFile = path.join(workDir, 'issues.txt');
+        fs.writeFileSync(issuesFile, `# Naming\n${ISSUES[0]}\n\n${ISSUES[1]}\n`);
+        expect(readIssues(issuesFile)).toEqual(ISSUES.slice(0, 2));
+
+        const {stdout} = await promisify(execFile)(process.execPath, [
+            '--import', 'tsx', generatorMain, issuesFile, topicDir,
+            '--api-url', mockServer.url, '--checkpoint', checkpointFile, '--jobs', '2', '--rpm', '6000'
+        ], {env: {...process.env, GEMINI_API_KEY: 'test-key'}});
+
+        expect(stdout).toContain('Wrote 2 level(s), skipped 0 written before, 0 failed');
+        expect(stdout).not.toContain('Request to Gemini API');
+        expect(fs.readdirSync(topicDir).sort()).toEqual(['01-cryptic_variable_names.py', '02-magic_numbers.py', 'topic.json']);
+    }, 30000);
+});
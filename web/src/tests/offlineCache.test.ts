@@ -0,0 +1,189 @@
+import {beforeEach, describe, expect, test, vi} from 'vitest';
+import {hasUnsyncedStats, mergePlayerStats, OfflineCache} from '../firebase/offlineCache';
+import {loadPlayerStatsOfflineFirst, offlineCache} from '../firebase/firestore';
+import {createDefaultPlayerStats, statsReducer} from '../reducers/statsReducer';
+import {updateLevelStats} from '../reducers/actionCreators';
+import {PlayerStatsState, User} from '../types';
+import {getDoc} from 'firebase/firestore';
+
+vi.mock('firebase/firestore', () => ({
+    doc: vi.fn((...path: unknown[]) => path.slice(1).join('/')),
+    getDoc: vi.fn(),
+    updateDoc: vi.fn(),
+    writeBatch: vi.fn(),
+    deleteField: vi.fn(() => 'deleted-field'),
+    serverTimestamp: vi.fn(() => 'mocked-timestamp')
+}));
+
+vi.mock('../firebase/index', () => ({
+    db: {}
+}));
+
+const user: User = {uid: 'player1', displayName: 'Player', email: 'player@example.com', photoURL: null};
+
+// The caches are only tested where the environment has IndexedDB
+const hasIndexedDB = typeof indexedDB !== 'undefined';
+
+/**
+ * Play a level: time spent, hints used, mistakes made and whether it was completed
+ */
+type Play = [string, number, number, number, boolean];
+
+function play(stats: PlayerStatsState, ...plays: Play[]): PlayerStatsState {
+    return plays.reduce((state, [key, time, hints, mistakes, completed]) =>
+        statsReducer(state, updateLevelStats(key, {}, time, completed, hints, mistakes)), stats);
+}
+
+describe('mergePlayerStats', () => {
+    const base = play(createDefaultPlayerStats(), ['a__1', 30, 1, 2, true], ['a__2', 10, 0, 1, false]);
+
+    test('adds the local plays since the last sync to the remote statistics', () => {
+        const remotePlays: Play[] = [['a__1', 20, 0, 0, true], ['b__1', 50, 2, 3, true]];
+        const localPlays: Play[] = [['a__2', 40, 1, 0, true], ['a__1', 25, 2, 1, true], ['c__1', 5, 0, 0, false]];
+
+        const remote = play(base, ...remotePlays);
+        const local = play(base, ...localPlays);
+
+        // Same as if all plays had happened on one device
+        expect(mergePlayerStats(remote, local, base)).toEqual(play(base, ...remotePlays, ...localPlays));
+    });
+
+    test('counts a level solved on both sides once', () => {
+        const remote = play(base, ['b__1', 50, 2, 3, true]);
+        const local = play(base, ['b__1', 40, 1, 4, true]);
+
+        const merged = mergePlayerStats(remote, local, base);
+        expect(merged.summary.totalLevelsSolved).toBe(base.summary.totalLevelsSolved + 1);
+        expect(merged.levels['b__1']).toMatchObject({timesCompleted: 2, minTimeSpent: 40, minHintsUsed: 1, minMistakesMade: 3});
+    });
+
+    test('keeps the larger counters without a known sync state', () => {
+        const remote = play(base, ['a__1', 20, 0, 0, true]);
+        const local = play(base, ['a__1', 10, 0, 0, true], ['a__1', 10, 0, 0, true]);
+
+        const merged = mergePlayerStats(remote, local, null);
+        expect(merged.levels['a__1'].timesCompleted).toBe(3);
+        expect(merged.levels['a__1'].minTimeSpent).toBe(10);
+        expect(merged.summary.totalLevelCompletions).toBe(local.summary.totalLevelCompletions);
+        expect(mergePlayerStats(remote, base, null)).toEqual(remote);
+    });
+
+    test('returns the remote statistics when nothing changed locally', () => {
+        const remote = play(base, ['a__1', 20, 0, 0, true]);
+        expect(mergePlayerStats(remote, base, base)).toEqual(remote);
+    });
+});
+
+describe('hasUnsyncedStats', () => {
+    test('compares the statistics with the last synced ones', () => {
+        const synced = play(createDefaultPlayerStats(), ['a__1', 30, 1, 2, true]);
+
+        expect(hasUnsyncedStats({stats: synced, synced})).toBe(false);
+        expect(hasUnsyncedStats({stats: structuredClone(synced), synced})).toBe(false);
+        expect(hasUnsyncedStats({stats: play(synced, ['a__1', 5, 0, 0, false]), synced})).toBe(true);
+        expect(hasUnsyncedStats({stats: play(synced, ['b__1', 5, 0, 0, false]), synced})).toBe(true);
+        expect(hasUnsyncedStats({stats: synced, synced: null})).toBe(true);
+    });
+});
+
+describe.skipIf(!hasIndexedDB)('OfflineCache', () => {
+    let cache: OfflineCache;
+    let databases = 0;
+
+    beforeEach(() => {
+        // A new database per test
+        cache = new OfflineCache(indexedDB, `offlineCacheTest${++databases}`);
+    });
+
+    test('stores, updates and deletes values', async () => {
+        expect(await cache.get('key')).toBeUndefined();
+
+        await cache.put('key', {value: 1});
+        expect(await cache.get('key')).toEqual({value: 1});
+
+        await Promise.all([
+            cache.update<{ value: number }>('key', current => ({value: current!.value + 1})),
+            cache.update<{ value: number }>('key', current => ({value: current!.value + 1}))
+        ]);
+        expect(await cache.get('key')).toEqual({value: 3});
+
+        await cache.delete('key');
+        expect(await cache.get('key')).toBeUndefined();
+    });
+
+    test('keeps the synced statistics when the local ones change', async () => {
+        const synced = play(createDefaultPlayerStats(), ['a__1', 30, 1, 2, true]);
+        const stats = play(synced, ['a__2', 10, 0, 0, true]);
+
+        await cache.savePlayerStats('player1', synced);
+        expect(await cache.getPlayerStats('player1')).toEqual({stats: synced, synced: null});
+
+        await cache.markPlayerStatsSynced('player1', synced);
+        await cache.savePlayerStats('player1', stats);
+        expect(await cache.getPlayerStats('player1')).toEqual({stats, synced});
+
+        await cache.markPlayerStatsSynced('player1', stats);
+        expect(await cache.getPlayerStats('player1')).toEqual({stats, synced: stats});
+    });
+});
+
+describe('OfflineCache without IndexedDB', () => {
+    test('does nothing', async () => {
+        const unavailable = new OfflineCache(undefined);
+
+        await unavailable.put('key', 1);
+        expect(await unavailable.get('key')).toBeUndefined();
+    });
+});
+
+describe.skipIf(!hasIndexedDB)('loadPlayerStatsOfflineFirst', () => {
+    const remote = play(createDefaultPlayerStats(), ['a__1', 30, 1, 2, true]);
+
+    beforeEach(async () => {
+        vi.mocked(getDoc).mockReset();
+        await offlineCache.delete(`playerStats/${user.uid}`);
+    });
+
+    const mockRemote = (stats: PlayerStatsState) => vi.mocked(getDoc).mockResolvedValue({
+        exists: () => true,
+        data: () => ({...stats, memberOfGroups: []})
+    } as never);
+
+    test('shows the cached statistics first and reconciles them with Firestore', async () => {
+        const local = play(remote, ['a__2', 10, 0, 0, true]);
+        await offlineCache.markPlayerStatsSynced(user.uid, remote);
+        await offlineCache.savePlayerStats(user.uid, local);
+        const remoteNow = play(remote, ['b__1', 20, 0, 1, true]);
+        mockRemote(remoteNow);
+
+        const onStats = vi.fn();
+        expect(await loadPlayerStatsOfflineFirst(user, onStats)).toBe(true);
+
+        const merged = play(remoteNow, ['a__2', 10, 0, 0, true]);
+        expect(onStats.mock.calls).toEqual([[local, false], [merged, true]]);
+        expect(await offlineCache.getPlayerStats(user.uid)).toEqual({stats: merged, synced: remoteNow});
+    });
+
+    test('keeps the cached statistics while Firestore is unreachable', async () => {
+        const local = play(remote, ['a__2', 10, 0, 0, true]);
+        await offlineCache.savePlayerStats(user.uid, local);
+        vi.mocked(getDoc).mockRejectedValue(new Error('offline'));
+        vi.spyOn(console, 'error').mockImplementation(() => {});
+
+        const onStats = vi.fn();
+        expect(await loadPlayerStatsOfflineFirst(user, onStats)).toBe(false);
+
+        expect(onStats.mock.calls).toEqual([[local, false]]);
+        expect(await offlineCache.getPlayerStats(user.uid)).toEqual({stats: local, synced: null});
+    });
+
+    test('uses the Firestore statistics when nothing is cached', async () => {
+        mockRemote(remote);
+
+        const onStats = vi.fn();
+        expect(await loadPlayerStatsOfflineFirst(user, onStats)).toBe(true);
+
+        expect(onStats.mock.calls).toEqual([[remote, true]]);
+        expect(await offlineCache.getPlayerStats(user.uid)).toEqual({stats: remote, synced: remote});
+    });
+});
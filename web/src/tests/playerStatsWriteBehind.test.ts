@@ -0,0 +1,229 @@
+import {afterEach, beforeEach, describe, expect, test, vi} from 'vitest';
+import {
+    diffPlayerStats,
+    flushOnPageHide,
+    PlayerStatsWrite,
+    PlayerStatsWriteBehind,
+    STATS_WRITE_DELAY_MS
+} from '../firebase/statsWriteBehind';
+import {savePlayerStats} from '../firebase/firestore';
+import {createDefaultLevelStats, createDefaultPlayerStats} from '../reducers/statsReducer';
+import {PlayerStatsState, User} from '../types';
+import {deleteField, getDoc, updateDoc, writeBatch} from 'firebase/firestore';
+
+vi.mock('firebase/firestore', () => ({
+    doc: vi.fn((...path: unknown[]) => path.slice(1).join('/')),
+    getDoc: vi.fn(),
+    updateDoc: vi.fn(),
+    writeBatch: vi.fn(),
+    deleteField: vi.fn(() => 'deleted-field'),
+    serverTimestamp: vi.fn(() => 'mocked-timestamp')
+}));
+
+vi.mock('../firebase/index', () => ({
+    db: {}
+}));
+
+const user: User = {uid: 'player1', displayName: 'Player', email: 'player@example.com', photoURL: null};
+
+function withLevel(stats: PlayerStatsState, key: string, timesCompleted: number): PlayerStatsState {
+    return {
+        summary: {...stats.summary, totalLevelCompletions: stats.summary.totalLevelCompletions + 1},
+        levels: {...stats.levels, [key]: {...createDefaultLevelStats(), timesCompleted}}
+    };
+}
+
+/**
+ * In-memory stand-in for the player statistics document
+ */
+function createFakeStore() {
+    const store = {
+        doc: null as PlayerStatsState | null,
+        writes: [] as PlayerStatsWrite[],
+        fail: false,
+        writer: async (write: PlayerStatsWrite) => {
+            if (store.fail) throw new Error('unavailable');
+            store.writes.push(write);
+            const levels = {...store.doc?.levels};
+            for (const [key, levelStats] of Object.entries(write.patch.levels)) {
+                if (levelStats) levels[key] = levelStats;
+                else delete levels[key];
+            }
+            store.doc = {summary: write.patch.summary ?? store.doc!.summary, levels};
+        }
+    };
+    return store;
+}
+
+describe('diffPlayerStats', () => {
+    test('returns everything when the stored statistics are unknown', () => {
+        const stats = withLevel(createDefaultPlayerStats(), 'a__1', 1);
+        expect(diffPlayerStats(null, stats)).toEqual({summary: stats.summary, levels: stats.levels});
+    });
+
+    test('returns only changed and removed levels', () => {
+        const base = withLevel(withLevel(createDefaultPlayerStats(), 'a__1', 1), 'a__2', 1);
+        const changed = withLevel(base, 'a__3', 1);
+        delete changed.levels['a__1'];
+
+        expect(diffPlayerStats(base, changed)).toEqual({
+            summary: changed.summary,
+            levels: {'a__1': null, 'a__3': changed.levels['a__3']}
+        });
+        expect(diffPlayerStats(base, {summary: {...base.summary}, levels: {...base.levels}})).toBeNull();
+    });
+});
+
+describe('PlayerStatsWriteBehind', () => {
+    beforeEach(() => {
+        vi.useFakeTimers();
+    });
+
+    afterEach(() => {
+        vi.useRealTimers();
+        vi.restoreAllMocks();
+    });
+
+    test('coalesces changes within the delay into a single write', async () => {
+        const store = createFakeStore();
+        const queue = new PlayerStatsWriteBehind(store.writer);
+        queue.setPersisted(user.uid, null, false);
+
+        let stats = createDefaultPlayerStats();
+        for (let i = 1; i <= 5; i++) {
+            stats = withLevel(stats, `a__${i}`, 1);
+            queue.schedule(user, stats);
+        }
+        expect(store.writes).toHaveLength(0);
+
+        await vi.advanceTimersByTimeAsync(STATS_WRITE_DELAY_MS);
+
+        expect(store.writes).toHaveLength(1);
+        expect(store.writes[0].isNew).toBe(true);
+        expect(store.doc).toEqual(stats);
+    });
+
+    test('writes only the levels changed since the last write', async () => {
+        const store = createFakeStore();
+        const queue = new PlayerStatsWriteBehind(store.writer);
+        const loaded = withLevel(withLevel(createDefaultPlayerStats(), 'a__1', 1), 'a__2', 1);
+        store.doc = loaded;
+        queue.setPersisted(user.uid, loaded, true);
+
+        queue.schedule(user, loaded);
+        await vi.advanceTimersByTimeAsync(STATS_WRITE_DELAY_MS);
+        expect(store.writes).toHaveLength(0);
+
+        const played = withLevel(loaded, 'a__2', 2);
+        queue.schedule(user, played);
+        await vi.advanceTimersByTimeAsync(STATS_WRITE_DELAY_MS);
+
+        expect(store.writes).toHaveLength(1);
+        expect(Object.keys(store.writes[0].patch.levels)).toEqual(['a__2']);
+        expect(store.writes[0].isNew).toBe(false);
+        expect(store.doc).toEqual(played);
+    });
+
+    test('keeps failed changes for the next write', async () => {
+        vi.spyOn(console, 'error').mockImplementation(() => {});
+        const store = createFakeStore();
+        const queue = new PlayerStatsWriteBehind(store.writer);
+        const loaded = createDefaultPlayerStats();
+        store.doc = loaded;
+        queue.setPersisted(user.uid, loaded, true);
+
+        const first = withLevel(loaded, 'a__1', 1);
+        store.fail = true;
+        queue.schedule(user, first);
+        await vi.advanceTimersByTimeAsync(STATS_WRITE_DELAY_MS);
+        expect(queue.hasPending()).toBe(true);
+
+        store.fail = false;
+        const second = withLevel(first, 'a__2', 1);
+        queue.schedule(user, second);
+        await queue.flush();
+
+        expect(store.writes).toHaveLength(1);
+        expect(Object.keys(store.writes[0].patch.levels).sort()).toEqual(['a__1', 'a__2']);
+        expect(store.doc).toEqual(second);
+    });
+
+    test('never runs writes concurrently', async () => {
+        let active = 0;
+        let maxActive = 0;
+        const queue = new PlayerStatsWriteBehind(async () => {
+            maxActive = Math.max(maxActive, ++active);
+            await new Promise(resolve => setTimeout(resolve, 100));
+            active--;
+        });
+
+        let stats = createDefaultPlayerStats();
+        const flushes = [];
+        for (let i = 1; i <= 3; i++) {
+            stats = withLevel(stats, `a__${i}`, 1);
+            queue.schedule(user, stats);
+            flushes.push(queue.flush());
+        }
+        await vi.advanceTimersByTimeAsync(300);
+        await Promise.all(flushes);
+
+        expect(maxActive).toBe(1);
+    });
+
+    test('flushes pending changes when the page is hidden', async () => {
+        const store = createFakeStore();
+        const queue = new PlayerStatsWriteBehind(store.writer);
+        const removeListeners = flushOnPageHide(queue);
+
+        queue.schedule(user, withLevel(createDefaultPlayerStats(), 'a__1', 1));
+        window.dispatchEvent(new Event('pagehide'));
+        await vi.advanceTimersByTimeAsync(0);
+        expect(store.writes).toHaveLength(1);
+
+        removeListeners();
+        queue.schedule(user, withLevel(createDefaultPlayerStats(), 'a__2', 1));
+        window.dispatchEvent(new Event('pagehide'));
+        await vi.advanceTimersByTimeAsync(0);
+        expect(store.writes).toHaveLength(1);
+    });
+});
+
+describe('savePlayerStats', () => {
+    beforeEach(() => {
+        vi.clearAllMocks();
+    });
+
+    test('merges changed fields without reading the document first', async () => {
+        const batch = {set: vi.fn(), commit: vi.fn().mockResolvedValue(undefined)};
+        (writeBatch as any).mockReturnValue(batch);
+        (getDoc as any).mockResolvedValue({exists: () => true, data: () => ({memberOfGroups: []})});
+
+        const first = withLevel(createDefaultPlayerStats(), 'a__1', 1);
+        await savePlayerStats(user, first);
+        vi.clearAllMocks();
+
+        // Reset progress removes the stored level
+        await savePlayerStats(user, createDefaultPlayerStats());
+
+        expect(batch.commit).toHaveBeenCalledTimes(1);
+        expect(batch.set).toHaveBeenCalledWith('playerStats/player1', {
+            playerId: 'player1',
+            displayName: 'Player',
+            email: 'player@example.com',
+            summary: createDefaultPlayerStats().summary,
+            levels: {'a__1': 'deleted-field'},
+            updatedAt: 'mocked-timestamp'
+        }, {merge: true});
+        // The activity mirror gets the summary only
+        expect(batch.set).toHaveBeenCalledWith('playerActivity/player1', {
+            displayName: 'Player',
+            email: 'player@example.com',
+            summary: createDefaultPlayerStats().summary,
+            updatedAt: 'mocked-timestamp'
+        }, {merge: true});
+        expect(deleteField).toHaveBeenCalledTimes(1);
+        expect(updateDoc).not.toHaveBeenCalled();
+        // The group membership was read by the first save
+        expect(getDoc).not.toHaveBeenCalled();
+    });
+});
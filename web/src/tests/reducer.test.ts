@@ -1,4 +1,4 @@
-import {describe, expect, test} from 'vitest';
+import {beforeAll, describe, expect, test} from 'vitest';
 import {gameReducer, initialState} from '../reducers';
 import {
     applyFix,
@@ -12,8 +12,15 @@ import {
 } from '../reducers/actionCreators';
 import {GameState, LevelId} from '../types';
 import {getCurrentLevelKey, getLevelKey} from '../utils/levelUtils';
+import {loadLevelData} from '../utils/levelLoader';
 
 describe('Game Reducer', () => {
+    // Levels are loaded on demand, so load all of them before dispatching LOAD_LEVEL
+    beforeAll(async () => {
+        const {topics} = initialState;
+        await Promise.all(topics.flatMap(t => t.levels.map(l => loadLevelData(topics, {topic: t.name, levelId: l.filename}))));
+    });
+
     test('all levels can be solved one by one', () => {
         let state: GameState = initialState;
         const solvedLevels: string[] = [];
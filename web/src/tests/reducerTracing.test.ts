@@ -0,0 +1,93 @@
+import {beforeEach, describe, expect, test, vi} from 'vitest';
+import {ReducerTracer, withReducerTracing} from '../utils/reducerTracing';
+import {isReducerTracingEnabled} from '../utils/debugUtils';
+
+interface CounterState {
+    values: number[];
+}
+
+type CounterAction = { type: 'ADD', value: number } | { type: 'NOOP' };
+
+const counterReducer = (state: CounterState, action: CounterAction): CounterState =>
+    action.type === 'ADD' ? {values: [...state.values, action.value]} : state;
+
+const entry = (type: string, durationMs = 1) => ({type, startedAt: 0, durationMs, stateSizeDelta: 0});
+
+describe('ReducerTracer', () => {
+    beforeEach(() => {
+        localStorage.clear();
+    });
+
+    test('keeps the latest entries in a ring buffer but counts all of them', () => {
+        const tracer = new ReducerTracer(3, true);
+        ['A', 'B', 'C', 'D', 'E'].forEach(type => tracer.record(entry(type)));
+        tracer.record(entry('E'));
+
+        expect(tracer.getEntries().map(e => e.type)).toEqual(['D', 'E', 'E']);
+        const summary = tracer.getSummary();
+        expect(summary.find(s => s.type === 'E')).toMatchObject({count: 2, traced: 2, totalMs: 2});
+        expect(summary.find(s => s.type === 'A')).toMatchObject({count: 1, traced: 0, totalMs: 0});
+    });
+
+    test('summarizes action types, slowest first', () => {
+        const tracer = new ReducerTracer(10, true);
+        tracer.record(entry('FAST', 1));
+        tracer.record(entry('SLOW', 5));
+        tracer.record(entry('SLOW', 3));
+
+        expect(tracer.getSummary()).toEqual([
+            {type: 'SLOW', count: 2, traced: 2, totalMs: 8, maxMs: 5, totalStateSizeDelta: 0},
+            {type: 'FAST', count: 1, traced: 1, totalMs: 1, maxMs: 1, totalStateSizeDelta: 0}
+        ]);
+    });
+
+    test('exports entries and summary as JSON and can be cleared', () => {
+        const tracer = new ReducerTracer(10, true);
+        tracer.record(entry('A'));
+
+        const exported = JSON.parse(tracer.exportJson());
+        expect(exported.capacity).toBe(10);
+        expect(exported.entries).toEqual([entry('A')]);
+        expect(exported.summary[0].type).toBe('A');
+
+        tracer.clear();
+        expect(tracer.getEntries()).toEqual([]);
+        expect(tracer.getSummary()).toEqual([]);
+    });
+
+    test('remembers whether tracing is enabled', () => {
+        const tracer = new ReducerTracer();
+        tracer.setEnabled(true);
+
+        expect(tracer.enabled).toBe(true);
+        expect(isReducerTracingEnabled()).toBe(true);
+    });
+});
+
+describe('withReducerTracing', () => {
+    test('records the duration and state size change of actions while enabled', () => {
+        const tracer = new ReducerTracer(10, true);
+        const reducer = withReducerTracing(counterReducer, tracer);
+
+        const state = reducer({values: []}, {type: 'ADD', value: 12345});
+        reducer(state, {type: 'NOOP'});
+
+        const [add, noop] = tracer.getEntries();
+        expect(state).toEqual({values: [12345]});
+        expect(add.type).toBe('ADD');
+        expect(add.durationMs).toBeGreaterThanOrEqual(0);
+        expect(add.stateSizeDelta).toBe('12345'.length);
+        expect(noop.stateSizeDelta).toBe(0);
+    });
+
+    test('only calls the reducer while disabled', () => {
+        const tracer = new ReducerTracer(10, false);
+        const stringify = vi.spyOn(JSON, 'stringify');
+        const reducer = withReducerTracing(counterReducer, tracer);
+
+        expect(reducer({values: []}, {type: 'ADD', value: 1})).toEqual({values: [1]});
+        expect(tracer.getEntries()).toEqual([]);
+        expect(stringify).not.toHaveBeenCalled();
+        stringify.mockRestore();
+    });
+});
@@ -0,0 +1,115 @@
+import {describe, expect, test} from 'vitest';
+import * as fs from 'node:fs';
+import * as path from 'node:path';
+import {fileURLToPath} from 'node:url';
+import {applyEvents} from '../utils/pylang';
+import {EventRegion, packRegions, unpackRegions} from '../utils/regions';
+import {getRegionIndex, RegionIndex} from '../utils/regionIndex';
+import {parseLevelText} from '../levels_compiler/parser';
+import {LevelBlock, LevelData, LevelState} from '../types';
+
+const levelsDir = fileURLToPath(new URL('../../levels', import.meta.url));
+
+function loadLevels(): LevelData[] {
+    const levels: LevelData[] = [];
+    for (const topicDir of fs.readdirSync(levelsDir).sort()) {
+        const topicPath = path.join(levelsDir, topicDir);
+        if (!fs.existsSync(path.join(topicPath, 'topic.json'))) continue;
+        for (const file of fs.readdirSync(topicPath).filter(f => f.endsWith('.py')).sort()) {
+            const result = parseLevelText(fs.readFileSync(path.join(topicPath, file), 'utf-8'));
+            if (result.level) {
+                levels.push(result.level);
+            }
+        }
+    }
+    return levels;
+}
+
+function expectSameAsLinearScan(regions: EventRegion[], lines: number, columns: number): void {
+    const index = new RegionIndex(regions, []);
+    for (let line = -1; line <= lines; line++) {
+        for (let col = -1; col <= columns; col++) {
+            for (const len of [1, 3, 8]) {
+                expect(index.find(line, col, len)).toBe(regions.find(r => r.contains(line, col, len)));
+            }
+        }
+    }
+}
+
+describe('RegionIndex', () => {
+    test('should return nothing without regions', () => {
+        expect(new RegionIndex([], []).find(0, 0)).toBeUndefined();
+    });
+
+    test('should prefer the first region when regions overlap', () => {
+        const regions = [
+            new EventRegion(1, 4, 1, 10, 'outer'),
+            new EventRegion(1, 0, 1, 20, 'wide'),
+            new EventRegion(1, 6, 1, 8, 'inner')
+        ];
+        const index = new RegionIndex(regions, []);
+
+        expect(index.find(1, 7)?.eventId).toBe('outer');
+        expect(index.find(1, 2)?.eventId).toBe('wide');
+        expect(index.find(1, 15)?.eventId).toBe('wide');
+        expect(index.find(1, 21)).toBeUndefined();
+        expectSameAsLinearScan(regions, 3, 24);
+    });
+
+    test('should handle regions spanning several lines', () => {
+        const regions = [
+            new EventRegion(2, 5, 4, 3, 'block'),
+            new EventRegion(3, 0, 3, 100500, 'line'),
+            new EventRegion(0, 0, 6, 100500, 'everything')
+        ];
+        const index = new RegionIndex(regions, []);
+
+        expect(index.find(2, 4)?.eventId).toBe('everything');
+        expect(index.find(2, 2, 4)?.eventId).toBe('block');
+        expect(index.find(3, 50)?.eventId).toBe('block');
+        expect(index.find(4, 4)?.eventId).toBe('everything');
+        expectSameAsLinearScan(regions, 8, 12);
+    });
+
+    test('should find the first block with options for an event', () => {
+        const blocks: LevelBlock[] = [
+            {type: 'replace', event: 'plain', text: 'a', replacement: 'b'},
+            {type: 'replace', event: ['other', 'choice'], text: 'c', options: [{id: 'd', label: 'd', correct: true}]},
+            {type: 'replace', event: 'choice', text: 'e', options: [{id: 'f', label: 'f', correct: false}]}
+        ];
+        const index = new RegionIndex([], blocks);
+
+        expect(index.findOptionsBlock('choice')).toBe(blocks[1]);
+        expect(index.findOptionsBlock('plain')).toBeUndefined();
+    });
+
+    test('should match a linear scan on all levels', () => {
+        for (const level of loadLevels()) {
+            const {code, regions} = applyEvents(level.blocks, []);
+            const lines = code.split('\n');
+            const columns = Math.max(...lines.map(l => l.length)) + 1;
+            expectSameAsLinearScan(regions, lines.length, columns);
+        }
+    });
+});
+
+describe('packRegions', () => {
+    test('should round-trip regions', () => {
+        const regions = [new EventRegion(0, 1, 2, 3, 'a'), new EventRegion(4, 5, 4, 100500, 'b')];
+
+        expect(unpackRegions(packRegions(regions))).toEqual(regions);
+    });
+});
+
+describe('getRegionIndex', () => {
+    test('should reuse the index only while it matches the state', () => {
+        const blocks: LevelBlock[] = [{type: 'replace', event: 'fix', text: 'x = 1', replacement: 'x = 2'}];
+        const {regions} = applyEvents(blocks, []);
+        const regionIndex = new RegionIndex(regions, blocks);
+        const state = {level: {blocks}, regions, regionIndex} as unknown as LevelState;
+
+        expect(getRegionIndex(state)).toBe(regionIndex);
+        expect(getRegionIndex({...state, regions: []})).not.toBe(regionIndex);
+        expect(getRegionIndex({...state, regionIndex: undefined}).find(0, 0)?.eventId).toBe('fix');
+    });
+});
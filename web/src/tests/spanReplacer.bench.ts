@@ -0,0 +1,53 @@
+import {bench, describe} from 'vitest';
+import {replaceAll} from '../utils/pylang';
+import {SpanReplacer} from '../utils/spanReplacer';
+import {LevelBlock} from '../types';
+
+const LINES = 5000;
+const SPANS = 200;
+
+function createSpans(count: number, identifiersOnly: boolean): LevelBlock[] {
+    return Array.from({length: count}, (_, i) => ({
+        type: 'replace-span',
+        clickable: !identifiersOnly && i % 10 === 0 ? `v${i}+1` : `v${i}`,
+        replacement: `value_${i}`,
+        event: `rename_${i}`
+    }));
+}
+
+function createCode(lines: number, names: number): string {
+    const code: string[] = [];
+    for (let i = 0; i < lines; i++) {
+        const a = (i * 7) % names;
+        const b = (i * 13 + 5) % names;
+        code.push(`    v${a} = compute(v${b}+1, other_${i}) + v${a}[i]  # line ${i}`);
+    }
+    return code.join('\n');
+}
+
+// Only a third of the lines mention a renamed variable, as in real levels
+const code = createCode(LINES, SPANS * 3);
+
+describe(`replace-span rewriting, ${LINES} lines, ${SPANS} identifier spans`, () => {
+    const spans = createSpans(SPANS, true);
+
+    bench('replaceAll (sequential)', () => {
+        replaceAll(code, spans);
+    });
+
+    bench('SpanReplacer (single pass)', () => {
+        new SpanReplacer(spans).replace(code);
+    });
+});
+
+describe(`replace-span rewriting, ${LINES} lines, ${SPANS} mixed spans`, () => {
+    const spans = createSpans(SPANS, false);
+
+    bench('replaceAll (sequential)', () => {
+        replaceAll(code, spans);
+    });
+
+    bench('SpanReplacer (single pass)', () => {
+        new SpanReplacer(spans).replace(code);
+    });
+});
@@ -0,0 +1,81 @@
+import {describe, expect, test} from 'vitest';
+import {PatternAutomaton, SpanReplacer} from '../utils/spanReplacer';
+import {replaceAll} from '../utils/pylang';
+import {LevelBlock} from '../types';
+
+function span(clickable: string, replacement: string): LevelBlock {
+    return {type: 'replace-span', clickable, replacement, event: clickable};
+}
+
+function random(seed: number): () => number {
+    let state = seed;
+    return () => {
+        state = (state * 1103515245 + 12345) % 2147483648;
+        return state / 2147483648;
+    };
+}
+
+function pick<T>(items: T[], next: () => number): T {
+    return items[Math.floor(next() * items.length)];
+}
+
+describe('PatternAutomaton', () => {
+    test('should report overlapping occurrences of all patterns', () => {
+        const automaton = new PatternAutomaton(['he', 'she', 'his', 'hers']);
+        const matches: [number, number, number][] = [];
+        automaton.forEachMatch('ushers', (patternIndex, start, end) => matches.push([patternIndex, start, end]));
+
+        expect(matches).toEqual([[1, 1, 4], [0, 2, 4], [3, 2, 6]]);
+    });
+});
+
+describe('SpanReplacer', () => {
+    test('should replace identifiers through the whole chain in one pass', () => {
+        const replacer = new SpanReplacer([span('a', 'b'), span('b', 'c'), span('x', 'y')]);
+
+        expect(replacer.replace('a b x\nab = a_b')).toBe('c c y\nab = a_b');
+    });
+
+    test('should use the first span when clickables are equal', () => {
+        const spans = [span('flag', 'has_discount'), span('flag', 'is_done')];
+
+        expect(new SpanReplacer(spans).replace('if flag: flag = 1')).toBe(replaceAll('if flag: flag = 1', spans));
+    });
+
+    test('should keep replaceAll semantics for non-identifier clickables', () => {
+        const spans = [span('l', 'len'), span('i+1', 'i+l'), span('86400', '(24*60*60)'), span('(24*60*60)', 'ss')];
+        const text = 'x = l[i+1] + 86400\ny = l(i+1)';
+
+        expect(new SpanReplacer(spans).replace(text)).toBe(replaceAll(text, spans));
+    });
+
+    test('should return null for lines without occurrences', () => {
+        const replacer = new SpanReplacer([span('count', 'total')]);
+
+        expect(replacer.replaceLine('counter = 0')).toBeNull();
+        expect(replacer.replaceLine('count = 0')).toBe('total = 0');
+    });
+
+    test('should ignore spans without clickable or replacement', () => {
+        const spans: LevelBlock[] = [{type: 'replace-span', event: 'e'}, span('a', '')];
+
+        expect(new SpanReplacer(spans).replace('a b')).toBe('a b');
+    });
+
+    test('should match replaceAll on random chains', () => {
+        const words = ['a', 'b', 'ab', 'i', 'l', 'x1', 'foo', 'foo_bar', '1', '42'];
+        const symbols = [' ', '.', '+', '(', ')', ', ', ' = ', '\n', '_'];
+        const clickables = [...words, 'i+1', 'a.b', '(x1)', 'foo(', '+1', 'b b'];
+
+        for (let seed = 1; seed <= 300; seed++) {
+            const next = random(seed);
+            const tokenOnly = seed % 2 === 0;
+            const spans = Array.from({length: 1 + Math.floor(next() * 6)}, () => tokenOnly
+                ? span(pick(words, next), pick(words, next))
+                : span(pick(clickables, next), pick(clickables, next)));
+            const text = Array.from({length: 40}, () => next() < 0.6 ? pick(words, next) : pick(symbols, next)).join('');
+
+            expect(new SpanReplacer(spans).replace(text)).toBe(replaceAll(text, spans));
+        }
+    });
+});
@@ -1,7 +1,9 @@
 /**
  * Type definitions for the application
  */
-import {EventRegion} from "./utils/regions.ts";
+import {EventRegion, SerializedRegions} from "./utils/regions.ts";
+import {RegionIndex} from "./utils/regionIndex.ts";
+import {TriggeredEvents} from "./utils/levelIndex.ts";
 
 export interface LevelId {
     topic: string;
@@ -34,6 +36,16 @@ export interface LevelData {
     startReply?: string | undefined;
     finalMessage?: string | undefined;
     endReply?: string | undefined;
+    initialState?: CompiledLevelState;  // precomputed by the levels compiler; absent for community levels
+}
+
+/**
+ * State of a level before any event is triggered, as emitted by the levels compiler
+ */
+export interface CompiledLevelState {
+    code: string;
+    regions: SerializedRegions;
+    pendingHintId: string | null;
 }
 
 export interface Topic {
@@ -47,6 +59,31 @@ export interface Topic {
     inDevelopment?: boolean;
 }
 
+/**
+ * A level as listed in the levels manifest. The level data itself is loaded on demand from its chunk.
+ */
+export interface LevelSummary {
+    filename: string;
+    chunk?: string;              // id of the JSON chunk with the level data
+}
+
+/**
+ * A topic as listed in the levels manifest
+ */
+export interface TopicSummary {
+    name: string;
+    levels: LevelSummary[];
+    inDevelopment?: boolean;
+}
+
+/**
+ * Index of all topics and levels, generated by the levels compiler next to the per-level chunks
+ */
+export interface LevelsManifest {
+    topics: TopicSummary[];
+    startLevel: { topic: string; level: LevelData } | null;   // level players start with, inlined
+}
+
 export type ChatMessageType =
     'me'
     | 'buddy-instruct'
@@ -63,10 +100,12 @@ export interface ChatMessage {
 export interface LevelState {
     level: LevelData;
     triggeredEvents: string[];
+    triggered?: TriggeredEvents; // set of triggeredEvents with the progress they make, rebuilt with them
     pendingHintId: string | null;
     code: string;
     isFinished: boolean;
     regions: EventRegion[];
+    regionIndex?: RegionIndex;   // point-lookup index over regions, rebuilt with them
     startTime: number;           // timestamp when the level was started
     sessionHintsUsed: number;    // number of hints used in the current session
     sessionMistakesMade: number; // number of mistakes made in the current session
@@ -203,7 +242,7 @@ export type ContextMenuState = {
 };
 
 export interface GameState {
-    topics: Topic[];
+    topics: TopicSummary[];      // from the levels manifest, level data is loaded on demand
     currentLevelId: LevelId;
     currentLevel: LevelState;
     chatMessages: ChatMessage[];
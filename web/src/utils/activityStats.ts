@@ -0,0 +1,89 @@
+/**
+ * Running aggregates over the pages of the admin activity feed
+ */
+
+import {UserActivity} from '../types';
+
+export const ACTIVITY_METRICS = [
+    'totalLevelCompletions',
+    'totalLevelsSolved',
+    'totalTimeSpent',
+    'totalHintsUsed',
+    'totalMistakesMade'
+] as const;
+
+export type ActivityMetric = typeof ACTIVITY_METRICS[number];
+
+/**
+ * Aggregates over all users loaded so far
+ */
+export interface ActivityAggregates {
+    count: number;
+    totals: Record<ActivityMetric, number>;
+    sorted: Record<ActivityMetric, number[]>;   // ascending values of each metric, for percentiles
+}
+
+/**
+ * Create aggregates of no users
+ * @returns Empty aggregates
+ */
+export function createActivityAggregates(): ActivityAggregates {
+    const totals = {} as Record<ActivityMetric, number>;
+    const sorted = {} as Record<ActivityMetric, number[]>;
+    for (const metric of ACTIVITY_METRICS) {
+        totals[metric] = 0;
+        sorted[metric] = [];
+    }
+    return {count: 0, totals, sorted};
+}
+
+/**
+ * Merge two ascending arrays
+ */
+function mergeSorted(a: number[], b: number[]): number[] {
+    const merged = new Array<number>(a.length + b.length);
+    let i = 0, j = 0, k = 0;
+    while (i < a.length && j < b.length) {
+        merged[k++] = a[i] <= b[j] ? a[i++] : b[j++];
+    }
+    while (i < a.length) merged[k++] = a[i++];
+    while (j < b.length) merged[k++] = b[j++];
+    return merged;
+}
+
+/**
+ * Add a page of users to the aggregates
+ *
+ * Only the new page is sorted; it is then merged into the sorted values, so adding a page costs
+ * linear time in the number of users loaded so far.
+ *
+ * @param aggregates - Aggregates of the previous pages
+ * @param users - Users of the new page
+ * @returns New aggregates including the page
+ */
+export function addActivityPage(aggregates: ActivityAggregates, users: UserActivity[]): ActivityAggregates {
+    if (users.length === 0) return aggregates;
+
+    const totals = {...aggregates.totals};
+    const sorted = {...aggregates.sorted};
+    for (const metric of ACTIVITY_METRICS) {
+        const values = users.map(user => user[metric] || 0);
+        totals[metric] += values.reduce((sum, value) => sum + value, 0);
+        sorted[metric] = mergeSorted(sorted[metric], values.sort((a, b) => a - b));
+    }
+    return {count: aggregates.count + users.length, totals, sorted};
+}
+
+/**
+ * Get a percentile of a metric, using the nearest-rank method
+ * @param aggregates - Aggregates of the loaded users
+ * @param metric - The metric
+ * @param percentile - Percentile between 0 and 100
+ * @returns The percentile value, or 0 if no users are loaded
+ */
+export function getActivityPercentile(aggregates: ActivityAggregates, metric: ActivityMetric, percentile: number): number {
+    const values = aggregates.sorted[metric];
+    if (values.length === 0) return 0;
+    const rank = Math.ceil(percentile / 100 * values.length);
+    return values[Math.min(values.length, Math.max(1, rank)) - 1];
+}
@@ -1,11 +1,28 @@
 import {parseLevelText} from '../levels_compiler/parser';
-import type {LevelData} from '../types';
+import type {LevelBlock, LevelData} from '../types';
 import {applyEvents, renderToPyLevel} from './pylang';
+import {OfflineCache} from '../firebase/offlineCache';
+import {IncrementalJsonParser} from './incrementalJson';
 
 /**
  * Utility functions for AI Co-Author feature
  */
 
+/**
+ * Options of the generation functions
+ */
+export interface GenerationOptions {
+    client?: GeminiClient;      // client that sends the requests, the shared client by default
+    refresh?: boolean;          // ignore cached responses and generate new ones
+}
+
+/**
+ * Options of the streaming generation functions
+ */
+export interface StreamingOptions extends GenerationOptions {
+    signal?: AbortSignal;       // cancels the generation
+}
+
 /**
  * Generates start and final messages for a level
  * @param code The level code to process
@@ -13,7 +30,12 @@ import {applyEvents, renderToPyLevel} from './pylang';
  * @param model The Gemini model to use
  * @returns The updated level code with generated messages
  */
-export async function generateStartAndFinalMessages(code: string, apiKey: string, model: string): Promise<string> {
+export async function generateStartAndFinalMessages(
+    code: string,
+    apiKey: string,
+    model: string,
+    options: GenerationOptions = {}
+): Promise<string> {
     // Parse the level code
     const parseResult = parseLevelText(code);
 
@@ -23,7 +45,7 @@ export async function generateStartAndFinalMessages(code: string, apiKey: string
     }
 
     const level = parseResult.level;
-    const newLevel = await updateStartAndFinalMessages(level, apiKey, model);
+    const newLevel = await updateStartAndFinalMessages(level, apiKey, model, options);
     return renderToPyLevel(newLevel);
 }
 
@@ -42,7 +64,8 @@ export async function generateHintAndExplanation(
     eventId: string,
     apiKey: string,
     model: string,
-    mode: RegenerationMode = 'both'
+    mode: RegenerationMode = 'both',
+    options: GenerationOptions = {}
 ): Promise<string> {
     // Parse the level code
     const parseResult = parseLevelText(code);
@@ -56,10 +79,115 @@ export async function generateHintAndExplanation(
     const level = parseResult.level;
 
     // Update the level with hint and explanation for the event
-    const newLevel = await updateHintAndExplanation(level, eventId, apiKey, model, mode);
+    const newLevel = await updateHintAndExplanation(level, eventId, apiKey, model, mode, options);
     return renderToPyLevel(newLevel);
 }
 
+/**
+ * Generates hints and explanations for all events of a level
+ *
+ * The requests for all events are sent at once; the request pool of the client limits how many
+ * run at the same time. Events that fail are logged and keep their texts.
+ *
+ * @param code The level code to process
+ * @param apiKey The API key for authentication
+ * @param model The Gemini model to use
+ * @param mode What to regenerate for each event
+ * @param options Generation options
+ * @param onProgress Called after each event with the number of finished events and the number of all events
+ * @returns The updated level code with generated hints and explanations
+ */
+export async function generateHintsForAllEvents(
+    code: string,
+    apiKey: string,
+    model: string,
+    mode: RegenerationMode = 'both',
+    options: GenerationOptions = {},
+    onProgress?: (finished: number, total: number) => void
+): Promise<string> {
+    // Parse the level code once for all events
+    const parseResult = parseLevelText(code);
+
+    // If there's an error in parsing, return the original code
+    if (parseResult.error || !parseResult.level) {
+        return code;
+    }
+
+    const level = parseResult.level;
+    const events = getAllEventIds(level);
+    let finished = 0;
+    onProgress?.(finished, events.length);
+
+    const responses = await Promise.all(events.map(async eventId => {
+        try {
+            return await requestHintAndExplanation(level, eventId, apiKey, model, options);
+        } catch (error) {
+            console.error(`Error generating hint and explanation for event ${eventId}:`, error);
+            return null;
+        } finally {
+            onProgress?.(++finished, events.length);
+        }
+    }));
+
+    const newLevel = events.reduce((current, eventId, i) =>
+        responses[i] ? parseHintAndExplanationResponse(current, eventId, responses[i], mode) : current, level);
+    return renderToPyLevel(newLevel);
+}
+
+/**
+ * Generates hint and explanation for a specific event, streaming the response into the level
+ *
+ * The level code is passed to onCode every time more of the response has arrived, so hint,
+ * explanation and options fill in while they are generated. If streaming fails, the response is
+ * requested without streaming.
+ *
+ * @param code The level code to process
+ * @param eventId The event ID to generate hint and explanation for
+ * @param apiKey The API key for authentication
+ * @param model The Gemini model to use
+ * @param mode What to regenerate
+ * @param onCode Called with the level code updated with the response received so far
+ * @param options Generation options; aborting the signal rejects with an AbortError
+ * @returns The updated level code with generated hint and explanation
+ */
+export async function streamHintAndExplanation(
+    code: string,
+    eventId: string,
+    apiKey: string,
+    model: string,
+    mode: RegenerationMode,
+    onCode: (code: string) => void,
+    options: StreamingOptions = {}
+): Promise<string> {
+    // Parse the level code
+    const parseResult = parseLevelText(code);
+
+    // If there's an error in parsing, return the original code
+    if (parseResult.error || !parseResult.level) {
+        return code;
+    }
+
+    const level = parseResult.level;
+    const request = getHintAndExplanationRequest(level, eventId, apiKey, model, options);
+    const response = await (options.client ?? geminiClient).stream(request, partial => {
+        if (partial && typeof partial === 'object') {
+            onCode(renderToPyLevel(parseHintAndExplanationResponse(level, eventId, withCompleteOptions(partial), mode)));
+        }
+    }, options);
+    return renderToPyLevel(parseHintAndExplanationResponse(level, eventId, response, mode));
+}
+
+/**
+ * Keeps only the options of a partial response that have arrived completely, and none until one
+ * of them is correct, so that every partial response renders to a valid level
+ */
+function withCompleteOptions(partial: any): any {
+    const options = Array.isArray(partial.options)
+        ? partial.options.filter((option: any) => typeof option?.correct === 'boolean')
+        : [];
+    return {...partial, options: options.some((option: any) => option.correct) ? options : []};
+}
+
 /**
  * JSON schema for start and final messages
  */
@@ -96,7 +224,12 @@ const startFinalMessagesSchema = {
  * @param model The Gemini model to use
  * @returns The updated level data with generated messages
  */
-async function updateStartAndFinalMessages(level: LevelData, apiKey: string, model: string): Promise<LevelData> {
+async function updateStartAndFinalMessages(
+    level: LevelData,
+    apiKey: string,
+    model: string,
+    options: GenerationOptions
+): Promise<LevelData> {
     // Get the initial state of the level (no events triggered)
     const initialState = applyEvents(level.blocks, []);
     const initialCode = initialState.code;
@@ -110,11 +243,11 @@ async function updateStartAndFinalMessages(level: LevelData, apiKey: string, mod
 
     // Get system prompt and user prompt
     const {systemPrompt, userPrompt} = constructStartAndFinalPrompt(initialCode, finalCode);
-    console.log("System prompt:", systemPrompt);
-    console.log("User prompt:", userPrompt);
+    log(options, "System prompt:", systemPrompt);
+    log(options, "User prompt:", userPrompt);
 
     // Call the Gemini API with structured output
-    const response = await callGeminiApi(userPrompt, apiKey, model, systemPrompt, startFinalMessagesSchema);
+    const response = await generate({apiKey, model, systemPrompt, prompt: userPrompt, schema: startFinalMessagesSchema}, options);
     return parseStartAndFinalResponse(level, response);
 }
 
@@ -163,7 +296,9 @@ const hintExplanationSchema = {
                     "label": {"type": "string"},
                     "correct": {"type": "boolean"}
                 },
-                "required": ["label", "correct"]
+                "required": ["label", "correct"],
+                // The label is complete once "correct" arrives in a streamed response
+                "propertyOrdering": ["label", "correct"]
             }
         }
     },
@@ -184,19 +319,14 @@ async function updateHintAndExplanation(
     eventId: string,
     apiKey: string,
     model: string,
-    mode: RegenerationMode = 'both'
+    mode: RegenerationMode = 'both',
+    options: GenerationOptions = {}
 ): Promise<LevelData> {
-    console.log('Updating hint and explanation for event:', eventId, 'mode:', mode);
-    const {beforeCode, afterCode} = getCodeBeforeAndAfter(level, eventId);
-
-    // Get system prompt and user prompt
-    const {systemPrompt, userPrompt} = constructHintAndExplanationPrompt(beforeCode, afterCode);
-    console.log("System prompt:", systemPrompt);
-    console.log("User prompt:", userPrompt);
+    log(options, 'Updating hint and explanation for event:', eventId, 'mode:', mode);
 
     // Call the Gemini API with structured output
     try {
-        const response = await callGeminiApi(userPrompt, apiKey, model, systemPrompt, hintExplanationSchema);
+        const response = await requestHintAndExplanation(level, eventId, apiKey, model, options);
         return parseHintAndExplanationResponse(level, eventId, response, mode);
     } catch (error) {
         console.error('Error calling Gemini API:', error);
@@ -204,6 +334,41 @@ async function updateHintAndExplanation(
     }
 }
 
+/**
+ * Requests hint, explanation and options for a specific event from the Gemini API
+ * @returns The parsed response
+ */
+async function requestHintAndExplanation(
+    level: LevelData,
+    eventId: string,
+    apiKey: string,
+    model: string,
+    options: GenerationOptions
+): Promise<any> {
+    return generate(getHintAndExplanationRequest(level, eventId, apiKey, model, options), options);
+}
+
+/**
+ * Builds the request for hint, explanation and options of a specific event
+ * @returns The request
+ */
+function getHintAndExplanationRequest(
+    level: LevelData,
+    eventId: string,
+    apiKey: string,
+    model: string,
+    options: GenerationOptions
+): GeminiRequest {
+    const {beforeCode, afterCode} = getCodeBeforeAndAfter(level, eventId);
+
+    // Get system prompt and user prompt
+    const {systemPrompt, userPrompt} = constructHintAndExplanationPrompt(beforeCode, afterCode);
+    log(options, "System prompt:", systemPrompt);
+    log(options, "User prompt:", userPrompt);
+
+    return {apiKey, model, systemPrompt, prompt: userPrompt, schema: hintExplanationSchema};
+}
+
 /**
  * Collects all event IDs from the level
  * @param level The level data
@@ -289,14 +454,306 @@ function extractResponse(data: any, jsonSchema?: object): any {
     }
 }
 
-async function callGeminiApi(
-    prompt: string,
-    apiKey: string,
-    model: string = 'gemini-2.5-flash-lite',
-    systemPrompt: string,
-    jsonSchema: object
-): Promise<any> {
-    const url = `https://generativelanguage.googleapis.com/v1beta/models/${model}:generateContent`;
+// Base URL of the Gemini API
+export const GEMINI_API_URL = 'https://generativelanguage.googleapis.com/v1beta';
+
+// Defaults of the Gemini client
+const DEFAULT_CONCURRENCY = 4;          // requests that run at the same time
+const DEFAULT_MAX_RETRIES = 3;          // retries of a request after a 429 or 5xx response
+const DEFAULT_RETRY_DELAY_MS = 1000;    // delay before the first retry; doubles with every retry
+const MAX_RETRY_DELAY_MS = 30000;
+const CACHE_KEY_PREFIX = 'gemini/';
+
+/**
+ * A structured output request to the Gemini API
+ */
+export interface GeminiRequest {
+    apiKey: string;
+    model: string;
+    systemPrompt: string;
+    prompt: string;
+    schema: object;
+}
+
+/**
+ * Persistent store of Gemini responses; OfflineCache implements it with IndexedDB
+ */
+export interface GeminiResponseCache {
+    get<T>(key: string): Promise<T | undefined>;
+    put(key: string, value: unknown): Promise<void>;
+}
+
+export interface GeminiClientOptions {
+    apiUrl?: string;                        // base URL of the API, e.g. of a local stand-in server
+    concurrency?: number;                   // maximum number of requests that run at the same time
+    maxRetries?: number;                    // retries after a 429 or 5xx response
+    retryDelayMs?: number;                  // delay before the first retry
+    cache?: GeminiResponseCache | null;     // store of responses, or null for no caching
+    requestsPerMinute?: number;             // maximum rate of requests, unlimited by default
+    quiet?: boolean;                        // don't log prompts, requests and responses
+}
+
+/**
+ * Logs values like console.log
+ */
+export type Logger = (...data: unknown[]) => void;
+
+/**
+ * Error response of the Gemini API
+ */
+export class GeminiApiError extends Error {
+    readonly status: number;
+    readonly retryAfterMs: number | null;   // delay requested by the Retry-After header
+
+    constructor(status: number, retryAfterMs: number | null = null) {
+        super(`API request failed with status ${status}`);
+        this.name = 'GeminiApiError';
+        this.status = status;
+        this.retryAfterMs = retryAfterMs;
+    }
+
+    /**
+     * True for rate limiting and server errors, which may succeed when tried again
+     */
+    get retryable(): boolean {
+        return this.status === 429 || this.status >= 500;
+    }
+}
+
+/**
+ * Runs async tasks with a bounded number of concurrent tasks, optionally spacing their starts
+ */
+export class RequestPool {
+    private readonly concurrency: number;
+    private readonly minIntervalMs: number;
+    private running = 0;
+    private readonly queue: (() => void)[] = [];
+    private nextStart = 0;          // earliest start time of the next task
+
+    /**
+     * @param concurrency Maximum number of tasks that run at the same time
+     * @param minIntervalMs Minimum time between the starts of two tasks
+     */
+    constructor(concurrency: number, minIntervalMs: number = 0) {
+        this.concurrency = Math.max(1, concurrency);
+        this.minIntervalMs = Math.max(0, minIntervalMs);
+    }
+
+    /**
+     * Run a task as soon as fewer than the maximum number of tasks are running
+     * @param task The task
+     * @returns The result of the task
+     */
+    async run<T>(task: () => Promise<T>): Promise<T> {
+        if (this.running >= this.concurrency) {
+            await new Promise<void>(resolve => this.queue.push(resolve));
+        } else {
+            this.running++;
+        }
+        try {
+            if (this.minIntervalMs > 0) {
+                const now = Date.now();
+                const start = Math.max(now, this.nextStart);
+                this.nextStart = start + this.minIntervalMs;
+                if (start > now) await sleep(start - now);
+            }
+            return await task();
+        } finally {
+            // Hand the slot to the next task, or free it
+            const next = this.queue.shift();
+            if (next) {
+                next();
+            } else {
+                this.running--;
+            }
+        }
+    }
+}
+
+/**
+ * Computes the cache key of a request: a SHA-256 hash of the model, the prompts and the schema
+ * @param request The request
+ * @returns The hex-encoded hash
+ */
+export async function hashGeminiRequest(request: GeminiRequest): Promise<string> {
+    const text = JSON.stringify([request.model, request.systemPrompt, request.prompt, request.schema]);
+    const digest = await crypto.subtle.digest('SHA-256', new TextEncoder().encode(text));
+    return Array.from(new Uint8Array(digest), byte => byte.toString(16).padStart(2, '0')).join('');
+}
+
+const sleep = (ms: number): Promise<void> => new Promise(resolve => setTimeout(resolve, ms));
+
+/**
+ * Client of the Gemini API
+ *
+ * Responses are cached by a hash of the request, so an unchanged request is answered without
+ * calling the API; the API key is not part of the hash. Equal requests that run at the same time
+ * share one API call. At most `concurrency` calls run at once, and calls that fail with 429 or
+ * 5xx are retried with exponential backoff.
+ */
+export class GeminiClient {
+    private readonly apiUrl: string;
+    private readonly maxRetries: number;
+    private readonly retryDelayMs: number;
+    private readonly cache: GeminiResponseCache | null;
+    private readonly pool: RequestPool;
+    private readonly quiet: boolean;
+    private readonly inFlight = new Map<string, Promise<any>>();
+
+    constructor(options: GeminiClientOptions = {}) {
+        this.apiUrl = options.apiUrl ?? GEMINI_API_URL;
+        this.maxRetries = options.maxRetries ?? DEFAULT_MAX_RETRIES;
+        this.retryDelayMs = options.retryDelayMs ?? DEFAULT_RETRY_DELAY_MS;
+        this.cache = options.cache ?? null;
+        this.pool = new RequestPool(options.concurrency ?? DEFAULT_CONCURRENCY,
+            options.requestsPerMinute ? 60000 / options.requestsPerMinute : 0);
+        this.quiet = options.quiet ?? false;
+    }
+
+    /**
+     * Logs a prompt, request or response, unless the client is quiet
+     * @param data Values to log
+     */
+    readonly log: Logger = (...data) => {
+        if (!this.quiet) {
+            console.log(...data);
+        }
+    };
+
+    /**
+     * Get the structured response to a request
+     * @param request The request
+     * @param refresh Ignore a cached response and call the API
+     * @returns The parsed response
+     */
+    async generate(request: GeminiRequest, refresh: boolean = false): Promise<any> {
+        const key = CACHE_KEY_PREFIX + await hashGeminiRequest(request);
+
+        // A refresh doesn't join a load that may answer from the cache
+        const flightKey = refresh ? key + ':refresh' : key;
+        let response = this.inFlight.get(flightKey);
+        if (!response) {
+            response = this.load(key, request, refresh).finally(() => this.inFlight.delete(flightKey));
+            this.inFlight.set(flightKey, response);
+        }
+        return response;
+    }
+
+    /**
+     * Get the structured response to a request, streaming it while it is generated
+     *
+     * A cached response is passed to onPartial at once. Otherwise the response is parsed while it
+     * arrives; if streaming fails, the request is sent again without streaming.
+     *
+     * @param request The request
+     * @param onPartial Called with the response received so far; its objects are updated in place
+     * @param options Whether to ignore a cached response, and a signal that cancels the request
+     * @returns The parsed response
+     */
+    async stream(
+        request: GeminiRequest,
+        onPartial: (partial: unknown) => void,
+        options: { refresh?: boolean, signal?: AbortSignal } = {}
+    ): Promise<any> {
+        const {refresh = false, signal} = options;
+        const key = CACHE_KEY_PREFIX + await hashGeminiRequest(request);
+
+        const cached = refresh ? undefined : await this.getCached(key);
+        if (cached !== undefined) {
+            onPartial(cached);
+            return cached;
+        }
+
+        let response: any;
+        try {
+            response = await this.pool.run(() => {
+                signal?.throwIfAborted();
+                return streamGeminiApi(request, this.apiUrl, onPartial, this.log, signal);
+            });
+        } catch (error) {
+            if (signal?.aborted) throw error;
+            console.warn('Streaming from Gemini API failed, sending a regular request:', error);
+            response = await this.pool.run(() => this.callWithRetry(request, signal));
+        }
+        await this.cache?.put(key, response);
+        return response;
+    }
+
+    private async getCached(key: string): Promise<any> {
+        const cached = await this.cache?.get(key);
+        if (cached !== undefined) {
+            this.log("Cached response from Gemini API: ", cached);
+        }
+        return cached;
+    }
+
+    private async load(key: string, request: GeminiRequest, refresh: boolean): Promise<any> {
+        const cached = refresh ? undefined : await this.getCached(key);
+        if (cached !== undefined) return cached;
+
+        const response = await this.pool.run(() => this.callWithRetry(request));
+        await this.cache?.put(key, response);
+        return response;
+    }
+
+    private async callWithRetry(request: GeminiRequest, signal?: AbortSignal): Promise<any> {
+        for (let attempt = 0; ; attempt++) {
+            signal?.throwIfAborted();
+            try {
+                return await callGeminiApi(request, this.apiUrl, this.log, signal);
+            } catch (error) {
+                if (!(error instanceof GeminiApiError) || !error.retryable || attempt >= this.maxRetries) {
+                    throw error;
+                }
+                // Exponential backoff with jitter, unless the server asks for a delay; both are capped
+                const backoff = Math.min(MAX_RETRY_DELAY_MS, this.retryDelayMs * 2 ** attempt);
+                const delay = Math.min(MAX_RETRY_DELAY_MS, error.retryAfterMs ?? backoff * (0.5 + Math.random() / 2));
+                console.warn(`Gemini API request failed with status ${error.status}, retrying in ${Math.round(delay)} ms`);
+                await sleep(delay);
+            }
+        }
+    }
+}
+
+// Shared client of the co-author; responses are kept in IndexedDB across sessions
+export const geminiClient = new GeminiClient({cache: new OfflineCache()});
+
+/**
+ * Logs through the client of the options
+ */
+function log(options: GenerationOptions, ...data: unknown[]): void {
+    (options.client ?? geminiClient).log(...data);
+}
+
+/**
+ * Sends a request through the client of the options
+ */
+function generate(request: GeminiRequest, options: GenerationOptions): Promise<any> {
+    return (options.client ?? geminiClient).generate(request, options.refresh);
+}
+
+/**
+ * Parses the Retry-After header of a response
+ * @returns The requested delay in milliseconds, or null if there is none
+ */
+function parseRetryAfter(value: string | null): number | null {
+    if (!value) return null;
+    const seconds = Number(value);
+    if (Number.isFinite(seconds)) return Math.max(0, seconds * 1000);
+    const date = Date.parse(value);
+    return Number.isNaN(date) ? null : Math.max(0, date - Date.now());
+}
+
+/**
+ * Posts a request to a method of the Gemini API
+ * @param request The request
+ * @param url URL of the method
+ * @param log Logs the request
+ * @param signal Signal that cancels the request
+ * @returns The response, if it is successful
+ */
+async function postToGeminiApi(request: GeminiRequest, url: string, log: Logger, signal?: AbortSignal): Promise<Response> {
+    const {apiKey, systemPrompt, prompt, schema: jsonSchema} = request;
 
     const requestBody: any = {
         system_instruction: {
@@ -321,7 +778,7 @@ async function callGeminiApi(
             responseSchema: jsonSchema
         }
     };
-    console.log("Request to Gemini API: ", requestBody);
+    log("Request to Gemini API: ", requestBody);
 
     const response = await fetch(`${url}`, {
         method: 'POST',
@@ -329,21 +786,113 @@ async function callGeminiApi(
             'Content-Type': 'application/json',
             'X-goog-api-key': apiKey
         },
-        body: JSON.stringify(requestBody)
+        body: JSON.stringify(requestBody),
+        signal
     });
 
     if (!response.ok) {
         let errorDescription = await response.text()
         console.error(errorDescription);
-        throw new Error(`API request failed with status ${response.status}`);
+        throw new GeminiApiError(response.status, parseRetryAfter(response.headers.get('Retry-After')));
     }
+    return response;
+}
+
+/**
+ * Calls the generateContent method of the Gemini API once
+ * @param request The request
+ * @param apiUrl Base URL of the API
+ * @param log Logs the request and the response
+ * @param signal Signal that cancels the request
+ * @returns The parsed response
+ */
+async function callGeminiApi(request: GeminiRequest, apiUrl: string, log: Logger, signal?: AbortSignal): Promise<any> {
+    const response = await postToGeminiApi(request, `${apiUrl}/models/${request.model}:generateContent`, log, signal);
 
     const data = await response.json();
-    const responseObject = extractResponse(data, jsonSchema);
-    console.log("Response from Gemini API: ", responseObject);
+    const responseObject = extractResponse(data, request.schema);
+    log("Response from Gemini API: ", responseObject);
+    return responseObject;
+}
+
+/**
+ * Calls the streamGenerateContent method of the Gemini API with server-sent events and parses the
+ * JSON response while it arrives
+ * @param request The request
+ * @param apiUrl Base URL of the API
+ * @param onPartial Called with the response received so far after every event
+ * @param log Logs the request and the response
+ * @param signal Signal that cancels the request
+ * @returns The parsed response
+ */
+async function streamGeminiApi(
+    request: GeminiRequest,
+    apiUrl: string,
+    onPartial: (partial: unknown) => void,
+    log: Logger,
+    signal?: AbortSignal
+): Promise<any> {
+    const url = `${apiUrl}/models/${request.model}:streamGenerateContent?alt=sse`;
+    const response = await postToGeminiApi(request, url, log, signal);
+    if (!response.body) {
+        throw new Error('Response of the Gemini API has no body to stream');
+    }
+
+    const parser = new IncrementalJsonParser();
+    await readServerSentEvents(response.body, data => {
+        // Each event carries the next piece of the response text
+        const parts: any[] = JSON.parse(data).candidates?.[0]?.content?.parts ?? [];
+        const text = parts.map(part => part.text ?? '').join('');
+        if (text) {
+            parser.push(text);
+            onPartial(parser.value);
+        }
+    });
+
+    const responseObject = parser.end();
+    log("Response from Gemini API: ", responseObject);
     return responseObject;
 }
 
+/**
+ * Reads a stream of server-sent events
+ * @param body The response body
+ * @param onData Called with the data of every event
+ */
+async function readServerSentEvents(body: ReadableStream<Uint8Array>, onData: (data: string) => void): Promise<void> {
+    const reader = body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    let data: string[] = [];
+
+    const readLine = (line: string) => {
+        if (line === '') {
+            // An empty line ends the event
+            if (data.length > 0) onData(data.join('\n'));
+            data = [];
+        } else if (line.startsWith('data:')) {
+            data.push(line.substring(line.startsWith('data: ') ? 6 : 5));
+        }
+        // Comments and other fields are not used
+    };
+
+    let done = false;
+    try {
+        while (!done) {
+            const chunk = await reader.read();
+            done = chunk.done;
+            buffer += done ? decoder.decode() : decoder.decode(chunk.value, {stream: true});
+            const lines = buffer.split('\n');
+            buffer = done ? '' : lines.pop()!;
+            lines.forEach(line => readLine(line.endsWith('\r') ? line.slice(0, -1) : line));
+        }
+        readLine('');
+    } finally {
+        // Close the connection if reading stopped early
+        if (!done) reader.cancel().catch(() => {});
+    }
+}
+
 /**
  * Constructs system and user prompts for the Gemini API to generate start and final messages
  * @param initialCode The initial code of the level
@@ -557,7 +1106,12 @@ const randomPythonCodeSchema = {
  * @param model The Gemini model to use
  * @returns The generated Python code
  */
-export async function generateRandomPythonCode(codeStyleIssue: string, apiKey: string, model: string): Promise<string> {
+export async function generateRandomPythonCode(
+    codeStyleIssue: string,
+    apiKey: string,
+    model: string,
+    options: GenerationOptions = {}
+): Promise<string> {
     // Construct the system prompt
     const systemPrompt = `
 You are a Python code generator for an educational game that teaches clean code principles.
@@ -596,7 +1150,7 @@ The code should be realistic and demonstrate the issue clearly. Make sure the co
 `;
 
     try {
-        const parsedResponse: any = await callGeminiApi(userPrompt, apiKey, model, systemPrompt, randomPythonCodeSchema);
+        const parsedResponse: any = await generate({apiKey, model, systemPrompt, prompt: userPrompt, schema: randomPythonCodeSchema}, options);
         const parts = [
             "##file " + parsedResponse.filename,
             '"""start',
@@ -612,4 +1166,107 @@ The code should be realistic and demonstrate the issue clearly. Make sure the co
         console.error('Error generating random Python code:', error);
         throw error;
     }
-}
\ No newline at end of file
+}
+
+/**
+ * JSON schema for the fixes of generated code
+ */
+const levelFixesSchema = {
+    "type": "object",
+    "properties": {
+        "analysis": {
+            "type": "string"
+        },
+        "fixes": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "clickable": {"type": "string"},
+                    "replacement": {"type": "string"}
+                },
+                "required": ["clickable", "replacement"],
+                "propertyOrdering": ["clickable", "replacement"]
+            }
+        }
+    },
+    "required": ["analysis", "fixes"],
+    "propertyOrdering": ["analysis", "fixes"]
+};
+
+/**
+ * Adds the fixes of the code style issue to a level, as replace-span blocks after its code
+ *
+ * Fixes whose clickable text does not occur in the code are dropped, so the level stays valid.
+ *
+ * @param code The level code, e.g. generated by generateRandomPythonCode
+ * @param codeStyleIssue Description of the code style issue the code demonstrates
+ * @param apiKey The Gemini API key
+ * @param model The Gemini model to use
+ * @returns The level code with one event per fix
+ */
+export async function generateLevelFixes(
+    code: string,
+    codeStyleIssue: string,
+    apiKey: string,
+    model: string,
+    options: GenerationOptions = {}
+): Promise<string> {
+    // Parse the level code
+    const parseResult = parseLevelText(code);
+
+    // If there's an error in parsing, return the original code
+    if (parseResult.error || !parseResult.level) {
+        return code;
+    }
+
+    const level = parseResult.level;
+    const initialCode = applyEvents(level.blocks, []).code;
+
+    const systemPrompt = `
+You are a code reviewer for an educational game that teaches clean code principles.
+The player fixes the code by clicking on problematic pieces of code. Each click replaces all
+occurrences of the clicked text with a better version.
+
+As a reply, generate a JSON response with the following fields:
+
+1. analysis — internal analysis of the code style issues in the code.
+2. fixes — an array of 1-5 fixes. Each fix has:
+   - clickable (exact text from the code: a name, an expression or a whole line, without leading spaces),
+   - replacement (the text that replaces it).
+
+Fixes are applied one after another, so a later fix must not depend on an earlier one.
+`;
+
+    const userPrompt = `
+The following code demonstrates this code style issue:
+
+${codeStyleIssue}
+
+\`\`\`python
+${initialCode}
+\`\`\`
+
+Please list the fixes that solve the issue.
+`;
+
+    const response = await generate({apiKey, model, systemPrompt, prompt: userPrompt, schema: levelFixesSchema}, options);
+    const fixes: any[] = Array.isArray(response.fixes) ? response.fixes : [];
+    const clickables = new Set<string>();
+    const blocks: LevelBlock[] = fixes
+        .map(fix => ({clickable: String(fix?.clickable ?? ''), replacement: String(fix?.replacement ?? '')}))
+        .filter(({clickable, replacement}) => {
+            const valid = clickable.trim().length > 0 && clickable !== replacement
+                && !clickables.has(clickable) && initialCode.includes(clickable);
+            clickables.add(clickable);
+            return valid;
+        })
+        .map(({clickable, replacement}, i) => ({
+            type: 'replace-span',
+            clickable,
+            replacement,
+            event: `fix${i + 1}`
+        }));
+
+    return renderToPyLevel({...level, blocks: [...level.blocks, ...blocks]});
+}
@@ -0,0 +1,247 @@
+/**
+ * Line-level syntax highlighting of Python code with a cache of tokenized lines
+ *
+ * Tokenizing a whole level on every change is wasteful: after a fix or during the reveal animation
+ * almost all lines are unchanged. Lines are therefore tokenized one by one and cached by their text
+ * and the tokenizer state at their start. The only state carried from one line to the next is
+ * whether the line starts inside a triple-quoted string.
+ */
+
+import React from 'react';
+import {normalizeTokens, Prism, PrismTheme, Token} from 'prism-react-renderer';
+
+const MAX_CACHED_LINES = 10000;
+const TRIPLE_STRING_TYPES = ['triple-quoted-string', 'string'];
+
+/**
+ * Tokenizer state at the start of a line: the delimiter of the open triple-quoted string, if any
+ */
+export type LineState = '' | "'''" | '"""';
+
+export interface TokenizedLine {
+    tokens: Token[];
+    signature: string;      // changes whenever the rendering of the tokens changes
+    endState: LineState;
+}
+
+export interface TokenStyle {
+    className: string;
+    style?: React.CSSProperties;
+}
+
+export type TokenStyler = (token: Token) => TokenStyle;
+
+/**
+ * Get a string that changes whenever the rendering of a line's tokens changes
+ * @param tokens - Tokens of the line
+ * @returns The line signature
+ */
+export function getLineSignature(tokens: Token[]): string {
+    return tokens.map(token => `${token.types.join('.')}:${token.content}`).join('\u0000');
+}
+
+/**
+ * Find the end of a string closed by the given delimiter, skipping escaped characters
+ * @returns Index after the closing delimiter, or -1 if the string is not closed on this line
+ */
+function findStringEnd(text: string, from: number, delimiter: string): number {
+    for (let i = from; i < text.length; i++) {
+        if (text[i] === '\\') {
+            i++;
+        } else if (text.startsWith(delimiter, i)) {
+            return i + delimiter.length;
+        }
+    }
+    return -1;
+}
+
+/**
+ * Find a triple-quoted string that is opened but not closed on the line
+ * @returns Start of the string (including its prefix) and its delimiter, or null
+ */
+function findOpenTripleString(text: string): { start: number, delimiter: LineState } | null {
+    let i = 0;
+    while (i < text.length) {
+        const c = text[i];
+        if (c === '#') return null;
+        if (c !== '"' && c !== "'") {
+            i++;
+            continue;
+        }
+
+        const delimiter = text.startsWith(c.repeat(3), i) ? c.repeat(3) as LineState : c;
+        const end = findStringEnd(text, i + delimiter.length, delimiter);
+        if (end >= 0) {
+            i = end;
+        } else if (delimiter.length === 3) {
+            let start = i;
+            while (start > 0 && i - start < 2 && /[rubf]/i.test(text[start - 1])) start--;
+            return {start, delimiter: delimiter as LineState};
+        } else {
+            // Unterminated single-quoted string; it does not continue on the next line
+            return null;
+        }
+    }
+    return null;
+}
+
+/**
+ * Tokenize a piece of a line that contains no open multi-line string
+ */
+function tokenizePlain(text: string): Token[] {
+    if (text.length === 0) return [];
+    return normalizeTokens(Prism.tokenize(text, Prism.languages.python))[0];
+}
+
+/**
+ * Tokenize a single line of code
+ * @param text - Text of the line, without line break
+ * @param state - Tokenizer state at the start of the line
+ * @returns The tokens and the state at the start of the next line
+ */
+export function tokenizeLine(text: string, state: LineState): TokenizedLine {
+    const tokens: Token[] = [];
+    let rest = text;
+    let endState: LineState = '';
+
+    if (state !== '') {
+        const end = findStringEnd(text, 0, state);
+        if (end < 0) {
+            tokens.push({types: TRIPLE_STRING_TYPES, content: text});
+            rest = '';
+            endState = state;
+        } else {
+            tokens.push({types: TRIPLE_STRING_TYPES, content: text.substring(0, end)});
+            rest = text.substring(end);
+        }
+    }
+
+    const open = findOpenTripleString(rest);
+    if (open) {
+        tokens.push(...tokenizePlain(rest.substring(0, open.start)));
+        tokens.push({types: TRIPLE_STRING_TYPES, content: rest.substring(open.start)});
+        endState = open.delimiter;
+    } else {
+        tokens.push(...tokenizePlain(rest));
+    }
+
+    const nonEmpty = tokens.filter(token => token.content.length > 0);
+    return {tokens: nonEmpty, signature: getLineSignature(nonEmpty), endState};
+}
+
+/**
+ * Cache of tokenized lines, keyed by the line text and the state at its start
+ */
+export class LineTokenCache {
+    private readonly lines = new Map<string, TokenizedLine>();
+    private readonly maxLines: number;
+
+    constructor(maxLines: number = MAX_CACHED_LINES) {
+        this.maxLines = maxLines;
+    }
+
+    /**
+     * Tokenize a line, reusing the result of an earlier call for the same text and state
+     * @param text - Text of the line, without line break
+     * @param state - Tokenizer state at the start of the line
+     * @returns The tokenized line
+     */
+    tokenizeLine(text: string, state: LineState): TokenizedLine {
+        const key = `${state}\n${text}`;
+        let line = this.lines.get(key);
+        if (!line) {
+            line = tokenizeLine(text, state);
+            if (this.lines.size >= this.maxLines) {
+                // Evict the oldest entry
+                this.lines.delete(this.lines.keys().next().value as string);
+            }
+            this.lines.set(key, line);
+        }
+        return line;
+    }
+
+    /**
+     * Tokenize code line by line
+     * @param code - The code
+     * @returns The tokenized lines
+     */
+    tokenize(code: string): TokenizedLine[] {
+        const result: TokenizedLine[] = [];
+        let state: LineState = '';
+        for (const text of code.split('\n')) {
+            const line = this.tokenizeLine(text, state);
+            result.push(line);
+            state = line.endState;
+        }
+        return result;
+    }
+
+    get size(): number {
+        return this.lines.size;
+    }
+}
+
+const sharedCache = new LineTokenCache();
+
+/**
+ * Tokenize Python code line by line, using the shared line cache
+ * @param code - The code
+ * @returns The tokenized lines
+ */
+export function tokenizeCode(code: string): TokenizedLine[] {
+    return sharedCache.tokenize(code);
+}
+
+/**
+ * Cut a tokenized line after a number of characters
+ * @param line - The tokenized line
+ * @param length - Number of characters to keep
+ * @returns The tokens of the first characters of the line
+ */
+export function sliceLineTokens(line: TokenizedLine, length: number): Token[] {
+    const tokens: Token[] = [];
+    let remaining = length;
+    for (const token of line.tokens) {
+        if (remaining <= 0) break;
+        if (token.content.length <= remaining) {
+            tokens.push(token);
+        } else {
+            tokens.push({types: token.types, content: token.content.substring(0, remaining)});
+        }
+        remaining -= token.content.length;
+    }
+    return tokens;
+}
+
+const stylers = new WeakMap<PrismTheme, TokenStyler>();
+
+/**
+ * Get a function that computes the class name and style of tokens, like the token props of
+ * prism-react-renderer's Highlight component
+ * @param theme - The theme
+ * @returns The token styler, which is the same function for every call with the same theme
+ */
+export function getTokenStyler(theme: PrismTheme): TokenStyler {
+    let styler = stylers.get(theme);
+    if (styler) return styler;
+
+    const styleByType: Record<string, React.CSSProperties> = {};
+    for (const {types, style, languages} of theme.styles) {
+        if (languages && !languages.includes('python')) continue;
+        for (const type of types) {
+            styleByType[type] = {...styleByType[type], ...style} as React.CSSProperties;
+        }
+    }
+
+    const styleCache = new Map<string, React.CSSProperties | undefined>();
+    styler = (token: Token): TokenStyle => {
+        const key = token.types.join(' ');
+        if (!styleCache.has(key)) {
+            const isPlain = token.types.length === 1 && token.types[0] === 'plain';
+            styleCache.set(key, isPlain ? undefined : Object.assign({}, ...token.types.map(type => styleByType[type])));
+        }
+        return {className: `token ${key}`, style: styleCache.get(key)};
+    };
+    stylers.set(theme, styler);
+    return styler;
+}
@@ -3,6 +3,9 @@
  */
 
 const DEBUG_STORAGE_KEY = 'cleanCodeGame_debugMode';
+const REDUCER_TRACING_STORAGE_KEY = 'cleanCodeGame_reducerTracing';
+
+const debugModeListeners = new Set<() => void>();
 
 /**
  * Checks if debug mode is enabled
@@ -18,6 +21,36 @@ export const isDebugModeEnabled = (): boolean => {
  */
 export const setDebugMode = (enabled: boolean): void => {
     localStorage.setItem(DEBUG_STORAGE_KEY, enabled ? 'true' : 'false');
+    debugModeListeners.forEach(listener => listener());
+};
+
+/**
+ * Registers a listener that is called when debug mode is set, e.g. for useSyncExternalStore
+ * together with isDebugModeEnabled
+ * @param listener - Called after every call of setDebugMode
+ * @returns Function that removes the listener
+ */
+export const subscribeToDebugMode = (listener: () => void): (() => void) => {
+    debugModeListeners.add(listener);
+    return () => {
+        debugModeListeners.delete(listener);
+    };
+};
+
+/**
+ * Checks if reducer tracing is enabled
+ * @returns Whether the game reducer records the duration and state size of actions
+ */
+export const isReducerTracingEnabled = (): boolean => {
+    return localStorage.getItem(REDUCER_TRACING_STORAGE_KEY) === 'true';
+};
+
+/**
+ * Sets reducer tracing enabled/disabled
+ * @param enabled - Whether reducer tracing should be enabled
+ */
+export const setReducerTracing = (enabled: boolean): void => {
+    localStorage.setItem(REDUCER_TRACING_STORAGE_KEY, enabled ? 'true' : 'false');
 };
 
 /**
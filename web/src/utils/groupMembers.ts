@@ -0,0 +1,98 @@
+/**
+ * Incremental updates of a group's member list from snapshot changes
+ */
+
+import {GroupMember} from '../types';
+
+// Minimum time between two updates of the member list shown on the group page
+export const MEMBER_UPDATE_INTERVAL_MS = 500;
+
+/**
+ * A change of a single member document
+ */
+export interface GroupMemberChange {
+    type: 'added' | 'modified' | 'removed';
+    member: GroupMember;
+}
+
+/**
+ * Apply member changes to a member map
+ * @param members - Members keyed by UID
+ * @param changes - Changes in the order they happened
+ * @returns A new map with the changes applied, or the same map if there were no changes
+ */
+export function applyMemberChanges(members: Map<string, GroupMember>, changes: GroupMemberChange[]): Map<string, GroupMember> {
+    if (changes.length === 0) return members;
+
+    const updated = new Map(members);
+    for (const {type, member} of changes) {
+        if (type === 'removed') {
+            updated.delete(member.uid);
+        } else {
+            updated.set(member.uid, member);
+        }
+    }
+    return updated;
+}
+
+/**
+ * Collects items and hands them over in batches, at most once per interval
+ *
+ * The first batch after a quiet period is delivered immediately; items arriving within the
+ * interval after a delivery are delivered together when it ends.
+ */
+export class ThrottledBatcher<T> {
+    private items: T[] = [];
+    private timer: ReturnType<typeof setTimeout> | null = null;
+    private lastDelivery = -Infinity;
+    private readonly deliver: (items: T[]) => void;
+    private readonly intervalMs: number;
+
+    /**
+     * @param deliver - Receives the collected items
+     * @param intervalMs - Minimum time between two deliveries
+     */
+    constructor(deliver: (items: T[]) => void, intervalMs: number) {
+        this.deliver = deliver;
+        this.intervalMs = intervalMs;
+    }
+
+    /**
+     * Add items to the next batch
+     * @param items - Items to add
+     */
+    push(items: T[]): void {
+        this.items.push(...items);
+        if (this.timer !== null) return;
+
+        const wait = this.lastDelivery + this.intervalMs - Date.now();
+        if (wait <= 0) {
+            this.flush();
+        } else {
+            this.timer = setTimeout(() => {
+                this.timer = null;
+                this.flush();
+            }, wait);
+        }
+    }
+
+    /**
+     * Drop the collected items and stop the pending delivery
+     */
+    cancel(): void {
+        if (this.timer !== null) {
+            clearTimeout(this.timer);
+            this.timer = null;
+        }
+        this.items = [];
+    }
+
+    private flush(): void {
+        const items = this.items;
+        this.items = [];
+        this.lastDelivery = Date.now();
+        if (items.length > 0) {
+            this.deliver(items);
+        }
+    }
+}
@@ -0,0 +1,269 @@
+/**
+ * Incremental JSON parser for streamed model responses
+ *
+ * The text of a structured response arrives in chunks. The parser consumes each chunk once and
+ * keeps the value built so far, so the fields of a response can be used as soon as they arrive
+ * instead of after the whole response. Strings that are still open are included with the text
+ * received so far; numbers and literals appear once they are complete.
+ */
+
+type Container = Record<string, unknown> | unknown[];
+
+interface Frame {
+    container: Container;
+    key: string | null;     // key of the next value of an object
+}
+
+type State =
+    | 'value'           // expecting a value
+    | 'firstItem'       // after '[': a value or ']'
+    | 'key'             // expecting the key of an object member
+    | 'firstKey'        // after '{': a key or '}'
+    | 'colon'           // after a key
+    | 'afterValue'      // after a value: ',' or the end of the container
+    | 'string'
+    | 'number'
+    | 'literal'
+    | 'done';
+
+const LITERALS: Record<string, unknown> = {true: true, false: false, null: null};
+const ESCAPES: Record<string, string> = {'"': '"', '\\': '\\', '/': '/', b: '\b', f: '\f', n: '\n', r: '\r', t: '\t'};
+
+const isWhitespace = (c: string): boolean => c === ' ' || c === '\n' || c === '\r' || c === '\t';
+
+export class IncrementalJsonParser {
+    private root: unknown = undefined;
+    private readonly stack: Frame[] = [];
+    private state: State = 'value';
+
+    private buffer = '';            // text of the current string, number or literal
+    private isKey = false;          // the current string is a key
+    private escape: string | null = null;   // escape sequence being read, without the backslash
+    private stringSlot: { container: Container | null, key: string | number } | null = null;
+
+    /**
+     * The value parsed so far; containers are updated in place by later chunks
+     */
+    get value(): unknown {
+        return this.root;
+    }
+
+    /**
+     * True once the root value is complete
+     */
+    get done(): boolean {
+        return this.state === 'done';
+    }
+
+    /**
+     * Parse the next chunk of the text
+     * @param chunk - The chunk
+     * @throws SyntaxError if the text is not valid JSON
+     */
+    push(chunk: string): void {
+        for (let i = 0; i < chunk.length; i++) {
+            const c = chunk[i];
+            switch (this.state) {
+                case 'string': {
+                    // Copy a run of plain characters at once
+                    let end = i;
+                    while (this.escape === null && end < chunk.length && chunk[end] !== '"' && chunk[end] !== '\\') end++;
+                    if (end > i) {
+                        this.buffer += chunk.substring(i, end);
+                        i = end - 1;
+                    } else {
+                        this.pushStringChar(c);
+                    }
+                    break;
+                }
+                case 'number':
+                    if (/[0-9eE+\-.]/.test(c)) {
+                        this.buffer += c;
+                    } else {
+                        this.completeNumber();
+                        i--;
+                    }
+                    break;
+                case 'literal':
+                    this.buffer += c;
+                    if (this.buffer in LITERALS) {
+                        this.completeValue(LITERALS[this.buffer]);
+                    } else if (!Object.keys(LITERALS).some(literal => literal.startsWith(this.buffer))) {
+                        throw new SyntaxError(`Unexpected literal '${this.buffer}' in JSON`);
+                    }
+                    break;
+                default:
+                    if (!isWhitespace(c)) {
+                        this.pushStructural(c);
+                    }
+            }
+        }
+
+        // Show the received part of an open string
+        if (this.state === 'string' && !this.isKey && this.stringSlot) {
+            this.assignString();
+        }
+    }
+
+    /**
+     * Parse the rest of the text and check that it is complete
+     * @param chunk - The last chunk
+     * @returns The parsed value
+     * @throws SyntaxError if the text is not complete, valid JSON
+     */
+    end(chunk: string = ''): unknown {
+        this.push(chunk);
+        if (this.state === 'number' && this.stack.length === 0) {
+            this.completeNumber();
+        }
+        if (this.state !== 'done') {
+            throw new SyntaxError('Unexpected end of JSON input');
+        }
+        return this.root;
+    }
+
+    private pushStructural(c: string): void {
+        switch (this.state) {
+            case 'value':
+            case 'firstItem':
+                if (c === ']' && this.state === 'firstItem') {
+                    this.closeContainer();
+                } else {
+                    this.startValue(c);
+                }
+                break;
+            case 'key':
+            case 'firstKey':
+                if (c === '}' && this.state === 'firstKey') {
+                    this.closeContainer();
+                } else if (c === '"') {
+                    this.startString(true);
+                } else {
+                    throw new SyntaxError(`Unexpected character '${c}' in JSON, expected a key`);
+                }
+                break;
+            case 'colon':
+                if (c !== ':') throw new SyntaxError(`Unexpected character '${c}' in JSON, expected ':'`);
+                this.state = 'value';
+                break;
+            case 'afterValue': {
+                const frame = this.stack[this.stack.length - 1];
+                const isArray = Array.isArray(frame.container);
+                if (c === ',') {
+                    this.state = isArray ? 'value' : 'key';
+                } else if (c === (isArray ? ']' : '}')) {
+                    this.closeContainer();
+                } else {
+                    throw new SyntaxError(`Unexpected character '${c}' in JSON`);
+                }
+                break;
+            }
+            case 'done':
+                throw new SyntaxError(`Unexpected character '${c}' after JSON`);
+        }
+    }
+
+    private startValue(c: string): void {
+        if (c === '{' || c === '[') {
+            const container: Container = c === '{' ? {} : [];
+            this.assignValue(container);
+            this.stack.push({container, key: null});
+            this.state = c === '{' ? 'firstKey' : 'firstItem';
+        } else if (c === '"') {
+            this.startString(false);
+        } else if (c === '-' || (c >= '0' && c <= '9')) {
+            this.buffer = c;
+            this.state = 'number';
+        } else if (c === 't' || c === 'f' || c === 'n') {
+            this.buffer = c;
+            this.state = 'literal';
+        } else {
+            throw new SyntaxError(`Unexpected character '${c}' in JSON`);
+        }
+    }
+
+    private startString(isKey: boolean): void {
+        this.buffer = '';
+        this.isKey = isKey;
+        this.state = 'string';
+        if (!isKey) {
+            // Remember where the string goes, so its received part can be shown
+            const frame = this.stack[this.stack.length - 1];
+            this.stringSlot = !frame ? {container: null, key: 0}
+                : Array.isArray(frame.container) ? {container: frame.container, key: frame.container.length}
+                    : {container: frame.container, key: frame.key!};
+            this.assignString();
+        }
+    }
+
+    private pushStringChar(c: string): void {
+        if (this.escape !== null) {
+            this.escape += c;
+            if (this.escape[0] === 'u') {
+                if (this.escape.length === 5) {
+                    this.buffer += String.fromCharCode(parseInt(this.escape.substring(1), 16));
+                    this.escape = null;
+                }
+            } else {
+                if (!(c in ESCAPES)) throw new SyntaxError(`Bad escaped character '${c}' in JSON`);
+                this.buffer += ESCAPES[c];
+                this.escape = null;
+            }
+        } else if (c === '\\') {
+            this.escape = '';
+        } else if (c === '"') {
+            if (this.isKey) {
+                this.stack[this.stack.length - 1].key = this.buffer;
+                this.state = 'colon';
+            } else {
+                this.assignString();
+                this.stringSlot = null;
+                this.afterValue();
+            }
+        } else {
+            this.buffer += c;
+        }
+    }
+
+    private assignString(): void {
+        const {container, key} = this.stringSlot!;
+        if (container === null) {
+            this.root = this.buffer;
+        } else {
+            (container as Record<string | number, unknown>)[key] = this.buffer;
+        }
+    }
+
+    private completeNumber(): void {
+        const number = Number(this.buffer);
+        if (this.buffer === '-' || Number.isNaN(number)) {
+            throw new SyntaxError(`Bad number '${this.buffer}' in JSON`);
+        }
+        this.completeValue(number);
+    }
+
+    private completeValue(value: unknown): void {
+        this.assignValue(value);
+        this.afterValue();
+    }
+
+    private assignValue(value: unknown): void {
+        const frame = this.stack[this.stack.length - 1];
+        if (!frame) {
+            this.root = value;
+        } else if (Array.isArray(frame.container)) {
+            frame.container.push(value);
+        } else {
+            frame.container[frame.key!] = value;
+        }
+    }
+
+    private closeContainer(): void {
+        this.stack.pop();
+        this.afterValue();
+    }
+
+    private afterValue(): void {
+        this.state = this.stack.length === 0 ? 'done' : 'afterValue';
+    }
+}
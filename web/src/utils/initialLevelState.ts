@@ -0,0 +1,50 @@
+/**
+ * Initial state of a level, before any event is triggered
+ *
+ * The initial state is the same for every player, so the levels compiler computes it once and
+ * stores it with the level. Only community levels, which are parsed in the browser, are rendered
+ * when they are loaded.
+ */
+
+import {CompiledLevelState, LevelData} from '../types';
+import {renderLevel} from './levelRenderer';
+import {EventRegion, serializeRegions, unpackRegions} from './regions';
+import {getLevelIndex, TriggeredEvents} from './levelIndex';
+
+/**
+ * Get the event of the first hint of a level, before any event is triggered
+ * @param levelData - The level
+ * @returns The event ID, or null if the level has no hints
+ */
+export function getFirstHintId(levelData: LevelData): string | null {
+    return new TriggeredEvents(getLevelIndex(levelData.blocks), []).nextHintId;
+}
+
+/**
+ * Compute the initial state of a level in the form stored by the levels compiler
+ * @param levelData - The level
+ * @returns The initial code, regions and pending hint
+ */
+export function compileInitialLevelState(levelData: LevelData): CompiledLevelState {
+    const {code, regions} = renderLevel(levelData.blocks, []);
+    return {code, regions: serializeRegions(regions), pendingHintId: getFirstHintId(levelData)};
+}
+
+/**
+ * Get the initial state of a level, from its precomputed state if it has one
+ * @param levelData - The level
+ * @returns The initial code, regions and pending hint
+ */
+export function getInitialLevelState(levelData: LevelData): {
+    code: string;
+    regions: EventRegion[];
+    pendingHintId: string | null;
+} {
+    const compiled = levelData.initialState;
+    if (compiled) {
+        return {code: compiled.code, regions: unpackRegions(compiled.regions), pendingHintId: compiled.pendingHintId};
+    }
+
+    const {code, regions} = renderLevel(levelData.blocks, []);
+    return {code, regions, pendingHintId: getFirstHintId(levelData)};
+}
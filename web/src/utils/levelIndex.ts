@@ -0,0 +1,234 @@
+import {LevelBlock, LevelState} from "../types";
+
+/**
+ * Index of the events of a level
+ *
+ * Maps every event to the blocks that use it and keeps the blocks that have to be fixed and the
+ * blocks with hints in level order, so the reducers don't scan all blocks on every fix. A block
+ * with several events counts as fixed as soon as one of its events is triggered.
+ */
+export class LevelIndex {
+    readonly blocks: LevelBlock[];
+    readonly requiredCount: number;             // number of blocks that have to be fixed
+
+    private readonly eventBlocks = new Map<string, number[]>();    // event → indices of its blocks
+    private readonly required: Uint8Array;      // 1 for blocks that have to be fixed
+    private readonly hintQueue: number[];       // indices of blocks with hints, in level order
+    private readonly optionsBlocks = new Map<string, LevelBlock>();
+
+    /**
+     * Build the index
+     * @param blocks - Blocks of the level
+     */
+    constructor(blocks: LevelBlock[]) {
+        this.blocks = blocks;
+        this.required = new Uint8Array(blocks.length);
+        this.hintQueue = [];
+
+        let requiredCount = 0;
+        blocks.forEach((block, i) => {
+            if (!block.event) return;
+            if (block.type !== 'neutral') {
+                this.required[i] = 1;
+                requiredCount++;
+            }
+            if (block.hint) {
+                this.hintQueue.push(i);
+            }
+            for (const eventId of getBlockEvents(block)) {
+                let indices = this.eventBlocks.get(eventId);
+                if (!indices) {
+                    indices = [];
+                    this.eventBlocks.set(eventId, indices);
+                }
+                if (indices[indices.length - 1] !== i) {
+                    indices.push(i);
+                }
+                if (block.options && !this.optionsBlocks.has(eventId)) {
+                    this.optionsBlocks.set(eventId, block);
+                }
+            }
+        });
+        this.requiredCount = requiredCount;
+    }
+
+    /**
+     * Get the indices of the blocks that use an event
+     * @param eventId - The event ID
+     * @returns Block indices in level order
+     */
+    getEventBlockIndices(eventId: string): readonly number[] {
+        return this.eventBlocks.get(eventId) ?? [];
+    }
+
+    /**
+     * Find the first block of an event that matches a condition
+     * @param eventId - The event ID
+     * @param predicate - The condition
+     * @returns The first matching block in level order, if any
+     */
+    findEventBlock(eventId: string, predicate: (block: LevelBlock) => unknown): LevelBlock | undefined {
+        for (const i of this.getEventBlockIndices(eventId)) {
+            if (predicate(this.blocks[i])) return this.blocks[i];
+        }
+        return undefined;
+    }
+
+    /**
+     * Find the block that offers context options for an event
+     * @param eventId - The event ID
+     * @returns The first block with options for this event, if any
+     */
+    findOptionsBlock(eventId: string): LevelBlock | undefined {
+        return this.optionsBlocks.get(eventId);
+    }
+
+    isRequired(blockIndex: number): boolean {
+        return this.required[blockIndex] === 1;
+    }
+
+    /**
+     * Get the block with the hint at a position of the hint queue
+     * @returns The block index, or -1 past the end of the queue
+     */
+    getHintBlockIndex(position: number): number {
+        return position < this.hintQueue.length ? this.hintQueue[position] : -1;
+    }
+}
+
+/**
+ * Get the events of a block as an array
+ */
+function getBlockEvents(block: LevelBlock): string[] {
+    if (!block.event) return [];
+    return Array.isArray(block.event) ? block.event : [block.event];
+}
+
+/**
+ * Get the event a hint is given for: the first event of the block
+ * @param block - A block with a hint
+ */
+function getHintEventId(block: LevelBlock): string | null {
+    if (!block.event) return null;
+    return Array.isArray(block.event) ? block.event[0] : block.event;
+}
+
+const levelIndices = new WeakMap<LevelBlock[], LevelIndex>();
+
+/**
+ * Get the index of a level, building it on first use
+ *
+ * One index is kept per blocks array, so it is built once per level and shared by all states of
+ * the level.
+ *
+ * @param blocks - Blocks of the level
+ * @returns The level index
+ */
+export function getLevelIndex(blocks: LevelBlock[]): LevelIndex {
+    let index = levelIndices.get(blocks);
+    if (!index) {
+        index = new LevelIndex(blocks);
+        levelIndices.set(blocks, index);
+    }
+    return index;
+}
+
+/**
+ * Immutable set of the triggered events of a level, with the progress they make
+ *
+ * Tracks which blocks are fixed, how many required blocks are left and the position of the next
+ * hint, so checking completion and finding the next hint take constant time. Adding an event only
+ * visits the blocks of that event.
+ */
+export class TriggeredEvents {
+    readonly index: LevelIndex;
+    readonly events: string[];                  // triggered events in the order they were triggered
+
+    private readonly eventSet: Set<string>;
+    private readonly fixed: Uint8Array;         // 1 for blocks with a triggered event
+    private readonly remaining: number;         // required blocks that are not fixed yet
+    private readonly hintPosition: number;      // position of the next hint in the hint queue
+
+    /**
+     * Create the set from a list of events
+     * @param index - Index of the level
+     * @param events - Triggered events
+     * @param from - Set to extend; events must then be its events followed by one new event
+     */
+    constructor(index: LevelIndex, events: string[], from?: TriggeredEvents) {
+        this.index = index;
+        this.events = events;
+
+        const newEvents = from ? events.slice(from.events.length) : events;
+        this.eventSet = from ? new Set(from.eventSet) : new Set<string>();
+        this.fixed = from ? from.fixed.slice() : new Uint8Array(index.blocks.length);
+        let remaining = from ? from.remaining : index.requiredCount;
+
+        for (const eventId of newEvents) {
+            this.eventSet.add(eventId);
+            for (const i of index.getEventBlockIndices(eventId)) {
+                if (this.fixed[i]) continue;
+                this.fixed[i] = 1;
+                if (index.isRequired(i)) remaining--;
+            }
+        }
+        this.remaining = remaining;
+
+        // Hints are given in level order, so the next hint never moves backwards
+        let hintPosition = from ? from.hintPosition : 0;
+        while (index.getHintBlockIndex(hintPosition) >= 0 && this.fixed[index.getHintBlockIndex(hintPosition)]) {
+            hintPosition++;
+        }
+        this.hintPosition = hintPosition;
+    }
+
+    has(eventId: string): boolean {
+        return this.eventSet.has(eventId);
+    }
+
+    /**
+     * Add an event
+     * @param eventId - The event ID
+     * @returns A set with the event added, or this set if the event is already triggered
+     */
+    add(eventId: string): TriggeredEvents {
+        if (this.eventSet.has(eventId)) return this;
+        return new TriggeredEvents(this.index, [...this.events, eventId], this);
+    }
+
+    /**
+     * Check if one of the events of a block is triggered
+     * @param blockIndex - Index of the block
+     */
+    isBlockFixed(blockIndex: number): boolean {
+        return this.fixed[blockIndex] === 1;
+    }
+
+    /**
+     * True if every block that has to be fixed has a triggered event
+     */
+    get allIssuesFixed(): boolean {
+        return this.remaining === 0;
+    }
+
+    /**
+     * Event of the first block with a hint that is not fixed yet, or null if there is none
+     */
+    get nextHintId(): string | null {
+        const blockIndex = this.index.getHintBlockIndex(this.hintPosition);
+        return blockIndex < 0 ? null : getHintEventId(this.index.blocks[blockIndex]);
+    }
+}
+
+/**
+ * Get the triggered events of a level state, rebuilding them if they don't match the state
+ * @param levelState - The level state
+ * @returns The triggered events of the state
+ */
+export function getTriggeredEvents(levelState: LevelState): TriggeredEvents {
+    const triggered = levelState.triggered;
+    if (triggered && triggered.events === levelState.triggeredEvents && triggered.index.blocks === levelState.level.blocks) {
+        return triggered;
+    }
+    return new TriggeredEvents(getLevelIndex(levelState.level.blocks), levelState.triggeredEvents);
+}
@@ -0,0 +1,98 @@
+/// <reference types="vite/client" />
+/**
+ * On-demand loading of built-in levels
+ *
+ * The levels compiler splits the levels into a small manifest and one JSON chunk per level.
+ * Only the manifest, with the start level inlined, is part of the main bundle; every other level
+ * is fetched as a separate chunk when it is loaded or prefetched.
+ */
+
+import manifest from '../data/levels/manifest.json';
+import {LevelData, LevelId, LevelsManifest, LevelSummary, TopicSummary} from '../types';
+
+export const levelsManifest = manifest as LevelsManifest;
+
+const CHUNK_PATH_PREFIX = '../data/levels/';
+
+// One lazily imported module per level chunk
+const chunkModules = import.meta.glob<LevelData>('../data/levels/*/*.json', {import: 'default'});
+
+const loadedLevels = new Map<string, LevelData>();
+const pendingLevels = new Map<string, Promise<LevelData>>();
+
+/**
+ * Find a level in the topics list
+ * @param topics - Topics from the levels manifest
+ * @param levelId - The level ID
+ * @returns The level summary, or undefined if there's no such level
+ */
+function findLevelSummary(topics: TopicSummary[], levelId: LevelId): LevelSummary | undefined {
+    const topic = topics.find(t => t.name === levelId.topic);
+    return topic?.levels.find(l => l.filename === levelId.levelId);
+}
+
+/**
+ * Get the data of a level if it is available without loading
+ * @param topics - Topics from the levels manifest
+ * @param levelId - The level ID
+ * @returns The level data, or undefined if the level's chunk hasn't been loaded yet
+ */
+export function getLoadedLevel(topics: TopicSummary[], levelId: LevelId): LevelData | undefined {
+    const summary = findLevelSummary(topics, levelId);
+    if (!summary) return undefined;
+
+    // Topics may also carry the full level data, e.g. when built by hand
+    if ('blocks' in summary) return summary as LevelData;
+
+    return summary.chunk ? loadedLevels.get(summary.chunk) : undefined;
+}
+
+/**
+ * Load the data of a level, fetching its chunk if needed
+ *
+ * Concurrent calls for the same level share a single request.
+ *
+ * @param topics - Topics from the levels manifest
+ * @param levelId - The level ID
+ * @returns The level data, or undefined if there's no such level
+ */
+export function loadLevelData(topics: TopicSummary[], levelId: LevelId): Promise<LevelData | undefined> {
+    const loaded = getLoadedLevel(topics, levelId);
+    if (loaded) return Promise.resolve(loaded);
+
+    const chunk = findLevelSummary(topics, levelId)?.chunk;
+    const importChunk = chunk ? chunkModules[`${CHUNK_PATH_PREFIX}${chunk}.json`] : undefined;
+    if (!chunk || !importChunk) return Promise.resolve(undefined);
+
+    let pending = pendingLevels.get(chunk);
+    if (!pending) {
+        pending = importChunk()
+            .then(level => {
+                loadedLevels.set(chunk, level);
+                return level;
+            })
+            .finally(() => pendingLevels.delete(chunk));
+        pendingLevels.set(chunk, pending);
+    }
+    return pending;
+}
+
+/**
+ * Start loading a level in the background
+ * @param topics - Topics from the levels manifest
+ * @param levelId - The level ID
+ */
+export function prefetchLevel(topics: TopicSummary[], levelId: LevelId): void {
+    loadLevelData(topics, levelId).catch(error => {
+        console.error(`Error prefetching level ${levelId.topic}/${levelId.levelId}:`, error);
+    });
+}
+
+// The start level is inlined in the manifest, so it's available without loading
+if (levelsManifest.startLevel) {
+    const {topic, level} = levelsManifest.startLevel;
+    const chunk = findLevelSummary(levelsManifest.topics, {topic, levelId: level.filename})?.chunk;
+    if (chunk) {
+        loadedLevels.set(chunk, level);
+    }
+}
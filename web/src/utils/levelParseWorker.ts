@@ -0,0 +1,14 @@
+/**
+ * Web Worker parsing levels for the editor, off the main thread
+ */
+
+import {IncrementalLevelParser} from '../levels_compiler/parser';
+import type {LevelParseRequest, LevelParseResponse} from './levelParserClient';
+
+const parser = new IncrementalLevelParser();
+
+self.onmessage = (event: MessageEvent<LevelParseRequest>) => {
+    const {id, content} = event.data;
+    const response: LevelParseResponse = {id, content, result: parser.parse(content)};
+    self.postMessage(response);
+};
@@ -0,0 +1,143 @@
+/**
+ * Debounced level parsing in a Web Worker
+ *
+ * Only the latest requested text is parsed: a request replaces the one waiting for the debounce
+ * delay, and while the worker is busy only the newest text is kept for the next parse. Where Web
+ * Workers are not available, e.g. in tests, the level is parsed on the main thread instead.
+ */
+
+import {useEffect, useRef, useState} from 'react';
+import {IncrementalLevelParser, ParseResult} from '../levels_compiler/parser';
+
+export const PARSE_DEBOUNCE_MS = 150;
+
+export interface LevelParseRequest {
+    id: number;
+    content: string;
+}
+
+export interface LevelParseResponse {
+    id: number;
+    content: string;
+    result: ParseResult;
+}
+
+/**
+ * Minimal interface of the worker, so tests can provide their own
+ */
+export interface LevelParseWorker {
+    postMessage(request: LevelParseRequest): void;
+    onmessage: ((event: MessageEvent<LevelParseResponse>) => void) | null;
+    terminate(): void;
+}
+
+function createDefaultWorker(): LevelParseWorker | null {
+    if (typeof Worker === 'undefined') return null;
+    return new Worker(new URL('./levelParseWorker.ts', import.meta.url), {type: 'module'}) as LevelParseWorker;
+}
+
+/**
+ * Parser of the text of a level being edited
+ */
+export class LevelParserClient {
+    private readonly worker: LevelParseWorker | null;
+    private readonly localParser = new IncrementalLevelParser();
+    private readonly delayMs: number;
+    private readonly onResult: (response: LevelParseResponse) => void;
+    private timer: ReturnType<typeof setTimeout> | null = null;
+    private nextId = 0;
+    private inFlight: number | null = null;     // ID of the request the worker is parsing
+    private queued: string | null = null;       // newest text, waiting for the worker
+    private disposed = false;
+
+    /**
+     * @param onResult - Called with the result of every parse that is still current
+     * @param delayMs - Debounce delay
+     * @param createWorker - Creates the worker; without a worker the level is parsed on the main thread
+     */
+    constructor(
+        onResult: (response: LevelParseResponse) => void,
+        delayMs: number = PARSE_DEBOUNCE_MS,
+        createWorker: () => LevelParseWorker | null = createDefaultWorker
+    ) {
+        this.onResult = onResult;
+        this.delayMs = delayMs;
+        this.worker = createWorker();
+        if (this.worker) {
+            this.worker.onmessage = event => this.handleResponse(event.data);
+        }
+    }
+
+    /**
+     * Request parsing a text, after the debounce delay
+     * @param content - The level text
+     */
+    parse(content: string): void {
+        if (this.disposed) return;
+        if (this.timer !== null) clearTimeout(this.timer);
+        this.timer = setTimeout(() => {
+            this.timer = null;
+            this.send(content);
+        }, this.delayMs);
+    }
+
+    /**
+     * Stop parsing and drop all pending requests
+     */
+    dispose(): void {
+        this.disposed = true;
+        if (this.timer !== null) clearTimeout(this.timer);
+        this.worker?.terminate();
+    }
+
+    private send(content: string): void {
+        if (!this.worker) {
+            this.onResult({id: this.nextId++, content, result: this.localParser.parse(content)});
+            return;
+        }
+        if (this.inFlight !== null) {
+            // Replaces any older text waiting for the worker
+            this.queued = content;
+            return;
+        }
+        this.inFlight = this.nextId++;
+        this.worker.postMessage({id: this.inFlight, content});
+    }
+
+    private handleResponse(response: LevelParseResponse): void {
+        if (this.disposed || response.id !== this.inFlight) return;
+        this.inFlight = null;
+
+        const queued = this.queued;
+        this.queued = null;
+        if (queued !== null) {
+            // The result is already outdated; parse the newest text instead
+            this.send(queued);
+        } else {
+            this.onResult(response);
+        }
+    }
+}
+
+/**
+ * Parse a level text in the background whenever it changes
+ * @param content - The level text
+ * @param delayMs - Debounce delay
+ * @returns The latest result with the text it belongs to, or null before the first parse
+ */
+export function useParsedLevel(content: string, delayMs: number = PARSE_DEBOUNCE_MS): { content: string, result: ParseResult } | null {
+    const [parsed, setParsed] = useState<{ content: string, result: ParseResult } | null>(null);
+    const client = useRef<LevelParserClient | null>(null);
+
+    useEffect(() => {
+        const parser = new LevelParserClient(({content, result}) => setParsed({content, result}), delayMs);
+        client.current = parser;
+        return () => parser.dispose();
+    }, [delayMs]);
+
+    useEffect(() => {
+        client.current?.parse(content);
+    }, [content, delayMs]);
+
+    return parsed;
+}
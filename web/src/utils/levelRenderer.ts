@@ -0,0 +1,384 @@
+import {EventRegion} from "./regions";
+import {LevelBlock} from "../types";
+import {countLines, findAllSubstringPositions} from "./pylang";
+import {SpanReplacer} from "./spanReplacer";
+
+/**
+ * Cached result of applying the triggered replace-span chain to a single line
+ */
+interface RewrittenLine {
+    text: string;
+    touched: boolean;  // true if any clickable of the chain occurs in the line
+    version: number;   // span version the entry was validated against
+}
+
+/**
+ * Cached rendering of a single block
+ */
+interface RenderedBlock {
+    triggered: boolean;
+    text?: string;
+    replacement?: string;
+    clickable?: string;
+    displayed: string;
+    lineCount: number;
+    relativeRegions: EventRegion[];  // regions as if the block started at line 0
+    lineOffset: number;
+    regions: EventRegion[];          // regions shifted by lineOffset
+}
+
+/**
+ * Stateful, incremental counterpart of applyEvents
+ *
+ * The renderer keeps per-block rendered text, line offsets and regions, and a per-line cache
+ * of replace-span rewrites. When new events are added, only the blocks that react to those
+ * events are re-rendered; a triggered replace-span re-checks only lines that contain its
+ * clickable or were already rewritten by another span. The output is byte-identical to
+ * applyEvents(blocks, events).
+ */
+export class LevelRenderer {
+    private readonly blocks: LevelBlock[];
+    private readonly eventBlocks = new Map<string, number[]>();
+    private readonly spanBlocks: number[] = [];
+
+    private events = new Set<string>();
+    private replacer = new SpanReplacer([]);
+    private spanVersion = 0;
+    private spanHistory: string[][] = [];
+    private rewrittenLines = new Map<string, RewrittenLine>();
+    private renderedBlocks: RenderedBlock[] = [];
+    private pendingClickables: (string | null)[] = [];
+    private lineHits = new Map<string, Map<number, number[]>>();
+    private result: { code: string; regions: EventRegion[] } | null = null;
+
+    /**
+     * Create a renderer for the given level blocks
+     * @param blocks - The code blocks of the level
+     */
+    constructor(blocks: LevelBlock[]) {
+        this.blocks = blocks;
+        blocks.forEach((block, index) => {
+            if (block.type === 'replace-span') {
+                this.spanBlocks.push(index);
+            }
+            const events = Array.isArray(block.event) ? block.event : block.event ? [block.event] : [];
+            for (const event of events) {
+                const indices = this.eventBlocks.get(event) ?? [];
+                indices.push(index);
+                this.eventBlocks.set(event, indices);
+            }
+        });
+    }
+
+    /**
+     * Render the level with the given triggered events
+     *
+     * If events is a superset of the previously rendered events, only the difference is applied.
+     * Otherwise the renderer starts over from scratch.
+     *
+     * @param events - List of triggered event IDs
+     * @returns - The resulting code and interactive regions
+     */
+    render(events: string[]): { code: string; regions: EventRegion[] } {
+        const eventSet = new Set(events);
+        for (const event of this.events) {
+            if (!eventSet.has(event)) {
+                this.reset();
+                break;
+            }
+        }
+
+        const addedEvents = [...eventSet].filter(e => !this.events.has(e));
+        if (this.result && addedEvents.length === 0) {
+            return this.result;
+        }
+        for (const event of addedEvents) {
+            this.events.add(event);
+        }
+
+        const affectedBlocks = new Set<number>();
+        for (const event of addedEvents) {
+            for (const index of this.eventBlocks.get(event) ?? []) {
+                affectedBlocks.add(index);
+            }
+        }
+
+        const spansChanged = this.updateTriggeredSpans(affectedBlocks);
+        const firstRender = this.result === null;
+
+        // Re-render blocks whose trigger state or span rewriting may have changed
+        const blockRegions: EventRegion[] = [];
+        const parts: string[] = [];
+        let lineOffset = 0;
+        for (let i = 0; i < this.blocks.length; i++) {
+            let rendered = this.renderedBlocks[i];
+            if (firstRender || spansChanged || affectedBlocks.has(i)) {
+                rendered = this.renderBlock(this.blocks[i], rendered);
+            }
+            if (rendered.lineOffset !== lineOffset) {
+                rendered = {...rendered, lineOffset, regions: shiftRegions(rendered.relativeRegions, lineOffset)};
+            }
+            this.renderedBlocks[i] = rendered;
+            blockRegions.push(...rendered.regions);
+            parts.push(rendered.displayed);
+            lineOffset += rendered.lineCount;
+        }
+
+        // Apply triggered span replacements to the entire code
+        const processedCode = parts.join('').split('\n').map(line => this.rewriteLine(line)).join('\n');
+
+        const spansAffected = this.spanBlocks.some(i => affectedBlocks.has(i));
+        const changedSpans = firstRender || spansAffected ? this.updatePendingClickables() : [];
+        const spanRegions = this.collectSpanRegions(processedCode.split('\n'), changedSpans);
+
+        this.result = {
+            code: processedCode.replace(/\n$/, ""),
+            regions: [...blockRegions, ...spanRegions]
+        };
+        return this.result;
+    }
+
+    /**
+     * Forget all triggered events and cached renderings
+     */
+    reset(): void {
+        this.events = new Set<string>();
+        this.replacer = new SpanReplacer([]);
+        this.spanVersion = 0;
+        this.spanHistory = [];
+        this.rewrittenLines = new Map();
+        this.renderedBlocks = [];
+        this.pendingClickables = [];
+        this.lineHits = new Map();
+        this.result = null;
+    }
+
+    private isTriggered(block: LevelBlock): boolean {
+        if (!block.event) return false;
+        return Array.isArray(block.event)
+            ? block.event.some(e => this.events.has(e))
+            : this.events.has(block.event);
+    }
+
+    /**
+     * Recollect triggered span blocks if any of the affected blocks is a replace-span
+     * @returns - True if the span rewriting chain has changed
+     */
+    private updateTriggeredSpans(affectedBlocks: Set<number>): boolean {
+        const newSpans = this.spanBlocks
+            .filter(i => affectedBlocks.has(i))
+            .map(i => this.blocks[i])
+            .filter(block => block.clickable && block.replacement);
+        if (newSpans.length === 0) return false;
+
+        // Spans are applied in block order, not in the order their events were triggered
+        this.replacer = new SpanReplacer(this.spanBlocks
+            .map(i => this.blocks[i])
+            .filter(block => this.isTriggered(block)));
+        this.spanHistory.push(newSpans.map(block => block.clickable!));
+        this.spanVersion++;
+        return true;
+    }
+
+    /**
+     * Apply the triggered span chain to a single line, reusing the cached result when possible
+     *
+     * A cached line stays valid after new spans are triggered if no clickable of the previous
+     * chain occurs in it and it does not contain any of the new clickables either.
+     */
+    private rewriteLine(line: string): string {
+        const cached = this.rewrittenLines.get(line);
+        if (cached && cached.version !== this.spanVersion) {
+            const stale = cached.touched || this.spanHistory
+                .slice(cached.version)
+                .some(clickables => clickables.some(clickable => line.includes(clickable)));
+            if (stale) {
+                this.rewrittenLines.delete(line);
+            } else {
+                cached.version = this.spanVersion;
+            }
+        }
+
+        let entry = this.rewrittenLines.get(line);
+        if (!entry) {
+            const text = this.replacer.replaceLine(line);
+            entry = {text: text ?? line, touched: text !== null, version: this.spanVersion};
+            this.rewrittenLines.set(line, entry);
+        }
+        return entry.text;
+    }
+
+    /**
+     * Equivalent of replaceAll(text, triggeredSpans), computed line by line
+     */
+    private rewriteText(text: string | undefined): string | undefined {
+        if (!text) return text;
+        return text.split('\n').map(line => this.rewriteLine(line)).join('\n');
+    }
+
+    /**
+     * Render a block, keeping the previous rendering if nothing has changed
+     */
+    private renderBlock(block: LevelBlock, previous: RenderedBlock | undefined): RenderedBlock {
+        const triggered = this.isTriggered(block);
+        const text = this.rewriteText(block.text);
+        const replacement = this.rewriteText(block.replacement);
+        const clickable = this.rewriteText(block.clickable);
+
+        if (previous && previous.triggered === triggered && previous.text === text
+            && previous.replacement === replacement && previous.clickable === clickable) {
+            return previous;
+        }
+
+        let displayed: string;
+        let relativeRegions: EventRegion[] = [];
+        switch (block.type) {
+            case 'text':
+                displayed = text || '';
+                break;
+            case 'replace':
+                displayed = triggered ? replacement || '' : text || '';
+                if (!triggered) {
+                    relativeRegions = createReplaceBlockRegions(block, text, clickable);
+                }
+                break;
+            case 'replace-on':
+                displayed = triggered ? replacement || '' : text || '';
+                break;
+            default:
+                displayed = '';
+        }
+
+        return {
+            triggered,
+            text,
+            replacement,
+            clickable,
+            displayed,
+            lineCount: countLines(displayed),
+            relativeRegions,
+            lineOffset: 0,
+            regions: relativeRegions
+        };
+    }
+
+    /**
+     * Recompute rewritten clickables of pending replace-span blocks
+     * @returns - Indices (in spanBlocks) of spans whose pending clickable has changed
+     */
+    private updatePendingClickables(): number[] {
+        const changed: number[] = [];
+        this.spanBlocks.forEach((blockIndex, spanIndex) => {
+            const block = this.blocks[blockIndex];
+            const clickable = this.isTriggered(block) ? null : this.rewriteText(block.clickable) || null;
+            if (this.pendingClickables[spanIndex] !== clickable) {
+                this.pendingClickables[spanIndex] = clickable;
+                changed.push(spanIndex);
+            }
+        });
+        return changed;
+    }
+
+    /**
+     * Find occurrences of the pending clickables in the rendered lines
+     *
+     * Occurrences are cached per line text; cached lines are only re-scanned for the spans
+     * whose clickable has changed.
+     */
+    private collectSpanRegions(lines: string[], changedSpans: number[]): EventRegion[] {
+        const lineHits = new Map<string, Map<number, number[]>>();
+        const spanOccurrences: number[][] = this.spanBlocks.map(() => []);
+
+        lines.forEach((line, lineIndex) => {
+            let hits = lineHits.get(line);
+            if (!hits) {
+                hits = this.lineHits.get(line);
+                if (hits) {
+                    for (const spanIndex of changedSpans) {
+                        this.scanLine(hits, line, spanIndex);
+                    }
+                } else {
+                    hits = new Map();
+                    for (let spanIndex = 0; spanIndex < this.spanBlocks.length; spanIndex++) {
+                        this.scanLine(hits, line, spanIndex);
+                    }
+                }
+                lineHits.set(line, hits);
+            }
+            for (const [spanIndex, columns] of hits) {
+                for (const column of columns) {
+                    spanOccurrences[spanIndex].push(lineIndex, column);
+                }
+            }
+        });
+        this.lineHits = lineHits;
+
+        const regions: EventRegion[] = [];
+        spanOccurrences.forEach((occurrences, spanIndex) => {
+            const clickable = this.pendingClickables[spanIndex];
+            if (!clickable) return;
+            const event = this.blocks[this.spanBlocks[spanIndex]].event;
+            const eventId = Array.isArray(event) ? event[0] : event!;
+            for (let i = 0; i < occurrences.length; i += 2) {
+                const line = occurrences[i];
+                const column = occurrences[i + 1];
+                regions.push(new EventRegion(line, column, line, column + clickable.length, eventId));
+            }
+        });
+        return regions;
+    }
+
+    private scanLine(hits: Map<number, number[]>, line: string, spanIndex: number): void {
+        const clickable = this.pendingClickables[spanIndex];
+        if (!clickable || !line.includes(clickable)) {
+            hits.delete(spanIndex);
+            return;
+        }
+        hits.set(spanIndex, findAllSubstringPositions(line, clickable).map(position => position.startColumn));
+    }
+}
+
+/**
+ * Create regions for a non-triggered replace block, relative to the block's first line
+ */
+function createReplaceBlockRegions(block: LevelBlock, text: string | undefined, clickable: string | undefined): EventRegion[] {
+    // If block.event is an array, use the first event in the array
+    const eventId = Array.isArray(block.event) ? block.event[0] : block.event!;
+    if (clickable) {
+        return findAllSubstringPositions(text || '', clickable).map(position =>
+            new EventRegion(position.startLine, position.startColumn, position.endLine, position.endColumn, eventId)
+        );
+    }
+    // The whole block is clickable
+    return [new EventRegion(0, 0, countLines(text) - 1, 100500, eventId)];
+}
+
+function shiftRegions(regions: EventRegion[], lineOffset: number): EventRegion[] {
+    return regions.map(r =>
+        new EventRegion(r.startLine + lineOffset, r.startCol, r.endLine + lineOffset, r.endCol, r.eventId)
+    );
+}
+
+const renderers = new WeakMap<LevelBlock[], LevelRenderer>();
+
+/**
+ * Incremental drop-in replacement for applyEvents
+ *
+ * Keeps one LevelRenderer per blocks array, so consecutive calls for the same level only
+ * re-render what the newly triggered events have changed.
+ *
+ * @param blocks - The code blocks to process
+ * @param events - List of triggered event IDs
+ * @returns - The resulting code and interactive regions
+ */
+export function renderLevel(blocks: LevelBlock[], events: string[]): {
+    code: string;
+    regions: EventRegion[];
+} {
+    let renderer = renderers.get(blocks);
+    if (!renderer) {
+        renderer = new LevelRenderer(blocks);
+        renderers.set(blocks, renderer);
+    }
+    return renderer.render(events);
+}
@@ -2,7 +2,7 @@
  * Utility functions for working with levels and topics
  */
 
-import {GameState} from '../types';
+import {GameState, PlayerLevelStats, TopicSummary} from '../types';
 import {isDebugModeEnabled} from './debugUtils';
 
 /**
@@ -94,4 +94,77 @@ export const isLevelClickable = (state: GameState, topic: string, levelId: strin
     // Check if the previous level is solved
     const previousLevel = topicObj.levels[levelIndex - 1];
     return isLevelSolved(state, topic, previousLevel.filename);
+};
+
+/**
+ * Status of a level in the sidebar
+ */
+export interface LevelStatus {
+    solved: boolean;
+    clickable: boolean;
+}
+
+// One shared object per status, so equal statuses are the same object in every status map
+const LEVEL_STATUSES: readonly LevelStatus[] = [
+    {solved: false, clickable: false},
+    {solved: false, clickable: true},
+    {solved: true, clickable: false},
+    {solved: true, clickable: true}
+];
+
+/**
+ * Get the status of all levels by level key
+ * @param topics - All topics
+ * @param levels - Statistics of the player by level key
+ * @param debugMode - Whether debug mode is enabled
+ * @returns The status of every level, following the rules of isLevelClickable
+ */
+export const computeLevelStatuses = (
+    topics: TopicSummary[],
+    levels: Record<string, PlayerLevelStats>,
+    debugMode: boolean
+): Map<string, LevelStatus> => {
+    const statuses = new Map<string, LevelStatus>();
+    for (const topic of topics) {
+        let previousSolved = true;  // the first level of a topic is always clickable
+        for (const level of topic.levels) {
+            const key = getLevelKey(topic.name, level.filename);
+            const solved = levels[key]?.timesCompleted > 0;
+            if (!statuses.has(key)) {
+                const clickable = debugMode || solved || previousSolved;
+                statuses.set(key, LEVEL_STATUSES[(solved ? 2 : 0) + (clickable ? 1 : 0)]);
+            }
+            previousSolved = solved;
+        }
+    }
+    return statuses;
+};
+
+let lastStatuses: {
+    topics: TopicSummary[];
+    levels: Record<string, PlayerLevelStats>;
+    debugMode: boolean;
+    statuses: ReadonlyMap<string, LevelStatus>;
+} | null = null;
+
+/**
+ * Get the status of all levels, computed once per version of the topics, the player statistics
+ * and debug mode
+ *
+ * Statuses are shared objects, so a level's status is the same object until it changes.
+ *
+ * @param topics - All topics
+ * @param levels - Statistics of the player by level key
+ * @param debugMode - Whether debug mode is enabled
+ * @returns The status of every level by level key
+ */
+export const selectLevelStatuses = (
+    topics: TopicSummary[],
+    levels: Record<string, PlayerLevelStats>,
+    debugMode: boolean
+): ReadonlyMap<string, LevelStatus> => {
+    if (!lastStatuses || lastStatuses.topics !== topics || lastStatuses.levels !== levels || lastStatuses.debugMode !== debugMode) {
+        lastStatuses = {topics, levels, debugMode, statuses: computeLevelStatuses(topics, levels, debugMode)};
+    }
+    return lastStatuses.statuses;
 };
\ No newline at end of file
@@ -0,0 +1,212 @@
+import {LevelBlock, LevelData} from "../types";
+import {applyEvents} from "./pylang";
+
+/**
+ * Solvability verifier for levels
+ *
+ * The parser checks the syntax of a level and its event references, but not that every order of
+ * clicks can be finished. A fix can rename or remove the clickable text of another fix, and the
+ * player is then stuck with issues that can no longer be clicked. The verifier explores all
+ * reachable sets of triggered events with applyEvents and reports the states from which the level
+ * can no longer be completed.
+ *
+ * The result of applyEvents only depends on the set of triggered events, not on their order, so
+ * states are memoized by a bitmask of their events. Events that share no word or symbol with each
+ * other cannot affect each other's regions; they are split into independent groups that are
+ * explored separately, so the orders in which the groups are interleaved are not explored.
+ */
+
+export interface DeadEnd {
+    events: string[];           // clicks that lead to the dead end, in order
+    missing: string[];          // events of unfixed blocks that have no clickable region
+}
+
+export interface VerifyResult {
+    solvable: boolean;          // false if some order of clicks leads to a dead end
+    deadEnds: DeadEnd[];        // first states from which the level can't be completed
+    states: number;             // number of explored states
+    groups: number;             // number of independent groups of events
+    complete: boolean;          // false if the exploration stopped at maxStates
+}
+
+export interface VerifyOptions {
+    maxStates?: number;         // stop exploring after this many states
+    maxDeadEnds?: number;       // stop collecting dead ends after this many
+    splitGroups?: boolean;      // explore independent groups of events separately, true by default
+}
+
+const DEFAULT_MAX_STATES = 100000;
+const DEFAULT_MAX_DEAD_ENDS = 10;
+
+/**
+ * Events of a group with their blocks, addressed by bit position
+ */
+interface EventGroup {
+    events: string[];           // events of the group, bit i is events[i]
+    bits: Map<string, bigint>;
+    required: bigint[];         // for every required block, the bits of its events
+}
+
+class StateLimitError extends Error {
+}
+
+function getBlockEvents(block: LevelBlock): string[] {
+    if (!block.event) return [];
+    return Array.isArray(block.event) ? block.event : [block.event];
+}
+
+/**
+ * Words and symbols of the texts of a block that fixes and other blocks could share
+ *
+ * Symbols are split into single characters, so a clickable "+" shares a token with "+=".
+ */
+function getBlockTokens(block: LevelBlock): string[] {
+    const tokens: string[] = [];
+    for (const text of [block.text, block.clickable, block.replacement]) {
+        if (!text) continue;
+        tokens.push(...(text.match(/\w+|[^\w\s]/g) ?? []));
+    }
+    return tokens;
+}
+
+/**
+ * Split the events of a level into groups that can't affect each other
+ *
+ * Events are in the same group if they share a block, or if the texts of their blocks share a
+ * word or a symbol: only then can the replacements of one change the text the regions of the other are found
+ * in.
+ *
+ * @param blocks - Blocks of the level
+ * @param split - False to put all events in one group
+ * @returns Groups of events, each in level order
+ */
+export function groupIndependentEvents(blocks: LevelBlock[], split: boolean = true): string[][] {
+    const parent = new Map<string, string>();
+    const find = (event: string): string => {
+        let root = event;
+        while (parent.get(root) !== root) root = parent.get(root)!;
+        parent.set(event, root);
+        return root;
+    };
+    const union = (a: string, b: string) => parent.set(find(a), find(b));
+
+    const tokenOwners = new Map<string, string>();
+    let previous: string | null = null;
+    for (const block of blocks) {
+        const events = getBlockEvents(block);
+        for (const event of events) {
+            if (!parent.has(event)) parent.set(event, event);
+            union(event, events[0]);
+            if (!split && previous) union(event, previous);
+            previous = event;
+        }
+        if (events.length === 0) continue;
+        for (const token of getBlockTokens(block)) {
+            const owner = tokenOwners.get(token);
+            if (owner) {
+                union(owner, events[0]);
+            } else {
+                tokenOwners.set(token, events[0]);
+            }
+        }
+    }
+
+    const groups = new Map<string, string[]>();
+    for (const event of parent.keys()) {
+        const root = find(event);
+        if (!groups.has(root)) groups.set(root, []);
+        groups.get(root)!.push(event);
+    }
+    return [...groups.values()];
+}
+
+function createGroup(blocks: LevelBlock[], events: string[]): EventGroup {
+    const bits = new Map(events.map((event, i) => [event, 1n << BigInt(i)]));
+    const required: bigint[] = [];
+    for (const block of blocks) {
+        const blockEvents = getBlockEvents(block);
+        if (block.type === 'neutral' || !blockEvents.some(event => bits.has(event))) continue;
+        required.push(blockEvents.reduce((mask, event) => mask | (bits.get(event) ?? 0n), 0n));
+    }
+    return {events, bits, required};
+}
+
+/**
+ * Verify that every order of clicks in a level can be completed
+ *
+ * A state is a set of triggered events. From a state, the player can click every event that has a
+ * region. A state is a dead end if some required block isn't fixed and no order of the clickable
+ * events fixes it. Dead ends are reported with the clicks that lead to them and the events of
+ * unfixed blocks that have no region there.
+ *
+ * @param level - The level
+ * @param options - Limits of the exploration
+ * @returns Whether the level is solvable, its dead ends and statistics of the exploration
+ */
+export function verifyLevel(level: LevelData, options: VerifyOptions = {}): VerifyResult {
+    const {maxStates = DEFAULT_MAX_STATES, maxDeadEnds = DEFAULT_MAX_DEAD_ENDS, splitGroups = true} = options;
+    const blocks = level.blocks;
+    const groups = groupIndependentEvents(blocks, splitGroups).map(events => createGroup(blocks, events));
+    const result: VerifyResult = {solvable: true, deadEnds: [], states: 0, groups: groups.length, complete: true};
+
+    for (const group of groups) {
+        const memo = new Map<bigint, boolean>();
+        const reported = new Set<bigint>();
+        const eventsOf = (mask: bigint) => group.events.filter(event => (mask & group.bits.get(event)!) !== 0n);
+        const isComplete = (mask: bigint) => group.required.every(blockMask => (blockMask & mask) !== 0n);
+
+        // Events of the group that are clickable in a state, and those of unfixed blocks that aren't
+        const getClickable = (mask: bigint) => {
+            const regions = applyEvents(blocks, eventsOf(mask)).regions;
+            return new Set(regions
+                .map(region => region.eventId)
+                .filter(event => group.bits.has(event) && (mask & group.bits.get(event)!) === 0n));
+        };
+
+        const addDeadEnd = (mask: bigint, path: string[]) => {
+            result.solvable = false;
+            if (reported.has(mask) || result.deadEnds.length >= maxDeadEnds) return;
+            reported.add(mask);
+            const clickable = getClickable(mask);
+            const missing = group.events.filter(event => (mask & group.bits.get(event)!) === 0n
+                && !clickable.has(event)
+                && group.required.some(blockMask => (blockMask & mask) === 0n && (blockMask & group.bits.get(event)!) !== 0n));
+            result.deadEnds.push({events: path, missing});
+        };
+
+        // Depth-first search; a state is visited once, whatever order of clicks reached it
+        const solve = (mask: bigint, path: string[]): boolean => {
+            const known = memo.get(mask);
+            if (known !== undefined) return known;
+            if (++result.states > maxStates) throw new StateLimitError();
+
+            let solvable = isComplete(mask);
+            if (!solvable) {
+                const children = [...getClickable(mask)].map(event => ({
+                    event,
+                    solvable: solve(mask | group.bits.get(event)!, [...path, event])
+                }));
+                solvable = children.some(child => child.solvable);
+                if (solvable) {
+                    // Clicks that leave the level unsolvable
+                    for (const child of children.filter(child => !child.solvable)) {
+                        addDeadEnd(mask | group.bits.get(child.event)!, [...path, child.event]);
+                    }
+                }
+            }
+            memo.set(mask, solvable);
+            return solvable;
+        };
+
+        try {
+            if (!solve(0n, [])) {
+                addDeadEnd(0n, []);
+            }
+        } catch (error) {
+            if (!(error instanceof StateLimitError)) throw error;
+            result.complete = false;
+            break;
+        }
+    }
+    return result;
+}
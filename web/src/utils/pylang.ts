@@ -1,4 +1,5 @@
 import {EventRegion} from "./regions";
+import {SpanReplacer} from "./spanReplacer";
 import {LevelBlock, LevelData} from "../types";
 
 /**
@@ -311,29 +312,27 @@ export function applyEvents(blocks: LevelBlock[], events: string[]): {
 } {
     const {pendingSpans, triggeredSpans} = sortSpanBlocks(blocks, events);
 
+    // Compile all triggered span replacements once, for the blocks and for the final code
+    const replacer = new SpanReplacer(triggeredSpans);
+
     // Create a deep copy of pending spans to avoid modifying the original blocks
     const processedPendingSpans = pendingSpans.map(span => ({...span}));
 
     // Update clickable text in pending replace-span blocks with triggered replacements
     for (const pendingSpan of processedPendingSpans) {
         if (pendingSpan.clickable) {
-            pendingSpan.clickable = replaceAll(pendingSpan.clickable, triggeredSpans);
+            pendingSpan.clickable = replacer.replace(pendingSpan.clickable);
         }
         if (pendingSpan.replacement) {
-            pendingSpan.replacement = replaceAll(pendingSpan.replacement, triggeredSpans);
+            pendingSpan.replacement = replacer.replace(pendingSpan.replacement);
         }
     }
 
     // Process blocks to get initial code
-    const {code: initialCode, regions} = renderReplaceBlocks(blocks, events, triggeredSpans);
+    const {code: initialCode, regions} = renderReplaceBlocks(blocks, events, replacer);
 
     // Apply triggered span replacements to the entire code
-    let processedCode = initialCode;
-    for (const triggeredSpan of triggeredSpans) {
-        if (triggeredSpan.clickable && triggeredSpan.replacement) {
-            processedCode = replaceSubstringWithWordBoundaries(processedCode, triggeredSpan.clickable, triggeredSpan.replacement);
-        }
-    }
+    const processedCode = replacer.replace(initialCode);
 
     const spanRegions = getRegionsFromPendingReplaceSpans(processedPendingSpans, processedCode);
     return {
@@ -347,10 +346,10 @@ export function applyEvents(blocks: LevelBlock[], events: string[]): {
  *
  * @param blocks - The code blocks to process
  * @param events - List of triggered event IDs
- * @param triggeredSpanBlocks - Span blocks that have been triggered
+ * @param replacer - Compiled replacements of the span blocks that have been triggered
  * @returns - Processing results
  */
-function renderReplaceBlocks(blocks: LevelBlock[], events: string[], triggeredSpanBlocks: LevelBlock[]): {
+function renderReplaceBlocks(blocks: LevelBlock[], events: string[], replacer: SpanReplacer): {
     code: string;
     regions: EventRegion[];
     pendingReplaceSpans: LevelBlock[];
@@ -361,9 +360,9 @@ function renderReplaceBlocks(blocks: LevelBlock[], events: string[], triggeredSp
     const pendingReplaceSpans: LevelBlock[] = [];
 
     for (const block of blocks) {
-        const processedText = block.text ? replaceAll(block.text, triggeredSpanBlocks) : block.text;
-        const processedReplacement = block.replacement ? replaceAll(block.replacement, triggeredSpanBlocks) : block.replacement;
-        const processedClickable = block.clickable ? replaceAll(block.clickable, triggeredSpanBlocks) : block.clickable;
+        const processedText = block.text ? replacer.replace(block.text) : block.text;
+        const processedReplacement = block.replacement ? replacer.replace(block.replacement) : block.replacement;
+        const processedClickable = block.clickable ? replacer.replace(block.clickable) : block.clickable;
         const processedBlock: LevelBlock = {
             ...block,
             clickable: processedClickable,
@@ -656,7 +655,13 @@ function sortSpanBlocks(blocks: LevelBlock[], events: string[]): {
     return {triggeredSpans: triggered, pendingSpans: pending};
 }
 
-function countLines(text: string | undefined): number {
+/**
+ * Counts newline characters in a text
+ *
+ * @param text - The text to inspect
+ * @returns - Number of '\n' characters, 0 for empty or missing text
+ */
+export function countLines(text: string | undefined): number {
     if (!text) return 0;
     let count = 0;
     for (let i = 0; i < text.length; i++) {
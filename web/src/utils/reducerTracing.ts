@@ -0,0 +1,183 @@
+/**
+ * Opt-in tracing of reducer performance
+ *
+ * When tracing is enabled, every dispatched action records its duration and the change of the
+ * state size in a ring buffer. When it is disabled, the traced reducer only checks a flag.
+ */
+
+import {isReducerTracingEnabled, setReducerTracing} from './debugUtils';
+
+export const REDUCER_TRACE_CAPACITY = 500;
+
+/**
+ * A single traced action
+ */
+export interface ReducerTraceEntry {
+    type: string;
+    startedAt: number;          // milliseconds since the epoch
+    durationMs: number;
+    stateSizeDelta: number;     // change of the size of the state serialized as JSON, in characters
+}
+
+/**
+ * Statistics of the traced actions of one type
+ */
+export interface ReducerTraceSummary {
+    type: string;
+    count: number;              // all actions of the type since tracing was enabled or cleared
+    traced: number;             // actions of the type still in the ring buffer
+    totalMs: number;
+    maxMs: number;
+    totalStateSizeDelta: number;
+}
+
+/**
+ * Get the size of a state serialized as JSON, in characters
+ * @param state - The state
+ * @returns The size, or 0 if the state cannot be serialized
+ */
+function measureStateSize(state: unknown): number {
+    try {
+        return JSON.stringify(state)?.length ?? 0;
+    } catch {
+        return 0;
+    }
+}
+
+/**
+ * Ring buffer of traced actions
+ */
+export class ReducerTracer {
+    enabled: boolean;
+    private readonly capacity: number;
+    private buffer: ReducerTraceEntry[] = [];
+    private next = 0;
+    private counts = new Map<string, number>();
+    // States are immutable, so the size of the state returned by one action is reused by the next
+    private stateSizes = new WeakMap<object, number>();
+
+    constructor(capacity: number = REDUCER_TRACE_CAPACITY, enabled: boolean = false) {
+        this.capacity = capacity;
+        this.enabled = enabled;
+    }
+
+    /**
+     * Enable or disable tracing and remember the setting
+     * @param enabled - Whether tracing should be enabled
+     */
+    setEnabled(enabled: boolean): void {
+        this.enabled = enabled;
+        setReducerTracing(enabled);
+    }
+
+    /**
+     * Get the serialized size of a state, measuring each state only once
+     */
+    getStateSize(state: unknown): number {
+        if (typeof state !== 'object' || state === null) return measureStateSize(state);
+        let size = this.stateSizes.get(state);
+        if (size === undefined) {
+            size = measureStateSize(state);
+            this.stateSizes.set(state, size);
+        }
+        return size;
+    }
+
+    /**
+     * Add an entry, replacing the oldest one when the buffer is full
+     * @param entry - The traced action
+     */
+    record(entry: ReducerTraceEntry): void {
+        if (this.buffer.length < this.capacity) {
+            this.buffer.push(entry);
+        } else {
+            this.buffer[this.next] = entry;
+        }
+        this.next = (this.next + 1) % this.capacity;
+        this.counts.set(entry.type, (this.counts.get(entry.type) ?? 0) + 1);
+    }
+
+    /**
+     * Get the traced actions in the ring buffer
+     * @returns The entries, oldest first
+     */
+    getEntries(): ReducerTraceEntry[] {
+        if (this.buffer.length < this.capacity) return [...this.buffer];
+        return [...this.buffer.slice(this.next), ...this.buffer.slice(0, this.next)];
+    }
+
+    /**
+     * Get statistics per action type
+     * @returns The statistics, slowest action types first
+     */
+    getSummary(): ReducerTraceSummary[] {
+        const summaries = new Map<string, ReducerTraceSummary>();
+        for (const [type, count] of this.counts) {
+            summaries.set(type, {type, count, traced: 0, totalMs: 0, maxMs: 0, totalStateSizeDelta: 0});
+        }
+        for (const entry of this.buffer) {
+            const summary = summaries.get(entry.type)!;
+            summary.traced++;
+            summary.totalMs += entry.durationMs;
+            summary.maxMs = Math.max(summary.maxMs, entry.durationMs);
+            summary.totalStateSizeDelta += entry.stateSizeDelta;
+        }
+        return [...summaries.values()].sort((a, b) => b.totalMs - a.totalMs);
+    }
+
+    /**
+     * Remove all traced actions
+     */
+    clear(): void {
+        this.buffer = [];
+        this.next = 0;
+        this.counts.clear();
+    }
+
+    /**
+     * Export the traced actions and their statistics
+     * @returns JSON text
+     */
+    exportJson(): string {
+        return JSON.stringify({
+            exportedAt: new Date().toISOString(),
+            capacity: this.capacity,
+            summary: this.getSummary(),
+            entries: this.getEntries()
+        }, null, 2);
+    }
+}
+
+export const reducerTracer = new ReducerTracer(REDUCER_TRACE_CAPACITY, isReducerTracingEnabled());
+
+/**
+ * Wrap a reducer so that its actions are traced while tracing is enabled
+ *
+ * Only the outermost call is traced; actions the reducer dispatches to itself are part of the
+ * duration of the action that caused them.
+ *
+ * @param reducer - The reducer
+ * @param tracer - Tracer recording the actions
+ * @returns The traced reducer
+ */
+export function withReducerTracing<S, A extends { type: string }>(
+    reducer: (state: S, action: A) => S,
+    tracer: ReducerTracer = reducerTracer
+): (state: S, action: A) => S {
+    return (state: S, action: A): S => {
+        if (!tracer.enabled) return reducer(state, action);
+
+        const startedAt = Date.now();
+        const start = performance.now();
+        const nextState = reducer(state, action);
+        const durationMs = performance.now() - start;
+
+        tracer.record({
+            type: action.type,
+            startedAt,
+            durationMs,
+            stateSizeDelta: nextState === state ? 0 : tracer.getStateSize(nextState) - tracer.getStateSize(state)
+        });
+        return nextState;
+    };
+}
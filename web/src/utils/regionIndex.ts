@@ -0,0 +1,138 @@
+import {EventRegion, packRegions} from "./regions";
+import {LevelBlock, LevelState} from "../types";
+import {getLevelIndex} from "./levelIndex";
+
+const UNBOUNDED_START = -2147483648;
+const UNBOUNDED_END = 2147483647;
+
+/**
+ * Point-lookup index over the clickable regions of a level
+ *
+ * Every region is split into per-line column intervals. Intervals are sorted by line and start
+ * column, so a click is resolved with two binary searches. When regions overlap, the region that
+ * comes first in the regions array wins, exactly like regions.find(r => r.contains(...)).
+ * Blocks with options are looked up in the level index, which doesn't change when regions do.
+ */
+export class RegionIndex {
+    readonly regions: EventRegion[];
+    readonly blocks: LevelBlock[];
+
+    private readonly lineNumbers: Int32Array;    // distinct lines that have intervals, ascending
+    private readonly lineStarts: Int32Array;     // first interval of each line; one extra end marker
+    private readonly intervalStarts: Int32Array;
+    private readonly intervalEnds: Int32Array;
+    private readonly maxEnds: Int32Array;        // running maximum of intervalEnds within a line
+    private readonly intervalRegions: Int32Array;
+
+    /**
+     * Build the index
+     * @param regions - Regions of the level, in priority order
+     * @param blocks - Blocks of the level
+     */
+    constructor(regions: EventRegion[], blocks: LevelBlock[]) {
+        this.regions = regions;
+        this.blocks = blocks;
+
+        const {coords} = packRegions(regions);
+        const intervals: number[][] = [];
+        for (let i = 0; i < regions.length; i++) {
+            const startLine = coords[4 * i];
+            const endLine = coords[4 * i + 2];
+            for (let line = startLine; line <= endLine; line++) {
+                intervals.push([
+                    line,
+                    line === startLine ? coords[4 * i + 1] : UNBOUNDED_START,
+                    line === endLine ? coords[4 * i + 3] : UNBOUNDED_END,
+                    i
+                ]);
+            }
+        }
+        intervals.sort((a, b) => a[0] - b[0] || a[1] - b[1]);
+
+        const lineNumbers: number[] = [];
+        const lineStarts: number[] = [];
+        this.intervalStarts = new Int32Array(intervals.length);
+        this.intervalEnds = new Int32Array(intervals.length);
+        this.maxEnds = new Int32Array(intervals.length);
+        this.intervalRegions = new Int32Array(intervals.length);
+        intervals.forEach(([line, start, end, region], i) => {
+            const newLine = lineNumbers.length === 0 || lineNumbers[lineNumbers.length - 1] !== line;
+            if (newLine) {
+                lineNumbers.push(line);
+                lineStarts.push(i);
+            }
+            this.intervalStarts[i] = start;
+            this.intervalEnds[i] = end;
+            this.maxEnds[i] = newLine ? end : Math.max(this.maxEnds[i - 1], end);
+            this.intervalRegions[i] = region;
+        });
+        lineStarts.push(intervals.length);
+        this.lineNumbers = Int32Array.from(lineNumbers);
+        this.lineStarts = Int32Array.from(lineStarts);
+    }
+
+    /**
+     * Find the region that contains a clicked token
+     * @param lineIndex - The line index of the click
+     * @param columnIndex - The column index of the click
+     * @param len - The length of the clicked token (default is 1)
+     * @returns The first region in the regions array that contains the token, if any
+     */
+    find(lineIndex: number, columnIndex: number, len: number = 1): EventRegion | undefined {
+        const lineSlot = upperBound(this.lineNumbers, 0, this.lineNumbers.length, lineIndex) - 1;
+        if (lineSlot < 0 || this.lineNumbers[lineSlot] !== lineIndex) return undefined;
+
+        const first = this.lineStarts[lineSlot];
+        const tokenEnd = columnIndex + len - 1;
+        let best = -1;
+        // Intervals starting after the token's last column can't contain it; among the rest, stop
+        // as soon as no earlier interval reaches the token's first column
+        for (let i = upperBound(this.intervalStarts, first, this.lineStarts[lineSlot + 1], tokenEnd) - 1;
+             i >= first && this.maxEnds[i] >= columnIndex; i--) {
+            if (this.intervalEnds[i] >= columnIndex && (best === -1 || this.intervalRegions[i] < best)) {
+                best = this.intervalRegions[i];
+            }
+        }
+        return best === -1 ? undefined : this.regions[best];
+    }
+
+    /**
+     * Find the block that offers context options for an event
+     * @param eventId - The event ID
+     * @returns The first block with options for this event, if any
+     */
+    findOptionsBlock(eventId: string): LevelBlock | undefined {
+        return getLevelIndex(this.blocks).findOptionsBlock(eventId);
+    }
+}
+
+/**
+ * Index of the first element in values[from, to) that is greater than value
+ */
+function upperBound(values: Int32Array, from: number, to: number, value: number): number {
+    let lo = from;
+    let hi = to;
+    while (lo < hi) {
+        const mid = (lo + hi) >>> 1;
+        if (values[mid] <= value) {
+            lo = mid + 1;
+        } else {
+            hi = mid;
+        }
+    }
+    return lo;
+}
+
+/**
+ * Get the region index of a level state, rebuilding it if it doesn't match the state's regions
+ * @param levelState - The level state
+ * @returns The region index for the current regions and blocks
+ */
+export function getRegionIndex(levelState: LevelState): RegionIndex {
+    const regions = levelState.regions ?? [];
+    const index = levelState.regionIndex;
+    if (index && index.regions === regions && index.blocks === levelState.level.blocks) {
+        return index;
+    }
+    return new RegionIndex(regions, levelState.level.blocks);
+}
@@ -39,4 +39,66 @@ export class EventRegion {
         return !(lineIndex === this.endLine && columnIndex > this.endCol);
 
     }
-}
\ No newline at end of file
+}
+
+/**
+ * Compact, array-backed list of regions
+ *
+ * Coordinates of region i are stored at coords[4 * i .. 4 * i + 3] as
+ * startLine, startCol, endLine, endCol.
+ */
+export interface PackedRegions {
+    coords: Int32Array;
+    eventIds: string[];
+}
+
+/**
+ * Pack regions into a compact representation
+ * @param regions - Regions to pack
+ * @returns Packed regions in the same order
+ */
+export function packRegions(regions: EventRegion[]): PackedRegions {
+    const coords = new Int32Array(regions.length * 4);
+    const eventIds: string[] = new Array(regions.length);
+    regions.forEach((region, i) => {
+        coords[4 * i] = region.startLine;
+        coords[4 * i + 1] = region.startCol;
+        coords[4 * i + 2] = region.endLine;
+        coords[4 * i + 3] = region.endCol;
+        eventIds[i] = region.eventId;
+    });
+    return {coords, eventIds};
+}
+
+/**
+ * JSON-serializable form of packed regions, with the same layout
+ */
+export interface SerializedRegions {
+    coords: number[];
+    eventIds: string[];
+}
+
+/**
+ * Pack regions into a compact form that can be stored as JSON
+ * @param regions - Regions to pack
+ * @returns Serialized regions in the same order
+ */
+export function serializeRegions(regions: EventRegion[]): SerializedRegions {
+    const {coords, eventIds} = packRegions(regions);
+    return {coords: Array.from(coords), eventIds};
+}
+
+/**
+ * Restore regions from their packed or serialized representation
+ * @param packed - Packed regions
+ * @returns Regions in the same order
+ */
+export function unpackRegions(packed: PackedRegions | SerializedRegions): EventRegion[] {
+    return packed.eventIds.map((eventId, i) => new EventRegion(
+        packed.coords[4 * i],
+        packed.coords[4 * i + 1],
+        packed.coords[4 * i + 2],
+        packed.coords[4 * i + 3],
+        eventId
+    ));
+}
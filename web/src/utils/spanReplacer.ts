@@ -0,0 +1,187 @@
+import {LevelBlock} from "../types";
+import {replaceSubstringWithWordBoundaries} from "./pylang";
+
+/**
+ * Checks if a UTF-16 code unit is a word character, the same way /\w/ does
+ */
+function isWordCharCode(code: number): boolean {
+    return (code >= 48 && code <= 57)      // 0-9
+        || (code >= 65 && code <= 90)      // A-Z
+        || (code >= 97 && code <= 122)     // a-z
+        || code === 95;                    // _
+}
+
+const WORD_ONLY = /^\w+$/;
+
+/**
+ * Aho-Corasick automaton that finds all occurrences of a set of patterns in one pass
+ */
+export class PatternAutomaton {
+    private readonly patternLengths: number[];
+    private readonly next: Map<number, number>[] = [new Map()];
+    private readonly fail: number[] = [0];
+    private readonly output: number[][] = [[]];
+
+    /**
+     * Build the automaton
+     * @param patterns - Non-empty patterns; the index in this array identifies the pattern in matches
+     */
+    constructor(patterns: string[]) {
+        this.patternLengths = patterns.map(p => p.length);
+
+        patterns.forEach((pattern, patternIndex) => {
+            let node = 0;
+            for (let i = 0; i < pattern.length; i++) {
+                const code = pattern.charCodeAt(i);
+                let child = this.next[node].get(code);
+                if (child === undefined) {
+                    child = this.next.length;
+                    this.next.push(new Map());
+                    this.fail.push(0);
+                    this.output.push([]);
+                    this.next[node].set(code, child);
+                }
+                node = child;
+            }
+            this.output[node].push(patternIndex);
+        });
+
+        // Breadth-first construction of failure links
+        const queue: number[] = [...this.next[0].values()];
+        for (let head = 0; head < queue.length; head++) {
+            const node = queue[head];
+            for (const [code, child] of this.next[node]) {
+                let fallback = this.fail[node];
+                while (fallback !== 0 && !this.next[fallback].has(code)) {
+                    fallback = this.fail[fallback];
+                }
+                const target = this.next[fallback].get(code);
+                this.fail[child] = target !== undefined && target !== child ? target : 0;
+                this.output[child] = [...this.output[child], ...this.output[this.fail[child]]];
+                queue.push(child);
+            }
+        }
+    }
+
+    /**
+     * Report every occurrence of every pattern, including overlapping ones
+     * @param text - Text to search in
+     * @param onMatch - Called with the pattern index and the [start, end) range of the occurrence
+     */
+    forEachMatch(text: string, onMatch: (patternIndex: number, start: number, end: number) => void): void {
+        let node = 0;
+        for (let i = 0; i < text.length; i++) {
+            const code = text.charCodeAt(i);
+            let child = this.next[node].get(code);
+            while (child === undefined && node !== 0) {
+                node = this.fail[node];
+                child = this.next[node].get(code);
+            }
+            node = child ?? 0;
+            for (const patternIndex of this.output[node]) {
+                onMatch(patternIndex, i + 1 - this.patternLengths[patternIndex], i + 1);
+            }
+        }
+    }
+}
+
+/**
+ * Compiled equivalent of replaceAll(text, spanBlocks)
+ *
+ * Triggered replace-span blocks are applied in order, each one seeing the output of the previous
+ * ones. The replacer finds word-bounded occurrences of all clickables in a single pass; a line
+ * without occurrences is returned as is. When all clickables and replacements are plain
+ * identifiers, replacements never change word boundaries, so each occurrence is replaced with its
+ * replacement rewritten by the rest of the chain in the same pass. Otherwise only the lines that
+ * contain an occurrence go through the sequential replacement chain.
+ */
+export class SpanReplacer {
+    private readonly spans: LevelBlock[];
+    private readonly automaton: PatternAutomaton;
+    private readonly tokenSafe: boolean;
+    private readonly composedReplacements: string[];
+    private readonly patternSpans: number[];
+
+    /**
+     * Compile the replacer
+     * @param spanBlocks - Triggered replace-span blocks, in the order they are applied
+     */
+    constructor(spanBlocks: LevelBlock[]) {
+        this.spans = spanBlocks.filter(span => span.clickable && span.replacement);
+        // A clickable with a line break never matches, as replacement works line by line
+        const patterns = this.spans.map(span => span.clickable!.includes('\n') ? '' : span.clickable!);
+        this.automaton = new PatternAutomaton(patterns.filter(p => p));
+        this.patternSpans = patterns.map((p, i) => p ? i : -1).filter(i => i >= 0);
+        this.tokenSafe = this.spans.every(span => WORD_ONLY.test(span.clickable!) && WORD_ONLY.test(span.replacement!));
+        this.composedReplacements = this.spans.map((span, i) => {
+            let token = span.replacement!;
+            for (const later of this.spans.slice(i + 1)) {
+                if (token === later.clickable) {
+                    token = later.replacement!;
+                }
+            }
+            return token;
+        });
+    }
+
+    /**
+     * Replace all triggered clickables in a text
+     * @param text - Original text
+     * @returns - Text with all occurrences replaced
+     */
+    replace(text: string): string {
+        if (!text || this.spans.length === 0) return text;
+        if (!text.includes('\n')) {
+            return this.replaceLine(text) ?? text;
+        }
+        return text.split('\n').map(line => this.replaceLine(line) ?? line).join('\n');
+    }
+
+    /**
+     * Replace all triggered clickables in a single line
+     * @param line - A line without line breaks
+     * @returns - The rewritten line, or null if no clickable occurs in the line
+     */
+    replaceLine(line: string): string | null {
+        if (!line || this.spans.length === 0) return null;
+
+        // Word-bounded occurrences as [start, end, spanIndex] triples
+        const occurrences: number[] = [];
+        this.automaton.forEachMatch(line, (patternIndex, start, end) => {
+            if (start > 0 && isWordCharCode(line.charCodeAt(start - 1))) return;
+            if (end < line.length && isWordCharCode(line.charCodeAt(end))) return;
+            occurrences.push(start, end, this.patternSpans[patternIndex]);
+        });
+        if (occurrences.length === 0) return null;
+
+        if (!this.tokenSafe) {
+            let result = line;
+            for (const span of this.spans) {
+                if (result.includes(span.clickable!)) {
+                    result = replaceSubstringWithWordBoundaries(result, span.clickable!, span.replacement!);
+                }
+            }
+            return result;
+        }
+
+        // Identifier occurrences are whole words, so they never overlap. The same word may match
+        // several spans with equal clickables; the first one in the chain wins.
+        const replacements = new Map<number, { end: number; span: number }>();
+        for (let i = 0; i < occurrences.length; i += 3) {
+            const start = occurrences[i];
+            const current = replacements.get(start);
+            if (!current || occurrences[i + 2] < current.span) {
+                replacements.set(start, {end: occurrences[i + 1], span: occurrences[i + 2]});
+            }
+        }
+
+        let result = '';
+        let lastIndex = 0;
+        for (const start of [...replacements.keys()].sort((a, b) => a - b)) {
+            const {end, span} = replacements.get(start)!;
+            result += line.substring(lastIndex, start) + this.composedReplacements[span];
+            lastIndex = end;
+        }
+        return result + line.substring(lastIndex);
+    }
+}
@@ -5,8 +5,8 @@ import tailwindcss from '@tailwindcss/vite'
 import {generate} from './src/levels_compiler/main.js'
 import * as path from "node:path";
 
-function generateJson() {
-    generate("levels", "src/data/levels.json");
+function generateJson(): boolean {
+    return generate("levels", "src/data/levels.json", {chunksDir: "src/data/levels"}).written;
 }
 
 function levelsGeneratorPlugin(): PluginOption {
@@ -19,7 +19,10 @@ function levelsGeneratorPlugin(): PluginOption {
             server.watcher.on('change', (changedPath) => {
                 if (changedPath.includes(path.join('web', 'levels'))) {
 
-                    generateJson();
+                    // Skip the reload if the change didn't affect the compiled levels
+                    if (!generateJson()) {
+                        return;
+                    }
 
                     // Full browser reload
                     server.ws.send({
@@ -1,9 +1,15 @@
 import {defineConfig} from 'vitest/config';
+import BenchmarkResultsReporter from './src/benchmarks/resultsReporter';
 
 export default defineConfig({
     test: {
         environment: 'happy-dom',
         globals: true,
         include: ['**/*.{test,spec}.{js,jsx,ts,tsx}'],
+        benchmark: {
+            // The samples give the 95th percentiles stored for comparison with the baseline
+            includeSamples: true,
+            reporters: ['default', new BenchmarkResultsReporter()],
+        },
     },
 });
\ No newline at end of file